@@ -47,6 +47,10 @@ struct SchedulerCAPI
     using PyTasklet_Kill_Routine                                        = std::add_pointer_t<int(struct PyTaskletObject*)>;
     using PyTasklet_GetTimesSwitchedTo_Routine                          = std::add_pointer_t<long(struct PyTaskletObject*)>;
     using PyTasklet_GetContext_Routine                                  = std::add_pointer_t<const char*(struct PyTaskletObject*)>;
+    using PyTasklet_GetWallTime_Routine                                 = std::add_pointer_t<long long(struct PyTaskletObject*)>;
+    using PyTasklet_GetCpuTime_Routine                                  = std::add_pointer_t<long long(struct PyTaskletObject*)>;
+    using PyTasklet_GetSwitchInCount_Routine                            = std::add_pointer_t<long(struct PyTaskletObject*)>;
+    using PyTasklet_GetLongestSlice_Routine                             = std::add_pointer_t<long long(struct PyTaskletObject*)>;
 
     //channel functions
 	using PyChannel_New_Routine           		                        = std::add_pointer_t<struct PyChannelObject*(PyTypeObject*)>;
@@ -77,6 +81,8 @@ struct SchedulerCAPI
     using PyScheduler_GetActiveTaskletCount_Routine                     = std::add_pointer_t<int(void)>;
     using PyScheduler_GetTaskletsCompletedLastRunWithTimeout_Routine    = std::add_pointer_t<int(void)>;
     using PyScheduler_GetTaskletsSwitchedLastRunWithTimeout_Routine     = std::add_pointer_t<int(void)>;
+    using PyScheduler_RunWithTimeoutEarliestDeadlineFirst_Routine       = std::add_pointer_t<PyObject*(long long)>;
+    using PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout_Routine = std::add_pointer_t<int(void)>;
 
     // =============== member function pointers ===============
 
@@ -130,6 +136,14 @@ struct SchedulerCAPI
 
     PyTasklet_GetTimesSwitchedTo_Routine PyTasklet_GetTimesSwitchedTo;
 	PyTasklet_GetContext_Routine PyTasklet_GetContext;
+
+	PyScheduler_RunWithTimeoutEarliestDeadlineFirst_Routine PyScheduler_RunWithTimeoutEarliestDeadlineFirst;
+	PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout_Routine PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout;
+
+	PyTasklet_GetWallTime_Routine PyTasklet_GetWallTime;
+	PyTasklet_GetCpuTime_Routine PyTasklet_GetCpuTime;
+	PyTasklet_GetSwitchInCount_Routine PyTasklet_GetSwitchInCount;
+	PyTasklet_GetLongestSlice_Routine PyTasklet_GetLongestSlice;
 };
 
 
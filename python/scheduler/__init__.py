@@ -1,6 +1,6 @@
-import collections
+import atexit
 import contextlib
-import threading
+import pstats
 
 
 import _scheduler
@@ -12,67 +12,15 @@ for member in dir(_scheduler):
     globals()[member] = getattr(_scheduler, member)
 
 
-class QueueChannel(_scheduler.channel):
-    """
-    A QueueChannel is like a channel except that it contains a queue, so that the
-    sender never blocks.  If there isn't a blocked tasklet waiting for the data,
-    the data is queued up internally.  The sender always continues.
-    """
-    def __init__(self):
-        super().__init__(self)
-        self.data_queue = collections.deque()
-        self.preference = 1 #sender never blocks
-
-    @property
-    def balance(self):
-        if self.data_queue:
-            return len(self.data_queue)
-        return super(QueueChannel, self).balance
-
-    def send(self, data):
-        sup = super(QueueChannel, self)
-        with threading.Lock():
-            if sup.balance >= 0 and not sup.closing:
-                self.data_queue.append((True, data))
-            else:
-                sup.send(data)
-
-    def send_exception(self, exc, *args):
-        self.send_throw(exc, args)
-
-    def send_throw(self, exc, value=None, tb=None):
-        """call with similar arguments as raise keyword"""
-        sup = super(QueueChannel, self)
-        with threading.Lock():
-            if sup.balance >= 0 and not sup.closing:
-                self.data_queue.append((False, (exc, value, tb)))
-            else:
-                #deal with channel.send_exception signature
-                sup.send_throw(exc, value, tb)
-
-    def receive(self):
-        with threading.Lock():
-            if not self.data_queue:
-                return super(QueueChannel, self).receive()
-            ok, data = self.data_queue.popleft()
-            if ok:
-                return data
-            exc, value, tb = data
-            try:
-                raise exc(value).with_traceback(tb)
-            finally:
-                tb = None
-
-    #iterator protocol
-    def send_sequence(self, sequence):
-        for i in sequence:
-            self.send(i)
-
-    def __next__(self):
-        return self.receive()
-
-    def __len__(self):
-        return len(self.data_queue)
+# Complete any trace file still being written rather than leave it truncated
+atexit.register(_scheduler.stop_trace_to_file)
+
+# The watchdog and profiler threads take the GIL so must not outlive the interpreter
+atexit.register(_scheduler.stop_stall_watchdog)
+atexit.register(_scheduler.stop_sampling_profiler)
+
+# Hand the allocators back before finalisation frees memory through them
+atexit.register(_scheduler.stop_allocation_tracking)
 
 
 @contextlib.contextmanager
@@ -85,3 +33,23 @@ def block_trap(trap=True):
         yield
     finally:
         c.block_trap = old
+
+
+class _TaskletProfile:
+    """Holds a profile in the form pstats.Stats loads from a profiler object"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def get_tasklet_profile_stats():
+    """
+    Get the calls recorded by the tasklet profiler as a pstats.Stats, for sorting, printing or dump_stats.
+
+    :return: Statistics merged across every tasklet profiled
+    :rtype: pstats.Stats
+    """
+    return pstats.Stats(_TaskletProfile(_scheduler.get_tasklet_profile()))
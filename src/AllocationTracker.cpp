@@ -0,0 +1,346 @@
+#include "AllocationTracker.h"
+
+#include "ScheduleManager.h"
+#include "Tasklet.h"
+
+bool AllocationTracker::Start()
+{
+	if( s_active )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Allocation tracking is already running." );
+
+		return false;
+	}
+
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	if( !scheduleManager )
+	{
+		return false;
+	}
+
+	if( s_groups.empty() )
+	{
+		s_groups.push_back( AllocationGroup{ nullptr, nullptr, {} } );
+	}
+
+	t_currentGroup = GroupOf( scheduleManager->GetCurrentTasklet() );
+
+	for( DomainAllocator* domain : { &s_memAllocator, &s_objectAllocator } )
+	{
+		PyMem_GetAllocator( domain->m_domain, &domain->m_original );
+
+		PyMemAllocatorEx allocator = { domain, &AllocationTracker::Malloc, &AllocationTracker::Calloc, &AllocationTracker::Realloc, &AllocationTracker::Free };
+
+		PyMem_SetAllocator( domain->m_domain, &allocator );
+	}
+
+	s_active = true;
+
+	return true;
+}
+
+bool AllocationTracker::Stop()
+{
+	if( !s_active )
+	{
+		return true;
+	}
+
+	// Restoring over a hook installed since, such as tracemalloc, would drop it, and it would later restore our
+	// wrappers when it stops
+	for( DomainAllocator* domain : { &s_memAllocator, &s_objectAllocator } )
+	{
+		PyMemAllocatorEx installed;
+
+		PyMem_GetAllocator( domain->m_domain, &installed );
+
+		if( installed.ctx != domain || installed.malloc != &AllocationTracker::Malloc )
+		{
+			PyErr_SetString( PyExc_RuntimeError, "Allocation tracking cannot be stopped while an allocator hook installed after it, such as tracemalloc, is still installed." );
+
+			return false;
+		}
+	}
+
+	// Memory allocated while tracking is freed through the original allocators, which the wrappers forwarded to
+	PyMem_SetAllocator( PYMEM_DOMAIN_MEM, &s_memAllocator.m_original );
+
+	PyMem_SetAllocator( PYMEM_DOMAIN_OBJ, &s_objectAllocator.m_original );
+
+	s_active = false;
+
+	s_allocations.clear();
+
+	return true;
+}
+
+bool AllocationTracker::IsActive()
+{
+	return s_active;
+}
+
+void AllocationTracker::OnSwitch( Tasklet* tasklet )
+{
+	t_currentGroup = GroupOf( tasklet );
+}
+
+PyObject* AllocationTracker::GetStats( TaskletCensusGroup group )
+{
+	PyObject* stats = PyDict_New();
+
+	if( !stats )
+	{
+		return nullptr;
+	}
+
+	std::vector<AllocationGroupStats> merged;
+
+	// Groups with equal keys, such as matching context strings held in different objects, are merged
+	for( const AllocationGroup& allocationGroup : s_groups )
+	{
+		PyObject* key;
+
+		if( !allocationGroup.m_context && !allocationGroup.m_callsite )
+		{
+			key = Py_NewRef( Py_None );
+		}
+		else if( group == TaskletCensusGroup::CONTEXT )
+		{
+			key = allocationGroup.m_context ? Py_NewRef( allocationGroup.m_context ) : PyUnicode_FromString( "" );
+		}
+		else if( allocationGroup.m_callsite && PyCode_Check( allocationGroup.m_callsite ) )
+		{
+			PyCodeObject* code = reinterpret_cast<PyCodeObject*>( allocationGroup.m_callsite );
+
+			key = Py_BuildValue( "(OiO)", code->co_filename, code->co_firstlineno, code->co_name );
+		}
+		else
+		{
+			key = Py_BuildValue( "(siO)", "unknown_file", 0, allocationGroup.m_callsite ? allocationGroup.m_callsite : Py_None );
+		}
+
+		if( !key )
+		{
+			Py_DECREF( stats );
+
+			return nullptr;
+		}
+
+		PyObject* index = PyDict_GetItemWithError( stats, key );
+
+		if( index )
+		{
+			AllocationGroupStats& total = merged[PyLong_AsSize_t( index )];
+
+			total.m_allocatedBytes += allocationGroup.m_stats.m_allocatedBytes;
+
+			total.m_freedBytes += allocationGroup.m_stats.m_freedBytes;
+
+			total.m_allocations += allocationGroup.m_stats.m_allocations;
+
+			total.m_frees += allocationGroup.m_stats.m_frees;
+		}
+		else
+		{
+			index = PyErr_Occurred() ? nullptr : PyLong_FromSize_t( merged.size() );
+
+			if( !index || PyDict_SetItem( stats, key, index ) < 0 )
+			{
+				Py_XDECREF( index );
+
+				Py_DECREF( key );
+
+				Py_DECREF( stats );
+
+				return nullptr;
+			}
+
+			Py_DECREF( index );
+
+			merged.push_back( allocationGroup.m_stats );
+		}
+
+		Py_DECREF( key );
+	}
+
+	PyObject* key;
+
+	PyObject* index;
+
+	Py_ssize_t position = 0;
+
+	while( PyDict_Next( stats, &position, &key, &index ) )
+	{
+		const AllocationGroupStats& total = merged[PyLong_AsSize_t( index )];
+
+		PyObject* value = Py_BuildValue(
+			"{s:L,s:L,s:L,s:L,s:L}",
+			"allocated_bytes", total.m_allocatedBytes,
+			"freed_bytes", total.m_freedBytes,
+			"live_bytes", total.m_allocatedBytes - total.m_freedBytes,
+			"allocations", total.m_allocations,
+			"frees", total.m_frees );
+
+		// Replacing the value of an existing key does not disturb iteration
+		if( !value || PyDict_SetItem( stats, key, value ) < 0 )
+		{
+			Py_XDECREF( value );
+
+			Py_DECREF( stats );
+
+			return nullptr;
+		}
+
+		Py_DECREF( value );
+	}
+
+	return stats;
+}
+
+void AllocationTracker::Reset()
+{
+	s_allocations.clear();
+
+	for( AllocationGroup& group : s_groups )
+	{
+		group.m_stats = AllocationGroupStats{};
+	}
+
+	// Other threads may still hold a group index while tracking
+	if( s_active )
+	{
+		return;
+	}
+
+	for( AllocationGroup& group : s_groups )
+	{
+		Py_XDECREF( group.m_context );
+
+		Py_XDECREF( group.m_callsite );
+	}
+
+	s_groups.clear();
+
+	s_groupIndices.clear();
+}
+
+void* AllocationTracker::Malloc( void* context, size_t size )
+{
+	DomainAllocator* domain = static_cast<DomainAllocator*>( context );
+
+	void* pointer = domain->m_original.malloc( domain->m_original.ctx, size );
+
+	if( pointer && s_active )
+	{
+		Track( pointer, size );
+	}
+
+	return pointer;
+}
+
+void* AllocationTracker::Calloc( void* context, size_t count, size_t size )
+{
+	DomainAllocator* domain = static_cast<DomainAllocator*>( context );
+
+	void* pointer = domain->m_original.calloc( domain->m_original.ctx, count, size );
+
+	if( pointer && s_active )
+	{
+		Track( pointer, count * size );
+	}
+
+	return pointer;
+}
+
+void* AllocationTracker::Realloc( void* context, void* pointer, size_t size )
+{
+	DomainAllocator* domain = static_cast<DomainAllocator*>( context );
+
+	void* newPointer = domain->m_original.realloc( domain->m_original.ctx, pointer, size );
+
+	if( newPointer && s_active )
+	{
+		// The resized block is charged to the tasklet that resized it
+		if( pointer )
+		{
+			Untrack( pointer );
+		}
+
+		Track( newPointer, size );
+	}
+
+	return newPointer;
+}
+
+void AllocationTracker::Free( void* context, void* pointer )
+{
+	DomainAllocator* domain = static_cast<DomainAllocator*>( context );
+
+	if( pointer && s_active )
+	{
+		Untrack( pointer );
+	}
+
+	domain->m_original.free( domain->m_original.ctx, pointer );
+}
+
+void AllocationTracker::Track( void* pointer, size_t size )
+{
+	// Threads that started before tracking have not switched since, so count towards group 0 until they do
+	uint32_t group = t_currentGroup < s_groups.size() ? t_currentGroup : 0;
+
+	s_allocations[pointer] = std::make_pair( size, group );
+
+	AllocationGroupStats& stats = s_groups[group].m_stats;
+
+	stats.m_allocatedBytes += size;
+
+	stats.m_allocations++;
+}
+
+void AllocationTracker::Untrack( void* pointer )
+{
+	auto allocation = s_allocations.find( pointer );
+
+	// Allocations made before tracking started are not charged to anyone
+	if( allocation == s_allocations.end() )
+	{
+		return;
+	}
+
+	AllocationGroupStats& stats = s_groups[allocation->second.second].m_stats;
+
+	stats.m_freedBytes += allocation->second.first;
+
+	stats.m_frees++;
+
+	s_allocations.erase( allocation );
+}
+
+uint32_t AllocationTracker::GroupOf( Tasklet* tasklet )
+{
+	if( tasklet->IsMain() )
+	{
+		return 0;
+	}
+
+	std::pair<const void*, const void*> key( tasklet->GetCensusKey( TaskletCensusGroup::CONTEXT ), tasklet->GetCensusKey( TaskletCensusGroup::CALLSITE ) );
+
+	auto inserted = s_groupIndices.emplace( key, static_cast<uint32_t>( s_groups.size() ) );
+
+	if( inserted.second )
+	{
+		PyObject* context = static_cast<PyObject*>( const_cast<void*>( key.first ) );
+
+		PyObject* callsite = static_cast<PyObject*>( const_cast<void*>( key.second ) );
+
+		Py_XINCREF( context );
+
+		Py_XINCREF( callsite );
+
+		s_groups.push_back( AllocationGroup{ context, callsite, {} } );
+	}
+
+	return inserted.first->second;
+}
@@ -0,0 +1,111 @@
+#pragma once
+#ifndef AllocationTracker_H
+#define AllocationTracker_H
+
+#include "stdafx.h"
+
+#include <cstddef>
+#include <cstdint>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+class Tasklet;
+enum class TaskletCensusGroup;
+
+// Bytes charged to one group of tasklets, frees are charged to the group that made the allocation
+struct AllocationGroupStats
+{
+	long long m_allocatedBytes = 0;
+
+	long long m_freedBytes = 0;
+
+	long long m_allocations = 0;
+
+	long long m_frees = 0;
+};
+
+// Tasklets sharing a context and callsite, keys hold strong references so their addresses are not reused
+struct AllocationGroup
+{
+	PyObject* m_context;
+
+	PyObject* m_callsite; // code object, or method name if the callable has no code object
+
+	AllocationGroupStats m_stats;
+};
+
+// Wraps the Python object and memory allocators to charge every allocation to the tasklet current on the
+// allocating thread, grouped by tasklet context and callsite.
+// Both wrapped allocator domains require the GIL so the tracking tables are protected by it.
+// The wrappers only forward once tracking stops, in case another hook still calls through them.
+// All methods must be called with the GIL held.
+class AllocationTracker
+{
+public:
+	// Returns false with a Python exception set on failure
+	static bool Start();
+
+	// Fails with a Python exception set if another allocator hook was installed over the tracker's wrappers
+	static bool Stop();
+
+	static bool IsActive();
+
+	// Called on every switch while tracking is active, on the thread switching
+	static void OnSwitch( Tasklet* tasklet );
+
+	// Returns a new dict mapping each group key to a dict of its totals
+	static PyObject* GetStats( TaskletCensusGroup group );
+
+	static void Reset();
+
+private:
+
+	struct DomainAllocator
+	{
+		PyMemAllocatorDomain m_domain;
+
+		PyMemAllocatorEx m_original;
+	};
+
+	struct GroupKeyHash
+	{
+		size_t operator()( const std::pair<const void*, const void*>& key ) const
+		{
+			return std::hash<const void*>()( key.first ) ^ ( std::hash<const void*>()( key.second ) << 1 );
+		}
+	};
+
+	static void* Malloc( void* context, size_t size );
+
+	static void* Calloc( void* context, size_t count, size_t size );
+
+	static void* Realloc( void* context, void* pointer, size_t size );
+
+	static void Free( void* context, void* pointer );
+
+	static void Track( void* pointer, size_t size );
+
+	static void Untrack( void* pointer );
+
+	// Index of the group for the tasklet, created on first use
+	static uint32_t GroupOf( Tasklet* tasklet );
+
+	inline static bool s_active = false;
+
+	inline static DomainAllocator s_memAllocator{ PYMEM_DOMAIN_MEM, {} };
+
+	inline static DomainAllocator s_objectAllocator{ PYMEM_DOMAIN_OBJ, {} };
+
+	// Group 0 collects allocations made outside of any tasklet, such as by a main tasklet
+	inline static std::vector<AllocationGroup> s_groups;
+
+	inline static std::unordered_map<std::pair<const void*, const void*>, uint32_t, GroupKeyHash> s_groupIndices;
+
+	// Size and group of every live allocation made while tracking
+	inline static std::unordered_map<void*, std::pair<size_t, uint32_t>> s_allocations;
+
+	inline static thread_local uint32_t t_currentGroup = 0;
+};
+
+#endif // AllocationTracker_H
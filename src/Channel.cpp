@@ -1,13 +1,20 @@
 #include "Channel.h"
 
+#include <algorithm>
+#include <cstdlib>
+#include <limits>
+#include <memory>
 #include <vector>
 
 #include "Tasklet.h"
+#include "Probes.h"
 #include "ScheduleManager.h"
+#include "Utils.h"
 
 
 Channel::Channel( PyObject* pythonObject ) :
 	PythonCppType( pythonObject ),
+	m_id( s_nextId++ ),
 	m_balance(0),
 	m_preference(ChannelPreference::RECEIVER),
 	m_firstBlockedOnSend( nullptr ),
@@ -15,7 +22,12 @@ Channel::Channel( PyObject* pythonObject ) :
 	m_firstBlockedOnReceive( nullptr ),
 	m_lastBlockedOnReceive( nullptr ),
 	m_closing( false ),
-	m_closed( false )
+	m_closed( false ),
+	m_capacity( 0 ),
+	m_bufferHead( 0 ),
+	m_bufferCount( 0 ),
+	m_peakBufferCount( 0 ),
+	m_stats{}
 {
     // Store weak reference in central store
     // Required just in case we lose all references to channel
@@ -27,6 +39,8 @@ Channel::~Channel()
 {
 	// Note: Destructor will never be called while there are tasklets blocking
 
+	ReleaseBuffered();
+
 	// Remove weak ref from store
 	s_activeChannels.erase( this );
 }
@@ -37,87 +51,56 @@ bool Channel::Send( PyObject* args, PyObject* exception /* = nullptr */, bool re
 
     Tasklet* current = scheduleManager->GetCurrentTasklet();
 
-	RunChannelCallback( this, current, true, m_lastBlockedOnReceive == nullptr );
-
-    current->SetTransferInProgress(true);
+	bool receiverWaiting = m_firstBlockedOnReceive != nullptr || FirstLiveSelectWaiter( m_selectWaitersOnReceive ) != nullptr;
 
-	ChannelDirection direction = ChannelDirection::SENDER;
-
-	if( m_firstBlockedOnReceive == nullptr )
+	if( IsBuffered() && !receiverWaiting && !m_closing && !IsBufferFull() )
 	{
-		direction = ChannelDirection::RECEIVER;
-
-		// Block as there is no tasklet sending
-        if( !current )
-		{
-			PyErr_SetString( PyExc_RuntimeError, "No current tasklet set" );
-
-			return false;
-		}
-
-        //If current tasklet has block_trap set to true then throw runtime error
-		if( current->IsBlocktrapped())
-		{
-			PyErr_SetString( PyExc_RuntimeError, "Channel cannot block on main tasklet with block_trap set true" );
+		RunChannelCallback( current, true, false );
 
-			return false;
-		}
+		PushBuffered( args, exception, restoreException );
 
-        // Ensure channel is open
-        if (m_closed || m_closing)
-        {
-			PyErr_SetString( PyExc_ValueError, "Send operation on a closed channel" );
-
-			return false;
-        }
-
-		// Block as there is no tasklet receiving
-		current->Incref();
+		return true;
+	}
 
-        AddTaskletToWaitingToSend( current );
+	RunChannelCallback( current, true, !receiverWaiting );
 
-		current->Block( this );
+    current->SetTransferInProgress(true);
 
-        UpdateCloseState();
+	ChannelDirection direction = ChannelDirection::SENDER;
 
-        current->SetTransferArguments( args, exception, restoreException );
+	if( !receiverWaiting )
+	{
+		direction = ChannelDirection::RECEIVER;
 
-         // Continue scheduler
-		if( !scheduleManager->Yield() )
+		if( !BlockOnSend( current, args, exception, restoreException, false ) )
 		{
-			current->SetTransferInProgress( false );
-
-            RemoveTaskletFromBlocked( current );
-
-            auto transferArguments = current->GetTransferArguments();
-
-            if ( transferArguments )
-            {
-				// If branch is entered it must mean that the tasklet was killed/error raised
-				// before the transfer completed
-				// Transfer arguments will not have been cleared, so we need to clean them up
-				// The tasklet reference belonged to the channel as it was in the block list
-				Py_DecRef( transferArguments );
-				current->ClearTransferArguments();
-				current->Decref();
-            }
-
-            current->Unblock();
-
-            UpdateCloseState();
-
 			return false;
-        }
-
+		}
     }
     else
     {
-		Tasklet* receivingTasklet = PopNextTaskletBlockedOnReceive();
+		Tasklet* receivingTasklet = m_firstBlockedOnReceive != nullptr ? PopNextTaskletBlockedOnReceive() : PopSelectWaiter( m_selectWaitersOnReceive, false )->m_tasklet;
 
 		receivingTasklet->Unblock();
 
 		// Store for retrieval from receiving tasklet
-		receivingTasklet->SetTransferArguments( args, exception, restoreException );
+		if( receivingTasklet->GetReceiveBatchCapacity() > 0 && !exception )
+		{
+			// Receivers blocked in receive_many always get a list
+			PyObject* batch = PyList_New( 1 );
+
+			Py_INCREF( args );
+
+			PyList_SET_ITEM( batch, 0, args );
+
+			receivingTasklet->SetTransferArguments( batch, nullptr, false );
+
+			Py_DECREF( batch );
+		}
+		else
+		{
+			receivingTasklet->SetTransferArguments( args, exception, restoreException );
+		}
 
 		Tasklet* current_tasklet = scheduleManager->GetCurrentTasklet();
 
@@ -157,7 +140,9 @@ PyObject* Channel::Receive()
 	// Block as there is no tasklet sending
 	Tasklet* current = scheduleManager->GetCurrentTasklet();
 
-	RunChannelCallback( this , current, false, m_lastBlockedOnSend == nullptr );
+	bool senderWaiting = m_bufferCount > 0 || m_firstBlockedOnSend != nullptr || FirstLiveSelectWaiter( m_selectWaitersOnSend ) != nullptr;
+
+	RunChannelCallback( current, false, !senderWaiting );
 
     if( current == nullptr )
 	{
@@ -166,7 +151,19 @@ PyObject* Channel::Receive()
 		return nullptr;
 	}
 
-    if( m_firstBlockedOnSend == nullptr )
+	if( m_bufferCount > 0 )
+	{
+		ChannelBufferEntry entry = PopBuffered();
+
+		current->SetTransferArguments( entry.m_args, entry.m_exception, entry.m_restoreException );
+
+		Py_DECREF( entry.m_args );
+
+		FillBufferFromBlockedSenders();
+
+		UpdateCloseState();
+	}
+    else if( !senderWaiting )
 	{
 		current->Incref();
 		AddTaskletToWaitingToReceive( current );
@@ -197,6 +194,8 @@ PyObject* Channel::Receive()
 			return nullptr;
 		}
 		
+		m_stats.m_blockedOperations++;
+
 		current->Block( this );
 
         UpdateCloseState();
@@ -239,20 +238,51 @@ PyObject* Channel::Receive()
 			return nullptr;
 		}
 	}
+	else if( m_firstBlockedOnSend != nullptr && m_firstBlockedOnSend->IsSendingBatch() && PyList_GET_SIZE( m_firstBlockedOnSend->GetTransferArguments() ) - m_firstBlockedOnSend->GetSendBatchOffset() > 1 )
+	{
+		// The sender stays blocked until the rest of its batch has been received
+		Tasklet* sendingTasklet = m_firstBlockedOnSend;
+
+		Py_ssize_t offset = sendingTasklet->GetSendBatchOffset();
+
+		current->SetTransferArguments( PyList_GET_ITEM( sendingTasklet->GetTransferArguments(), offset ), nullptr, false );
+
+		sendingTasklet->SetSendBatchOffset( offset + 1 );
+	}
 	else
 	{
-		Tasklet* sendingTasklet = PopNextTaskletBlockedOnSend();
-		sendingTasklet->Unblock();
-		sendingTasklet->SetTransferInProgress( false );
+		Tasklet* sendingTasklet;
+
+		if( m_firstBlockedOnSend != nullptr )
+		{
+			if( m_firstBlockedOnSend->IsSendingBatch() )
+			{
+				TakeLastItemFromBatch( m_firstBlockedOnSend );
+			}
 
-        current->SetTransferArguments(
-            sendingTasklet->GetTransferArguments(),
-            sendingTasklet->TransferException(), 
-            sendingTasklet->ShouldRestoreTransferException()
-        );
+			sendingTasklet = PopNextTaskletBlockedOnSend();
 
-        Py_DECREF( sendingTasklet->GetTransferArguments() );
-        sendingTasklet->ClearTransferArguments();
+			current->SetTransferArguments(
+				sendingTasklet->GetTransferArguments(),
+				sendingTasklet->TransferException(),
+				sendingTasklet->ShouldRestoreTransferException()
+			);
+
+			Py_DECREF( sendingTasklet->GetTransferArguments() );
+			sendingTasklet->ClearTransferArguments();
+		}
+		else
+		{
+			// Offered by a tasklet blocked in select
+			SelectWaiter* waiter = PopSelectWaiter( m_selectWaitersOnSend, true );
+
+			sendingTasklet = waiter->m_tasklet;
+
+			current->SetTransferArguments( waiter->m_cases[waiter->m_firedCase].m_value, nullptr, false );
+		}
+
+		sendingTasklet->Unblock();
+		sendingTasklet->SetTransferInProgress( false );
 
         UpdateCloseState();
         
@@ -274,61 +304,611 @@ PyObject* Channel::Receive()
         }
 	}
 
-    
-    //Process the exception
-	PyObject* transferException = current->TransferException();
+	return FinishReceive( current );
+}
+
+PyObject* Channel::FinishReceive( Tasklet* current )
+{
+	//Process the exception
+	PyObject* transferException = current->TransferException();
+
+	if( transferException )
+	{	
+        PyObject* arguments = current->GetTransferArguments();
+
+        // If arguments are Py_None, then we want to use the exception data as it is set in send_throw
+        if (current->ShouldRestoreTransferException())
+        {
+            auto exceptionType = PyTuple_GetItem( transferException, 0 );
+			auto exceptionValue = PyTuple_GetItem( transferException, 1 );
+			auto exceptionTb = PyTuple_GetItem( transferException, 2 );
+
+            Py_INCREF( exceptionType );
+			Py_INCREF( exceptionValue );
+			Py_INCREF( exceptionTb );
+
+            Py_DECREF( transferException );
+            
+			PyErr_Restore( exceptionType, exceptionValue == Py_None ? nullptr : exceptionValue, exceptionTb == Py_None ? nullptr : exceptionTb );
+        }
+        else
+        {
+			PyErr_SetObject( transferException, arguments );
+
+			Py_DecRef( transferException );
+
+        }
+
+        Py_DecRef( arguments );
+
+        current->ClearTransferArguments();
+
+		current->SetTransferInProgress( false );
+
+        UpdateCloseState();
+       
+        return nullptr;
+
+    }
+
+	current->SetTransferInProgress( false );
+
+	auto ret = current->GetTransferArguments();
+
+	current->ClearTransferArguments();
+
+	return ret;
+}
+
+bool Channel::SendMany( PyObject* items )
+{
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	Tasklet* current = scheduleManager->GetCurrentTasklet();
+
+	Py_ssize_t numberOfItems = PyList_GET_SIZE( items );
+
+	if( numberOfItems == 0 )
+	{
+		return true;
+	}
+
+	RunChannelCallback( current, true, m_lastBlockedOnReceive == nullptr && !IsBuffered(), numberOfItems );
+
+	current->SetTransferInProgress( true );
+
+	Py_ssize_t sent = 0;
+
+	std::vector<Tasklet*> receivingTasklets;
+
+	// Hand items to every waiting receiver before anything is rescheduled
+	while( sent < numberOfItems && ( m_firstBlockedOnReceive != nullptr || FirstLiveSelectWaiter( m_selectWaitersOnReceive ) != nullptr ) )
+	{
+		Tasklet* receivingTasklet = m_firstBlockedOnReceive != nullptr ? PopNextTaskletBlockedOnReceive() : PopSelectWaiter( m_selectWaitersOnReceive, false )->m_tasklet;
+
+		receivingTasklet->Unblock();
+
+		PyObject* transferArguments;
+
+		Py_ssize_t batchCapacity = receivingTasklet->GetReceiveBatchCapacity();
+
+		if( batchCapacity > 0 )
+		{
+			Py_ssize_t count = std::min( batchCapacity, numberOfItems - sent );
+
+			transferArguments = PyList_GetSlice( items, sent, sent + count );
+
+			sent += count;
+		}
+		else
+		{
+			transferArguments = PyList_GET_ITEM( items, sent );
+
+			Py_INCREF( transferArguments );
+
+			sent++;
+		}
+
+		receivingTasklet->SetTransferArguments( transferArguments, nullptr, false );
+
+		Py_DECREF( transferArguments );
+
+		receivingTasklets.push_back( receivingTasklet );
+	}
+
+	UpdateCloseState();
+
+	if( m_preference == ChannelPreference::RECEIVER )
+	{
+		// Inserted in reverse so the receivers still run in the order they blocked
+		for( auto iter = receivingTasklets.rbegin(); iter != receivingTasklets.rend(); iter++ )
+		{
+			( *iter )->GetScheduleManager()->InsertTaskletToRunNext( *iter );
+			( *iter )->Decref();
+		}
+	}
+	else
+	{
+		for( Tasklet* receivingTasklet : receivingTasklets )
+		{
+			receivingTasklet->GetScheduleManager()->InsertTasklet( receivingTasklet );
+			receivingTasklet->Decref();
+		}
+	}
+
+	if( IsBuffered() && !m_closing )
+	{
+		// Buffered channels queue the remainder and only block with what does not fit
+		for( ; sent < numberOfItems && !IsBufferFull(); sent++ )
+		{
+			PushBuffered( PyList_GET_ITEM( items, sent ), nullptr, false );
+		}
+	}
+
+	if( sent < numberOfItems )
+	{
+		// Block with whatever is left, later receivers take items straight from the batch
+		PyObject* remaining = PyList_GetSlice( items, sent, numberOfItems );
+
+		bool blocked = BlockOnSend( current, remaining, nullptr, false, true );
+
+		Py_DECREF( remaining );
+
+		if( !blocked )
+		{
+			return false;
+		}
+	}
+	else if( !receivingTasklets.empty() && m_preference == ChannelPreference::RECEIVER )
+	{
+		if( !scheduleManager->Schedule( RescheduleType::BACK ) )
+		{
+			UpdateCloseState();
+			return false;
+		}
+	}
+
+	current->SetTransferInProgress( false );
+
+	UpdateCloseState();
+
+	return true;
+}
+
+PyObject* Channel::ReceiveMany( int maxItems )
+{
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	Tasklet* current = scheduleManager->GetCurrentTasklet();
+
+	bool exceptionFirst = m_bufferCount > 0 ? BufferFront().m_exception != nullptr : m_firstBlockedOnSend != nullptr && m_firstBlockedOnSend->TransferException();
+
+	if( ( m_bufferCount == 0 && m_firstBlockedOnSend == nullptr && FirstLiveSelectWaiter( m_selectWaitersOnSend ) == nullptr ) || exceptionFirst )
+	{
+		// Nothing to drain, wait like a normal receiver that accepts a whole batch in one transfer
+		current->SetReceiveBatchCapacity( maxItems );
+
+		PyObject* ret = Receive();
+
+		current->SetReceiveBatchCapacity( 0 );
+
+		if( ret )
+		{
+			// Receive counted the batch as a single item
+			m_stats.m_receives += PyList_GET_SIZE( ret ) - 1;
+		}
+
+		return ret;
+	}
+
+	// Items are counted once drained, as how many are taken is not known up front
+	RunChannelCallback( current, false, false, 0 );
+
+	current->SetTransferInProgress( true );
+
+	PyObject* items = PyList_New( 0 );
+
+	// Buffered items were sent before any blocked sender, so they are taken first
+	while( PyList_GET_SIZE( items ) < maxItems && m_bufferCount > 0 && !BufferFront().m_exception )
+	{
+		ChannelBufferEntry entry = PopBuffered();
+
+		PyList_Append( items, entry.m_args );
+
+		Py_DECREF( entry.m_args );
+	}
+
+	std::vector<Tasklet*> sendingTasklets;
+
+	// Stops early at a sender carrying an exception so it is raised by the next receive
+	while( PyList_GET_SIZE( items ) < maxItems && m_bufferCount == 0 && m_firstBlockedOnSend != nullptr && !m_firstBlockedOnSend->TransferException() )
+	{
+		Tasklet* sendingTasklet = m_firstBlockedOnSend;
+
+		PyObject* transferArguments = sendingTasklet->GetTransferArguments();
+
+		if( sendingTasklet->IsSendingBatch() )
+		{
+			Py_ssize_t offset = sendingTasklet->GetSendBatchOffset();
+
+			Py_ssize_t count = std::min( maxItems - PyList_GET_SIZE( items ), PyList_GET_SIZE( transferArguments ) - offset );
+
+			for( Py_ssize_t i = offset; i < offset + count; i++ )
+			{
+				PyList_Append( items, PyList_GET_ITEM( transferArguments, i ) );
+			}
+
+			if( offset + count < PyList_GET_SIZE( transferArguments ) )
+			{
+				// Sender stays blocked with the rest of its batch
+				sendingTasklet->SetSendBatchOffset( offset + count );
+
+				break;
+			}
+
+			sendingTasklet->SetSendBatchOffset( -1 );
+		}
+		else
+		{
+			PyList_Append( items, transferArguments );
+		}
+
+		PopNextTaskletBlockedOnSend();
+
+		sendingTasklet->Unblock();
+
+		sendingTasklet->SetTransferInProgress( false );
+
+		Py_DECREF( transferArguments );
+
+		sendingTasklet->ClearTransferArguments();
+
+		sendingTasklets.push_back( sendingTasklet );
+	}
+
+	while( PyList_GET_SIZE( items ) < maxItems && m_bufferCount == 0 && m_firstBlockedOnSend == nullptr && FirstLiveSelectWaiter( m_selectWaitersOnSend ) != nullptr )
+	{
+		// Offered by a tasklet blocked in select
+		SelectWaiter* waiter = PopSelectWaiter( m_selectWaitersOnSend, true );
+
+		PyList_Append( items, waiter->m_cases[waiter->m_firedCase].m_value );
+
+		waiter->m_tasklet->Unblock();
+
+		waiter->m_tasklet->SetTransferInProgress( false );
+
+		sendingTasklets.push_back( waiter->m_tasklet );
+	}
+
+	m_stats.m_receives += PyList_GET_SIZE( items );
+
+	FillBufferFromBlockedSenders();
+
+	UpdateCloseState();
+
+	if( m_preference == ChannelPreference::SENDER && !sendingTasklets.empty() )
+	{
+		// Inserted in reverse so the senders still run in the order they blocked
+		for( auto iter = sendingTasklets.rbegin(); iter != sendingTasklets.rend(); iter++ )
+		{
+			( *iter )->GetScheduleManager()->InsertTaskletToRunNext( *iter );
+			( *iter )->Decref();
+		}
+
+		if( !scheduleManager->Schedule( RescheduleType::BACK ) )
+		{
+			Py_DECREF( items );
+			UpdateCloseState();
+			return nullptr;
+		}
+	}
+	else
+	{
+		for( Tasklet* sendingTasklet : sendingTasklets )
+		{
+			sendingTasklet->GetScheduleManager()->InsertTasklet( sendingTasklet );
+			sendingTasklet->Decref();
+		}
+	}
+
+	current->SetTransferInProgress( false );
+
+	return items;
+}
+
+bool Channel::CanSendWithoutBlocking() const
+{
+	if( m_firstBlockedOnReceive != nullptr || FirstLiveSelectWaiter( m_selectWaitersOnReceive ) != nullptr )
+	{
+		return true;
+	}
+
+	return IsBuffered() && !m_closing && !IsBufferFull();
+}
+
+bool Channel::CanReceiveWithoutBlocking() const
+{
+	return m_bufferCount > 0 || m_firstBlockedOnSend != nullptr || FirstLiveSelectWaiter( m_selectWaitersOnSend ) != nullptr;
+}
+
+PyObject* Channel::Select( std::vector<ChannelSelectCase>& cases, long long timeout )
+{
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	Tasklet* current = scheduleManager->GetCurrentTasklet();
+
+	// Complete the first ready case, a closed channel raises from the operation itself
+	for( size_t i = 0; i < cases.size(); i++ )
+	{
+		ChannelSelectCase& selectCase = cases[i];
+
+		Channel* channel = selectCase.m_channel;
+
+		bool closed = channel->m_closing || channel->m_closed;
+
+		if( selectCase.m_sending ? ( channel->CanSendWithoutBlocking() || closed ) : ( channel->CanReceiveWithoutBlocking() || closed ) )
+		{
+			PyObject* value;
+
+			if( selectCase.m_sending )
+			{
+				if( !channel->Send( selectCase.m_value ) )
+				{
+					return nullptr;
+				}
+
+				Py_IncRef( Py_None );
+
+				value = Py_None;
+			}
+			else
+			{
+				value = channel->Receive();
+
+				if( !value )
+				{
+					return nullptr;
+				}
+			}
+
+			return Py_BuildValue( "(nN)", static_cast<Py_ssize_t>( i ), value );
+		}
+	}
+
+	if( timeout == 0 )
+	{
+		return Py_BuildValue( "(iO)", -1, Py_None );
+	}
+
+	//If current tasklet has block_trap set to true then throw runtime error
+	if( current->IsBlocktrapped() )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Channel cannot block on main tasklet with block_trap set true" );
+
+		return nullptr;
+	}
+
+	if( timeout > 0 && current->IsMain() )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "The main tasklet cannot wait on a timer" );
+
+		return nullptr;
+	}
+
+	// Other tasklets reach the waiter through the channels, so it cannot live on this tasklet's stack
+	std::unique_ptr<SelectWaiter> waiter( new SelectWaiter{ current, cases, -1, false } );
+
+	// Reference held by the select registrations, as it would be by a channel blocked list
+	current->Incref();
+
+	RegisterSelect( waiter.get() );
+
+	// A blocked select is a blocked operation on every channel it waits on
+	for( size_t i = 0; i < cases.size(); i++ )
+	{
+		if( IsFirstSelectCaseOnChannel( cases, i ) )
+		{
+			cases[i].m_channel->m_stats.m_blockedOperations++;
+		}
+	}
+
+	current->SetSelectWaiter( waiter.get() );
+
+	current->SetTransferInProgress( true );
+
+	current->Block( nullptr );
+
+	if( timeout > 0 )
+	{
+		long long now = MonotonicTimeNanoseconds();
+
+		// Saturates rather than overflows for timeouts close to the longest representable
+		scheduleManager->AddTimer( current, timeout < std::numeric_limits<long long>::max() - now ? now + timeout : std::numeric_limits<long long>::max() );
+	}
+
+	bool success = scheduleManager->Yield();
+
+	scheduleManager->CancelTimer( current );
+
+	if( !success )
+	{
+		current->SetTransferInProgress( false );
+
+		if( waiter->m_registered )
+		{
+			// Killed or error raised before any channel completed a case
+			UnregisterSelect( waiter.get() );
+
+			current->Decref();
+		}
+
+		PyObject* transferArguments = current->GetTransferArguments();
+
+		if( transferArguments )
+		{
+			// A receive case completed but the tasklet was killed before it could run
+			Py_DecRef( transferArguments );
+
+			current->ClearTransferArguments();
+		}
+
+		// Still registered as the select waiter so the blocked time is charged to its channels
+		current->Unblock();
+
+		current->SetSelectWaiter( nullptr );
+
+		return nullptr;
+	}
+
+	current->SetSelectWaiter( nullptr );
+
+	if( waiter->m_firedCase < 0 )
+	{
+		// Timed out
+		current->SetTransferInProgress( false );
+
+		return Py_BuildValue( "(iO)", -1, Py_None );
+	}
+
+	ChannelSelectCase& firedCase = cases[waiter->m_firedCase];
+
+	PyObject* value;
+
+	if( firedCase.m_sending )
+	{
+		current->SetTransferInProgress( false );
+
+		Py_IncRef( Py_None );
+
+		value = Py_None;
+	}
+	else
+	{
+		value = firedCase.m_channel->FinishReceive( current );
+
+		if( !value )
+		{
+			return nullptr;
+		}
+	}
+
+	return Py_BuildValue( "(iN)", waiter->m_firedCase, value );
+}
+
+void Channel::AddSelectBlockedTime( const SelectWaiter* waiter, long long blockedTime )
+{
+	for( size_t i = 0; i < waiter->m_cases.size(); i++ )
+	{
+		if( IsFirstSelectCaseOnChannel( waiter->m_cases, i ) )
+		{
+			waiter->m_cases[i].m_channel->AddBlockedTime( blockedTime );
+		}
+	}
+}
+
+bool Channel::IsFirstSelectCaseOnChannel( const std::vector<ChannelSelectCase>& cases, size_t index )
+{
+	for( size_t i = 0; i < index; i++ )
+	{
+		if( cases[i].m_channel == cases[index].m_channel )
+		{
+			return false;
+		}
+	}
+
+	return true;
+}
+
+void Channel::TimeoutSelect( Tasklet* tasklet )
+{
+	SelectWaiter* waiter = tasklet->GetSelectWaiter();
+
+	if( !waiter || !waiter->m_registered )
+	{
+		return;
+	}
+
+	UnregisterSelect( waiter );
 
-	if( transferException )
-	{	
-        PyObject* arguments = current->GetTransferArguments();
+	tasklet->Unblock();
 
-        // If arguments are Py_None, then we want to use the exception data as it is set in send_throw
-        if (current->ShouldRestoreTransferException())
-        {
-            auto exceptionType = PyTuple_GetItem( transferException, 0 );
-			auto exceptionValue = PyTuple_GetItem( transferException, 1 );
-			auto exceptionTb = PyTuple_GetItem( transferException, 2 );
+	// Release the reference held by the registrations
+	tasklet->Decref();
+}
 
-            Py_INCREF( exceptionType );
-			Py_INCREF( exceptionValue );
-			Py_INCREF( exceptionTb );
+SelectWaiter* Channel::FirstLiveSelectWaiter( const std::vector<SelectWaiter*>& waiters )
+{
+	// Tasklets with a pending kill or throw stay registered until they run, they can no longer be completed
+	for( SelectWaiter* waiter : waiters )
+	{
+		if( waiter->m_tasklet->IsBlocked() && !waiter->m_tasklet->IsScheduled() )
+		{
+			return waiter;
+		}
+	}
 
-            Py_DECREF( transferException );
-            
-			PyErr_Restore( exceptionType, exceptionValue == Py_None ? nullptr : exceptionValue, exceptionTb == Py_None ? nullptr : exceptionTb );
-        }
-        else
-        {
-			PyErr_SetObject( transferException, arguments );
+	return nullptr;
+}
 
-			Py_DecRef( transferException );
+SelectWaiter* Channel::PopSelectWaiter( std::vector<SelectWaiter*>& waiters, bool sending )
+{
+	SelectWaiter* waiter = FirstLiveSelectWaiter( waiters );
 
-        }
+	for( size_t i = 0; i < waiter->m_cases.size(); i++ )
+	{
+		if( waiter->m_cases[i].m_channel == this && waiter->m_cases[i].m_sending == sending )
+		{
+			waiter->m_firedCase = static_cast<int>( i );
 
-        Py_DecRef( arguments );
+			// The select's half of the transfer, the other half was counted by the completing operation
+			if( sending )
+			{
+				m_stats.m_sends++;
+			}
+			else
+			{
+				m_stats.m_receives++;
+			}
 
-        current->ClearTransferArguments();
+			break;
+		}
+	}
 
-		current->SetTransferInProgress( false );
+	// Removed from every channel at once, the registration reference passes to the caller
+	UnregisterSelect( waiter );
 
-        UpdateCloseState();
-       
-        return nullptr;
+	return waiter;
+}
 
-    }
+void Channel::RegisterSelect( SelectWaiter* waiter )
+{
+	for( ChannelSelectCase& selectCase : waiter->m_cases )
+	{
+		Channel* channel = selectCase.m_channel;
 
-	current->SetTransferInProgress( false );
+		( selectCase.m_sending ? channel->m_selectWaitersOnSend : channel->m_selectWaitersOnReceive ).push_back( waiter );
+	}
 
-	auto ret = current->GetTransferArguments();
+	waiter->m_registered = true;
+}
 
-	current->ClearTransferArguments();
+void Channel::UnregisterSelect( SelectWaiter* waiter )
+{
+	for( ChannelSelectCase& selectCase : waiter->m_cases )
+	{
+		Channel* channel = selectCase.m_channel;
 
-	return ret;
+		std::vector<SelectWaiter*>& waiters = selectCase.m_sending ? channel->m_selectWaitersOnSend : channel->m_selectWaitersOnReceive;
+
+		waiters.erase( std::remove( waiters.begin(), waiters.end(), waiter ), waiters.end() );
+	}
+
+	waiter->m_registered = false;
 }
 
 int Channel::Balance() const
 {
-	return m_balance;
+	return m_balance + static_cast<int>( m_bufferCount );
 }
 
 void Channel::UnblockTaskletFromChannel( Tasklet* tasklet )
@@ -412,27 +992,135 @@ void Channel::RemoveTaskletFromBlocked( Tasklet* tasklet )
     
 }
 
-void Channel::RunChannelCallback( Channel* channel, Tasklet* tasklet, bool sending, bool willBlock ) const
+bool Channel::BlockOnSend( Tasklet* current, PyObject* args, PyObject* exception, bool restoreException, bool batch )
 {
-	if( s_channelCallback )
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	// Block as there is no tasklet sending
+	if( !current )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "No current tasklet set" );
+
+		return false;
+	}
+
+	//If current tasklet has block_trap set to true then throw runtime error
+	if( current->IsBlocktrapped() )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Channel cannot block on main tasklet with block_trap set true" );
+
+		return false;
+	}
+
+	// Ensure channel is open
+	if( m_closed || m_closing )
+	{
+		PyErr_SetString( PyExc_ValueError, "Send operation on a closed channel" );
+
+		return false;
+	}
+
+	// Block as there is no tasklet receiving
+	current->Incref();
+
+	AddTaskletToWaitingToSend( current );
+
+	m_stats.m_blockedOperations++;
+
+	current->Block( this );
+
+	UpdateCloseState();
+
+	current->SetTransferArguments( args, exception, restoreException );
+
+	if( batch )
+	{
+		current->SetSendBatchOffset( 0 );
+	}
+
+	// Continue scheduler
+	if( !scheduleManager->Yield() )
 	{
-		PyObject* args = PyTuple_New( 4 );
+		current->SetTransferInProgress( false );
+
+		current->SetSendBatchOffset( -1 );
+
+		RemoveTaskletFromBlocked( current );
+
+		auto transferArguments = current->GetTransferArguments();
+
+		if( transferArguments )
+		{
+			// If branch is entered it must mean that the tasklet was killed/error raised
+			// before the transfer completed
+			// Transfer arguments will not have been cleared, so we need to clean them up
+			// The tasklet reference belonged to the channel as it was in the block list
+			Py_DecRef( transferArguments );
+			current->ClearTransferArguments();
+			current->Decref();
+		}
+
+		current->Unblock();
+
+		UpdateCloseState();
+
+		return false;
+	}
+
+	return true;
+}
+
+void Channel::TakeLastItemFromBatch( Tasklet* sendingTasklet )
+{
+	// Swap the batch for its final item so the sender can complete like a single send
+	PyObject* batch = sendingTasklet->GetTransferArguments();
+
+	PyObject* item = PyList_GET_ITEM( batch, sendingTasklet->GetSendBatchOffset() );
+
+	Py_INCREF( item );
+
+	sendingTasklet->ClearTransferArguments();
+
+	sendingTasklet->SetTransferArguments( item, nullptr, false );
+
+	sendingTasklet->SetSendBatchOffset( -1 );
 
-		channel->Incref();
+	Py_DECREF( item );
 
-		PyTuple_SetItem( args, 0, channel->PythonObject() );
+	Py_DECREF( batch );
+}
 
-		tasklet->Incref();
+void Channel::RunChannelCallback( Tasklet* tasklet, bool sending, bool willBlock, Py_ssize_t items /* = 1 */ )
+{
+	// Every channel operation passes through here exactly once, batches are counted per item
+	if( sending )
+	{
+		m_stats.m_sends += items;
+	}
+	else
+	{
+		m_stats.m_receives += items;
+	}
 
-		PyTuple_SetItem( args, 1, tasklet->PythonObject() );
+	tasklet->GetScheduleManager()->Trace( sending ? TraceEvent::CHANNEL_SEND : TraceEvent::CHANNEL_RECEIVE, tasklet->GetId(), m_id, willBlock ? TRACE_FLAG_WILL_BLOCK : 0 );
 
-		PyTuple_SetItem( args, 2, sending ? Py_True : Py_False );
+	if( sending && SCHEDULER_PROBE_ENABLED( channel_send ) )
+	{
+		SCHEDULER_PROBE( channel_send, tasklet->GetId(), m_id, willBlock ? 1 : 0, tasklet->GetContextUtf8() );
+	}
+	else if( !sending && SCHEDULER_PROBE_ENABLED( channel_receive ) )
+	{
+		SCHEDULER_PROBE( channel_receive, tasklet->GetId(), m_id, willBlock ? 1 : 0, tasklet->GetContextUtf8() );
+	}
 
-		PyTuple_SetItem( args, 3, willBlock ? Py_True : Py_False );
+	if( s_channelCallback )
+	{
+		// Borrowed arguments on the stack, the leading slot is spare so bound method callbacks can prepend self in place
+		PyObject* args[] = { nullptr, PythonObject(), tasklet->PythonObject(), sending ? Py_True : Py_False, willBlock ? Py_True : Py_False };
 
-		PyObject_Call( s_channelCallback, args, nullptr );
+		PyObject* result = PyObject_Vectorcall( s_channelCallback, args + 1, 4 | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr );
 
-		Py_DecRef( args );
+		Py_XDECREF( result );
 	}
 }
 
@@ -546,6 +1234,91 @@ void Channel::ClearBlocked( bool pending )
 		m_firstBlockedOnSend->Kill( pending );
 	}
 
+	// Killed select waiters unregister from every channel when they run
+	while( SelectWaiter* waiter = FirstLiveSelectWaiter( m_selectWaitersOnReceive ) )
+	{
+		waiter->m_tasklet->Kill( pending );
+	}
+
+	while( SelectWaiter* waiter = FirstLiveSelectWaiter( m_selectWaitersOnSend ) )
+	{
+		waiter->m_tasklet->Kill( pending );
+	}
+
+}
+
+const ChannelStats& Channel::GetStats() const
+{
+	return m_stats;
+}
+
+void Channel::ResetStats()
+{
+	m_stats = ChannelStats{};
+
+	m_stats.m_maxAbsoluteBalance = std::abs( m_balance );
+}
+
+void Channel::AddBlockedTime( long long blockedTime )
+{
+	m_stats.m_blockedTime += blockedTime;
+
+	m_stats.m_maxBlockedTime = std::max( m_stats.m_maxBlockedTime, blockedTime );
+}
+
+long long Channel::GetStatsValue( ChannelStatsKey key ) const
+{
+	switch( key )
+	{
+	case ChannelStatsKey::SENDS:
+		return m_stats.m_sends;
+	case ChannelStatsKey::RECEIVES:
+		return m_stats.m_receives;
+	case ChannelStatsKey::OPERATIONS:
+		return m_stats.m_sends + m_stats.m_receives;
+	case ChannelStatsKey::BLOCKED_OPERATIONS:
+		return m_stats.m_blockedOperations;
+	case ChannelStatsKey::BLOCKED_TIME:
+		return m_stats.m_blockedTime;
+	case ChannelStatsKey::MAX_BLOCKED_TIME:
+		return m_stats.m_maxBlockedTime;
+	case ChannelStatsKey::MAX_ABSOLUTE_BALANCE:
+		return m_stats.m_maxAbsoluteBalance;
+	}
+
+	return 0;
+}
+
+void Channel::TopChannels( size_t n, ChannelStatsKey key, std::vector<Channel*>& channels )
+{
+	std::vector<std::pair<long long, Channel*>> ranked;
+
+	for( Channel* channel : s_activeChannels )
+	{
+		long long value = channel->GetStatsValue( key );
+
+		if( value > 0 )
+		{
+			ranked.emplace_back( value, channel );
+		}
+	}
+
+	size_t count = std::min( n, ranked.size() );
+
+	// Ties are broken by age so the order does not depend on the hash set
+	std::partial_sort( ranked.begin(), ranked.begin() + count, ranked.end(), []( const std::pair<long long, Channel*>& a, const std::pair<long long, Channel*>& b ) {
+		return a.first != b.first ? a.first > b.first : a.second->m_id < b.second->m_id;
+	} );
+
+	for( size_t i = 0; i < count; i++ )
+	{
+		channels.push_back( ranked[i].second );
+	}
+}
+
+unsigned long long Channel::GetId() const
+{
+	return m_id;
 }
 
 long Channel::NumberOfActiveChannels()
@@ -564,7 +1337,7 @@ int Channel::UnblockAllActiveChannels()
 	while(iter != s_activeChannels.end())
 	{
 		Channel* channel = *iter;
-		if (channel->m_balance != 0)
+		if (channel->m_balance != 0 || !channel->m_selectWaitersOnReceive.empty() || !channel->m_selectWaitersOnSend.empty())
 		{
 			channelsToUnblock.push_back(channel);
 		}
@@ -605,21 +1378,183 @@ bool Channel::IsClosing() const
 	return m_closing;
 }
 
+int Channel::Capacity() const
+{
+	return m_capacity;
+}
+
+void Channel::SetCapacity( int capacity )
+{
+	m_capacity = capacity;
+
+	// Room may have been made for senders blocked on a full buffer
+	if( IsBuffered() )
+	{
+		FillBufferFromBlockedSenders();
+	}
+}
+
+bool Channel::IsBuffered() const
+{
+	return m_capacity != 0;
+}
+
+int Channel::BufferedCount() const
+{
+	return static_cast<int>( m_bufferCount );
+}
+
+int Channel::PeakBufferedCount() const
+{
+	return static_cast<int>( m_peakBufferCount );
+}
+
+void Channel::ResetPeakBufferedCount()
+{
+	m_peakBufferCount = m_bufferCount;
+}
+
+bool Channel::IsBufferFull() const
+{
+	return m_capacity > 0 && m_bufferCount >= static_cast<size_t>( m_capacity );
+}
+
+void Channel::FillBufferFromBlockedSenders()
+{
+	// Senders blocked on a full buffer are woken as soon as their item fits
+	while( IsBuffered() && m_firstBlockedOnSend != nullptr && !IsBufferFull() )
+	{
+		Tasklet* sendingTasklet = m_firstBlockedOnSend;
+
+		if( sendingTasklet->IsSendingBatch() )
+		{
+			PyObject* batch = sendingTasklet->GetTransferArguments();
+
+			Py_ssize_t offset = sendingTasklet->GetSendBatchOffset();
+
+			while( offset < PyList_GET_SIZE( batch ) - 1 && !IsBufferFull() )
+			{
+				PushBuffered( PyList_GET_ITEM( batch, offset ), nullptr, false );
+
+				offset++;
+			}
+
+			sendingTasklet->SetSendBatchOffset( offset );
+
+			if( IsBufferFull() )
+			{
+				break;
+			}
+
+			TakeLastItemFromBatch( sendingTasklet );
+		}
+
+		PopNextTaskletBlockedOnSend();
+
+		sendingTasklet->Unblock();
+
+		sendingTasklet->SetTransferInProgress( false );
+
+		// Ownership of the exception passes to the buffer as it would to a receiver
+		PushBuffered( sendingTasklet->GetTransferArguments(), sendingTasklet->TransferException(), sendingTasklet->ShouldRestoreTransferException() );
+
+		Py_DECREF( sendingTasklet->GetTransferArguments() );
+
+		sendingTasklet->ClearTransferArguments();
+
+		sendingTasklet->GetScheduleManager()->InsertTasklet( sendingTasklet );
+
+		sendingTasklet->Decref();
+	}
+
+	while( IsBuffered() && m_firstBlockedOnSend == nullptr && !IsBufferFull() && FirstLiveSelectWaiter( m_selectWaitersOnSend ) != nullptr )
+	{
+		SelectWaiter* waiter = PopSelectWaiter( m_selectWaitersOnSend, true );
+
+		PushBuffered( waiter->m_cases[waiter->m_firedCase].m_value, nullptr, false );
+
+		waiter->m_tasklet->Unblock();
+
+		waiter->m_tasklet->GetScheduleManager()->InsertTasklet( waiter->m_tasklet );
+
+		waiter->m_tasklet->Decref();
+	}
+}
+
+void Channel::PushBuffered( PyObject* args, PyObject* exception, bool restoreException )
+{
+	if( m_bufferCount == m_buffer.size() )
+	{
+		// Grow to the next power of two, unrolling the ring so the oldest item is at the front
+		std::vector<ChannelBufferEntry> grown( std::max( size_t( 8 ), m_buffer.size() * 2 ) );
+
+		for( size_t i = 0; i < m_bufferCount; i++ )
+		{
+			grown[i] = m_buffer[( m_bufferHead + i ) & ( m_buffer.size() - 1 )];
+		}
+
+		m_buffer.swap( grown );
+
+		m_bufferHead = 0;
+	}
+
+	// The buffer owns a reference to args, ownership of exception is passed in as it is with a send
+	Py_INCREF( args );
+
+	m_buffer[( m_bufferHead + m_bufferCount ) & ( m_buffer.size() - 1 )] = ChannelBufferEntry{ args, exception, restoreException };
+
+	m_bufferCount++;
+
+	m_peakBufferCount = std::max( m_peakBufferCount, m_bufferCount );
+}
+
+ChannelBufferEntry Channel::PopBuffered()
+{
+	ChannelBufferEntry entry = m_buffer[m_bufferHead];
+
+	m_bufferHead = ( m_bufferHead + 1 ) & ( m_buffer.size() - 1 );
+
+	m_bufferCount--;
+
+	return entry;
+}
+
+const ChannelBufferEntry& Channel::BufferFront() const
+{
+	return m_buffer[m_bufferHead];
+}
+
+void Channel::ReleaseBuffered()
+{
+	while( m_bufferCount > 0 )
+	{
+		ChannelBufferEntry entry = PopBuffered();
+
+		Py_DECREF( entry.m_args );
+
+		Py_XDECREF( entry.m_exception );
+	}
+}
+
 void Channel::IncrementBalance()
 {
 	m_balance++;
+
+	m_stats.m_maxAbsoluteBalance = std::max( m_stats.m_maxAbsoluteBalance, m_balance );
 }
 
 void Channel::DecrementBalance()
 {
 	m_balance--;
+
+	m_stats.m_maxAbsoluteBalance = std::max( m_stats.m_maxAbsoluteBalance, -m_balance );
 }
 
 void Channel::UpdateCloseState()
 {
     // If channel is set to close and the balance is zero then set as closed
 
-	if((m_closing) && ( m_balance == 0 ))
+	if((m_closing) && ( m_balance == 0 ) && ( m_bufferCount == 0 ))
 	{
 
 		m_closed = true;
@@ -24,6 +24,7 @@
 #include "PythonCppType.h"
 
 #include <unordered_set>
+#include <vector>
 
 enum class ChannelDirection
 {
@@ -36,6 +37,66 @@ typedef ChannelDirection ChannelPreference;
 
 class Tasklet;
 
+class Channel;
+
+struct ChannelBufferEntry
+{
+	PyObject* m_args;
+
+	PyObject* m_exception;
+
+	bool m_restoreException;
+};
+
+struct ChannelSelectCase
+{
+	Channel* m_channel;
+
+	bool m_sending;
+
+	PyObject* m_value; // Borrowed, only used when sending
+};
+
+// A tasklet blocked in select registers this on the select lists of every channel in its cases
+struct SelectWaiter
+{
+	Tasklet* m_tasklet;
+
+	std::vector<ChannelSelectCase> m_cases;
+
+	int m_firedCase; // Index of the case completed by another tasklet, -1 while waiting
+
+	bool m_registered;
+};
+
+// Cumulative traffic on one channel since creation or the last ResetStats
+struct ChannelStats
+{
+	long long m_sends; // values sent by send, send_many and select send operations, each item of a batch counts
+
+	long long m_receives; // values received, each item of a batch counts
+
+	long long m_blockedOperations; // operations that had to block the calling tasklet
+
+	long long m_blockedTime; // total nanoseconds tasklets spent blocked on the channel
+
+	long long m_maxBlockedTime;
+
+	int m_maxAbsoluteBalance;
+};
+
+// Channel statistics that channels can be ranked by
+enum class ChannelStatsKey
+{
+	SENDS,
+	RECEIVES,
+	OPERATIONS,
+	BLOCKED_OPERATIONS,
+	BLOCKED_TIME,
+	MAX_BLOCKED_TIME,
+	MAX_ABSOLUTE_BALANCE
+};
+
 class Channel : public PythonCppType
 {
 public:
@@ -48,6 +109,21 @@ public:
 
     PyObject* Receive();
 
+	bool SendMany( PyObject* items );
+
+    bool CanSendWithoutBlocking() const;
+
+    bool CanReceiveWithoutBlocking() const;
+
+    static PyObject* Select( std::vector<ChannelSelectCase>& cases, long long timeout );
+
+    static void TimeoutSelect( Tasklet* tasklet );
+
+    // Charges the time a select spent blocked to each channel it waited on
+    static void AddSelectBlockedTime( const SelectWaiter* waiter, long long blockedTime );
+
+    PyObject* ReceiveMany( int maxItems );
+
     int Balance() const;
 
     void UnblockTaskletFromChannel( Tasklet* tasklet );
@@ -72,19 +148,76 @@ public:
 
 	bool IsClosing() const; 
 
+    int Capacity() const;
+
+    void SetCapacity( int capacity );
+
+    bool IsBuffered() const;
+
+    int BufferedCount() const;
+
+    int PeakBufferedCount() const;
+
+    void ResetPeakBufferedCount();
+
     static long NumberOfActiveChannels();
 
+    // Unique for the lifetime of the process, used to identify the channel in traces
+    unsigned long long GetId() const;
+
     static int UnblockAllActiveChannels();
 
+    const ChannelStats& GetStats() const;
+
+    void ResetStats();
+
+    // Called when a tasklet blocked on this channel is unblocked
+    void AddBlockedTime( long long blockedTime );
+
+    long long GetStatsValue( ChannelStatsKey key ) const;
+
+    // Appends up to n active channels with the highest non zero value for key, highest first
+    static void TopChannels( size_t n, ChannelStatsKey key, std::vector<Channel*>& channels );
+
 private:
 
     void RemoveTaskletFromBlocked( Tasklet* tasklet );
 
+    bool BlockOnSend( Tasklet* current, PyObject* args, PyObject* exception, bool restoreException, bool batch );
+
+    void TakeLastItemFromBatch( Tasklet* sendingTasklet );
+
+    void PushBuffered( PyObject* args, PyObject* exception, bool restoreException );
+
+    ChannelBufferEntry PopBuffered();
+
+    const ChannelBufferEntry& BufferFront() const;
+
+    void ReleaseBuffered();
+
+    bool IsBufferFull() const;
+
+    void FillBufferFromBlockedSenders();
+
+    PyObject* FinishReceive( Tasklet* current );
+
+    static SelectWaiter* FirstLiveSelectWaiter( const std::vector<SelectWaiter*>& waiters );
+
+    SelectWaiter* PopSelectWaiter( std::vector<SelectWaiter*>& waiters, bool sending );
+
+    static void RegisterSelect( SelectWaiter* waiter );
+
+    // Channels may appear in more than one case of a select, such as to send or receive, but are only charged once
+    static bool IsFirstSelectCaseOnChannel( const std::vector<ChannelSelectCase>& cases, size_t index );
+
+    static void UnregisterSelect( SelectWaiter* waiter );
+
     void IncrementBalance();
 
 	void DecrementBalance();
 
-    void RunChannelCallback( Channel* channel, Tasklet* tasklet, bool sending, bool willBlock ) const;
+    // items is the number of values the operation transfers, counted in the channel stats
+    void RunChannelCallback( Tasklet* tasklet, bool sending, bool willBlock, Py_ssize_t items = 1 );
 
     void AddTaskletToWaitingToSend( Tasklet* tasklet );
 
@@ -106,6 +239,8 @@ private:
 
 private:
 
+    unsigned long long m_id;
+
     int m_balance;
 
 	ChannelPreference m_preference;
@@ -124,7 +259,25 @@ private:
 
     Tasklet* m_lastBlockedOnSend;
 
+    int m_capacity; // Items queued when there is no receiver waiting, 0 for an unbuffered channel and negative for no limit
+
+    std::vector<ChannelBufferEntry> m_buffer; // Ring buffer, size is always zero or a power of two
+
+    size_t m_bufferHead;
+
+    size_t m_bufferCount;
+
+    size_t m_peakBufferCount;
+
+    ChannelStats m_stats;
+
+    std::vector<SelectWaiter*> m_selectWaitersOnSend; // Tasklets blocked in select offering to send, in registration order
+
+    std::vector<SelectWaiter*> m_selectWaitersOnReceive;
+
     inline static std::unordered_set<Channel*> s_activeChannels;
+
+    inline static unsigned long long s_nextId = 1;
 };
 
 #endif // Channel_H
@@ -0,0 +1,85 @@
+#include "LatencyHistogram.h"
+
+#include <algorithm>
+#include <cmath>
+#include <iterator>
+
+LatencyHistogram::LatencyHistogram()
+{
+	Reset();
+}
+
+void LatencyHistogram::Reset()
+{
+	std::fill( std::begin( m_counts ), std::end( m_counts ), 0 );
+
+	m_count = 0;
+
+	m_sum = 0;
+
+	m_min = s_maxValue;
+
+	m_max = 0;
+}
+
+long long LatencyHistogram::Count() const
+{
+	return m_count;
+}
+
+long long LatencyHistogram::Min() const
+{
+	return m_count > 0 ? m_min : 0;
+}
+
+long long LatencyHistogram::Max() const
+{
+	return m_max;
+}
+
+double LatencyHistogram::Mean() const
+{
+	return m_count > 0 ? static_cast<double>( m_sum ) / m_count : 0.0;
+}
+
+long long LatencyHistogram::ValueAtPercentile( double percentile ) const
+{
+	if( m_count == 0 )
+	{
+		return 0;
+	}
+
+	percentile = std::min( std::max( percentile, 0.0 ), 100.0 );
+
+	// Rank of the value at the percentile, at least the first value
+	long long target = std::max( 1LL, static_cast<long long>( std::ceil( percentile / 100.0 * m_count ) ) );
+
+	long long seen = 0;
+
+	for( int index = 0; index < s_bucketCount; index++ )
+	{
+		seen += m_counts[index];
+
+		if( seen >= target )
+		{
+			// The bucket bound can overshoot the largest value actually recorded
+			return std::min( HighestEquivalentValue( index ), m_max );
+		}
+	}
+
+	return m_max;
+}
+
+long long LatencyHistogram::HighestEquivalentValue( int index )
+{
+	if( index < 2 * s_subBucketCount )
+	{
+		return index;
+	}
+
+	int shift = index / s_subBucketCount - 1;
+
+	long long top = index - shift * s_subBucketCount;
+
+	return ( ( top + 1 ) << shift ) - 1;
+}
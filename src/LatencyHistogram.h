@@ -0,0 +1,107 @@
+#pragma once
+#ifndef LatencyHistogram_H
+#define LatencyHistogram_H
+
+#include <cstdint>
+
+#if _WIN32
+#include <intrin.h>
+#endif
+
+// Log linear histogram of nanosecond latencies in the style of HdrHistogram.
+// Values below 2 * s_subBucketCount are recorded exactly, above that each power of two range is split into
+// s_subBucketCount buckets, giving ~3% precision up to s_maxValue. Larger values are clamped.
+// Recording is a bit scan and an increment, there is no allocation.
+class LatencyHistogram
+{
+public:
+	LatencyHistogram();
+
+	void Record( long long value )
+	{
+		if( value < 0 )
+		{
+			value = 0;
+		}
+		else if( value > s_maxValue )
+		{
+			value = s_maxValue;
+		}
+
+		m_counts[BucketIndex( static_cast<uint64_t>( value ) )]++;
+
+		m_count++;
+
+		m_sum += value;
+
+		if( value < m_min )
+		{
+			m_min = value;
+		}
+
+		if( value > m_max )
+		{
+			m_max = value;
+		}
+	}
+
+	void Reset();
+
+	long long Count() const;
+
+	// 0 if nothing has been recorded
+	long long Min() const;
+
+	long long Max() const;
+
+	double Mean() const;
+
+	// Highest value equivalent to the bucket holding the given percentile, 0 if nothing has been recorded
+	long long ValueAtPercentile( double percentile ) const;
+
+private:
+
+	static int BucketIndex( uint64_t value )
+	{
+		if( value < 2 * s_subBucketCount )
+		{
+			return static_cast<int>( value );
+		}
+
+#if _WIN32
+		unsigned long highestBit;
+
+		_BitScanReverse64( &highestBit, value );
+#else
+		int highestBit = 63 - __builtin_clzll( value );
+#endif
+
+		int shift = static_cast<int>( highestBit ) - s_subBucketBits;
+
+		return shift * s_subBucketCount + static_cast<int>( value >> shift );
+	}
+
+	static long long HighestEquivalentValue( int index );
+
+	inline static const int s_subBucketBits = 5;
+
+	inline static const int s_subBucketCount = 1 << s_subBucketBits;
+
+	inline static const int s_maxValueBits = 40;
+
+	inline static const long long s_maxValue = ( 1LL << s_maxValueBits ) - 1; // ~18 minutes
+
+	inline static const int s_bucketCount = ( s_maxValueBits - s_subBucketBits + 1 ) * s_subBucketCount;
+
+	uint64_t m_counts[s_bucketCount];
+
+	long long m_count;
+
+	long long m_sum;
+
+	long long m_min;
+
+	long long m_max;
+};
+
+#endif // LatencyHistogram_H
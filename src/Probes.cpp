@@ -0,0 +1,19 @@
+#include "Probes.h"
+
+#if defined( SCHEDULER_USDT )
+
+// Tracers locate the semaphores through the probe notes, which refer to them in the .probes section
+#define SCHEDULER_PROBE_SEMAPHORE( name ) volatile unsigned short scheduler_##name##_semaphore __attribute__( ( section( ".probes" ) ) ) = 0
+
+extern "C"
+{
+	SCHEDULER_PROBE_SEMAPHORE( tasklet_switch );
+	SCHEDULER_PROBE_SEMAPHORE( run_start );
+	SCHEDULER_PROBE_SEMAPHORE( run_end );
+	SCHEDULER_PROBE_SEMAPHORE( channel_send );
+	SCHEDULER_PROBE_SEMAPHORE( channel_receive );
+	SCHEDULER_PROBE_SEMAPHORE( tasklet_kill );
+	SCHEDULER_PROBE_SEMAPHORE( tasklet_complete );
+}
+
+#endif
@@ -0,0 +1,52 @@
+#pragma once
+#ifndef Probes_H
+#define Probes_H
+
+// Static tracepoints for perf and bpftrace, under the provider name "scheduler".
+// Built in when SCHEDULER_USDT is defined, which requires <sys/sdt.h> from systemtap, otherwise they compile away.
+// Each probe site is a single nop until a tracer attaches. Probe arguments are only evaluated while a tracer is
+// attached, which the tracer signals through the probe's semaphore, so sites check SCHEDULER_PROBE_ENABLED first.
+//
+// tasklet_switch    previous tasklet id, next tasklet id, next tasklet context
+// run_start         thread id, tasklet id the run was started from
+// run_end           thread id, tasklet id the run was started from, 1 if the run succeeded
+// channel_send      tasklet id, channel id, 1 if the send is expected to block, tasklet context
+// channel_receive   tasklet id, channel id, 1 if the receive is expected to block, tasklet context
+// tasklet_kill      tasklet id, tasklet context
+// tasklet_complete  tasklet id, tasklet context
+//
+// Tasklet ids of 0 refer to no tasklet. Contexts are UTF-8 strings, empty if the tasklet has no context.
+
+#if defined( SCHEDULER_USDT )
+
+#define _SDT_HAS_SEMAPHORES 1
+#include <sys/sdt.h>
+
+#define SCHEDULER_PROBE_ENABLED( name ) __builtin_expect( scheduler_##name##_semaphore != 0, 0 )
+
+#define SCHEDULER_PROBE( name, ... ) STAP_PROBEV( scheduler, name, __VA_ARGS__ )
+
+// Incremented by tracers while attached, names must match the "provider_name_semaphore" form sys/sdt.h expects
+extern "C"
+{
+	extern volatile unsigned short scheduler_tasklet_switch_semaphore;
+	extern volatile unsigned short scheduler_run_start_semaphore;
+	extern volatile unsigned short scheduler_run_end_semaphore;
+	extern volatile unsigned short scheduler_channel_send_semaphore;
+	extern volatile unsigned short scheduler_channel_receive_semaphore;
+	extern volatile unsigned short scheduler_tasklet_kill_semaphore;
+	extern volatile unsigned short scheduler_tasklet_complete_semaphore;
+}
+
+#else
+
+#define SCHEDULER_PROBE_ENABLED( name ) false
+
+#define SCHEDULER_PROBE( name, ... ) \
+	do                               \
+	{                                \
+	} while( false )
+
+#endif
+
+#endif // Probes_H
@@ -23,8 +23,24 @@ static PyObject*
 }
 
 static int
-	ChannelInit( PyChannelObject* self, PyObject* Py_UNUSED( args ), PyObject* Py_UNUSED( kwds ) )
+	ChannelInitWithDefaultCapacity( PyChannelObject* self, PyObject* kwds, int capacity )
 {
+	// Positional arguments are ignored, subclasses have historically passed themselves to __init__
+	if( kwds )
+	{
+		const char* kwlist[] = { "capacity", NULL };
+
+		PyObject* noArguments = PyTuple_New( 0 );
+
+		int parsed = PyArg_ParseTupleAndKeywords( noArguments, kwds, "|i:channel", (char**)kwlist, &capacity );
+
+		Py_DECREF( noArguments );
+
+		if( !parsed )
+		{
+			return -1;
+		}
+	}
 
 	// Allocate the memory for the implementation member
 	self->m_implementation = (Channel*)PyObject_Malloc( sizeof( Channel ) );
@@ -58,9 +74,17 @@ static int
 		return -1;
 	}
 
+	self->m_implementation->SetCapacity( capacity );
+
 	return 0;
 }
 
+static int
+	ChannelInit( PyChannelObject* self, PyObject* Py_UNUSED( args ), PyObject* kwds )
+{
+	return ChannelInitWithDefaultCapacity( self, kwds, 0 );
+}
+
 static void
 	ChannelDealloc( PyChannelObject* self )
 {
@@ -152,6 +176,18 @@ static PyObject*
 	return PyLong_FromLong( self->m_implementation->Balance() );
 }
 
+static PyObject*
+	ChannelIdGet( PyChannelObject* self, void* closure )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromUnsignedLongLong( self->m_implementation->GetId() );
+}
+
 static PyObject*
 	ChannelQueueGet( PyChannelObject* self, void* closure )
 {
@@ -203,6 +239,57 @@ static PyObject*
 	return self->m_implementation->IsClosing() ? Py_True : Py_False;
 }
 
+static PyObject*
+	ChannelCapacityGet( PyChannelObject* self, void* closure )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLong( self->m_implementation->Capacity() );
+}
+
+static int
+	ChannelCapacitySet( PyChannelObject* self, PyObject* value, void* closure )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return -1;
+	}
+
+	if( value == NULL )
+	{
+		PyErr_SetString( PyExc_TypeError, "Cannot delete the capacity attribute" );
+		return -1;
+	}
+
+	int capacity = PyLong_AsLong( value );
+
+	if( capacity == -1 && PyErr_Occurred() )
+	{
+		return -1;
+	}
+
+	self->m_implementation->SetCapacity( capacity );
+
+	return 0;
+}
+
+static PyObject*
+	ChannelPeakBufferedGet( PyChannelObject* self, void* closure )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLong( self->m_implementation->PeakBufferedCount() );
+}
+
 static PyGetSetDef Channel_getsetters[] = {
 	{ "preference",
         (getter)ChannelPreferenceGet,
@@ -216,6 +303,12 @@ static PyGetSetDef Channel_getsetters[] = {
         "number of tasklets waiting to send (>0) or receive (<0).",
         NULL },
 
+	{ "id",
+        (getter)ChannelIdGet,
+        NULL,
+        "Unique id of the channel, never reused within a process. Identifies the channel in trace records.",
+        NULL },
+
 	{ "queue",
         (getter)ChannelQueueGet,
         NULL,
@@ -234,6 +327,18 @@ static PyGetSetDef Channel_getsetters[] = {
         "The value of this attribute is True when close() has been called.",
         NULL },
 
+	{ "capacity",
+        (getter)ChannelCapacityGet,
+        (setter)ChannelCapacitySet,
+        "number of items that can be buffered before senders block. 0 for an unbuffered channel, negative for no limit.",
+        NULL },
+
+	{ "peak_buffered",
+        (getter)ChannelPeakBufferedGet,
+        NULL,
+        "highest number of items buffered at once since creation or the last reset_peak_buffered().",
+        NULL },
+
 	{ NULL } /* Sentinel */
 };
 
@@ -275,6 +380,173 @@ static PyObject*
 	return self->m_implementation->Receive();
 }
 
+static PyObject*
+	ChannelSendMany( PyChannelObject* self, PyObject* args, PyObject* Py_UNUSED( kwds ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	PyObject* values;
+
+	if( !PyArg_ParseTuple( args, "O:Channel.send_many", &values ) )
+	{
+		return nullptr;
+	}
+
+	PyObject* items = PySequence_List( values );
+
+	if( !items )
+	{
+		return nullptr;
+	}
+
+	bool success = self->m_implementation->SendMany( items );
+
+	Py_DECREF( items );
+
+	if( !success )
+	{
+		return nullptr;
+	}
+
+	Py_IncRef( Py_None );
+
+	return Py_None;
+}
+
+static PyObject*
+	ChannelReceiveMany( PyChannelObject* self, PyObject* args, PyObject* Py_UNUSED( kwds ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	int maxItems;
+
+	if( !PyArg_ParseTuple( args, "i:Channel.receive_many", &maxItems ) )
+	{
+		return nullptr;
+	}
+
+	if( maxItems < 1 )
+	{
+		PyErr_SetString( PyExc_ValueError, "max_items must be at least 1" );
+
+		return nullptr;
+	}
+
+	return self->m_implementation->ReceiveMany( maxItems );
+}
+
+static PyObject*
+	ChannelResetPeakBuffered( PyChannelObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	self->m_implementation->ResetPeakBufferedCount();
+
+	Py_IncRef( Py_None );
+
+	return Py_None;
+}
+
+static PyObject*
+	ChannelGetStats( PyChannelObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	const ChannelStats& stats = self->m_implementation->GetStats();
+
+	return Py_BuildValue(
+		"{s:L,s:L,s:L,s:L,s:L,s:i}",
+		"sends", stats.m_sends,
+		"receives", stats.m_receives,
+		"blocked_operations", stats.m_blockedOperations,
+		"blocked_time_ns", stats.m_blockedTime,
+		"max_blocked_time_ns", stats.m_maxBlockedTime,
+		"max_abs_balance", stats.m_maxAbsoluteBalance );
+}
+
+static PyObject*
+	ChannelResetStats( PyChannelObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	self->m_implementation->ResetStats();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	ChannelTrySend( PyChannelObject* self, PyObject* args, PyObject* Py_UNUSED( kwds ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	PyObject* value;
+
+	if( !PyArg_ParseTuple( args, "O:Channel.try_send", &value ) )
+	{
+		return nullptr;
+	}
+
+	if( !self->m_implementation->CanSendWithoutBlocking() )
+	{
+		Py_RETURN_FALSE;
+	}
+
+	if( !self->m_implementation->Send( value ) )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_TRUE;
+}
+
+static PyObject*
+	ChannelTryReceive( PyChannelObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	if( !self->m_implementation->CanReceiveWithoutBlocking() )
+	{
+		return Py_BuildValue( "(OO)", Py_False, Py_None );
+	}
+
+	PyObject* value = self->m_implementation->Receive();
+
+	if( !value )
+	{
+		return nullptr;
+	}
+
+	return Py_BuildValue( "(ON)", Py_True, value );
+}
+
 static PyObject*
 	ChannelSendException( PyChannelObject* self, PyObject* args, PyObject* Py_UNUSED( kwds ) )
 {
@@ -483,6 +755,39 @@ static PyMethodDef Channel_methods[] = {
         "Receive an object over the channel. \n\n\
             :return received value" },
 
+	{ "send_many",
+        (PyCFunction)ChannelSendMany,
+        METH_VARARGS,
+        "Send every item of an iterable over the channel. \n\n\
+            Items are handed to all waiting receivers in one pass with a single reschedule at the end. \n\
+            If items remain once there are no receivers left the caller blocks until they have all been received. \n\n\
+            :param values: Values to send \n\
+            :type values: Iterable" },
+
+	{ "receive_many",
+        (PyCFunction)ChannelReceiveMany,
+        METH_VARARGS,
+        "Receive up to max_items objects over the channel. \n\n\
+            Takes from all waiting senders in one pass with a single reschedule at the end. \n\
+            If there are no waiting senders the caller blocks until a send arrives. \n\n\
+            :param max_items: Maximum number of items to receive \n\
+            :type max_items: int \n\
+            :return list of received values" },
+
+	{ "try_send",
+        (PyCFunction)ChannelTrySend,
+        METH_VARARGS,
+        "Send an object over the channel only if it can be done without blocking. \n\n\
+            :param value: Value to send \n\
+            :type value: Object \n\
+            :return True if the value was sent" },
+
+	{ "try_receive",
+        (PyCFunction)ChannelTryReceive,
+        METH_NOARGS,
+        "Receive an object over the channel only if it can be done without blocking. \n\n\
+            :return tuple of True and the received value, or (False, None) if receiving would block" },
+
 	{ "send_exception",
         (PyCFunction)ChannelSendException,
         METH_VARARGS,
@@ -503,6 +808,23 @@ static PyMethodDef Channel_methods[] = {
             :param tb: Traceback \n\
             :type tb: Python Traceback object" },
 
+	{ "reset_peak_buffered",
+        (PyCFunction)ChannelResetPeakBuffered,
+        METH_NOARGS,
+        "Reset peak_buffered to the number of items currently buffered." },
+
+	{ "get_stats",
+        (PyCFunction)ChannelGetStats,
+        METH_NOARGS,
+        "Get cumulative traffic counters for the channel since it was created or its stats were last reset. \n\n\
+            :return: Dictionary with keys sends, receives, blocked_operations, blocked_time_ns, max_blocked_time_ns and max_abs_balance \n\
+            :rtype: Dictionary" },
+
+	{ "reset_stats",
+        (PyCFunction)ChannelResetStats,
+        METH_NOARGS,
+        "Reset the channel's stats to zero, max_abs_balance restarts from the current balance." },
+
 	{ "clear",
         (PyCFunction)ChannelClearTasklets,
         METH_NOARGS,
@@ -565,4 +887,92 @@ static PyTypeObject ChannelType = {
 	ChannelNew, /*tp_new*/
 	0, /*tp_free*/
 	0, /*tp_is_gc*/
-};
\ No newline at end of file
+};
+
+static int
+	QueueChannelInit( PyChannelObject* self, PyObject* Py_UNUSED( args ), PyObject* kwds )
+{
+	// Unbounded unless a capacity is given
+	if( ChannelInitWithDefaultCapacity( self, kwds, -1 ) < 0 )
+	{
+		return -1;
+	}
+
+	// Sender never blocks
+	self->m_implementation->SetPreferenceFromInt( 1 );
+
+	return 0;
+}
+
+static Py_ssize_t
+	QueueChannelLength( PyChannelObject* self )
+{
+	// Ensure PyChannelObject is in a valid state
+	if( !PyChannelObjectIsValid( self ) )
+	{
+		return -1;
+	}
+
+	return self->m_implementation->BufferedCount();
+}
+
+static PySequenceMethods QueueChannel_as_sequence = {
+	(lenfunc)QueueChannelLength, /*sq_length*/
+};
+
+static PyMethodDef QueueChannel_methods[] = {
+	{ "send_sequence",
+        (PyCFunction)ChannelSendMany,
+        METH_VARARGS,
+        "Send every item of an iterable over the channel. \n\n\
+            :param values: Values to send \n\
+            :type values: Iterable" },
+
+	{ NULL } /* Sentinel */
+};
+
+static PyTypeObject QueueChannelType = {
+	/* The ob_type field must be initialized in the module init function
+     * to be portable to Windows without using C++. */
+	PyVarObject_HEAD_INIT( NULL, 0 ) "scheduler.QueueChannel", /*tp_name*/
+	sizeof( PyChannelObject ), /*tp_basicsize*/
+	0, /*tp_itemsize*/
+	/* methods */
+	(destructor)ChannelDealloc, /*tp_dealloc*/
+	0, /*tp_vectorcall_offset*/
+	0, /*tp_getattr*/
+	0, /*tp_setattr*/
+	0, /*tp_as_async*/
+	0, /*tp_repr*/
+	0, /*tp_as_number*/
+	&QueueChannel_as_sequence, /*tp_as_sequence*/
+	0, /*tp_as_mapping*/
+	0, /*tp_hash*/
+	0, /*tp_call*/
+	0, /*tp_str*/
+	0, /*tp_getattro*/
+	0, /*tp_setattro*/
+	0, /*tp_as_buffer*/
+	Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+	PyDoc_STR( "A channel with an internal queue so that the sender never blocks. If there is no tasklet waiting to receive, the data is queued up internally." ), /*tp_doc*/
+	0, /*tp_traverse*/
+	0, /*tp_clear*/
+	0, /*tp_richcompare*/
+	offsetof( PyChannelObject, m_weakrefList ), /*tp_weaklistoffset*/
+	(getiterfunc)ChannelIter, /*tp_iter*/
+	(iternextfunc)ChannelNext, /*tp_iternext*/
+	QueueChannel_methods, /*tp_methods*/
+	0, /*tp_members*/
+	0, /*tp_getset*/
+	0,
+	/* see PyInit_xx */ /*tp_base*/
+	0, /*tp_dict*/
+	0, /*tp_descr_get*/
+	0, /*tp_descr_set*/
+	0, /*tp_dictoffset*/
+	(initproc)QueueChannelInit, /*tp_init*/
+	0, /*tp_alloc*/
+	ChannelNew, /*tp_new*/
+	0, /*tp_free*/
+	0, /*tp_is_gc*/
+};
@@ -1,6 +1,7 @@
 #include "ScheduleManager.h"
 
 #include <new>
+#include <vector>
 
 #include "PyScheduleManager.h"
 
@@ -80,7 +81,335 @@ static void
     Py_TYPE( self )->tp_free( (PyObject*)self );
 }
 
+// Drained trace records, exported through the buffer protocol as a one dimensional array of TraceRecord structs
+typedef struct PyTraceRecordsObject
+{
+	PyObject_HEAD
+
+	std::vector<TraceRecord>* m_records;
+
+	unsigned long long m_dropped;
+
+	Py_ssize_t m_shape;
+
+	Py_ssize_t m_stride;
+
+} _PyTraceRecordsObject;
+
+static void
+	TraceRecords_dealloc( PyTraceRecordsObject* self )
+{
+	delete self->m_records;
+
+	Py_TYPE( self )->tp_free( (PyObject*)self );
+}
+
+static int
+	TraceRecordsGetBuffer( PyTraceRecordsObject* self, Py_buffer* view, int flags )
+{
+	if( ( flags & PyBUF_WRITABLE ) == PyBUF_WRITABLE )
+	{
+		PyErr_SetString( PyExc_BufferError, "Trace records are read only." );
+
+		view->obj = nullptr;
+
+		return -1;
+	}
+
+	self->m_shape = static_cast<Py_ssize_t>( self->m_records->size() );
+
+	self->m_stride = sizeof( TraceRecord );
+
+	view->obj = Py_NewRef( self );
+	view->buf = self->m_records->data();
+	view->len = self->m_shape * self->m_stride;
+	view->readonly = 1;
+	view->itemsize = sizeof( TraceRecord );
+	view->format = ( flags & PyBUF_FORMAT ) ? const_cast<char*>( TraceBuffer::s_recordFormat ) : nullptr;
+	view->ndim = 1;
+	view->shape = ( flags & PyBUF_ND ) == PyBUF_ND ? &self->m_shape : nullptr;
+	view->strides = ( flags & PyBUF_STRIDES ) == PyBUF_STRIDES ? &self->m_stride : nullptr;
+	view->suboffsets = nullptr;
+	view->internal = nullptr;
+
+	return 0;
+}
+
+static Py_ssize_t
+	TraceRecordsLength( PyTraceRecordsObject* self )
+{
+	return static_cast<Py_ssize_t>( self->m_records->size() );
+}
+
+static PyObject*
+	TraceRecordsDroppedGet( PyTraceRecordsObject* self, void* closure )
+{
+	return PyLong_FromUnsignedLongLong( self->m_dropped );
+}
+
+static PyBufferProcs TraceRecords_as_buffer = {
+	(getbufferproc)TraceRecordsGetBuffer,
+	nullptr
+};
+
+static PySequenceMethods TraceRecords_as_sequence = {
+	(lenfunc)TraceRecordsLength, /* sq_length */
+};
+
+static PyGetSetDef TraceRecords_getsetters[] = {
+	{ "dropped",
+	  (getter)TraceRecordsDroppedGet,
+	  NULL,
+	  "Number of records overwritten in the ring buffer since the previous drain, these are missing from the start of this batch.",
+	  NULL },
+	{ NULL } /* Sentinel */
+};
+
+static PyTypeObject TraceRecordsType = {
+	PyVarObject_HEAD_INIT( NULL, 0 ) "scheduler.TraceRecords", /*tp_name*/
+	sizeof( PyTraceRecordsObject ), /*tp_basicsize*/
+	0, /*tp_itemsize*/
+	/* methods */
+	(destructor)TraceRecords_dealloc, /*tp_dealloc*/
+	0, /*tp_vectorcall_offset*/
+	0, /*tp_getattr*/
+	0, /*tp_setattr*/
+	0, /*tp_as_async*/
+	0, /*tp_repr*/
+	0, /*tp_as_number*/
+	&TraceRecords_as_sequence, /*tp_as_sequence*/
+	0, /*tp_as_mapping*/
+	0, /*tp_hash*/
+	0, /*tp_call*/
+	0, /*tp_str*/
+	0, /*tp_getattro*/
+	0, /*tp_setattro*/
+	&TraceRecords_as_buffer, /*tp_as_buffer*/
+	Py_TPFLAGS_DEFAULT, /*tp_flags*/
+	PyDoc_STR( "Trace records drained from a Schedule Manager. Supports the buffer protocol, each item is one record of format 'qIIQQ': timestamp_ns, event, flags, tasklet_id, target_id." ), /*tp_doc*/
+	0, /*tp_traverse*/
+	0, /*tp_clear*/
+	0, /*tp_richcompare*/
+	0, /*tp_weaklistoffset*/
+	0, /*tp_iter*/
+	0, /*tp_iternext*/
+	0, /*tp_methods*/
+	0, /*tp_members*/
+	TraceRecords_getsetters, /*tp_getset*/
+};
+
+static PyObject*
+	ScheduleManagerEnableTrace( PyScheduleManagerObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "capacity", NULL };
+
+	Py_ssize_t capacity = 65536;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "|n:enable_trace", (char**)kwlist, &capacity ) )
+	{
+		return nullptr;
+	}
+
+	if( capacity < 1 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Trace capacity must be at least 1." );
+
+		return nullptr;
+	}
+
+	self->m_implementation->GetTraceBuffer().Enable( static_cast<size_t>( capacity ) );
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	ScheduleManagerDisableTrace( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	self->m_implementation->GetTraceBuffer().Disable();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	ScheduleManagerDrainTrace( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	PyTraceRecordsObject* records = PyObject_New( PyTraceRecordsObject, &TraceRecordsType );
+
+	if( !records )
+	{
+		return nullptr;
+	}
+
+	TraceBuffer& traceBuffer = self->m_implementation->GetTraceBuffer();
+
+	records->m_records = new std::vector<TraceRecord>();
+
+	records->m_shape = 0;
+
+	records->m_stride = sizeof( TraceRecord );
+
+	records->m_dropped = traceBuffer.Drain( *records->m_records );
+
+	return (PyObject*)records;
+}
+
+static PyObject*
+	ScheduleManagerTraceEnabledGet( PyScheduleManagerObject* self, void* closure )
+{
+	return PyBool_FromLong( self->m_implementation->GetTraceBuffer().IsEnabled() );
+}
+
+static PyObject*
+	ScheduleManagerTraceCapacityGet( PyScheduleManagerObject* self, void* closure )
+{
+	return PyLong_FromSize_t( self->m_implementation->GetTraceBuffer().Capacity() );
+}
+
+// Returns a new dictionary of the Schedule Manager's stats, shared with scheduler.get_all_schedule_manager_stats
+static PyObject*
+	ScheduleManagerStatsDict( ScheduleManager* scheduleManager )
+{
+	const ScheduleManagerStats& stats = scheduleManager->GetStats();
+
+	return Py_BuildValue(
+		"{s:k,s:L,s:L,s:L,s:L,s:L,s:L,s:d,s:i,s:i}",
+		"thread_id", scheduleManager->ThreadId(),
+		"switches", stats.m_switches,
+		"completions", stats.m_completions,
+		"inserts", stats.m_inserts,
+		"blocks", stats.m_blocks,
+		"kills", stats.m_kills,
+		"run_calls", stats.m_runCalls,
+		"run_time", stats.m_runTime / 1e9,
+		"queue_length", scheduleManager->GetCachedTaskletCount() - 1,
+		"queue_high_water_mark", stats.m_queueHighWaterMark );
+}
+
+static PyObject*
+	ScheduleManagerGetStats( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return ScheduleManagerStatsDict( self->m_implementation );
+}
+
+static PyObject*
+	ScheduleManagerResetStats( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	self->m_implementation->ResetStats();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	ScheduleManagerGetQueueWaitStats( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	const LatencyHistogram& histogram = self->m_implementation->GetQueueWaitHistogram();
+
+	return Py_BuildValue(
+		"{s:L,s:L,s:L,s:d,s:L,s:L,s:L}",
+		"count", histogram.Count(),
+		"min_ns", histogram.Min(),
+		"max_ns", histogram.Max(),
+		"mean_ns", histogram.Mean(),
+		"p50_ns", histogram.ValueAtPercentile( 50.0 ),
+		"p99_ns", histogram.ValueAtPercentile( 99.0 ),
+		"p999_ns", histogram.ValueAtPercentile( 99.9 ) );
+}
+
+static PyObject*
+	ScheduleManagerQueueWaitPercentile( PyScheduleManagerObject* self, PyObject* args )
+{
+	double percentile;
+
+	if( !PyArg_ParseTuple( args, "d:queue_wait_percentile", &percentile ) )
+	{
+		return nullptr;
+	}
+
+	if( percentile < 0.0 || percentile > 100.0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Percentile must be between 0 and 100." );
+
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetQueueWaitHistogram().ValueAtPercentile( percentile ) );
+}
+
+static PyObject*
+	ScheduleManagerResetQueueWaitStats( PyScheduleManagerObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	self->m_implementation->GetQueueWaitHistogram().Reset();
+
+	Py_RETURN_NONE;
+}
+
 static PyMethodDef ScheduleManager_methods[] = {
+	{ "enable_trace",
+	  (PyCFunction)ScheduleManagerEnableTrace,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Start recording switch, insert, kill, completion and channel events for this Schedule Manager's thread into a preallocated ring buffer. Any previously held records are discarded. \n\n\
+            :param capacity: Number of records held before the oldest are overwritten, rounded up to a power of two \n\
+            :type capacity: Integer" },
+
+	{ "disable_trace",
+	  (PyCFunction)ScheduleManagerDisableTrace,
+	  METH_NOARGS,
+	  "Stop recording trace events and free the ring buffer." },
+
+	{ "drain_trace",
+	  (PyCFunction)ScheduleManagerDrainTrace,
+	  METH_NOARGS,
+	  "Remove all held trace records from the ring buffer, oldest first. \n\n\
+            :return: Records supporting the buffer protocol \n\
+            :rtype: scheduler.TraceRecords" },
+
+	{ "get_stats",
+	  (PyCFunction)ScheduleManagerGetStats,
+	  METH_NOARGS,
+	  "Get cumulative activity counters for this Schedule Manager since it was created or its stats were last reset. \n\n\
+            :return: Dictionary with keys thread_id, switches, completions, inserts, blocks, kills, run_calls, run_time, queue_length and queue_high_water_mark \n\
+            :rtype: Dictionary" },
+
+	{ "reset_stats",
+	  (PyCFunction)ScheduleManagerResetStats,
+	  METH_NOARGS,
+	  "Reset this Schedule Manager's stats to zero, the queue high water mark restarts from the current queue length." },
+
+	{ "get_queue_wait_stats",
+	  (PyCFunction)ScheduleManagerGetQueueWaitStats,
+	  METH_NOARGS,
+	  "Get a summary of how long Tasklets waited in the runnables queue between being inserted and switched in, since the histogram was last reset. Percentiles are accurate to within ~3%. \n\n\
+            :return: Dictionary with keys count, min_ns, max_ns, mean_ns, p50_ns, p99_ns and p999_ns \n\
+            :rtype: Dictionary" },
+
+	{ "queue_wait_percentile",
+	  (PyCFunction)ScheduleManagerQueueWaitPercentile,
+	  METH_VARARGS,
+	  "Get the runnables queue wait time at a percentile. \n\n\
+            :param percentile: Percentile between 0 and 100 \n\
+            :type percentile: Float \n\
+            :return: Wait time in nanoseconds, 0 if no waits have been recorded \n\
+            :rtype: Integer" },
+
+	{ "reset_queue_wait_stats",
+	  (PyCFunction)ScheduleManagerResetQueueWaitStats,
+	  METH_NOARGS,
+	  "Clear the runnables queue wait time histogram, for example at the start of each frame." },
+
+	{ NULL } /* Sentinel */
+};
+
+static PyGetSetDef ScheduleManager_getsetters[] = {
+	{ "trace_enabled",
+	  (getter)ScheduleManagerTraceEnabledGet,
+	  NULL,
+	  "True if trace events are being recorded.",
+	  NULL },
+	{ "trace_capacity",
+	  (getter)ScheduleManagerTraceCapacityGet,
+	  NULL,
+	  "Number of records the trace ring buffer holds, 0 when tracing is disabled.",
+	  NULL },
 	{ NULL } /* Sentinel */
 };
 
@@ -116,7 +445,7 @@ static PyTypeObject ScheduleManagerType = {
 	0, /*tp_iternext*/
 	ScheduleManager_methods, /*tp_methods*/
 	0, /*tp_members*/
-	0, /*tp_getset*/
+	ScheduleManager_getsetters, /*tp_getset*/
 	0,
 	/* see PyInit_xx */ /*tp_base*/
 	0, /*tp_dict*/
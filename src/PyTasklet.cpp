@@ -2,6 +2,7 @@
 #include "stdafx.h"
 
 #include <new>
+#include <vector>
 
 #include "ScheduleManager.h"
 #include "PyTasklet.h"
@@ -22,11 +23,77 @@ static bool PyTaskletObjectIsValid( PyTaskletObject* tasklet )
 	return true;
 }
 
+// Opt-in free list of finished tasklet objects and their implementation storage
+// Only the static tasklet type is pooled, python subclasses are heap types and may carry extra state
+static std::vector<PyTaskletObject*> s_taskletObjectPool;
+
+static std::vector<Tasklet*> s_taskletImplementationPool;
+
+static size_t s_taskletPoolMaxSize = 0;
+
+static long long s_taskletPoolHits = 0;
+
+static long long s_taskletPoolMisses = 0;
+
+static bool TaskletTypeIsPooled( PyTypeObject* type )
+{
+	return !PyType_HasFeature( type, Py_TPFLAGS_HEAPTYPE );
+}
+
+static void TrimTaskletPool( size_t maxSize )
+{
+	while( s_taskletObjectPool.size() > maxSize )
+	{
+		PyObject_GC_Del( s_taskletObjectPool.back() );
+
+		s_taskletObjectPool.pop_back();
+	}
+
+	while( s_taskletImplementationPool.size() > maxSize )
+	{
+		PyObject_Free( s_taskletImplementationPool.back() );
+
+		s_taskletImplementationPool.pop_back();
+	}
+}
+
+static void SetTaskletPoolMaxSize( size_t maxSize )
+{
+	s_taskletPoolMaxSize = maxSize;
+
+	TrimTaskletPool( maxSize );
+}
+
 static PyObject*
 	TaskletNew( PyTypeObject* type, PyObject* args, PyObject* kwds )
 {
 	PyTaskletObject* self;
 
+	if( s_taskletPoolMaxSize > 0 && TaskletTypeIsPooled( type ) )
+	{
+		if( !s_taskletObjectPool.empty() )
+		{
+			s_taskletPoolHits++;
+
+			self = s_taskletObjectPool.back();
+
+			s_taskletObjectPool.pop_back();
+
+			// Mirror what tp_alloc would have done with fresh memory
+			PyObject_Init( (PyObject*)self, type );
+
+			self->m_implementation = nullptr;
+
+			self->m_weakrefList = nullptr;
+
+			PyObject_GC_Track( self );
+
+			return (PyObject*)self;
+		}
+
+		s_taskletPoolMisses++;
+	}
+
 	self = (PyTaskletObject*)type->tp_alloc( type, 0 );
 
 	if( self != nullptr )
@@ -44,7 +111,16 @@ static int
 {
 	PyTaskletObject* taskletObject = reinterpret_cast<PyTaskletObject*>( self );
 
-	taskletObject->m_implementation = (Tasklet*)PyObject_Malloc( sizeof( Tasklet ) );
+	if( !s_taskletImplementationPool.empty() )
+	{
+		taskletObject->m_implementation = s_taskletImplementationPool.back();
+
+		s_taskletImplementationPool.pop_back();
+	}
+	else
+	{
+		taskletObject->m_implementation = (Tasklet*)PyObject_Malloc( sizeof( Tasklet ) );
+	}
 
     Tasklet* tasklet = taskletObject->m_implementation;
 
@@ -113,7 +189,14 @@ static void
     {
 		tasklet->~Tasklet();
 
-		PyObject_Free( tasklet );
+		if( s_taskletImplementationPool.size() < s_taskletPoolMaxSize )
+		{
+			s_taskletImplementationPool.push_back( tasklet );
+		}
+		else
+		{
+			PyObject_Free( tasklet );
+		}
     }
 	
     // Handle weakrefs
@@ -122,6 +205,14 @@ static void
 		PyObject_ClearWeakRefs( (PyObject*)self );
 	}
 
+	// Keep the object memory for reuse, it is already untracked so only needs re-initialising on the way out
+	if( s_taskletObjectPool.size() < s_taskletPoolMaxSize && TaskletTypeIsPooled( Py_TYPE( self ) ) )
+	{
+		s_taskletObjectPool.push_back( self );
+
+		return;
+	}
+
 	Py_TYPE( self )->tp_free( (PyObject*)self );
 }
 
@@ -233,6 +324,18 @@ static PyObject*
 	return PyLong_FromLong( self->m_implementation->ThreadId() );
 }
 
+static PyObject*
+	TaskletIdGet( PyTaskletObject* self, void* closure )
+{
+	// Ensure PyTaskletObject is in a valid state
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromUnsignedLongLong( self->m_implementation->GetId() );
+}
+
 static PyObject*
 	TaskletNextGet( PyTaskletObject* self, void* closure )
 {
@@ -316,9 +419,7 @@ static PyObject*
 		return nullptr;
 	}
 
-    std::string str = self->m_implementation->GetMethodName();
-
-    return PyUnicode_FromStringAndSize( str.c_str(), str.size() );
+	return self->m_implementation->GetMethodName();
 }
 
 static PyObject*
@@ -330,9 +431,7 @@ static PyObject*
 		return nullptr;
 	}
 
-	std::string str = self->m_implementation->GetModuleName();
-
-	return PyUnicode_FromStringAndSize( str.c_str(), str.size() );
+	return self->m_implementation->GetModuleName();
 }
 
 static PyObject*
@@ -344,9 +443,7 @@ static PyObject*
 		return nullptr;
 	}
 
-	std::string str = self->m_implementation->GetContext();
-
-	return PyUnicode_FromStringAndSize( str.c_str(), str.size() );
+	return self->m_implementation->GetContext();
 }
 
 static int
@@ -358,14 +455,14 @@ static int
 		return -1;
 	}
 
-	std::string cstr;
-
-	if( !StdStringFromPyObject( value, cstr ) )
+	if( !value || !PyUnicode_Check( value ) )
 	{
+		PyErr_SetString( PyExc_TypeError, "value must be a string" );
+
 		return -1;
 	}
 
-	self->m_implementation->SetContext( cstr );
+	self->m_implementation->SetContext( value );
 
 	return 0;
 }
@@ -379,9 +476,7 @@ static PyObject*
 		return nullptr;
 	}
 
-	std::string str = self->m_implementation->GetFilename();
-
-	return PyUnicode_FromStringAndSize( str.c_str(), str.size() );
+	return self->m_implementation->GetFilename();
 }
 
 static PyObject*
@@ -395,6 +490,11 @@ static PyObject*
 
 	long lineNumber = self->m_implementation->GetLineNumber();
 
+	if( lineNumber == -1 && PyErr_Occurred() )
+	{
+		return nullptr;
+	}
+
 	return PyLong_FromLong( lineNumber );
 }
 
@@ -407,9 +507,7 @@ static PyObject*
 		return nullptr;
 	}
 
-	std::string str = self->m_implementation->GetParentCallsite();
-
-	return PyUnicode_FromStringAndSize( str.c_str(), str.size() );
+	return self->m_implementation->GetParentCallsite();
 }
 
 static int
@@ -421,14 +519,14 @@ static int
 		return -1;
 	}
 
-	std::string cstr;
-
-	if( !StdStringFromPyObject( value, cstr ) )
+	if( !value || !PyUnicode_Check( value ) )
 	{
+		PyErr_SetString( PyExc_TypeError, "value must be a string" );
+
 		return -1;
 	}
 
-	self->m_implementation->SetParentCallsite( cstr );
+	self->m_implementation->SetParentCallsite( value );
 
 	return 0;
 }
@@ -621,6 +719,46 @@ static PyObject* TaskletTimesSwitchedToGet(PyTaskletObject* self, void* closure)
     return PyLong_FromLong( self->m_implementation->GetTimesSwitchedTo() );
 }
 
+static PyObject* TaskletWallTimeGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetWallTime() );
+}
+
+static PyObject* TaskletCpuTimeGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetCpuTime() );
+}
+
+static PyObject* TaskletSwitchInCountGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLong( self->m_implementation->GetSwitchInCount() );
+}
+
+static PyObject* TaskletLongestSliceGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetLongestSlice() );
+}
+
 static PyObject* TaskletExceptionHandlerGet(PyTaskletObject* self, void* closure)
 {
 	if( !PyTaskletObjectIsValid( self ) )
@@ -635,6 +773,7 @@ static PyObject* TaskletExceptionHandlerGet(PyTaskletObject* self, void* closure
 		Py_RETURN_NONE;
     }
 
+    Py_INCREF( exceptionHandler );
     return exceptionHandler;
 }
 
@@ -665,6 +804,98 @@ static int TaskletExceptionHandlerSet(PyTaskletObject* self, PyObject* value, vo
     return 0;
 }
 
+static PyObject* TaskletPriorityGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLong( self->m_implementation->GetPriority() );
+}
+
+static int TaskletPrioritySet( PyTaskletObject* self, PyObject* value, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return -1;
+	}
+
+	if( !value || !PyLong_Check( value ) )
+	{
+		PyErr_SetString( PyExc_TypeError, "priority must be an integer" );
+		return -1;
+	}
+
+	long priority = PyLong_AsLong( value );
+
+	if( PyErr_Occurred() )
+	{
+		return -1;
+	}
+
+	if( priority < 0 || priority >= ScheduleManager::s_numberOfPriorityLevels )
+	{
+		PyErr_Format( PyExc_ValueError, "priority must be between 0 and %d", ScheduleManager::s_numberOfPriorityLevels - 1 );
+		return -1;
+	}
+
+	self->m_implementation->SetPriority( priority );
+
+	return 0;
+}
+
+static PyObject* TaskletDeadlineGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetDeadline() );
+}
+
+static PyObject* TaskletBlockedSinceGet( PyTaskletObject* self, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	return PyLong_FromLongLong( self->m_implementation->GetBlockTime() );
+}
+
+static int TaskletDeadlineSet( PyTaskletObject* self, PyObject* value, void* closure )
+{
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return -1;
+	}
+
+	if( !value || !PyLong_Check( value ) )
+	{
+		PyErr_SetString( PyExc_TypeError, "deadline_ns must be an integer" );
+		return -1;
+	}
+
+	long long deadline = PyLong_AsLongLong( value );
+
+	if( PyErr_Occurred() )
+	{
+		return -1;
+	}
+
+	if( deadline < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "deadline_ns must not be negative" );
+		return -1;
+	}
+
+	self->m_implementation->SetDeadline( deadline );
+
+	return 0;
+}
+
 static PyGetSetDef Tasklet_getsetters[] = {
 	{ "alive", 
         (getter)TaskletAliveGet,
@@ -708,6 +939,12 @@ static PyGetSetDef Tasklet_getsetters[] = {
         "Id of the thread the tasklet belongs to.",
         NULL },
 
+	{ "id",
+        (getter)TaskletIdGet,
+        NULL,
+        "Unique id of the tasklet, never reused within a process. Identifies the tasklet in trace records.",
+        NULL },
+
 	{ "next",
         (getter)TaskletNextGet,
         NULL,
@@ -800,10 +1037,45 @@ static PyGetSetDef Tasklet_getsetters[] = {
       NULL,
 	  "Number of times this tasklet has been switched to. This gets reset to zero when the tasklet is re-bound",
 	  NULL },
+	{ "wall_time_ns",
+	  (getter)TaskletWallTimeGet,
+      NULL,
+	  "Total wall time in nanoseconds this tasklet has spent as the current tasklet, accumulated on every switch. This gets reset to zero when the tasklet is re-bound",
+	  NULL },
+	{ "cpu_time_ns",
+	  (getter)TaskletCpuTimeGet,
+      NULL,
+	  "Total thread cpu time in nanoseconds this tasklet has spent as the current tasklet. Only accumulated while scheduler.set_track_thread_cpu_time is enabled. This gets reset to zero when the tasklet is re-bound",
+	  NULL },
+	{ "switch_in_count",
+	  (getter)TaskletSwitchInCountGet,
+      NULL,
+	  "Number of times this tasklet has become the current tasklet, including resuming after a nested tasklet. This gets reset to zero when the tasklet is re-bound",
+	  NULL },
+	{ "longest_slice_ns",
+	  (getter)TaskletLongestSliceGet,
+      NULL,
+	  "Longest single stretch of wall time in nanoseconds this tasklet has spent as the current tasklet. This gets reset to zero when the tasklet is re-bound",
+	  NULL },
 	{ "exception_handler",
 	  (getter)TaskletExceptionHandlerGet,
 	  (setter)TaskletExceptionHandlerSet,
 	  "If dont_raise is True, this callable will be called with one argument (a tasklet information string) whenever an uncaught exception is raised by the tasket's callable",
+      NULL },
+	{ "priority",
+	  (getter)TaskletPriorityGet,
+	  (setter)TaskletPrioritySet,
+	  "Priority level used when the tasklet is inserted into the runnables queue, from 0 (default) to 3. Higher priority tasklets are run first. A change takes effect the next time the tasklet is inserted.",
+      NULL },
+	{ "deadline_ns",
+	  (getter)TaskletDeadlineGet,
+	  (setter)TaskletDeadlineSet,
+	  "Time on the time.monotonic_ns() clock by which the tasklet should be run, 0 (default) if it has no deadline. Used to order earliest deadline first runs and count missed deadlines.",
+      NULL },
+	{ "blocked_since_ns",
+	  (getter)TaskletBlockedSinceGet,
+	  NULL,
+	  "Time on the time.monotonic_ns() clock at which the tasklet blocked on a channel, 0 if it is not blocked.",
       NULL },
 	{ NULL } /* Sentinel */
 };
@@ -877,6 +1149,34 @@ static PyObject*
 
 }
 
+static PyObject*
+	TaskletInsertAt( PyTaskletObject* self, PyObject* args )
+{
+	// Ensure PyTaskletObject is in a valid state
+	if( !PyTaskletObjectIsValid( self ) )
+	{
+		return nullptr;
+	}
+
+	long long wakeTime = 0;
+
+	if( !PyArg_ParseTuple( args, "L:insert_at", &wakeTime ) )
+	{
+		return nullptr;
+	}
+
+    Tasklet* tasklet = self->m_implementation;
+
+    if( !tasklet->InsertAt( wakeTime ) )
+    {
+		return nullptr;
+    }
+
+    tasklet->Incref();
+
+    return tasklet->PythonObject();
+}
+
 static PyObject*
 	TaskletRemove( PyTaskletObject* self, PyObject* Py_UNUSED( ignored ) )
 {
@@ -1095,6 +1395,19 @@ static PyObject*
 	return nullptr;
 }
 
+static PyObject*
+	TaskletSizeof( PyTaskletObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	size_t size = Py_TYPE( self )->tp_basicsize;
+
+	if( self->m_implementation )
+	{
+		size += self->m_implementation->GetAllocatedSize();
+	}
+
+	return PyLong_FromSize_t( size );
+}
+
 
 static int
 	TaskletTraverse( PyTaskletObject* self, visitproc visit, void* arg )
@@ -1175,6 +1488,13 @@ static PyMethodDef Tasklet_methods[] = {
         METH_NOARGS,
         "Insert a tasklet at the end of the scheduler runnables queue." },
 
+	{ "insert_at",
+        (PyCFunction)TaskletInsertAt,
+        METH_VARARGS,
+        "Remove a tasklet from the runnables queue and insert it at the end again once the time.monotonic_ns() clock reaches monotonic_ns. If called on the current tasklet it is suspended until then. Due tasklets are inserted when the scheduler next runs. \n\n\
+            :param monotonic_ns: Time on the time.monotonic_ns() clock \n\
+            :type monotonic_ns: Integer" },
+
 	{ "remove",
         (PyCFunction)TaskletRemove,
         METH_NOARGS,
@@ -1224,6 +1544,11 @@ static PyMethodDef Tasklet_methods[] = {
         METH_NOARGS,
         "Set the Context object to be used while this tasklet runs." },
 
+	{ "__sizeof__",
+        (PyCFunction)TaskletSizeof,
+        METH_NOARGS,
+        "Size of the Tasklet in memory in bytes, including its implementation object. The greenlet and any bound Python objects are not included." },
+
 	{ "bind",
         (PyCFunction)TaskletBind,
         METH_VARARGS | METH_KEYWORDS,
@@ -1409,7 +1734,7 @@ static PyObject*
 				t->IsBlocked(),
 				t->IsPaused(),
 				t->IsScheduled(),
-				t->GetContext().data()
+				t->GetContextUtf8()
             );
 
 			PyObject* exceptionHandlerResult = PyObject_CallOneArg( exceptionHandlerCallable, formatString );
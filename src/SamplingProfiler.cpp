@@ -0,0 +1,263 @@
+#include "SamplingProfiler.h"
+
+#include <algorithm>
+#include <chrono>
+#include <vector>
+
+#include "GILRAII.h"
+#include "ScheduleManager.h"
+#include "Tasklet.h"
+
+// Collapsed stack frames are separated by ';' and terminated by a newline, neither may appear in a frame
+static void AppendFrameText( std::string& stack, const char* text )
+{
+	for( const char* c = text; *c; c++ )
+	{
+		stack.push_back( *c == ';' || *c == '\n' ? ' ' : *c );
+	}
+}
+
+bool SamplingProfiler::Start( long long interval )
+{
+	if( s_active )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "The sampling profiler is already running." );
+
+		return false;
+	}
+
+	s_interval = interval;
+
+	s_stopping = false;
+
+	s_thread = std::thread( &SamplingProfiler::Run );
+
+	s_active = true;
+
+	return true;
+}
+
+void SamplingProfiler::Stop()
+{
+	if( !s_active )
+	{
+		return;
+	}
+
+	{
+		std::lock_guard<std::mutex> lock( s_mutex );
+
+		s_stopping = true;
+	}
+
+	s_wake.notify_all();
+
+	// The sampler may be waiting on the GIL to take a sample
+	Py_BEGIN_ALLOW_THREADS
+
+	s_thread.join();
+
+	Py_END_ALLOW_THREADS
+
+	s_active = false;
+}
+
+bool SamplingProfiler::IsActive()
+{
+	return s_active;
+}
+
+PyObject* SamplingProfiler::GetCollapsedStacks()
+{
+	std::vector<const std::pair<const std::string, long long>*> stacks;
+
+	stacks.reserve( s_stacks.size() );
+
+	for( const std::pair<const std::string, long long>& stack : s_stacks )
+	{
+		stacks.push_back( &stack );
+	}
+
+	// Sorted so the output is stable between calls
+	std::sort( stacks.begin(), stacks.end(), []( const std::pair<const std::string, long long>* a, const std::pair<const std::string, long long>* b ) {
+		return a->first < b->first;
+	} );
+
+	std::string collapsed;
+
+	for( const std::pair<const std::string, long long>* stack : stacks )
+	{
+		collapsed.append( stack->first );
+		collapsed.push_back( ' ' );
+		collapsed.append( std::to_string( stack->second ) );
+		collapsed.push_back( '\n' );
+	}
+
+	return PyUnicode_FromStringAndSize( collapsed.data(), static_cast<Py_ssize_t>( collapsed.size() ) );
+}
+
+long long SamplingProfiler::GetSampleCount()
+{
+	return s_sampleCount;
+}
+
+void SamplingProfiler::Reset()
+{
+	s_stacks.clear();
+
+	s_sampleCount = 0;
+}
+
+void SamplingProfiler::Run()
+{
+	std::chrono::nanoseconds interval( s_interval );
+
+	auto nextSample = std::chrono::steady_clock::now() + interval;
+
+	while( true )
+	{
+		{
+			std::unique_lock<std::mutex> lock( s_mutex );
+
+			if( s_wake.wait_until( lock, nextSample, []() { return s_stopping.load(); } ) )
+			{
+				return;
+			}
+		}
+
+		{
+			GILRAII gil;
+
+			if( s_stopping )
+			{
+				return;
+			}
+
+			Sample();
+		}
+
+		// Samples missed while waiting for the GIL are skipped rather than taken back to back
+		nextSample = std::max( nextSample + interval, std::chrono::steady_clock::now() );
+	}
+}
+
+void SamplingProfiler::Sample()
+{
+	PyObject* sys = PyImport_ImportModule( "sys" );
+
+	PyObject* frames = sys ? PyObject_CallMethod( sys, "_current_frames", nullptr ) : nullptr;
+
+	Py_XDECREF( sys );
+
+	if( !frames )
+	{
+		PyErr_WriteUnraisable( nullptr );
+
+		return;
+	}
+
+	std::vector<PyCodeObject*> codes;
+
+	std::string stack;
+
+	for( ScheduleManager* scheduleManager : ScheduleManager::GetScheduleManagers() )
+	{
+		PyObject* threadId = PyLong_FromUnsignedLong( scheduleManager->ThreadId() );
+
+		PyObject* frame = threadId ? PyDict_GetItemWithError( frames, threadId ) : nullptr;
+
+		Py_XDECREF( threadId );
+
+		if( !frame )
+		{
+			if( PyErr_Occurred() )
+			{
+				PyErr_WriteUnraisable( nullptr );
+			}
+
+			continue;
+		}
+
+		codes.clear();
+
+		// Walk from the innermost frame outwards, the stack is written outermost first
+		PyFrameObject* current = reinterpret_cast<PyFrameObject*>( Py_NewRef( frame ) );
+
+		while( current )
+		{
+			codes.push_back( PyFrame_GetCode( current ) );
+
+			PyFrameObject* back = PyFrame_GetBack( current );
+
+			Py_DECREF( current );
+
+			current = back;
+		}
+
+		stack.clear();
+
+		AppendTaskletLabel( scheduleManager, stack );
+
+		for( auto code = codes.rbegin(); code != codes.rend(); code++ )
+		{
+			const char* name = PyUnicode_AsUTF8( ( *code )->co_qualname );
+
+			const char* fileName = PyUnicode_AsUTF8( ( *code )->co_filename );
+
+			stack.push_back( ';' );
+
+			AppendFrameText( stack, name ? name : "unknown" );
+
+			stack.append( " (" );
+
+			AppendFrameText( stack, fileName ? fileName : "unknown" );
+
+			stack.push_back( ':' );
+
+			stack.append( std::to_string( ( *code )->co_firstlineno ) );
+
+			stack.push_back( ')' );
+
+			Py_DECREF( *code );
+		}
+
+		PyErr_Clear();
+
+		s_stacks[stack]++;
+
+		s_sampleCount++;
+	}
+
+	Py_DECREF( frames );
+}
+
+void SamplingProfiler::AppendTaskletLabel( ScheduleManager* scheduleManager, std::string& stack )
+{
+	Tasklet* tasklet = scheduleManager->GetCurrentTasklet();
+
+	if( tasklet->IsMain() )
+	{
+		stack.append( "main" );
+
+		return;
+	}
+
+	const char* context = tasklet->GetContextUtf8();
+
+	if( *context )
+	{
+		AppendFrameText( stack, context );
+
+		return;
+	}
+
+	PyObject* methodName = tasklet->GetMethodName();
+
+	const char* name = methodName ? PyUnicode_AsUTF8( methodName ) : nullptr;
+
+	AppendFrameText( stack, name ? name : "unknown_method" );
+
+	Py_XDECREF( methodName );
+
+	PyErr_Clear();
+}
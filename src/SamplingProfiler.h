@@ -0,0 +1,65 @@
+#pragma once
+#ifndef SamplingProfiler_H
+#define SamplingProfiler_H
+
+#include "stdafx.h"
+
+#include <atomic>
+#include <condition_variable>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <unordered_map>
+
+class ScheduleManager;
+
+// Periodically samples the Python stack of every ScheduleManager's thread from a background thread.
+// Each sample is rooted at the current tasklet's context, falling back to its method name, so time can be
+// grouped by tasklet even though tasklets share one thread. Samples are aggregated as collapsed stacks.
+// All methods must be called with the GIL held.
+class SamplingProfiler
+{
+public:
+	// Returns false with a Python exception set on failure
+	static bool Start( long long interval );
+
+	// Waits for the sampling thread to exit, releasing the GIL while waiting
+	static void Stop();
+
+	static bool IsActive();
+
+	// Returns a new str with one "frame;frame;frame count" line per distinct stack
+	static PyObject* GetCollapsedStacks();
+
+	static long long GetSampleCount();
+
+	static void Reset();
+
+private:
+
+	static void Run();
+
+	// Called on the sampling thread with the GIL held
+	static void Sample();
+
+	static void AppendTaskletLabel( ScheduleManager* scheduleManager, std::string& stack );
+
+	inline static std::thread s_thread;
+
+	inline static std::mutex s_mutex;
+
+	inline static std::condition_variable s_wake;
+
+	inline static std::atomic<bool> s_stopping = false;
+
+	inline static bool s_active = false;
+
+	inline static long long s_interval = 0;
+
+	// Guarded by the GIL
+	inline static std::unordered_map<std::string, long long> s_stacks;
+
+	inline static long long s_sampleCount = 0;
+};
+
+#endif // SamplingProfiler_H
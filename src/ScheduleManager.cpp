@@ -9,10 +9,20 @@
 #endif
 #endif
 
+#include <algorithm>
+#include <unordered_map>
+#include <vector>
+
 #include "Tasklet.h"
+#include "Channel.h"
 #include "PyTasklet.h"
 #include "PyScheduleManager.h"
 #include "GILRAII.h"
+#include "AllocationTracker.h"
+#include "Probes.h"
+#include "TaskletProfiler.h"
+#include "TraceCapture.h"
+#include "Utils.h"
 
 ScheduleManager::ScheduleManager( PyObject* pythonObject ) :
 	PythonCppType( pythonObject ),
@@ -25,10 +35,25 @@ ScheduleManager::ScheduleManager( PyObject* pythonObject ) :
 	m_totalTaskletRunTimeLimit(-1),
     m_stopScheduler(false),
 	m_numberOfTaskletsInQueue(0),
+	m_numberOfTaskletsCompletedLastRunWithTimeout( 0 ),
+	m_numberOfTaskletsSwitchedLastRunWithTimeout( 0 ),
+	m_numberOfTaskletsMissedDeadlineLastRunWithTimeout( 0 ),
+	m_stats{},
 	m_firstTimeLimitTestSkipped(false),
 	m_runType(RunType::STANDARD),
-	m_startTime( std::chrono::steady_clock::now() )
+	m_startTime( std::chrono::steady_clock::now() ),
+	m_sliceStartTime( MonotonicTimeNanoseconds() ),
+	m_sliceStartCpuTime( 0 ),
+	m_watchdogSwitchCount( 0 ),
+	m_runningTasklet( false )
 {
+	for( int level = 0; level < s_numberOfPriorityLevels; level++ )
+	{
+		m_priorityLevelHead[level] = nullptr;
+		m_priorityLevelCount[level] = 0;
+		m_priorityLevelOvertaken[level] = 0;
+	}
+
     // Create scheduler tasklet
 	CreateSchedulerTasklet();
 
@@ -36,6 +61,13 @@ ScheduleManager::ScheduleManager( PyObject* pythonObject ) :
 
 	m_previousTasklet = m_schedulerTasklet;
 
+	{
+		std::lock_guard<std::mutex> lock( s_scheduleManagersMutex );
+
+		s_scheduleManagers.push_back( this );
+	}
+
+	TraceCapture::OnScheduleManagerCreated( this );
 }
 
 ScheduleManager::~ScheduleManager()
@@ -45,10 +77,30 @@ ScheduleManager::~ScheduleManager()
     //Clear any Tasklets that may be remaining and associated with this Thread
 	ClearThreadTasklets();
 
+	// Release any timers that were not reached
+	m_timerWheel.Clear( m_expiredTimers );
+
+	for( TimerEntry& timer : m_expiredTimers )
+	{
+		timer.m_tasklet->Decref();
+	}
+
+	m_expiredTimers.clear();
+
 	s_closingScheduleManagers.erase( m_threadId );
 
 	m_schedulerTasklet->Decref();
 
+	TraceCapture::OnScheduleManagerDestroyed( this );
+
+	TaskletProfiler::OnScheduleManagerDestroyed( this );
+
+	{
+		std::lock_guard<std::mutex> lock( s_scheduleManagersMutex );
+
+		s_scheduleManagers.erase( std::find( s_scheduleManagers.begin(), s_scheduleManagers.end(), this ) );
+	}
+
     s_numberOfActiveScheduleManagers--;
 }
 
@@ -79,6 +131,26 @@ long ScheduleManager::NumberOfActiveScheduleManagers()
 	return s_numberOfActiveScheduleManagers;
 }
 
+const std::vector<ScheduleManager*>& ScheduleManager::GetScheduleManagers()
+{
+	return s_scheduleManagers;
+}
+
+std::mutex& ScheduleManager::GetScheduleManagersMutex()
+{
+	return s_scheduleManagersMutex;
+}
+
+unsigned long long ScheduleManager::GetWatchdogSwitchCount() const
+{
+	return m_watchdogSwitchCount.load( std::memory_order_relaxed );
+}
+
+bool ScheduleManager::IsRunningTasklet() const
+{
+	return m_runningTasklet.load( std::memory_order_relaxed );
+}
+
 // Returns a new schedule manager reference
 ScheduleManager* ScheduleManager::GetThreadScheduleManager()
 {
@@ -142,12 +214,88 @@ void ScheduleManager::SetCurrentTasklet( Tasklet* tasklet )
     {
 		OnSwitch();
 
+		m_stats.m_switches++;
+
+		RecordSlice( tasklet );
+
+		if( m_traceBuffer.IsEnabled() )
+		{
+			// Reuse the slice timestamp rather than reading the clock again
+			m_traceBuffer.Record( m_sliceStartTime, TraceEvent::SWITCH, m_currentTasklet ? m_currentTasklet->GetId() : 0, tasklet->GetId(), 0 );
+
+			if( TraceCapture::IsActive() )
+			{
+				TraceCapture::OnSwitch( this, tasklet, m_sliceStartTime );
+			}
+		}
+
+		if( SCHEDULER_PROBE_ENABLED( tasklet_switch ) )
+		{
+			SCHEDULER_PROBE( tasklet_switch, m_currentTasklet ? m_currentTasklet->GetId() : 0, tasklet->GetId(), tasklet->GetContextUtf8() );
+		}
+
 		RunSchedulerCallback( m_currentTasklet, tasklet );
 
+		if( TaskletProfiler::IsActive() )
+		{
+			// After the callback so its calls are charged to the outgoing tasklet
+			TaskletProfiler::OnSwitch( this, m_currentTasklet, tasklet, MonotonicTimeNanoseconds() );
+		}
+
 		m_currentTasklet = tasklet;
+
+		if( AllocationTracker::IsActive() )
+		{
+			AllocationTracker::OnSwitch( tasklet );
+		}
+
+		m_watchdogSwitchCount.fetch_add( 1, std::memory_order_relaxed );
+
+		m_runningTasklet.store( !tasklet->IsMain(), std::memory_order_relaxed );
     }
 }
 
+void ScheduleManager::RecordSlice( Tasklet* next )
+{
+	long long time = MonotonicTimeNanoseconds();
+
+	long long cpuTime = s_trackThreadCpuTime ? ThreadCpuTimeNanoseconds() : 0;
+
+	if( m_currentTasklet )
+	{
+		// Cpu time is only valid if tracking was enabled for the whole slice
+		long long cpuSlice = ( cpuTime > 0 && m_sliceStartCpuTime > 0 ) ? cpuTime - m_sliceStartCpuTime : 0;
+
+		m_currentTasklet->AddSlice( time - m_sliceStartTime, cpuSlice );
+	}
+
+	next->OnSwitchedIn();
+
+	long long insertTime = next->GetInsertTime();
+
+	// Only switches out of the runnables queue have an insert time
+	if( insertTime != 0 )
+	{
+		m_queueWaitHistogram.Record( time - insertTime );
+
+		next->SetInsertTime( 0 );
+	}
+
+	m_sliceStartTime = time;
+
+	m_sliceStartCpuTime = cpuTime;
+}
+
+bool ScheduleManager::GetTrackThreadCpuTime()
+{
+	return s_trackThreadCpuTime;
+}
+
+void ScheduleManager::SetTrackThreadCpuTime( bool value )
+{
+	s_trackThreadCpuTime = value;
+}
+
 Tasklet* ScheduleManager::GetCurrentTasklet()
 {
 	return m_currentTasklet;
@@ -179,10 +327,25 @@ void ScheduleManager::InsertTaskletToRunNext( Tasklet* tasklet )
 	{
 		m_previousTasklet = tasklet;
 	}
+
+	// Tasklets set to run next are not part of any priority level
+	tasklet->SetQueueLevel( -1 );
+
+	// Inserting cancels any pending timer
+	tasklet->GetScheduleManager()->CancelTimer( tasklet );
+
 	tasklet->Unblock();
 	tasklet->SetScheduled( true );
 
 	m_numberOfTaskletsInQueue++;
+
+	m_stats.m_inserts++;
+
+	m_stats.m_queueHighWaterMark = std::max( m_stats.m_queueHighWaterMark, m_numberOfTaskletsInQueue );
+
+	tasklet->SetInsertTime( MonotonicTimeNanoseconds() );
+
+	Trace( TraceEvent::INSERT, tasklet->GetId(), 0, TRACE_FLAG_RUN_NEXT );
 }
 
 void ScheduleManager::InsertTasklet( Tasklet* tasklet )
@@ -193,20 +356,25 @@ void ScheduleManager::InsertTasklet( Tasklet* tasklet )
 	{
 		tasklet->Incref();
 
-		taskletScheduleManager->m_previousTasklet->SetNext( tasklet );
-
-		tasklet->SetPrevious( taskletScheduleManager->m_previousTasklet );
-
-		// Clear out possible old next
-		tasklet->SetNext( nullptr );
+		taskletScheduleManager->LinkTaskletByPriority( tasklet );
 
-		taskletScheduleManager->m_previousTasklet = tasklet;
+		// Inserting cancels any pending timer
+		taskletScheduleManager->CancelTimer( tasklet );
 
 		tasklet->Unblock();	// TODO should probably not be here and replaced with error path
 
 		tasklet->SetScheduled( true );
 
-        m_numberOfTaskletsInQueue++;
+		// Counted on the manager whose queue the tasklet joined, which differs from this one for cross thread inserts
+		taskletScheduleManager->m_numberOfTaskletsInQueue++;
+
+		taskletScheduleManager->m_stats.m_inserts++;
+
+		taskletScheduleManager->m_stats.m_queueHighWaterMark = std::max( taskletScheduleManager->m_stats.m_queueHighWaterMark, taskletScheduleManager->m_numberOfTaskletsInQueue );
+
+		tasklet->SetInsertTime( MonotonicTimeNanoseconds() );
+
+		taskletScheduleManager->Trace( TraceEvent::INSERT, tasklet->GetId() );
     }
 	else
 	{
@@ -214,6 +382,290 @@ void ScheduleManager::InsertTasklet( Tasklet* tasklet )
 	}
 }
 
+void ScheduleManager::LinkTaskletByPriority( Tasklet* tasklet )
+{
+	int level = tasklet->GetPriority();
+
+	// Find the front of the highest priority segment below the tasklet's level
+	Tasklet* lowerPriorityHead = nullptr;
+
+	for( int lowerLevel = level - 1; lowerLevel >= 0; lowerLevel-- )
+	{
+		if( m_priorityLevelHead[lowerLevel] )
+		{
+			lowerPriorityHead = m_priorityLevelHead[lowerLevel];
+			break;
+		}
+	}
+
+	if( lowerPriorityHead )
+	{
+		// Queue in front of all lower priority tasklets
+		Tasklet* previous = lowerPriorityHead->Previous();
+
+		previous->SetNext( tasklet );
+
+		tasklet->SetPrevious( previous );
+
+		tasklet->SetNext( lowerPriorityHead );
+
+		lowerPriorityHead->SetPrevious( tasklet );
+	}
+	else
+	{
+		m_previousTasklet->SetNext( tasklet );
+
+		tasklet->SetPrevious( m_previousTasklet );
+
+		// Clear out possible old next
+		tasklet->SetNext( nullptr );
+
+		m_previousTasklet = tasklet;
+	}
+
+	tasklet->SetQueueLevel( level );
+
+	if( !m_priorityLevelHead[level] )
+	{
+		m_priorityLevelHead[level] = tasklet;
+	}
+
+	m_priorityLevelCount[level]++;
+
+	if( lowerPriorityHead && s_priorityAgingThreshold > 0 )
+	{
+		// Age the levels that have just been overtaken so they cannot be starved indefinitely
+		for( int lowerLevel = level - 1; lowerLevel >= 0; lowerLevel-- )
+		{
+			if( m_priorityLevelHead[lowerLevel] && ++m_priorityLevelOvertaken[lowerLevel] >= s_priorityAgingThreshold )
+			{
+				PromotePriorityLevel( lowerLevel );
+			}
+		}
+	}
+}
+
+void ScheduleManager::UnlinkTaskletFromPriorityLevel( Tasklet* tasklet )
+{
+	int level = tasklet->GetQueueLevel();
+
+	if( level < 0 )
+	{
+		return;
+	}
+
+	m_priorityLevelCount[level]--;
+
+	if( m_priorityLevelHead[level] == tasklet )
+	{
+		// The level has made progress
+		m_priorityLevelOvertaken[level] = 0;
+
+		Tasklet* nextInLevel = nullptr;
+
+		if( m_priorityLevelCount[level] > 0 )
+		{
+			// Tasklets inserted to run next can sit inside a segment, skip over them
+			nextInLevel = tasklet->Next();
+
+			while( nextInLevel && nextInLevel->GetQueueLevel() != level )
+			{
+				nextInLevel = nextInLevel->Next();
+			}
+		}
+
+		m_priorityLevelHead[level] = nextInLevel;
+	}
+
+	tasklet->SetQueueLevel( -1 );
+}
+
+void ScheduleManager::PromotePriorityLevel( int level )
+{
+	// Merge the whole segment into the level above, it directly follows that level's segment
+	int remaining = m_priorityLevelCount[level];
+
+	Tasklet* tasklet = m_priorityLevelHead[level];
+
+	while( tasklet && remaining > 0 )
+	{
+		if( tasklet->GetQueueLevel() == level )
+		{
+			tasklet->SetQueueLevel( level + 1 );
+
+			remaining--;
+		}
+
+		tasklet = tasklet->Next();
+	}
+
+	if( !m_priorityLevelHead[level + 1] )
+	{
+		m_priorityLevelHead[level + 1] = m_priorityLevelHead[level];
+	}
+
+	m_priorityLevelCount[level + 1] += m_priorityLevelCount[level];
+
+	m_priorityLevelHead[level] = nullptr;
+
+	m_priorityLevelCount[level] = 0;
+
+	m_priorityLevelOvertaken[level] = 0;
+}
+
+void ScheduleManager::AddTimer( Tasklet* tasklet, long long wakeTime )
+{
+	// A tasklet has at most one pending timer
+	CancelTimer( tasklet );
+
+	tasklet->Incref();
+
+	tasklet->SetWakeTime( wakeTime );
+
+	m_timerWheel.Add( tasklet, wakeTime );
+}
+
+void ScheduleManager::CancelTimer( Tasklet* tasklet )
+{
+	long long wakeTime = tasklet->GetWakeTime();
+
+	if( wakeTime == 0 )
+	{
+		return;
+	}
+
+	tasklet->SetWakeTime( 0 );
+
+	// Timers already taken from the wheel are released by InsertExpiredTimers
+	if( m_timerWheel.Remove( tasklet, wakeTime ) )
+	{
+		tasklet->Decref();
+	}
+}
+
+void ScheduleManager::InsertExpiredTimers()
+{
+	if( m_timerWheel.Size() == 0 )
+	{
+		return;
+	}
+
+	long long now = MonotonicTimeNanoseconds();
+
+	m_timerWheel.Advance( now, m_expiredTimers );
+
+	for( TimerEntry& timer : m_expiredTimers )
+	{
+		Tasklet* tasklet = timer.m_tasklet;
+
+		// A timer cancelled while expired entries are being inserted is no longer the latest timer
+		if( tasklet->GetWakeTime() == timer.m_wakeTime && tasklet->IsAlive() && !tasklet->IsScheduled() )
+		{
+			// A select that times out leaves every channel it was waiting on
+			Channel::TimeoutSelect( tasklet );
+
+			if( !tasklet->IsBlocked() )
+			{
+				tasklet->Insert();
+			}
+		}
+
+		tasklet->Decref();
+	}
+
+	m_expiredTimers.clear();
+}
+
+int ScheduleManager::GetTimerCount() const
+{
+	return m_timerWheel.Size();
+}
+
+void ScheduleManager::SortRunnablesByDeadline()
+{
+	std::vector<Tasklet*> runnables;
+
+	Tasklet* baseTasklet = GetCurrentTasklet();
+
+	for( Tasklet* tasklet = baseTasklet->Next(); tasklet != nullptr; tasklet = tasklet->Next() )
+	{
+		runnables.push_back( tasklet );
+	}
+
+	if( runnables.size() < 2 )
+	{
+		return;
+	}
+
+	// Tasklets without a deadline keep their order behind those with one
+	auto hasEarlierDeadline = []( Tasklet* a, Tasklet* b ) {
+		if( a->GetDeadline() == 0 )
+		{
+			return false;
+		}
+
+		return b->GetDeadline() == 0 || a->GetDeadline() < b->GetDeadline();
+	};
+
+	// Only reorder within a priority level, tasklets set to run next keep their position
+	size_t segmentStart = 0;
+
+	while( segmentStart < runnables.size() )
+	{
+		int level = runnables[segmentStart]->GetQueueLevel();
+
+		size_t segmentEnd = segmentStart + 1;
+
+		if( level >= 0 )
+		{
+			while( segmentEnd < runnables.size() && runnables[segmentEnd]->GetQueueLevel() == level )
+			{
+				segmentEnd++;
+			}
+
+			std::stable_sort( runnables.begin() + segmentStart, runnables.begin() + segmentEnd, hasEarlierDeadline );
+		}
+
+		segmentStart = segmentEnd;
+	}
+
+	Tasklet* previous = baseTasklet;
+
+	for( Tasklet* tasklet : runnables )
+	{
+		previous->SetNext( tasklet );
+
+		tasklet->SetPrevious( previous );
+
+		previous = tasklet;
+	}
+
+	previous->SetNext( nullptr );
+
+	m_previousTasklet = previous;
+
+	// Segment heads may have moved
+	for( int level = 0; level < s_numberOfPriorityLevels; level++ )
+	{
+		m_priorityLevelHead[level] = nullptr;
+	}
+
+	for( Tasklet* tasklet = GetMainTasklet()->Next(); tasklet != nullptr; tasklet = tasklet->Next() )
+	{
+		int level = tasklet->GetQueueLevel();
+
+		if( level >= 0 && !m_priorityLevelHead[level] )
+		{
+			m_priorityLevelHead[level] = tasklet;
+		}
+	}
+}
+
+bool ScheduleManager::IsTimeLimitedRun() const
+{
+	return m_runType == RunType::TIME_LIMITED || m_runType == RunType::TIME_LIMITED_EARLIEST_DEADLINE_FIRST;
+}
+
 // Relinquishes reference ownership of Tasklet
 bool ScheduleManager::RemoveTasklet( Tasklet* tasklet )
 {
@@ -226,6 +678,8 @@ bool ScheduleManager::RemoveTasklet( Tasklet* tasklet )
 		return false;
     }
 
+    UnlinkTaskletFromPriorityLevel( tasklet );
+
     if(previous != nullptr)
 	{
 		previous->SetNext( next );
@@ -372,18 +826,32 @@ bool ScheduleManager::Yield()
 	return true;
 }
 
-bool ScheduleManager::RunTaskletsForTime( long long timeout )
+bool ScheduleManager::RunTaskletsForTime( long long timeout, bool earliestDeadlineFirst /* = false */ )
 {
 	TelemetryZone telemetryZone(TMCM_CPP, "ScheduleManager::RunTaskletsForTime()", __FILE__, __LINE__, tracy::Color::LightGreen);
-	s_numberOfTaskletsCompletedLastRunWithTimeout = 0;
+	m_numberOfTaskletsCompletedLastRunWithTimeout = 0;
+
+    m_numberOfTaskletsSwitchedLastRunWithTimeout = 0;
 
-    s_numberOfTaskletsSwitchedLastRunWithTimeout = 0;
+    m_numberOfTaskletsMissedDeadlineLastRunWithTimeout = 0;
 
 	m_totalTaskletRunTimeLimit = timeout;
 
     m_firstTimeLimitTestSkipped = false;
 
-    m_runType = RunType::TIME_LIMITED;
+    // Timers must be in the queue before it is ordered
+    InsertExpiredTimers();
+
+    if( earliestDeadlineFirst )
+    {
+		m_runType = RunType::TIME_LIMITED_EARLIEST_DEADLINE_FIRST;
+
+        SortRunnablesByDeadline();
+    }
+    else
+    {
+		m_runType = RunType::TIME_LIMITED;
+    }
 
     m_startTime = std::chrono::steady_clock::now();
 
@@ -436,6 +904,53 @@ bool ScheduleManager::Run( Tasklet* startTasklet /* = nullptr */ )
 		baseTasklet = GetCurrentTasklet();
     }
 
+	// Pairs every run_start probe with a run_end, whichever way the run returns
+	struct RunProbeScope
+	{
+		unsigned long m_threadId;
+
+		unsigned long long m_taskletId;
+
+		~RunProbeScope()
+		{
+			// Failed runs return with the error set
+			if( SCHEDULER_PROBE_ENABLED( run_end ) )
+			{
+				SCHEDULER_PROBE( run_end, m_threadId, m_taskletId, PyErr_Occurred() ? 0 : 1 );
+			}
+		}
+	} runProbeScope{ m_threadId, GetCurrentTasklet()->GetId() };
+
+	if( SCHEDULER_PROBE_ENABLED( run_start ) )
+	{
+		SCHEDULER_PROBE( run_start, runProbeScope.m_threadId, runProbeScope.m_taskletId );
+	}
+
+    // Only runs started from the main tasklet are counted, nested runs are part of their time
+	struct RunStatsScope
+	{
+		ScheduleManagerStats* m_stats;
+
+		long long m_start;
+
+		~RunStatsScope()
+		{
+			if( m_stats )
+			{
+				m_stats->m_runTime += MonotonicTimeNanoseconds() - m_start;
+			}
+		}
+	} runStatsScope{ nullptr, 0 };
+
+    if( !startTasklet && GetCurrentTasklet()->IsMain() )
+    {
+		m_stats.m_runCalls++;
+
+		runStatsScope = { &m_stats, MonotonicTimeNanoseconds() };
+
+		InsertExpiredTimers();
+    }
+
     bool runComplete = false;
 
     bool runUntilUnblocked = false;
@@ -497,7 +1012,7 @@ bool ScheduleManager::Run( Tasklet* startTasklet /* = nullptr */ )
 					m_stopScheduler = true;
 				}
             }
-            else if (m_runType == RunType::TIME_LIMITED)
+            else if( IsTimeLimitedRun() )
             {
 				// Test Total tasklet Run Limit
 				std::chrono::steady_clock::time_point current_time = std::chrono::steady_clock::now();
@@ -521,6 +1036,16 @@ bool ScheduleManager::Run( Tasklet* startTasklet /* = nullptr */ )
             }
 		}
 
+        if( IsTimeLimitedRun() && currentTasklet->GetDeadline() > 0 )
+        {
+			long long now = MonotonicTimeNanoseconds();
+
+            if( now > currentTasklet->GetDeadline() )
+            {
+				m_numberOfTaskletsMissedDeadlineLastRunWithTimeout++;
+            }
+        }
+
         // If switch returns no error or if the error raised is a tasklet exception raised error
 		if( currentTasklet->SwitchTo() || currentTasklet->TaskletExceptionRaised() )
 		{
@@ -613,10 +1138,10 @@ bool ScheduleManager::Run( Tasklet* startTasklet /* = nullptr */ )
 		{
 			currentTasklet->Decref();
 
-            if (m_runType == RunType::TIME_LIMITED)
+            if( IsTimeLimitedRun() )
             {
                 // Increament tasklet completed value
-				s_numberOfTaskletsCompletedLastRunWithTimeout++;
+				m_numberOfTaskletsCompletedLastRunWithTimeout++;
             }
         }
 
@@ -627,15 +1152,37 @@ bool ScheduleManager::Run( Tasklet* startTasklet /* = nullptr */ )
 
 void ScheduleManager::OnSwitch()
 {
-	if( m_runType == RunType::TIME_LIMITED )
+	if( IsTimeLimitedRun() )
 	{
 		// Increament tasklet switched value
 		// Note this will also increment if a switch was blocked by switchtrap
 		// It is more of an attempted switch value
-		s_numberOfTaskletsSwitchedLastRunWithTimeout++;
+		m_numberOfTaskletsSwitchedLastRunWithTimeout++;
 	}
 }
 
+ScheduleManagerStats& ScheduleManager::GetStats()
+{
+	return m_stats;
+}
+
+void ScheduleManager::ResetStats()
+{
+	m_stats = ScheduleManagerStats{};
+
+	m_stats.m_queueHighWaterMark = m_numberOfTaskletsInQueue;
+}
+
+LatencyHistogram& ScheduleManager::GetQueueWaitHistogram()
+{
+	return m_queueWaitHistogram;
+}
+
+TraceBuffer& ScheduleManager::GetTraceBuffer()
+{
+	return m_traceBuffer;
+}
+
 Tasklet* ScheduleManager::GetMainTasklet()
 {
 	return m_schedulerTasklet;
@@ -659,8 +1206,6 @@ void ScheduleManager::RunSchedulerCallback( Tasklet* previous, Tasklet* next )
     // Run Callback through python
 	if(s_schedulerCallback)
 	{
-		PyObject* args = PyTuple_New( 2 );
-
         PyObject* pyPrevious = Py_None;
 
         if (previous)
@@ -675,17 +1220,13 @@ void ScheduleManager::RunSchedulerCallback( Tasklet* previous, Tasklet* next )
 			pyNext = next->PythonObject();
         }
 
-        Py_IncRef( pyPrevious );
-
-		Py_IncRef( pyNext );
-
-        PyTuple_SetItem( args, 0, pyPrevious );
-
-        PyTuple_SetItem( args, 1, pyNext );
+        // Runs on every switch so call through vectorcall with borrowed arguments on the stack rather than building a tuple
+        // The leading slot is spare so bound method callbacks can prepend self in place
+		PyObject* args[] = { nullptr, pyPrevious, pyNext };
 
-		PyObject_Call( s_schedulerCallback, args, nullptr );
+		PyObject* result = PyObject_Vectorcall( s_schedulerCallback, args + 1, 2 | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr );
 
-        Py_DecRef( args );
+        Py_XDECREF( result );
     }
 
     // Run fast callback bypassing python
@@ -715,19 +1256,26 @@ void ScheduleManager::SetSwitchTrapLevel( int level )
 	m_switchTrapLevel = level;
 }
 
-int ScheduleManager::GetNumberOfTaskletsCompletedLastRunWithTimeout()
+int ScheduleManager::GetNumberOfTaskletsCompletedLastRunWithTimeout() const
 {
-	return s_numberOfTaskletsCompletedLastRunWithTimeout;
+	return m_numberOfTaskletsCompletedLastRunWithTimeout;
 }
 
-int ScheduleManager::GetNumberOfTaskletsSwitchedLastRunWithTimeout()
+int ScheduleManager::GetNumberOfTaskletsSwitchedLastRunWithTimeout() const
 {
-	return s_numberOfTaskletsSwitchedLastRunWithTimeout;
+	return m_numberOfTaskletsSwitchedLastRunWithTimeout;
+}
+
+int ScheduleManager::GetNumberOfTaskletsMissedDeadlineLastRunWithTimeout() const
+{
+	return m_numberOfTaskletsMissedDeadlineLastRunWithTimeout;
 }
 
 
 void ScheduleManager::RegisterTaskletToThread( Tasklet* tasklet )
 {
+	m_deadTaskletsOnSchedulerThread.erase( tasklet );
+
 	m_taskletsOnSchedulerThread.insert( tasklet );
 }
 
@@ -737,6 +1285,16 @@ void ScheduleManager::UnregisterTaskletFromThread( Tasklet* tasklet )
 	{
 		m_taskletsOnSchedulerThread.erase( tasklet );
 	}
+
+	if( !tasklet->IsMain() )
+	{
+		m_deadTaskletsOnSchedulerThread.insert( tasklet );
+	}
+}
+
+void ScheduleManager::ForgetDeadTasklet( Tasklet* tasklet )
+{
+	m_deadTaskletsOnSchedulerThread.erase( tasklet );
 }
 
 void ScheduleManager::ClearThreadTasklets()
@@ -761,9 +1319,118 @@ void ScheduleManager::ClearThreadTasklets()
 
         taskletIter = m_taskletsOnSchedulerThread.begin();
 	}
+
+	// Dead tasklets remove themselves from the set as they are disassociated
+	while( !m_deadTaskletsOnSchedulerThread.empty() )
+	{
+		( *m_deadTaskletsOnSchedulerThread.begin() )->SetScheduleManager( nullptr );
+	}
+}
+
+void ScheduleManager::GetThreadTasklets( std::vector<Tasklet*>& tasklets ) const
+{
+	tasklets.insert( tasklets.end(), m_taskletsOnSchedulerThread.begin(), m_taskletsOnSchedulerThread.end() );
+
+	tasklets.insert( tasklets.end(), m_deadTaskletsOnSchedulerThread.begin(), m_deadTaskletsOnSchedulerThread.end() );
+}
+
+void ScheduleManager::FindLongBlockedTasklets( long long threshold, TaskletCensusGroup group, std::vector<LongBlockedEntry>& entries ) const
+{
+	std::unordered_map<const void*, size_t> groupIndices;
+
+	long long now = MonotonicTimeNanoseconds();
+
+	// Blocked tasklets are always alive so the dead tasklets do not need visiting
+	for( Tasklet* tasklet : m_taskletsOnSchedulerThread )
+	{
+		if( !tasklet->IsBlocked() )
+		{
+			continue;
+		}
+
+		long long blockedTime = now - tasklet->GetBlockTime();
+
+		if( blockedTime <= threshold )
+		{
+			continue;
+		}
+
+		auto inserted = groupIndices.emplace( tasklet->GetCensusKey( group ), entries.size() );
+
+		if( inserted.second )
+		{
+			entries.push_back( LongBlockedEntry{ tasklet, 0, blockedTime } );
+		}
+
+		LongBlockedEntry& entry = entries[inserted.first->second];
+
+		entry.m_count++;
+
+		if( blockedTime > entry.m_longestBlockedTime )
+		{
+			entry.m_oldestTasklet = tasklet;
+
+			entry.m_longestBlockedTime = blockedTime;
+		}
+	}
+}
+
+void ScheduleManager::TaskletCensus( TaskletCensusGroup group, std::vector<TaskletCensusEntry>& entries ) const
+{
+	std::unordered_map<const void*, size_t> groupIndices;
+
+	auto count = [&]( Tasklet* tasklet ) {
+		const void* key = tasklet->GetCensusKey( group );
+
+		auto inserted = groupIndices.emplace( key, entries.size() );
+
+		if( inserted.second )
+		{
+			entries.push_back( TaskletCensusEntry{ tasklet, TaskletCensusCounts{} } );
+		}
+
+		TaskletCensusCounts& counts = entries[inserted.first->second].m_counts;
+
+		if( !tasklet->IsAlive() )
+		{
+			counts.m_dead++;
+		}
+		else if( tasklet->IsBlocked() )
+		{
+			counts.m_blocked++;
+		}
+		else if( tasklet->IsPaused() )
+		{
+			counts.m_paused++;
+		}
+		else
+		{
+			counts.m_runnable++;
+		}
+	};
+
+	for( Tasklet* tasklet : m_taskletsOnSchedulerThread )
+	{
+		count( tasklet );
+	}
+
+	for( Tasklet* tasklet : m_deadTaskletsOnSchedulerThread )
+	{
+		count( tasklet );
+	}
 }
 
 unsigned long ScheduleManager::ThreadId() const
 {
 	return m_threadId;
 }
+
+int ScheduleManager::GetPriorityAgingThreshold()
+{
+	return s_priorityAgingThreshold;
+}
+
+void ScheduleManager::SetPriorityAgingThreshold( int threshold )
+{
+	s_priorityAgingThreshold = threshold;
+}
\ No newline at end of file
@@ -22,10 +22,18 @@
 #include "stdafx.h"
 
 #include "PythonCppType.h"
+#include "Utils.h"
 
+#include <atomic>
 #include <map>
+#include <mutex>
 #include <chrono>
 #include <unordered_set>
+#include <vector>
+
+#include "LatencyHistogram.h"
+#include "TimerWheel.h"
+#include "TraceBuffer.h"
 
 typedef int( schedule_hook_func )( struct PyTaskletObject* from, struct PyTaskletObject* to );  // TODO remove redef
 
@@ -35,11 +43,68 @@ enum class RunType
 {
     STANDARD,
     TIME_LIMITED,
+    TIME_LIMITED_EARLIEST_DEADLINE_FIRST,
     TASKLET_LIMITED
 };
 
 class Tasklet;
 
+// Cumulative activity of one ScheduleManager since creation or the last ResetStats
+struct ScheduleManagerStats
+{
+	long long m_switches;
+
+	long long m_completions;
+
+	long long m_inserts;
+
+	long long m_blocks;
+
+	long long m_kills;
+
+	long long m_runCalls; // runs started from the main tasklet
+
+	long long m_runTime; // nanoseconds spent in runs started from the main tasklet
+
+	int m_queueHighWaterMark;
+};
+
+enum class TaskletCensusGroup
+{
+	CALLSITE,
+	CONTEXT,
+	CHANNEL
+};
+
+struct TaskletCensusCounts
+{
+	long m_runnable = 0;
+
+	long m_blocked = 0;
+
+	long m_paused = 0; // includes tasklets sleeping on a timer
+
+	long m_dead = 0; // finished or unbound but still referenced
+};
+
+// Tasklets sharing a census group, m_tasklet is any one member and is used to describe the group
+struct TaskletCensusEntry
+{
+	Tasklet* m_tasklet;
+
+	TaskletCensusCounts m_counts;
+};
+
+// Tasklets sharing a census group that have been blocked longer than a threshold
+struct LongBlockedEntry
+{
+	Tasklet* m_oldestTasklet;
+
+	long m_count;
+
+	long long m_longestBlockedTime;
+};
+
 class ScheduleManager : public PythonCppType
 {
 public:
@@ -51,6 +116,18 @@ public:
 
     static ScheduleManager* GetThreadScheduleManager();
 
+    // Every ScheduleManager that currently exists, across all threads
+    static const std::vector<ScheduleManager*>& GetScheduleManagers();
+
+    // Guards the list of ScheduleManagers for readers that do not hold the GIL, changes also require the GIL
+    static std::mutex& GetScheduleManagersMutex();
+
+    // Incremented on every switch, safe to read without the GIL
+    unsigned long long GetWatchdogSwitchCount() const;
+
+    // True while a tasklet other than a main tasklet is current, safe to read without the GIL
+    bool IsRunningTasklet() const;
+
 	void SetCurrentTasklet( Tasklet* tasklet );
 
 	Tasklet* GetCurrentTasklet();
@@ -71,7 +148,7 @@ public:
 
     bool RunNTasklets( int n );
 
-    bool RunTaskletsForTime( long long timeout );
+    bool RunTaskletsForTime( long long timeout, bool earliestDeadlineFirst = false );
 
     bool Run( Tasklet* startTasklet = nullptr );
 
@@ -89,9 +166,18 @@ public:
 
     void SetSwitchTrapLevel( int level );
 
-    static int GetNumberOfTaskletsCompletedLastRunWithTimeout();
+    int GetNumberOfTaskletsCompletedLastRunWithTimeout() const;
+
+    int GetNumberOfTaskletsSwitchedLastRunWithTimeout() const;
 
-    static int GetNumberOfTaskletsSwitchedLastRunWithTimeout();
+    int GetNumberOfTaskletsMissedDeadlineLastRunWithTimeout() const;
+
+    ScheduleManagerStats& GetStats();
+
+    void ResetStats();
+
+    // Time tasklets spent in the runnables queue between being inserted and switched in
+    LatencyHistogram& GetQueueWaitHistogram();
 
     void RegisterTaskletToThread( Tasklet* tasklet );
 
@@ -99,13 +185,64 @@ public:
 
 	void ClearThreadTasklets();
 
+    // Stops tracking a dead tasklet, called when it is destroyed or moves to another ScheduleManager
+    void ForgetDeadTasklet( Tasklet* tasklet );
+
+    // Appends every tasklet on this thread, alive or dead but still referenced
+    void GetThreadTasklets( std::vector<Tasklet*>& tasklets ) const;
+
+    // Groups the tasklets on this thread that have been blocked for longer than threshold nanoseconds
+    void FindLongBlockedTasklets( long long threshold, TaskletCensusGroup group, std::vector<LongBlockedEntry>& entries ) const;
+
+    // Aggregates every tasklet on this thread, alive or dead but still referenced, by group
+    void TaskletCensus( TaskletCensusGroup group, std::vector<TaskletCensusEntry>& entries ) const;
+
 	unsigned long ThreadId() const;
 
+    void AddTimer( Tasklet* tasklet, long long wakeTime );
+
+    // Drops the tasklet's pending timer and the reference the wheel holds on it
+    void CancelTimer( Tasklet* tasklet );
+
+    void InsertExpiredTimers();
+
+    int GetTimerCount() const;
+
+    static bool GetTrackThreadCpuTime();
+
+    static void SetTrackThreadCpuTime( bool value );
+
+    static int GetPriorityAgingThreshold();
+
+    static void SetPriorityAgingThreshold( int threshold );
+
+    TraceBuffer& GetTraceBuffer();
+
+    // Records an event in this schedule manager's trace buffer if tracing is enabled
+    void Trace( TraceEvent event, unsigned long long taskletId, unsigned long long targetId = 0, uint32_t flags = 0 )
+    {
+		if( m_traceBuffer.IsEnabled() )
+		{
+			m_traceBuffer.Record( MonotonicTimeNanoseconds(), event, taskletId, targetId, flags );
+		}
+    }
 
 private:
 
     void RunSchedulerCallback( Tasklet* previous, Tasklet* next );
 
+    void RecordSlice( Tasklet* next );
+
+    void LinkTaskletByPriority( Tasklet* tasklet );
+
+    void UnlinkTaskletFromPriorityLevel( Tasklet* tasklet );
+
+    void PromotePriorityLevel( int level );
+
+    void SortRunnablesByDeadline();
+
+    bool IsTimeLimitedRun() const;
+
     void CreateSchedulerTasklet();
 
     void OnSwitch();
@@ -122,6 +259,9 @@ public:
     
     inline static PyObject* m_scheduleManagerThreadKey = nullptr;
 
+    // Tasklet priorities range from 0 (default) to s_numberOfPriorityLevels - 1
+    inline static const int s_numberOfPriorityLevels = 4;
+
 private:
 
     unsigned long m_threadId;
@@ -150,18 +290,63 @@ private:
 
     std::chrono::steady_clock::time_point m_startTime;
 
+    // Start of the current tasklet's time slice, used for per tasklet time accounting
+    long long m_sliceStartTime;
+
+    long long m_sliceStartCpuTime; // 0 if thread cpu time was not tracked at slice start
+
+    // This is global, not per schedule manager. Reading thread cpu time is a syscall on most platforms so it is opt in
+    static inline bool s_trackThreadCpuTime = false;
+
     bool m_stopScheduler;
 
     int m_numberOfTaskletsInQueue;
 
-    static inline long s_numberOfTaskletsCompletedLastRunWithTimeout = 0;
+    long m_numberOfTaskletsCompletedLastRunWithTimeout;
+
+    long m_numberOfTaskletsSwitchedLastRunWithTimeout;
+
+    long m_numberOfTaskletsMissedDeadlineLastRunWithTimeout;
 
-    static inline long s_numberOfTaskletsSwitchedLastRunWithTimeout = 0;
+    ScheduleManagerStats m_stats;
+
+    LatencyHistogram m_queueWaitHistogram;
 
     static inline long s_numberOfActiveScheduleManagers = 0;
 
+    static inline std::vector<ScheduleManager*> s_scheduleManagers;
+
+    static inline std::mutex s_scheduleManagersMutex;
+
+    // Mirrors of the switch state for the stall watchdog, which observes without the GIL
+    std::atomic<unsigned long long> m_watchdogSwitchCount;
+
+    std::atomic<bool> m_runningTasklet;
+
     std::unordered_set<Tasklet*> m_taskletsOnSchedulerThread;
 
+    // Tasklets that have died but are still referenced, only used to report on them
+    std::unordered_set<Tasklet*> m_deadTaskletsOnSchedulerThread;
+
+    // The runnable queue is a single list split into contiguous segments, highest priority first
+    // Only the first tasklet of each segment is tracked, nullptr when the level is empty
+    Tasklet* m_priorityLevelHead[s_numberOfPriorityLevels];
+
+    int m_priorityLevelCount[s_numberOfPriorityLevels];
+
+    // Number of higher priority tasklets queued ahead of a level since its front tasklet last changed
+    int m_priorityLevelOvertaken[s_numberOfPriorityLevels];
+
+    // This is global, not per schedule manager. 0 disables aging
+    static inline int s_priorityAgingThreshold = 64;
+
+    // Tasklets waiting on a timer, each entry holds a reference to its Tasklet
+    TimerWheel m_timerWheel;
+
+    std::vector<TimerEntry> m_expiredTimers;
+
+    TraceBuffer m_traceBuffer;
+
 	static inline std::map<long, ScheduleManager*> s_closingScheduleManagers;
     
 };
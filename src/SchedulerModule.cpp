@@ -5,12 +5,22 @@
 #include "Scheduler.h"
 
 #include <CcpMacros.h>
+#include <algorithm>
+#include <cmath>
+#include <limits>
 #include <string>
+#include <unordered_map>
+#include <utility>
 
 #include <greenlet.h>
 
 #include "ScheduleManager.h"
+#include "AllocationTracker.h"
 #include "GILRAII.h"
+#include "SamplingProfiler.h"
+#include "StallWatchdog.h"
+#include "TaskletProfiler.h"
+#include "TraceCapture.h"
 
 //Types
 #include "PyTasklet.cpp"
@@ -36,6 +46,9 @@ static PyObject*
 
 		PyObject* previousCallback = Channel::ChannelCallback();
 
+		// Setting the new callback releases the held reference to the previous one, keep it alive to return it
+		Py_XINCREF( previousCallback );
+
         if( PyCallable_Check( temp ) )
 		{
 			Py_IncRef( temp );
@@ -191,6 +204,161 @@ static PyObject*
 	}
 }
 
+static PyObject*
+	SchedulerSleep( PyObject* self, PyObject* args )
+{
+	double seconds = 0.0;
+
+	if( !PyArg_ParseTuple( args, "d:sleep", &seconds ) )
+	{
+		return nullptr;
+	}
+
+	if( std::isnan( seconds ) || seconds < 0.0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "sleep length must be non-negative" );
+
+		return nullptr;
+	}
+
+	ScheduleManager* currentScheduler = ScheduleManager::GetThreadScheduleManager();
+
+	if( !currentScheduler )
+	{
+		return nullptr;
+	}
+
+	// Sleeps too long to represent, including infinity, never wake
+	if( !currentScheduler->GetCurrentTasklet()->InsertAt( NanosecondsAfter( MonotonicTimeNanoseconds(), seconds ) ) )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerSelect( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "cases", "timeout", NULL };
+
+	PyObject* casesArgument;
+
+	PyObject* timeoutArgument = Py_None;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "O|O:select", (char**)kwlist, &casesArgument, &timeoutArgument ) )
+	{
+		return nullptr;
+	}
+
+	long long timeout = -1;
+
+	if( timeoutArgument != Py_None )
+	{
+		double seconds = PyFloat_AsDouble( timeoutArgument );
+
+		if( seconds == -1.0 && PyErr_Occurred() )
+		{
+			return nullptr;
+		}
+
+		if( std::isnan( seconds ) || seconds < 0.0 )
+		{
+			PyErr_SetString( PyExc_ValueError, "timeout must be non-negative" );
+
+			return nullptr;
+		}
+
+		timeout = NanosecondsAfter( 0, seconds );
+
+		// Timeouts too long to represent in nanoseconds, including infinity, never expire
+		if( timeout == std::numeric_limits<long long>::max() )
+		{
+			timeout = -1;
+		}
+	}
+
+	// A tuple snapshot holds the case tuples, and through them the channels and values, alive for the duration
+	// of the select even if the caller's sequence is changed while the tasklet is blocked
+	PyObject* cases = PySequence_Tuple( casesArgument );
+
+	if( !cases )
+	{
+		if( PyErr_ExceptionMatches( PyExc_TypeError ) )
+		{
+			PyErr_SetString( PyExc_TypeError, "select cases must be a sequence" );
+		}
+
+		return nullptr;
+	}
+
+	Py_ssize_t numberOfCases = PyTuple_GET_SIZE( cases );
+
+	if( numberOfCases == 0 )
+	{
+		Py_DECREF( cases );
+
+		PyErr_SetString( PyExc_ValueError, "select requires at least one case" );
+
+		return nullptr;
+	}
+
+	std::vector<ChannelSelectCase> selectCases;
+
+	selectCases.reserve( numberOfCases );
+
+	for( Py_ssize_t i = 0; i < numberOfCases; i++ )
+	{
+		PyObject* selectCase = PyTuple_GET_ITEM( cases, i );
+
+		PyObject* channel = nullptr;
+
+		const char* operation = nullptr;
+
+		PyObject* value = nullptr;
+
+		if( !PyTuple_Check( selectCase ) || !PyArg_ParseTuple( selectCase, "O!s|O:select", &ChannelType, &channel, &operation, &value ) )
+		{
+			Py_DECREF( cases );
+
+			if( !PyErr_Occurred() )
+			{
+				PyErr_SetString( PyExc_TypeError, "select cases must be (channel, 'recv') or (channel, 'send', value) tuples" );
+			}
+
+			return nullptr;
+		}
+
+		bool sending = strcmp( operation, "send" ) == 0;
+
+		if( ( !sending && strcmp( operation, "recv" ) != 0 ) || sending != ( value != nullptr ) )
+		{
+			Py_DECREF( cases );
+
+			PyErr_SetString( PyExc_ValueError, "select cases must be (channel, 'recv') or (channel, 'send', value) tuples" );
+
+			return nullptr;
+		}
+
+		PyChannelObject* channelObject = reinterpret_cast<PyChannelObject*>( channel );
+
+		if( !PyChannelObjectIsValid( channelObject ) )
+		{
+			Py_DECREF( cases );
+
+			return nullptr;
+		}
+
+		selectCases.push_back( ChannelSelectCase{ channelObject->m_implementation, sending, value } );
+	}
+
+	PyObject* ret = Channel::Select( selectCases, timeout );
+
+	Py_DECREF( cases );
+
+	return ret;
+}
+
 static PyObject*
 	SchedulerRun( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
@@ -244,6 +412,42 @@ static PyObject*
 	}
 }
 
+static PyObject*
+	SchedulerRunForTime( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "timeout", "earliest_deadline_first", NULL };
+
+	long long timeout = 0;
+
+	int earliestDeadlineFirst = 0;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "L|p:run_for_time", (char**)kwlist, &timeout, &earliestDeadlineFirst ) )
+	{
+		return nullptr;
+	}
+
+	ScheduleManager* currentScheduler = ScheduleManager::GetThreadScheduleManager();
+
+	bool ret = currentScheduler->RunTaskletsForTime( timeout, earliestDeadlineFirst );
+
+	if( ret )
+	{
+		Py_IncRef( Py_None );
+
+		return Py_None;
+	}
+	else
+	{
+		return nullptr;
+	}
+}
+
+static PyObject*
+	SchedulerGetTaskletsMissedDeadlineLastRunWithTimeout( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyLong_FromLong( ScheduleManager::GetThreadScheduleManager()->GetNumberOfTaskletsMissedDeadlineLastRunWithTimeout() );
+}
+
 static PyObject*
 	SchedulerSetScheduleCallback( PyObject* self, PyObject* args, PyObject* kwds )
 {
@@ -261,6 +465,9 @@ static PyObject*
 
         PyObject* previousCallback = currentScheduler->SchedulerCallback();
 
+        // Setting the new callback releases the held reference to the previous one, keep it alive to return it
+        Py_XINCREF( previousCallback );
+
         if( PyCallable_Check( temp ) )
 		{
 			Py_IncRef( temp );
@@ -355,88 +562,1103 @@ static PyObject*
 
 	currentScheduler->SetSwitchTrapLevel( originalSwitchTrap + delta );
 
-	return PyLong_FromLong( originalSwitchTrap );
+	return PyLong_FromLong( originalSwitchTrap );
+}
+
+static PyObject*
+	SchedulerGetScheduleManager( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+    if (scheduleManager)
+    {
+		scheduleManager->Incref();
+
+        return scheduleManager->PythonObject();
+    }
+    else
+    {
+		Py_IncRef( Py_None );
+
+		return Py_None;
+    }
+}
+
+static PyObject*
+	SchedulerGetNumberOfActiveScheduleManagers( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	int numberOfScheduleManagers = ScheduleManager::NumberOfActiveScheduleManagers( );
+
+    return PyLong_FromLong( numberOfScheduleManagers );
+}
+
+
+static PyObject*
+	SchedulerGetNumberOfActiveChannels( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	long numberOfChannels = Channel::NumberOfActiveChannels();
+
+	return PyLong_FromLong( numberOfChannels );
+}
+
+static PyObject*
+	SchedulerUnblockAllChannels( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	int numberOfChannels = Channel::UnblockAllActiveChannels();
+
+	return PyLong_FromLong( numberOfChannels );
+}
+
+static PyObject*
+	SchedulerSetUseNestedTasklets( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	bool useNestedTasklets;
+
+	if( !PyArg_ParseTuple( args, "b", &useNestedTasklets ) )
+	{
+        return nullptr;
+	}
+
+	ScheduleManager::s_useNestedTasklets = useNestedTasklets;
+
+	return Py_None;
+}
+
+static PyObject*
+	SchedulerGetUseNestedTasklets( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return ScheduleManager::s_useNestedTasklets ? Py_True : Py_False;
+}
+
+static PyObject*
+	SchedulerSetTrackThreadCpuTime( PyObject* self, PyObject* args )
+{
+	int trackThreadCpuTime;
+
+	if( !PyArg_ParseTuple( args, "p:set_track_thread_cpu_time", &trackThreadCpuTime ) )
+	{
+		return nullptr;
+	}
+
+	ScheduleManager::SetTrackThreadCpuTime( trackThreadCpuTime );
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerGetTrackThreadCpuTime( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyBool_FromLong( ScheduleManager::GetTrackThreadCpuTime() );
+}
+
+static PyObject*
+	SchedulerGetAllTimeTaskletCount( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	long numberOfAllTimeTasklets = Tasklet::GetAllTimeTaskletCount();
+
+	return PyLong_FromLong( numberOfAllTimeTasklets );
+}
+
+static PyObject*
+	SchedulerGetActiveTaskletCount( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	long numberOfActiveTasklets = Tasklet::GetActiveTaskletCount();
+
+	return PyLong_FromLong( numberOfActiveTasklets );
+}
+
+static PyObject*
+	SchedulerSetPriorityAgingThreshold( PyObject* self, PyObject* args )
+{
+	int threshold;
+
+	if( !PyArg_ParseTuple( args, "i:set_priority_aging_threshold", &threshold ) )
+	{
+		return nullptr;
+	}
+
+	if( threshold < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Priority aging threshold must not be negative." );
+
+		return nullptr;
+	}
+
+	ScheduleManager::SetPriorityAgingThreshold( threshold );
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerGetPriorityAgingThreshold( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyLong_FromLong( ScheduleManager::GetPriorityAgingThreshold() );
+}
+
+static PyObject*
+	SchedulerSetTaskletPoolMaxSize( PyObject* self, PyObject* args )
+{
+	Py_ssize_t maxSize;
+
+	if( !PyArg_ParseTuple( args, "n:set_tasklet_pool_max_size", &maxSize ) )
+	{
+		return nullptr;
+	}
+
+	if( maxSize < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Tasklet pool max size must not be negative." );
+
+		return nullptr;
+	}
+
+	SetTaskletPoolMaxSize( static_cast<size_t>( maxSize ) );
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerGetTaskletPoolMaxSize( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyLong_FromSize_t( s_taskletPoolMaxSize );
+}
+
+static PyObject*
+	SchedulerGetTaskletPoolStats( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return Py_BuildValue(
+		"{s:n,s:n,s:L,s:L}",
+		"size", static_cast<Py_ssize_t>( s_taskletObjectPool.size() ),
+		"max_size", static_cast<Py_ssize_t>( s_taskletPoolMaxSize ),
+		"hits", s_taskletPoolHits,
+		"misses", s_taskletPoolMisses );
+}
+
+static PyObject*
+	SchedulerResetTaskletPoolStats( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	s_taskletPoolHits = 0;
+
+	s_taskletPoolMisses = 0;
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerTopChannels( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "n", "key", nullptr };
+
+	Py_ssize_t n;
+
+	const char* keyName = "blocked_time_ns";
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "n|s:top_channels", (char**)kwlist, &n, &keyName ) )
+	{
+		return nullptr;
+	}
+
+	if( n < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Number of channels must not be negative." );
+
+		return nullptr;
+	}
+
+	static const std::pair<const char*, ChannelStatsKey> keys[] = {
+		{ "sends", ChannelStatsKey::SENDS },
+		{ "receives", ChannelStatsKey::RECEIVES },
+		{ "operations", ChannelStatsKey::OPERATIONS },
+		{ "blocked_operations", ChannelStatsKey::BLOCKED_OPERATIONS },
+		{ "blocked_time_ns", ChannelStatsKey::BLOCKED_TIME },
+		{ "max_blocked_time_ns", ChannelStatsKey::MAX_BLOCKED_TIME },
+		{ "max_abs_balance", ChannelStatsKey::MAX_ABSOLUTE_BALANCE }
+	};
+
+	const std::pair<const char*, ChannelStatsKey>* key = nullptr;
+
+	for( const std::pair<const char*, ChannelStatsKey>& candidate : keys )
+	{
+		if( strcmp( candidate.first, keyName ) == 0 )
+		{
+			key = &candidate;
+		}
+	}
+
+	if( !key )
+	{
+		PyErr_Format( PyExc_ValueError, "Unknown channel stats key '%s'.", keyName );
+
+		return nullptr;
+	}
+
+	std::vector<Channel*> channels;
+
+	Channel::TopChannels( static_cast<size_t>( n ), key->second, channels );
+
+	PyObject* ranked = PyList_New( channels.size() );
+
+	if( !ranked )
+	{
+		return nullptr;
+	}
+
+	for( size_t i = 0; i < channels.size(); i++ )
+	{
+		PyObject* entry = Py_BuildValue( "(OL)", channels[i]->PythonObject(), channels[i]->GetStatsValue( key->second ) );
+
+		if( !entry )
+		{
+			Py_DECREF( ranked );
+
+			return nullptr;
+		}
+
+		PyList_SET_ITEM( ranked, i, entry );
+	}
+
+	return ranked;
+}
+
+// Builds the Python key describing a census group from one of its tasklets
+static PyObject*
+	TaskletCensusKey( Tasklet* tasklet, TaskletCensusGroup group )
+{
+	switch( group )
+	{
+	case TaskletCensusGroup::CALLSITE:
+	{
+		PyObject* fileName = tasklet->GetFilename();
+
+		if( !fileName )
+		{
+			return nullptr;
+		}
+
+		PyObject* methodName = tasklet->GetMethodName();
+
+		if( !methodName )
+		{
+			Py_DECREF( fileName );
+
+			return nullptr;
+		}
+
+		PyObject* key = Py_BuildValue( "(NlN)", fileName, tasklet->GetLineNumber(), methodName );
+
+		return key;
+	}
+	case TaskletCensusGroup::CONTEXT:
+		return tasklet->GetContext();
+	case TaskletCensusGroup::CHANNEL:
+	{
+		Channel* channel = static_cast<Channel*>( const_cast<void*>( tasklet->GetCensusKey( group ) ) );
+
+		return Py_NewRef( channel ? channel->PythonObject() : Py_None );
+	}
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerTaskletCensus( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "group_by", nullptr };
+
+	const char* groupName = "callsite";
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "|s:tasklet_census", (char**)kwlist, &groupName ) )
+	{
+		return nullptr;
+	}
+
+	TaskletCensusGroup group;
+
+	if( strcmp( groupName, "callsite" ) == 0 )
+	{
+		group = TaskletCensusGroup::CALLSITE;
+	}
+	else if( strcmp( groupName, "context" ) == 0 )
+	{
+		group = TaskletCensusGroup::CONTEXT;
+	}
+	else if( strcmp( groupName, "channel" ) == 0 )
+	{
+		group = TaskletCensusGroup::CHANNEL;
+	}
+	else
+	{
+		PyErr_Format( PyExc_ValueError, "Unknown census grouping '%s', expected callsite, context or channel.", groupName );
+
+		return nullptr;
+	}
+
+	ScheduleManager* currentScheduler = ScheduleManager::GetThreadScheduleManager();
+
+	if( !currentScheduler )
+	{
+		return nullptr;
+	}
+
+	std::vector<TaskletCensusEntry> entries;
+
+	currentScheduler->TaskletCensus( group, entries );
+
+	// Groups are keyed by identity natively, equal keys such as matching context strings are merged here
+	PyObject* census = PyDict_New();
+
+	if( !census )
+	{
+		return nullptr;
+	}
+
+	std::vector<TaskletCensusCounts> groupCounts;
+
+	for( const TaskletCensusEntry& entry : entries )
+	{
+		PyObject* key = TaskletCensusKey( entry.m_tasklet, group );
+
+		if( !key )
+		{
+			Py_DECREF( census );
+
+			return nullptr;
+		}
+
+		PyObject* index = PyDict_GetItemWithError( census, key );
+
+		if( index )
+		{
+			TaskletCensusCounts& counts = groupCounts[PyLong_AsSize_t( index )];
+
+			counts.m_runnable += entry.m_counts.m_runnable;
+
+			counts.m_blocked += entry.m_counts.m_blocked;
+
+			counts.m_paused += entry.m_counts.m_paused;
+
+			counts.m_dead += entry.m_counts.m_dead;
+		}
+		else
+		{
+			index = PyErr_Occurred() ? nullptr : PyLong_FromSize_t( groupCounts.size() );
+
+			if( !index || PyDict_SetItem( census, key, index ) < 0 )
+			{
+				Py_XDECREF( index );
+
+				Py_DECREF( key );
+
+				Py_DECREF( census );
+
+				return nullptr;
+			}
+
+			Py_DECREF( index );
+
+			groupCounts.push_back( entry.m_counts );
+		}
+
+		Py_DECREF( key );
+	}
+
+	PyObject* key;
+
+	PyObject* index;
+
+	Py_ssize_t position = 0;
+
+	while( PyDict_Next( census, &position, &key, &index ) )
+	{
+		const TaskletCensusCounts& counts = groupCounts[PyLong_AsSize_t( index )];
+
+		PyObject* value = Py_BuildValue(
+			"{s:l,s:l,s:l,s:l}",
+			"runnable", counts.m_runnable,
+			"blocked", counts.m_blocked,
+			"paused", counts.m_paused,
+			"dead", counts.m_dead );
+
+		// Replacing the value of an existing key does not disturb iteration
+		if( !value || PyDict_SetItem( census, key, value ) < 0 )
+		{
+			Py_XDECREF( value );
+
+			Py_DECREF( census );
+
+			return nullptr;
+		}
+
+		Py_DECREF( value );
+	}
+
+	return census;
+}
+
+static PyObject*
+	SchedulerFindLongBlocked( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "threshold_ns", "group_by", nullptr };
+
+	long long threshold;
+
+	const char* groupName = "channel";
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "L|s:find_long_blocked", (char**)kwlist, &threshold, &groupName ) )
+	{
+		return nullptr;
+	}
+
+	if( threshold < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Threshold must not be negative." );
+
+		return nullptr;
+	}
+
+	TaskletCensusGroup group;
+
+	if( strcmp( groupName, "channel" ) == 0 )
+	{
+		group = TaskletCensusGroup::CHANNEL;
+	}
+	else if( strcmp( groupName, "callsite" ) == 0 )
+	{
+		group = TaskletCensusGroup::CALLSITE;
+	}
+	else
+	{
+		PyErr_Format( PyExc_ValueError, "Unknown grouping '%s', expected channel or callsite.", groupName );
+
+		return nullptr;
+	}
+
+	ScheduleManager* currentScheduler = ScheduleManager::GetThreadScheduleManager();
+
+	if( !currentScheduler )
+	{
+		return nullptr;
+	}
+
+	std::vector<LongBlockedEntry> entries;
+
+	currentScheduler->FindLongBlockedTasklets( threshold, group, entries );
+
+	PyObject* longBlocked = PyDict_New();
+
+	if( !longBlocked )
+	{
+		return nullptr;
+	}
+
+	for( LongBlockedEntry& entry : entries )
+	{
+		PyObject* key = TaskletCensusKey( entry.m_oldestTasklet, group );
+
+		if( !key )
+		{
+			Py_DECREF( longBlocked );
+
+			return nullptr;
+		}
+
+		PyObject* oldest = entry.m_oldestTasklet->PythonObject();
+
+		// Distinct code objects can describe the same callsite, merge them into one group
+		PyObject* existing = PyDict_GetItemWithError( longBlocked, key );
+
+		if( existing )
+		{
+			entry.m_count += PyLong_AsLong( PyDict_GetItemString( existing, "count" ) );
+
+			long long existingLongest = PyLong_AsLongLong( PyDict_GetItemString( existing, "longest_ns" ) );
+
+			if( existingLongest > entry.m_longestBlockedTime )
+			{
+				entry.m_longestBlockedTime = existingLongest;
+
+				oldest = PyDict_GetItemString( existing, "oldest" );
+			}
+		}
+		else if( PyErr_Occurred() )
+		{
+			Py_DECREF( key );
+
+			Py_DECREF( longBlocked );
+
+			return nullptr;
+		}
+
+		PyObject* value = Py_BuildValue(
+			"{s:l,s:L,s:O}",
+			"count", entry.m_count,
+			"longest_ns", entry.m_longestBlockedTime,
+			"oldest", oldest );
+
+		if( !value || PyDict_SetItem( longBlocked, key, value ) < 0 )
+		{
+			Py_XDECREF( value );
+
+			Py_DECREF( key );
+
+			Py_DECREF( longBlocked );
+
+			return nullptr;
+		}
+
+		Py_DECREF( value );
+
+		Py_DECREF( key );
+	}
+
+	return longBlocked;
+}
+
+// Bits of the flags column returned by scheduler.snapshot
+enum SnapshotFlag : uint8_t
+{
+	SNAPSHOT_FLAG_ALIVE = 1 << 0,
+	SNAPSHOT_FLAG_BLOCKED = 1 << 1,
+	SNAPSHOT_FLAG_PAUSED = 1 << 2,
+	SNAPSHOT_FLAG_SCHEDULED = 1 << 3
+};
+
+// Fills a new read only memoryview of the given struct format with value( i ) for each row
+template <typename T, typename F>
+static PyObject*
+	SnapshotColumn( size_t rows, const char* format, F value )
+{
+	// Columns are built back to back, stop once one of them has failed
+	if( PyErr_Occurred() )
+	{
+		return nullptr;
+	}
+
+	PyObject* data = PyBytes_FromStringAndSize( nullptr, static_cast<Py_ssize_t>( rows * sizeof( T ) ) );
+
+	if( !data )
+	{
+		return nullptr;
+	}
+
+	T* column = reinterpret_cast<T*>( PyBytes_AS_STRING( data ) );
+
+	for( size_t i = 0; i < rows; i++ )
+	{
+		column[i] = static_cast<T>( value( i ) );
+	}
+
+	PyObject* bytesView = PyMemoryView_FromObject( data );
+
+	Py_DECREF( data );
+
+	if( !bytesView )
+	{
+		return nullptr;
+	}
+
+	PyObject* view = PyObject_CallMethod( bytesView, "cast", "s", format );
+
+	Py_DECREF( bytesView );
+
+	return view;
+}
+
+static PyObject*
+	SchedulerSnapshot( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	std::vector<Tasklet*> tasklets;
+
+	for( ScheduleManager* scheduleManager : ScheduleManager::GetScheduleManagers() )
+	{
+		scheduleManager->GetThreadTasklets( tasklets );
+	}
+
+	// Callsites are interned by the identity used to group them in a census, the strings are built once each
+	std::unordered_map<const void*, int32_t> callsiteIndices;
+
+	std::vector<int32_t> callsiteIds;
+
+	callsiteIds.reserve( tasklets.size() );
+
+	PyObject* callsites = PyList_New( 0 );
+
+	if( !callsites )
+	{
+		return nullptr;
+	}
+
+	for( Tasklet* tasklet : tasklets )
+	{
+		auto inserted = callsiteIndices.emplace( tasklet->GetCensusKey( TaskletCensusGroup::CALLSITE ), static_cast<int32_t>( PyList_GET_SIZE( callsites ) ) );
+
+		if( inserted.second )
+		{
+			PyObject* fileName = tasklet->GetFilename();
+
+			PyObject* methodName = fileName ? tasklet->GetMethodName() : nullptr;
+
+			PyObject* callsite = methodName ? PyUnicode_FromFormat( "%U (%U:%ld)", methodName, fileName, tasklet->GetLineNumber() ) : nullptr;
+
+			Py_XDECREF( fileName );
+
+			Py_XDECREF( methodName );
+
+			if( !callsite || PyList_Append( callsites, callsite ) < 0 )
+			{
+				Py_XDECREF( callsite );
+
+				Py_DECREF( callsites );
+
+				return nullptr;
+			}
+
+			Py_DECREF( callsite );
+		}
+
+		callsiteIds.push_back( inserted.first->second );
+	}
+
+	PyObject* snapshot = PyDict_New();
+
+	if( !snapshot || PyDict_SetItemString( snapshot, "callsites", callsites ) < 0 )
+	{
+		Py_XDECREF( snapshot );
+
+		Py_DECREF( callsites );
+
+		return nullptr;
+	}
+
+	Py_DECREF( callsites );
+
+	size_t rows = tasklets.size();
+
+	std::pair<const char*, PyObject*> columns[] = {
+		{ "id", SnapshotColumn<uint64_t>( rows, "Q", [&]( size_t i ) { return tasklets[i]->GetId(); } ) },
+		{ "thread_id", SnapshotColumn<uint64_t>( rows, "Q", [&]( size_t i ) { return tasklets[i]->ThreadId(); } ) },
+		{ "flags", SnapshotColumn<uint8_t>( rows, "B", [&]( size_t i ) {
+			  Tasklet* t = tasklets[i];
+
+			  return ( t->IsAlive() ? SNAPSHOT_FLAG_ALIVE : 0 ) | ( t->IsBlocked() ? SNAPSHOT_FLAG_BLOCKED : 0 ) |
+				  ( t->IsPaused() ? SNAPSHOT_FLAG_PAUSED : 0 ) | ( t->IsScheduled() ? SNAPSHOT_FLAG_SCHEDULED : 0 );
+		  } ) },
+		{ "times_switched_to", SnapshotColumn<int64_t>( rows, "q", [&]( size_t i ) { return tasklets[i]->GetTimesSwitchedTo(); } ) },
+		{ "start_time", SnapshotColumn<int64_t>( rows, "q", [&]( size_t i ) { return tasklets[i]->GetStartTime(); } ) },
+		{ "end_time", SnapshotColumn<int64_t>( rows, "q", [&]( size_t i ) { return tasklets[i]->GetEndTime(); } ) },
+		{ "run_time", SnapshotColumn<double>( rows, "d", [&]( size_t i ) { return tasklets[i]->GetRunTime(); } ) },
+		{ "wall_time_ns", SnapshotColumn<int64_t>( rows, "q", [&]( size_t i ) { return tasklets[i]->GetWallTime(); } ) },
+		{ "cpu_time_ns", SnapshotColumn<int64_t>( rows, "q", [&]( size_t i ) { return tasklets[i]->GetCpuTime(); } ) },
+		{ "callsite", SnapshotColumn<int32_t>( rows, "i", [&]( size_t i ) { return callsiteIds[i]; } ) }
+	};
+
+	bool failed = false;
+
+	for( std::pair<const char*, PyObject*>& column : columns )
+	{
+		failed = failed || !column.second || PyDict_SetItemString( snapshot, column.first, column.second ) < 0;
+
+		Py_XDECREF( column.second );
+	}
+
+	if( failed )
+	{
+		Py_DECREF( snapshot );
+
+		return nullptr;
+	}
+
+	return snapshot;
+}
+
+static PyObject*
+	SchedulerGetAllScheduleManagerStats( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	const std::vector<ScheduleManager*>& scheduleManagers = ScheduleManager::GetScheduleManagers();
+
+	PyObject* statsList = PyList_New( scheduleManagers.size() );
+
+	if( !statsList )
+	{
+		return nullptr;
+	}
+
+	for( size_t i = 0; i < scheduleManagers.size(); i++ )
+	{
+		PyObject* stats = ScheduleManagerStatsDict( scheduleManagers[i] );
+
+		if( !stats )
+		{
+			Py_DECREF( statsList );
+
+			return nullptr;
+		}
+
+		PyList_SET_ITEM( statsList, i, stats );
+	}
+
+	return statsList;
+}
+
+static PyObject*
+	SchedulerTraceToFile( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "path", "capacity", nullptr };
+
+	PyObject* path = nullptr;
+
+	Py_ssize_t capacity = 65536;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "O|n:trace_to_file", (char**)kwlist, &path, &capacity ) )
+	{
+		return nullptr;
+	}
+
+	if( capacity < 1 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Trace capacity must be at least 1." );
+
+		return nullptr;
+	}
+
+	if( !TraceCapture::Start( path, static_cast<size_t>( capacity ) ) )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStopTraceToFile( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	TraceCapture::Stop();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerIsTracingToFile( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyBool_FromLong( TraceCapture::IsActive() );
+}
+
+static PyObject*
+	SchedulerStartStallWatchdog( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "threshold_ns", "log_capacity", nullptr };
+
+	long long threshold;
+
+	Py_ssize_t logCapacity = 256;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "L|n:start_stall_watchdog", (char**)kwlist, &threshold, &logCapacity ) )
+	{
+		return nullptr;
+	}
+
+	if( threshold <= 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Threshold must be greater than zero." );
+
+		return nullptr;
+	}
+
+	if( logCapacity <= 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Log capacity must be greater than zero." );
+
+		return nullptr;
+	}
+
+	if( !StallWatchdog::Start( threshold, static_cast<size_t>( logCapacity ) ) )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStopStallWatchdog( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	StallWatchdog::Stop();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerIsStallWatchdogRunning( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyBool_FromLong( StallWatchdog::IsActive() );
+}
+
+static PyObject*
+	SchedulerGetStallLog( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return StallWatchdog::GetLog();
+}
+
+static PyObject*
+	SchedulerClearStallLog( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	StallWatchdog::ClearLog();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStartSamplingProfiler( PyObject* self, PyObject* args, PyObject* kwds )
+{
+	const char* kwlist[] = { "interval_ns", nullptr };
+
+	long long interval = 10000000;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "|L:start_sampling_profiler", (char**)kwlist, &interval ) )
+	{
+		return nullptr;
+	}
+
+	if( interval <= 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Interval must be greater than zero." );
+
+		return nullptr;
+	}
+
+	if( !SamplingProfiler::Start( interval ) )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStopSamplingProfiler( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	SamplingProfiler::Stop();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerIsSamplingProfilerRunning( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyBool_FromLong( SamplingProfiler::IsActive() );
+}
+
+static PyObject*
+	SchedulerGetCollapsedStacks( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return SamplingProfiler::GetCollapsedStacks();
+}
+
+static PyObject*
+	SchedulerGetSampleCount( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return PyLong_FromLongLong( SamplingProfiler::GetSampleCount() );
+}
+
+static PyObject*
+	SchedulerResetSamplingProfiler( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	SamplingProfiler::Reset();
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStartTaskletProfiler( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	if( !TaskletProfiler::Start() )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
+}
+
+static PyObject*
+	SchedulerStopTaskletProfiler( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	if( !TaskletProfiler::Stop() )
+	{
+		return nullptr;
+	}
+
+	Py_RETURN_NONE;
 }
 
 static PyObject*
-	SchedulerGetScheduleManager( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerIsTaskletProfilerRunning( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
-
-    if (scheduleManager)
-    {
-		scheduleManager->Incref();
-
-        return scheduleManager->PythonObject();
-    }
-    else
-    {
-		Py_IncRef( Py_None );
+	return PyBool_FromLong( TaskletProfiler::IsActive() );
+}
 
-		return Py_None;
-    }
+static PyObject*
+	SchedulerGetTaskletProfile( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+{
+	return TaskletProfiler::GetStats();
 }
 
 static PyObject*
-	SchedulerGetNumberOfActiveScheduleManagers( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerResetTaskletProfiler( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	int numberOfScheduleManagers = ScheduleManager::NumberOfActiveScheduleManagers( );
+	TaskletProfiler::Reset();
 
-    return PyLong_FromLong( numberOfScheduleManagers );
+	Py_RETURN_NONE;
 }
 
-
 static PyObject*
-	SchedulerGetNumberOfActiveChannels( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerStartAllocationTracking( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	long numberOfChannels = Channel::NumberOfActiveChannels();
+	if( !AllocationTracker::Start() )
+	{
+		return nullptr;
+	}
 
-	return PyLong_FromLong( numberOfChannels );
+	Py_RETURN_NONE;
 }
 
 static PyObject*
-	SchedulerUnblockAllChannels( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerStopAllocationTracking( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	int numberOfChannels = Channel::UnblockAllActiveChannels();
+	if( !AllocationTracker::Stop() )
+	{
+		return nullptr;
+	}
 
-	return PyLong_FromLong( numberOfChannels );
+	Py_RETURN_NONE;
 }
 
 static PyObject*
-	SchedulerSetUseNestedTasklets( PyObject* self, PyObject* args, PyObject* kwds )
+	SchedulerIsTrackingAllocations( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	bool useNestedTasklets;
+	return PyBool_FromLong( AllocationTracker::IsActive() );
+}
 
-	if( !PyArg_ParseTuple( args, "b", &useNestedTasklets ) )
+// Parses the group_by argument shared by the allocation queries
+static bool ParseAllocationGroup( const char* groupName, TaskletCensusGroup& group )
+{
+	if( strcmp( groupName, "context" ) == 0 )
 	{
-        return nullptr;
+		group = TaskletCensusGroup::CONTEXT;
+	}
+	else if( strcmp( groupName, "callsite" ) == 0 )
+	{
+		group = TaskletCensusGroup::CALLSITE;
 	}
+	else
+	{
+		PyErr_Format( PyExc_ValueError, "Unknown grouping '%s', expected context or callsite.", groupName );
 
-	ScheduleManager::s_useNestedTasklets = useNestedTasklets;
+		return false;
+	}
 
-	return Py_None;
+	return true;
 }
 
 static PyObject*
-	SchedulerGetUseNestedTasklets( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerGetAllocationStats( PyObject* self, PyObject* args, PyObject* kwds )
 {
-	return ScheduleManager::s_useNestedTasklets ? Py_True : Py_False;
+	const char* kwlist[] = { "group_by", nullptr };
+
+	const char* groupName = "context";
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "|s:get_allocation_stats", (char**)kwlist, &groupName ) )
+	{
+		return nullptr;
+	}
+
+	TaskletCensusGroup group;
+
+	if( !ParseAllocationGroup( groupName, group ) )
+	{
+		return nullptr;
+	}
+
+	return AllocationTracker::GetStats( group );
 }
 
 static PyObject*
-	SchedulerGetAllTimeTaskletCount( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerTopAllocationContexts( PyObject* self, PyObject* args, PyObject* kwds )
 {
-	long numberOfAllTimeTasklets = Tasklet::GetAllTimeTaskletCount();
+	const char* kwlist[] = { "n", nullptr };
 
-	return PyLong_FromLong( numberOfAllTimeTasklets );
+	Py_ssize_t n = 10;
+
+	if( !PyArg_ParseTupleAndKeywords( args, kwds, "|n:top_allocation_contexts", (char**)kwlist, &n ) )
+	{
+		return nullptr;
+	}
+
+	if( n < 0 )
+	{
+		PyErr_SetString( PyExc_ValueError, "Number of contexts must not be negative." );
+
+		return nullptr;
+	}
+
+	PyObject* stats = AllocationTracker::GetStats( TaskletCensusGroup::CONTEXT );
+
+	if( !stats )
+	{
+		return nullptr;
+	}
+
+	std::vector<std::pair<long long, PyObject*>> ranked;
+
+	PyObject* key;
+
+	PyObject* value;
+
+	Py_ssize_t position = 0;
+
+	while( PyDict_Next( stats, &position, &key, &value ) )
+	{
+		long long liveBytes = PyLong_AsLongLong( PyDict_GetItemString( value, "live_bytes" ) );
+
+		if( liveBytes > 0 )
+		{
+			ranked.emplace_back( liveBytes, key );
+		}
+	}
+
+	size_t count = std::min( static_cast<size_t>( n ), ranked.size() );
+
+	std::partial_sort( ranked.begin(), ranked.begin() + count, ranked.end(), []( const std::pair<long long, PyObject*>& a, const std::pair<long long, PyObject*>& b ) {
+		return a.first > b.first;
+	} );
+
+	PyObject* top = PyList_New( count );
+
+	for( size_t i = 0; top && i < count; i++ )
+	{
+		PyObject* entry = Py_BuildValue( "(OL)", ranked[i].second, ranked[i].first );
+
+		if( !entry )
+		{
+			Py_CLEAR( top );
+
+			break;
+		}
+
+		PyList_SET_ITEM( top, i, entry );
+	}
+
+	Py_DECREF( stats );
+
+	return top;
 }
 
 static PyObject*
-	SchedulerGetActiveTaskletCount( PyObject* self, PyObject* Py_UNUSED( ignored ) )
+	SchedulerResetAllocationTracking( PyObject* self, PyObject* Py_UNUSED( ignored ) )
 {
-	long numberOfActiveTasklets = Tasklet::GetActiveTaskletCount();
+	AllocationTracker::Reset();
 
-	return PyLong_FromLong( numberOfActiveTasklets );
+	Py_RETURN_NONE;
 }
 
 void ModuleDestructor( void* )
@@ -577,13 +1799,49 @@ extern "C"
 		return tasklet->m_implementation->GetTimesSwitchedTo();
     }
 
+    /// @brief Return the total wall time the tasklet has spent as the current tasklet
+	/// @param tasklet to be checked, python object type derived from PyTaskletType
+	/// @return wall time in nanoseconds
+    static long long PyTasklet_GetWallTime( PyTaskletObject* tasklet )
+    {
+		GILRAII gil;
+		return tasklet->m_implementation->GetWallTime();
+    }
+
+    /// @brief Return the total thread cpu time the tasklet has spent as the current tasklet, only accumulated while thread cpu time tracking is enabled
+	/// @param tasklet to be checked, python object type derived from PyTaskletType
+	/// @return thread cpu time in nanoseconds
+    static long long PyTasklet_GetCpuTime( PyTaskletObject* tasklet )
+    {
+		GILRAII gil;
+		return tasklet->m_implementation->GetCpuTime();
+    }
+
+    /// @brief Return the number of times the tasklet has become the current tasklet, including resuming after nested tasklets
+	/// @param tasklet to be checked, python object type derived from PyTaskletType
+	/// @return switch in count
+    static long PyTasklet_GetSwitchInCount( PyTaskletObject* tasklet )
+    {
+		GILRAII gil;
+		return tasklet->m_implementation->GetSwitchInCount();
+    }
+
+    /// @brief Return the longest single time slice the tasklet has spent as the current tasklet
+	/// @param tasklet to be checked, python object type derived from PyTaskletType
+	/// @return longest slice wall time in nanoseconds
+    static long long PyTasklet_GetLongestSlice( PyTaskletObject* tasklet )
+    {
+		GILRAII gil;
+		return tasklet->m_implementation->GetLongestSlice();
+    }
+
 	/// @brief Return tasklet context as a C style string. The caller is not responsible for the string memory.
 	/// @param tasklet to get context from, python object type derived from PyTaskletType
 	/// @return a null terminated c-style const char* string
     static const char* PyTasklet_GetContext(PyTaskletObject* tasklet)
     {
 		GILRAII gil;
-		return tasklet->m_implementation->GetContext().data();
+		return tasklet->m_implementation->GetContextUtf8();
     }
 
 	// Channel functions
@@ -976,22 +2234,53 @@ extern "C"
 		return Tasklet::GetActiveTaskletCount();
 	}
 
-    /// @brief Get active number of Tasklets completed last run with timeout.
+    /// @brief Get active number of Tasklets completed last run with timeout on the calling thread.
 	/// @return Number of active Tasklets completed last run with timeout
 	static int PyScheduler_GetTaskletsCompletedLastRunWithTimeout()
 	{
 		GILRAII gil;
 
-		return ScheduleManager::GetNumberOfTaskletsCompletedLastRunWithTimeout();
+		return ScheduleManager::GetThreadScheduleManager()->GetNumberOfTaskletsCompletedLastRunWithTimeout();
 	}
 
-    /// @brief Get active number of Tasklets switched last run with timeout.
+    /// @brief Get active number of Tasklets switched last run with timeout on the calling thread.
 	/// @return Number of active Tasklets switched last run with timeout
 	static int PyScheduler_GetTaskletsSwitchedLastRunWithTimeout()
 	{
 		GILRAII gil;
 
-		return ScheduleManager::GetNumberOfTaskletsSwitchedLastRunWithTimeout();
+		return ScheduleManager::GetThreadScheduleManager()->GetNumberOfTaskletsSwitchedLastRunWithTimeout();
+	}
+
+    /// @brief Run scheduler for specified number of nanoseconds, running Tasklets with the earliest deadline first
+	/// @param timeout timeout value in nano seconds
+	/// @return Py_None on success, NULL on failure
+	static PyObject* PyScheduler_RunWithTimeoutEarliestDeadlineFirst( long long timeout )
+	{
+		GILRAII gil;
+		ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+		bool ret = scheduleManager->RunTaskletsForTime( timeout, true );
+
+        if ( ret )
+        {
+			Py_IncRef( Py_None );
+
+            return Py_None;
+        }
+        else
+        {
+			return nullptr;
+        }
+	}
+
+    /// @brief Get number of Tasklets switched to after their deadline had passed during the last run with timeout on the calling thread.
+	/// @return Number of Tasklets that missed their deadline last run with timeout
+	static int PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout()
+	{
+		GILRAII gil;
+
+		return ScheduleManager::GetThreadScheduleManager()->GetNumberOfTaskletsMissedDeadlineLastRunWithTimeout();
 	}
     
 
@@ -1063,12 +2352,46 @@ static PyMethodDef SchedulerMethods[] = {
         METH_NOARGS,
         "Run scheduler to end of run queue." },
 
+	{ "sleep",
+        (PyCFunction)SchedulerSleep,
+        METH_VARARGS,
+        "Suspend the current tasklet for at least the given number of seconds. It is inserted at the end of the runnables queue when the scheduler next runs after the time has passed. Cannot be called on the main tasklet. \n\n\
+            :param seconds: Time to sleep for in seconds \n\
+            :type seconds: Float" },
+
+	{ "select",
+        (PyCFunction)SchedulerSelect,
+        METH_VARARGS | METH_KEYWORDS,
+        "Wait on several channel operations at once and complete exactly one of them. The first ready case in list order is completed immediately, otherwise the current tasklet blocks on every channel until another tasklet completes one of its cases. \n\n\
+            :param cases: Sequence of (channel, 'recv') and (channel, 'send', value) tuples \n\
+            :type cases: Sequence \n\
+            :param timeout: Maximum time to wait in seconds, None to wait indefinitely and 0 to only poll. Cannot be used on the main tasklet \n\
+            :type timeout: Float \n\
+            :return: Tuple of the index of the completed case and the received value, None for a send. (-1, None) on timeout \n\
+            :rtype: Tuple" },
+
 	{ "run_n_tasklets",
         (PyCFunction)SchedulerRunNTasklets,
         METH_VARARGS,
         "Run scheduler limited to n number of Tasklets. \n\n\
             :param int: Number of Tasklets to run before exiting" },
 
+	{ "run_for_time",
+        (PyCFunction)SchedulerRunForTime,
+        METH_VARARGS | METH_KEYWORDS,
+        "Run scheduler until the run queue is exhausted or the time limit is reached. At least one Tasklet is always run. \n\n\
+            :param timeout: Time limit in nanoseconds \n\
+            :type timeout: Integer \n\
+            :param earliest_deadline_first: If True the run queue is ordered by Tasklet deadline_ns before running, within each priority level \n\
+            :type earliest_deadline_first: Boolean" },
+
+	{ "get_tasklets_missed_deadline_last_run_with_timeout",
+        (PyCFunction)SchedulerGetTaskletsMissedDeadlineLastRunWithTimeout,
+        METH_NOARGS,
+        "Get number of Tasklets switched to after their deadline had passed during the last time limited run on the calling thread. \n\n\
+            :return: Number of Tasklets that missed their deadline \n\
+            :rtype: Integer" },
+
 	{ "set_schedule_callback",
         (PyCFunction)SchedulerSetScheduleCallback,
         METH_VARARGS,
@@ -1139,6 +2462,19 @@ static PyMethodDef SchedulerMethods[] = {
             :return: Boolean indicating if nested Tasklets is on. \n\
             :rtype: Boolean" },
 
+    { "set_track_thread_cpu_time",
+	  (PyCFunction)SchedulerSetTrackThreadCpuTime,
+	  METH_VARARGS,
+	  "Specify if thread cpu time should be accumulated per Tasklet on every switch. Wall time is always tracked, reading thread cpu time is a system call on most platforms so is off by default. \n\n\
+            :param: Boolean." },
+
+    { "get_track_thread_cpu_time",
+	  (PyCFunction)SchedulerGetTrackThreadCpuTime,
+	  METH_NOARGS,
+	  "Get current setting for per Tasklet thread cpu time tracking. \n\n\
+            :return: Boolean indicating if thread cpu time is tracked. \n\
+            :rtype: Boolean" },
+
     { "get_all_time_tasklet_count",
 	  (PyCFunction)SchedulerGetAllTimeTaskletCount,
 	  METH_NOARGS,
@@ -1152,6 +2488,267 @@ static PyMethodDef SchedulerMethods[] = {
 	  "Get total number of active Tasklets across all threads. Active here meaning a Python Tasklet Object exists, active does not indicate state eg. the active Tasklet can be alive or dead. \n\n\
             :return: Number of active Tasklets \n\
             :rtype: Integer" },
+
+    { "set_priority_aging_threshold",
+	  (PyCFunction)SchedulerSetPriorityAgingThreshold,
+	  METH_VARARGS,
+	  "Set how many higher priority tasklets may be queued ahead of a waiting priority level before that level is promoted one level up. \n\n\
+            :param threshold: Number of overtaking inserts, 0 disables aging \n\
+            :type threshold: Integer" },
+
+    { "get_priority_aging_threshold",
+	  (PyCFunction)SchedulerGetPriorityAgingThreshold,
+	  METH_NOARGS,
+	  "Get the current priority aging threshold. \n\n\
+            :return: Number of overtaking inserts before a priority level is promoted, 0 if aging is disabled \n\
+            :rtype: Integer" },
+
+    { "set_tasklet_pool_max_size",
+	  (PyCFunction)SchedulerSetTaskletPoolMaxSize,
+	  METH_VARARGS,
+	  "Set how many finished Tasklet objects are kept for reuse by later Tasklet creation. Pooling is off by default, shrinking the pool frees any surplus objects. \n\n\
+            :param max_size: Maximum number of pooled Tasklets, 0 disables pooling \n\
+            :type max_size: Integer" },
+
+    { "get_tasklet_pool_max_size",
+	  (PyCFunction)SchedulerGetTaskletPoolMaxSize,
+	  METH_NOARGS,
+	  "Get the maximum number of finished Tasklet objects kept for reuse. \n\n\
+            :return: Maximum number of pooled Tasklets, 0 if pooling is disabled \n\
+            :rtype: Integer" },
+
+    { "get_tasklet_pool_stats",
+	  (PyCFunction)SchedulerGetTaskletPoolStats,
+	  METH_NOARGS,
+	  "Get Tasklet pool statistics. Hits count Tasklets created from a pooled object, misses count Tasklets that needed a fresh allocation while pooling was enabled. \n\n\
+            :return: Dictionary with keys size, max_size, hits and misses \n\
+            :rtype: Dictionary" },
+
+    { "reset_tasklet_pool_stats",
+	  (PyCFunction)SchedulerResetTaskletPoolStats,
+	  METH_NOARGS,
+	  "Reset the Tasklet pool hit and miss counters to zero." },
+
+    { "top_channels",
+	  (PyCFunction)SchedulerTopChannels,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Rank every active channel by one of its stats without visiting them from Python, see channel.get_stats. Channels whose value is zero are left out. \n\n\
+            :param n: Maximum number of channels to return \n\
+            :type n: Integer \n\
+            :param key: One of sends, receives, operations, blocked_operations, blocked_time_ns, max_blocked_time_ns or max_abs_balance, defaults to blocked_time_ns \n\
+            :type key: String \n\
+            :return: Up to n (channel, value) tuples, highest value first \n\
+            :rtype: List \n\
+            :raises ValueError: If key is not a channel stat" },
+
+    { "tasklet_census",
+	  (PyCFunction)SchedulerTaskletCensus,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Count the tasklets on the current thread by state, grouped without visiting each tasklet from Python. \n\n\
+            :param group_by: callsite groups by (file name, line number, method name) of the bound callable, context by tasklet context and channel by the channel a tasklet is blocked on or None, defaults to callsite \n\
+            :type group_by: String \n\
+            :return: Dictionary mapping each group to a dictionary of runnable, blocked, paused and dead tasklet counts \n\
+            :rtype: Dictionary \n\
+            :raises ValueError: If group_by is not recognised" },
+
+    { "find_long_blocked",
+	  (PyCFunction)SchedulerFindLongBlocked,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Find the tasklets on the current thread that have been blocked on a channel for longer than a threshold, grouped natively. \n\n\
+            :param threshold_ns: Nanoseconds a tasklet must have been blocked for to be reported \n\
+            :type threshold_ns: Integer \n\
+            :param group_by: channel groups by the channel blocked on, callsite by (file name, line number, method name) of the bound callable, defaults to channel \n\
+            :type group_by: String \n\
+            :return: Dictionary mapping each group to a dictionary of count, longest_ns and oldest, the longest blocked tasklet \n\
+            :rtype: Dictionary \n\
+            :raises ValueError: If threshold_ns is negative or group_by is not recognised" },
+
+    { "snapshot",
+	  (PyCFunction)SchedulerSnapshot,
+	  METH_NOARGS,
+	  "Capture every tasklet known to any Schedule Manager, alive or dead but still referenced, as one typed memoryview per field. \n\n\
+            Row i of every column describes the same tasklet. Columns are id, thread_id, flags, times_switched_to, start_time, end_time, run_time, wall_time_ns, cpu_time_ns and callsite. \n\
+            flags is a combination of the SNAPSHOT_FLAG constants and callsite indexes the callsites list. \n\n\
+            :return: Dictionary of column name to memoryview, plus callsites, a list of callsite strings \n\
+            :rtype: Dictionary" },
+
+    { "get_all_schedule_manager_stats",
+	  (PyCFunction)SchedulerGetAllScheduleManagerStats,
+	  METH_NOARGS,
+	  "Get the stats of every live Schedule Manager across all threads, see schedule_manager.get_stats. \n\n\
+            :return: One stats dictionary per Schedule Manager \n\
+            :rtype: List" },
+
+    { "trace_to_file",
+	  (PyCFunction)SchedulerTraceToFile,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Start streaming a Chrome Trace Event JSON timeline of every Schedule Manager to a file, viewable in Perfetto or chrome://tracing. Each thread gets a track of Tasklet slices named by context or method name, with flow arrows from channel operations to the Tasklets they woke. The file is written on a background thread until stop_trace_to_file is called. \n\n\
+            :param path: File to write, overwritten if it exists \n\
+            :type path: String or path-like object \n\
+            :param capacity: Number of trace records each Schedule Manager holds between writes, defaults to 65536 \n\
+            :type capacity: Integer \n\
+            :raises RuntimeError: If a capture is already running" },
+
+    { "stop_trace_to_file",
+	  (PyCFunction)SchedulerStopTraceToFile,
+	  METH_NOARGS,
+	  "Stop the capture started by trace_to_file, waiting until the file has been completely written. Does nothing if no capture is running." },
+
+    { "is_tracing_to_file",
+	  (PyCFunction)SchedulerIsTracingToFile,
+	  METH_NOARGS,
+	  "Query whether a trace_to_file capture is running. \n\n\
+            :return: True if a capture is running \n\
+            :rtype: Boolean" },
+
+    { "start_stall_watchdog",
+	  (PyCFunction)SchedulerStartStallWatchdog,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Start a background thread that records any tasklet holding its thread for longer than threshold_ns without switching, see get_stall_log. \n\n\
+            :param threshold_ns: Nanoseconds a tasklet may run without switching before it is recorded \n\
+            :type threshold_ns: Integer \n\
+            :param log_capacity: Number of stall records kept, the oldest are dropped first, defaults to 256 \n\
+            :type log_capacity: Integer \n\
+            :raises ValueError: If threshold_ns or log_capacity is not positive \n\
+            :raises RuntimeError: If the watchdog is already running" },
+
+    { "stop_stall_watchdog",
+	  (PyCFunction)SchedulerStopStallWatchdog,
+	  METH_NOARGS,
+	  "Stop the watchdog started by start_stall_watchdog, the stall log is kept. Does nothing if the watchdog is not running." },
+
+    { "is_stall_watchdog_running",
+	  (PyCFunction)SchedulerIsStallWatchdogRunning,
+	  METH_NOARGS,
+	  "Query whether the stall watchdog is running. \n\n\
+            :return: True if the watchdog is running \n\
+            :rtype: Boolean" },
+
+    { "get_stall_log",
+	  (PyCFunction)SchedulerGetStallLog,
+	  METH_NOARGS,
+	  "Get the stalls recorded by the watchdog, oldest first. \n\n\
+            :return: List of dictionaries with keys thread_id, tasklet_id, time_ns, held_ns, method_name, file_name, line_number, context and stack \n\
+            :rtype: List" },
+
+    { "clear_stall_log",
+	  (PyCFunction)SchedulerClearStallLog,
+	  METH_NOARGS,
+	  "Discard every stall recorded by the watchdog." },
+
+    { "start_sampling_profiler",
+	  (PyCFunction)SchedulerStartSamplingProfiler,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Start a background thread that samples the Python stack of every Schedule Manager's thread, rooted at the current tasklet's context. \n\n\
+            :param interval_ns: Nanoseconds between samples, defaults to 10000000 \n\
+            :type interval_ns: Integer \n\
+            :raises ValueError: If interval_ns is not positive \n\
+            :raises RuntimeError: If the profiler is already running" },
+
+    { "stop_sampling_profiler",
+	  (PyCFunction)SchedulerStopSamplingProfiler,
+	  METH_NOARGS,
+	  "Stop the profiler started by start_sampling_profiler, the samples are kept. Does nothing if the profiler is not running." },
+
+    { "is_sampling_profiler_running",
+	  (PyCFunction)SchedulerIsSamplingProfilerRunning,
+	  METH_NOARGS,
+	  "Query whether the sampling profiler is running. \n\n\
+            :return: True if the profiler is running \n\
+            :rtype: Boolean" },
+
+    { "get_collapsed_stacks",
+	  (PyCFunction)SchedulerGetCollapsedStacks,
+	  METH_NOARGS,
+	  "Get the samples taken so far in collapsed stack format, as read by flamegraph.pl and speedscope. \n\n\
+            :return: One line per distinct stack, frames separated by semicolons starting with the tasklet context, followed by a space and the number of samples \n\
+            :rtype: String" },
+
+    { "get_sample_count",
+	  (PyCFunction)SchedulerGetSampleCount,
+	  METH_NOARGS,
+	  "Get the number of stacks sampled since the profiler was last reset. \n\n\
+            :return: Number of samples \n\
+            :rtype: Integer" },
+
+    { "reset_sampling_profiler",
+	  (PyCFunction)SchedulerResetSamplingProfiler,
+	  METH_NOARGS,
+	  "Discard every sample taken by the sampling profiler." },
+
+    { "start_tasklet_profiler",
+	  (PyCFunction)SchedulerStartTaskletProfiler,
+	  METH_NOARGS,
+	  "Start profiling every call made on the current thread, keeping a separate call stack and clock per tasklet. \n\n\
+            :raises RuntimeError: If the profiler is already running" },
+
+    { "stop_tasklet_profiler",
+	  (PyCFunction)SchedulerStopTaskletProfiler,
+	  METH_NOARGS,
+	  "Stop the profiler started by start_tasklet_profiler, calls still in progress are counted up to now. Does nothing if the profiler is not running. \n\n\
+            :raises RuntimeError: If called from a thread other than the one that started the profiler, or while a profile function set after it, such as by cProfile, is still installed" },
+
+    { "is_tasklet_profiler_running",
+	  (PyCFunction)SchedulerIsTaskletProfilerRunning,
+	  METH_NOARGS,
+	  "Query whether the tasklet profiler is running. \n\n\
+            :return: True if the profiler is running \n\
+            :rtype: Boolean" },
+
+    { "get_tasklet_profile",
+	  (PyCFunction)SchedulerGetTaskletProfile,
+	  METH_NOARGS,
+	  "Get the calls recorded by the tasklet profiler, merged across tasklets. \n\n\
+            :return: Dictionary in the format of pstats.Stats.stats, see get_tasklet_profile_stats \n\
+            :rtype: Dictionary" },
+
+    { "reset_tasklet_profiler",
+	  (PyCFunction)SchedulerResetTaskletProfiler,
+	  METH_NOARGS,
+	  "Discard every call recorded by the tasklet profiler." },
+
+    { "start_allocation_tracking",
+	  (PyCFunction)SchedulerStartAllocationTracking,
+	  METH_NOARGS,
+	  "Start charging every Python object and memory allocation to the tasklet current on the allocating thread. \n\n\
+            :raises RuntimeError: If allocation tracking is already running" },
+
+    { "stop_allocation_tracking",
+	  (PyCFunction)SchedulerStopAllocationTracking,
+	  METH_NOARGS,
+	  "Stop allocation tracking, the totals are kept but later frees are no longer counted. Does nothing if tracking is not running. \n\n\
+            :raises RuntimeError: If an allocator hook installed after tracking started, such as tracemalloc, is still installed" },
+
+    { "is_tracking_allocations",
+	  (PyCFunction)SchedulerIsTrackingAllocations,
+	  METH_NOARGS,
+	  "Query whether allocation tracking is running. \n\n\
+            :return: True if allocation tracking is running \n\
+            :rtype: Boolean" },
+
+    { "get_allocation_stats",
+	  (PyCFunction)SchedulerGetAllocationStats,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Get the bytes allocated and freed by each group of tasklets since tracking started or was reset. Allocations made outside any tasklet are under None. \n\n\
+            :param group_by: context groups by tasklet context, callsite by (file name, line number, function name) of the bound callable, defaults to context \n\
+            :type group_by: String \n\
+            :return: Dictionary mapping each group to a dictionary of allocated_bytes, freed_bytes, live_bytes, allocations and frees \n\
+            :rtype: Dictionary \n\
+            :raises ValueError: If group_by is not recognised" },
+
+    { "top_allocation_contexts",
+	  (PyCFunction)SchedulerTopAllocationContexts,
+	  METH_VARARGS | METH_KEYWORDS,
+	  "Get the tasklet contexts holding the most live bytes allocated while tracking. \n\n\
+            :param n: Maximum number of contexts to return, defaults to 10 \n\
+            :type n: Integer \n\
+            :return: Up to n (context, live bytes) tuples, most live bytes first \n\
+            :rtype: List" },
+
+    { "reset_allocation_tracking",
+	  (PyCFunction)SchedulerResetAllocationTracking,
+	  METH_NOARGS,
+	  "Discard the allocation totals, allocations made before the reset are no longer charged when freed." },
 	
 	{ nullptr, nullptr, 0, nullptr } /* Sentinel */
 };
@@ -1189,6 +2786,13 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
     }
 
     if (PyType_Ready(&ChannelType) < 0)
+    {
+		return nullptr;
+    }
+
+	QueueChannelType.tp_base = &ChannelType;
+
+    if (PyType_Ready(&QueueChannelType) < 0)
     {
 		return nullptr;
     }
@@ -1197,6 +2801,11 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
     {
 		return nullptr;
     }
+
+    if (PyType_Ready(&TraceRecordsType) < 0)
+    {
+		return nullptr;
+    }
 		
     m = PyModule_Create( &schedulermodule );
     if (!m)
@@ -1231,12 +2840,24 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
 		return nullptr;
 	}
 
+	Py_INCREF( &QueueChannelType );
+	if( PyModule_AddObject( m, "QueueChannel", (PyObject*)&QueueChannelType ) < 0 )
+	{
+		Py_DECREF( &CallableWrapperType );
+		Py_DECREF( &TaskletType );
+		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
+		Py_DECREF( m );
+		return nullptr;
+	}
+
     Py_INCREF( &ScheduleManagerType );
 	if( PyModule_AddObject( m, "schedule_manager", (PyObject*)&ScheduleManagerType ) < 0 )
 	{
 		Py_DECREF( &CallableWrapperType );
 		Py_DECREF( &TaskletType );
 		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
 		Py_DECREF( &ScheduleManagerType );
 		Py_DECREF( m );
 		return nullptr;
@@ -1251,6 +2872,7 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
 		Py_DECREF( &CallableWrapperType );
 		Py_DECREF( &TaskletType );
 		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
 		Py_DECREF( &ScheduleManagerType );
 		Py_XDECREF( TaskletExit );
 		Py_CLEAR( TaskletExit );
@@ -1267,6 +2889,60 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
 		Py_DECREF( &CallableWrapperType );
 		Py_DECREF( &TaskletType );
 		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
+		Py_DECREF( &ScheduleManagerType );
+		Py_XDECREF( TaskletExit );
+		Py_CLEAR( TaskletExit );
+		Py_DECREF( m );
+		return nullptr;
+	}
+
+	// Trace event codes and flags, and snapshot flags
+	const std::pair<const char*, long> traceConstants[] = {
+		{ "TRACE_SWITCH", static_cast<long>( TraceEvent::SWITCH ) },
+		{ "TRACE_INSERT", static_cast<long>( TraceEvent::INSERT ) },
+		{ "TRACE_KILL", static_cast<long>( TraceEvent::KILL ) },
+		{ "TRACE_COMPLETE", static_cast<long>( TraceEvent::COMPLETE ) },
+		{ "TRACE_CHANNEL_SEND", static_cast<long>( TraceEvent::CHANNEL_SEND ) },
+		{ "TRACE_CHANNEL_RECEIVE", static_cast<long>( TraceEvent::CHANNEL_RECEIVE ) },
+		{ "TRACE_CHANNEL_BLOCK", static_cast<long>( TraceEvent::CHANNEL_BLOCK ) },
+		{ "TRACE_CHANNEL_UNBLOCK", static_cast<long>( TraceEvent::CHANNEL_UNBLOCK ) },
+		{ "TRACE_FLAG_WILL_BLOCK", static_cast<long>( TRACE_FLAG_WILL_BLOCK ) },
+		{ "TRACE_FLAG_RUN_NEXT", static_cast<long>( TRACE_FLAG_RUN_NEXT ) },
+		{ "SNAPSHOT_FLAG_ALIVE", static_cast<long>( SNAPSHOT_FLAG_ALIVE ) },
+		{ "SNAPSHOT_FLAG_BLOCKED", static_cast<long>( SNAPSHOT_FLAG_BLOCKED ) },
+		{ "SNAPSHOT_FLAG_PAUSED", static_cast<long>( SNAPSHOT_FLAG_PAUSED ) },
+		{ "SNAPSHOT_FLAG_SCHEDULED", static_cast<long>( SNAPSHOT_FLAG_SCHEDULED ) }
+	};
+
+	for( const std::pair<const char*, long>& constant : traceConstants )
+	{
+		if( PyModule_AddIntConstant( m, constant.first, constant.second ) < 0 )
+		{
+			Py_DECREF( &CallableWrapperType );
+			Py_DECREF( &TaskletType );
+			Py_DECREF( &ChannelType );
+			Py_DECREF( &QueueChannelType );
+			Py_DECREF( &ScheduleManagerType );
+			Py_XDECREF( TaskletExit );
+			Py_CLEAR( TaskletExit );
+			Py_DECREF( m );
+			return nullptr;
+		}
+	}
+
+#if defined( SCHEDULER_USDT )
+	PyObject* hasUsdtProbes = Py_True;
+#else
+	PyObject* hasUsdtProbes = Py_False;
+#endif
+
+	if( PyModule_AddStringConstant( m, "TRACE_RECORD_FORMAT", TraceBuffer::s_recordFormat ) < 0 || PyModule_AddObjectRef( m, "HAS_USDT_PROBES", hasUsdtProbes ) < 0 )
+	{
+		Py_DECREF( &CallableWrapperType );
+		Py_DECREF( &TaskletType );
+		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
 		Py_DECREF( &ScheduleManagerType );
 		Py_XDECREF( TaskletExit );
 		Py_CLEAR( TaskletExit );
@@ -1325,6 +3001,12 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
 	api.PyScheduler_GetActiveTaskletCount = PyScheduler_GetActiveTaskletCount;
 	api.PyScheduler_GetTaskletsCompletedLastRunWithTimeout =  PyScheduler_GetTaskletsCompletedLastRunWithTimeout;
 	api.PyScheduler_GetTaskletsSwitchedLastRunWithTimeout = PyScheduler_GetTaskletsSwitchedLastRunWithTimeout;
+	api.PyScheduler_RunWithTimeoutEarliestDeadlineFirst = PyScheduler_RunWithTimeoutEarliestDeadlineFirst;
+	api.PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout = PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout;
+	api.PyTasklet_GetWallTime = PyTasklet_GetWallTime;
+	api.PyTasklet_GetCpuTime = PyTasklet_GetCpuTime;
+	api.PyTasklet_GetSwitchInCount = PyTasklet_GetSwitchInCount;
+	api.PyTasklet_GetLongestSlice = PyTasklet_GetLongestSlice;
 
 	/* Create a Capsule containing the API pointer array's address */
 	c_api_object = PyCapsule_New( (void*)&api, "scheduler._C_API", nullptr );
@@ -1334,6 +3016,7 @@ PyMODINIT_FUNC CCP_CONCATENATE(PyInit__scheduler, CCP_BUILD_FLAVOR)(void)
 		Py_DECREF( &CallableWrapperType );
 		Py_DECREF( &TaskletType );
 		Py_DECREF( &ChannelType );
+		Py_DECREF( &QueueChannelType );
 		Py_DECREF( &ScheduleManagerType );
 		Py_XDECREF( TaskletExit );
 		Py_CLEAR( TaskletExit );
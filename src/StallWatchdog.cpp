@@ -0,0 +1,290 @@
+#include "StallWatchdog.h"
+
+#include <algorithm>
+#include <chrono>
+#include <unordered_map>
+#include <vector>
+
+#include "GILRAII.h"
+#include "ScheduleManager.h"
+#include "Tasklet.h"
+#include "Utils.h"
+
+// What the watchdog last saw of one ScheduleManager
+struct StallObservation
+{
+	unsigned long long m_switchCount;
+
+	long long m_firstSeen; // when the switch count was first seen at this value
+
+	bool m_reported;
+};
+
+// A ScheduleManager seen holding the same tasklet for longer than the threshold
+struct StallCandidate
+{
+	ScheduleManager* m_scheduleManager;
+
+	unsigned long long m_switchCount;
+
+	long long m_heldTime;
+};
+
+bool StallWatchdog::Start( long long threshold, size_t logCapacity )
+{
+	if( s_active )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "The stall watchdog is already running." );
+
+		return false;
+	}
+
+	if( !s_log )
+	{
+		s_log = PyList_New( 0 );
+
+		if( !s_log )
+		{
+			return false;
+		}
+	}
+
+	s_threshold = threshold;
+
+	s_logCapacity = logCapacity;
+
+	s_stopping = false;
+
+	s_thread = std::thread( &StallWatchdog::Run );
+
+	s_active = true;
+
+	return true;
+}
+
+void StallWatchdog::Stop()
+{
+	if( !s_active )
+	{
+		return;
+	}
+
+	{
+		std::lock_guard<std::mutex> lock( s_mutex );
+
+		s_stopping = true;
+	}
+
+	s_wake.notify_all();
+
+	// The watchdog may be waiting on the GIL to record a stall
+	Py_BEGIN_ALLOW_THREADS
+
+	s_thread.join();
+
+	Py_END_ALLOW_THREADS
+
+	s_active = false;
+}
+
+bool StallWatchdog::IsActive()
+{
+	return s_active;
+}
+
+PyObject* StallWatchdog::GetLog()
+{
+	return s_log ? PyList_GetSlice( s_log, 0, PyList_GET_SIZE( s_log ) ) : PyList_New( 0 );
+}
+
+void StallWatchdog::ClearLog()
+{
+	if( s_log )
+	{
+		PyList_SetSlice( s_log, 0, PyList_GET_SIZE( s_log ), nullptr );
+	}
+}
+
+void StallWatchdog::Run()
+{
+	// Checking several times per threshold bounds how late a stall is noticed
+	std::chrono::nanoseconds interval( std::max( s_threshold / 4, 1000000LL ) );
+
+	std::unordered_map<ScheduleManager*, StallObservation> observations;
+
+	std::unordered_map<ScheduleManager*, StallObservation> previousObservations;
+
+	std::vector<StallCandidate> candidates;
+
+	while( true )
+	{
+		{
+			std::unique_lock<std::mutex> lock( s_mutex );
+
+			if( s_wake.wait_for( lock, interval, []() { return s_stopping.load(); } ) )
+			{
+				return;
+			}
+		}
+
+		long long now = MonotonicTimeNanoseconds();
+
+		previousObservations.swap( observations );
+
+		observations.clear();
+
+		candidates.clear();
+
+		{
+			std::lock_guard<std::mutex> lock( ScheduleManager::GetScheduleManagersMutex() );
+
+			for( ScheduleManager* scheduleManager : ScheduleManager::GetScheduleManagers() )
+			{
+				unsigned long long switchCount = scheduleManager->GetWatchdogSwitchCount();
+
+				auto previous = previousObservations.find( scheduleManager );
+
+				if( previous == previousObservations.end() || previous->second.m_switchCount != switchCount || !scheduleManager->IsRunningTasklet() )
+				{
+					observations[scheduleManager] = StallObservation{ switchCount, now, false };
+
+					continue;
+				}
+
+				StallObservation observation = previous->second;
+
+				if( !observation.m_reported && now - observation.m_firstSeen >= s_threshold )
+				{
+					candidates.push_back( StallCandidate{ scheduleManager, switchCount, now - observation.m_firstSeen } );
+
+					// One record per stall, the next is only made once the thread has switched
+					observation.m_reported = true;
+				}
+
+				observations[scheduleManager] = observation;
+			}
+		}
+
+		for( const StallCandidate& candidate : candidates )
+		{
+			GILRAII gil;
+
+			if( s_stopping )
+			{
+				return;
+			}
+
+			RecordStall( candidate.m_scheduleManager, candidate.m_switchCount, candidate.m_heldTime );
+		}
+	}
+}
+
+void StallWatchdog::RecordStall( ScheduleManager* scheduleManager, unsigned long long switchCount, long long heldTime )
+{
+	const std::vector<ScheduleManager*>& scheduleManagers = ScheduleManager::GetScheduleManagers();
+
+	// The ScheduleManager may have been destroyed, or the tasklet may have yielded, while waiting for the GIL
+	if( std::find( scheduleManagers.begin(), scheduleManagers.end(), scheduleManager ) == scheduleManagers.end() ||
+		scheduleManager->GetWatchdogSwitchCount() != switchCount )
+	{
+		return;
+	}
+
+	PyObject* record = BuildStallRecord( scheduleManager, heldTime );
+
+	if( !record || PyList_Append( s_log, record ) < 0 )
+	{
+		Py_XDECREF( record );
+
+		PyErr_WriteUnraisable( nullptr );
+
+		return;
+	}
+
+	Py_DECREF( record );
+
+	Py_ssize_t excess = PyList_GET_SIZE( s_log ) - static_cast<Py_ssize_t>( s_logCapacity );
+
+	if( excess > 0 )
+	{
+		PyList_SetSlice( s_log, 0, excess, nullptr );
+	}
+}
+
+PyObject* StallWatchdog::BuildStallRecord( ScheduleManager* scheduleManager, long long heldTime )
+{
+	Tasklet* tasklet = scheduleManager->GetCurrentTasklet();
+
+	PyObject* stack = nullptr;
+
+	// Stack of the stalled thread as formatted by traceback.format_stack
+	PyObject* sys = PyImport_ImportModule( "sys" );
+
+	PyObject* frames = sys ? PyObject_CallMethod( sys, "_current_frames", nullptr ) : nullptr;
+
+	Py_XDECREF( sys );
+
+	if( !frames )
+	{
+		return nullptr;
+	}
+
+	PyObject* threadId = PyLong_FromUnsignedLong( scheduleManager->ThreadId() );
+
+	PyObject* frame = threadId ? PyDict_GetItemWithError( frames, threadId ) : nullptr;
+
+	Py_XDECREF( threadId );
+
+	if( frame )
+	{
+		PyObject* traceback = PyImport_ImportModule( "traceback" );
+
+		stack = traceback ? PyObject_CallMethod( traceback, "format_stack", "O", frame ) : nullptr;
+
+		Py_XDECREF( traceback );
+	}
+	else if( !PyErr_Occurred() )
+	{
+		stack = PyList_New( 0 );
+	}
+
+	Py_DECREF( frames );
+
+	if( !stack )
+	{
+		return nullptr;
+	}
+
+	PyObject* methodName = tasklet->GetMethodName();
+
+	PyObject* fileName = methodName ? tasklet->GetFilename() : nullptr;
+
+	PyObject* context = fileName ? tasklet->GetContext() : nullptr;
+
+	PyObject* record = nullptr;
+
+	if( context )
+	{
+		record = Py_BuildValue(
+			"{s:k,s:K,s:L,s:L,s:O,s:O,s:l,s:O,s:O}",
+			"thread_id", scheduleManager->ThreadId(),
+			"tasklet_id", tasklet->GetId(),
+			"time_ns", MonotonicTimeNanoseconds(),
+			"held_ns", heldTime,
+			"method_name", methodName,
+			"file_name", fileName,
+			"line_number", tasklet->GetLineNumber(),
+			"context", context,
+			"stack", stack );
+	}
+
+	Py_XDECREF( methodName );
+
+	Py_XDECREF( fileName );
+
+	Py_XDECREF( context );
+
+	Py_DECREF( stack );
+
+	return record;
+}
@@ -0,0 +1,62 @@
+#pragma once
+#ifndef StallWatchdog_H
+#define StallWatchdog_H
+
+#include "stdafx.h"
+
+#include <atomic>
+#include <condition_variable>
+#include <cstddef>
+#include <mutex>
+#include <thread>
+
+class ScheduleManager;
+
+// Watches every ScheduleManager from a background thread and records the tasklet, callsite and Python stack
+// of any tasklet that holds its thread for longer than a threshold without switching.
+// Observation only reads each ScheduleManager's switch counter so does not need the GIL, the GIL is only
+// taken to record a stall once one has been seen.
+// Start, Stop and the log accessors must be called with the GIL held.
+class StallWatchdog
+{
+public:
+	// Returns false with a Python exception set on failure
+	static bool Start( long long threshold, size_t logCapacity );
+
+	// Waits for the watchdog thread to exit, releasing the GIL while waiting
+	static void Stop();
+
+	static bool IsActive();
+
+	// Returns a new list holding the recorded stalls, oldest first
+	static PyObject* GetLog();
+
+	static void ClearLog();
+
+private:
+
+	static void Run();
+
+	// Called on the watchdog thread with the GIL held
+	static void RecordStall( ScheduleManager* scheduleManager, unsigned long long switchCount, long long heldTime );
+
+	static PyObject* BuildStallRecord( ScheduleManager* scheduleManager, long long heldTime );
+
+	inline static std::thread s_thread;
+
+	inline static std::mutex s_mutex;
+
+	inline static std::condition_variable s_wake;
+
+	inline static std::atomic<bool> s_stopping = false;
+
+	inline static bool s_active = false;
+
+	inline static long long s_threshold = 0;
+
+	inline static size_t s_logCapacity = 0;
+
+	inline static PyObject* s_log = nullptr; // list of stall records, only touched with the GIL held
+};
+
+#endif // StallWatchdog_H
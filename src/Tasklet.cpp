@@ -11,6 +11,7 @@
 
 #include "ScheduleManager.h"
 #include "Channel.h"
+#include "Probes.h"
 #include "PyCallableWrapper.h"
 #include "Utils.h"
 
@@ -20,42 +21,52 @@ Tasklet::Tasklet( PyObject* pythonObject, PyObject* taskletExitException, bool i
 	m_callable( nullptr ),
 	m_arguments( nullptr ),
 	m_kwArguments( nullptr ),
-	m_isMain( isMain ),
-	m_transferInProgress( false ),
-	m_scheduled( false ),
-	m_alive( isMain ),
-	m_blocktrap( false ),
 	m_previous( nullptr ),
 	m_next( nullptr ),
-	m_threadId( -1 ),
+	m_nextBlocked( nullptr ),
+	m_previousBlocked( nullptr ),
 	m_transferArguments( nullptr ),
 	m_transferException( nullptr ),
 	m_channelBlockedOn( nullptr ),
-	m_blockedDirection( ChannelDirection::NEITHER ),
-	m_blocked( false ),
+	m_taskletParent( nullptr ),
 	m_exceptionState( Py_None ),
 	m_exceptionArguments( Py_None ),
 	m_taskletExitException( taskletExitException ),
-	m_paused( false ),
-	m_taskletParent( nullptr ),
-	m_firstRun( true ),
+	m_scheduleManager( nullptr ),
+	m_methodName( nullptr ),
+	m_moduleName( nullptr ),
+	m_callsiteCode( nullptr ),
+	m_context( nullptr ),
+	m_extendedState( nullptr ),
+	m_id( s_nextId++ ),
+	m_threadId( -1 ),
 	m_timesSwitchedTo( 0 ),
+	m_startTime( 0 ),
+	m_endTime( 0 ),
+	m_wallTime( 0 ),
+	m_switchInCount( 0 ),
+	m_longestSlice( 0 ),
+	m_wakeTime( 0 ),
+	m_insertTime( 0 ),
+	m_blockTime( 0 ),
+	m_priority( 0 ),
+	m_queueLevel( -1 ),
+	m_blockedDirection( ChannelDirection::NEITHER ),
 	m_reschedule( RescheduleType::NONE ),
-	m_taggedForRemoval( false ),
-	m_previousBlocked( nullptr ),
-	m_nextBlocked( nullptr ),
-	m_scheduleManager( nullptr ),
+	m_isMain( isMain ),
+	m_transferInProgress( false ),
+	m_scheduled( false ),
+	m_alive( isMain ),
+	m_blocktrap( false ),
+	m_restoreException( false ),
+	m_blocked( false ),
+	m_paused( false ),
+	m_firstRun( true ),
 	m_remove( false ),
+	m_taggedForRemoval( false ),
 	m_killPending( false ),
-	m_restoreException( false ),
-	m_lineNumber( 0 ),
-	m_startTime( 0 ),
-	m_endTime( 0 ),
-	m_runTime( 0.0 ),
 	m_highlighted( false ),
-	m_dontRaise( false ),
-	m_ContextManagerCallable( nullptr ),
-	m_exceptionHandler(nullptr)
+	m_dontRaise( false )
 {
     // Update Tasklet counters
 	s_totalAllTimeTaskletCount++;
@@ -75,6 +86,11 @@ Tasklet::~Tasklet()
 		SetAlive( false );
 	}
 
+	if( m_scheduleManager && !m_isMain )
+	{
+		m_scheduleManager->ForgetDeadTasklet( this );
+	}
+
     // Decriment Tasklet Counter
 	s_totalActiveTasklets--;
 
@@ -88,8 +104,32 @@ Tasklet::~Tasklet()
 
 	Py_XDECREF( m_transferArguments );
 
-    Py_XDECREF( m_ContextManagerCallable );
+	Py_XDECREF( m_methodName );
+
+	Py_XDECREF( m_moduleName );
 
+	Py_XDECREF( m_callsiteCode );
+
+	Py_XDECREF( m_context );
+
+	if( m_extendedState )
+	{
+		Py_XDECREF( m_extendedState->m_exceptionHandler );
+
+		Py_XDECREF( m_extendedState->m_contextManagerCallable );
+
+		Py_XDECREF( m_extendedState->m_parentCallsite );
+	}
+}
+
+TaskletExtendedState& Tasklet::ExtendedState()
+{
+	if( !m_extendedState )
+	{
+		m_extendedState = std::make_unique<TaskletExtendedState>();
+	}
+
+	return *m_extendedState;
 }
 
 void Tasklet::SetNextBlocked(Tasklet* tasklet)
@@ -220,6 +260,69 @@ bool Tasklet::Insert()
  
 }
 
+bool Tasklet::InsertAt( long long wakeTime )
+{
+	// The timer wheel and runnables queue of another thread are not safe to modify from here
+	if( !BelongsToCurrentThread() )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Failed to insert tasklet: Cannot insert tasklet at a wake time from another thread" );
+
+		return false;
+	}
+
+	if( m_blocked )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Failed to insert tasklet: Cannot insert blocked tasklet" );
+
+		return false;
+	}
+
+	if( !m_alive )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "Failed to insert tasklet: Cannot insert dead tasklet" );
+
+		return false;
+	}
+
+	if( m_scheduleManager->GetCurrentTasklet() == this )
+	{
+		if( m_isMain )
+		{
+			PyErr_SetString( PyExc_RuntimeError, "Failed to insert tasklet: The main tasklet cannot wait on a timer" );
+
+			return false;
+		}
+
+		m_scheduleManager->AddTimer( this, wakeTime );
+
+		// Leave the runnables queue until the timer expires
+		if( !m_scheduleManager->Schedule( RescheduleType::NONE, true ) )
+		{
+			// Woken by an exception, such as being killed
+			m_scheduleManager->CancelTimer( this );
+
+			return false;
+		}
+
+		return true;
+	}
+
+	if( m_scheduled )
+	{
+		// Tasklet reference is relinquished from the schedule manager queue
+		if( m_scheduleManager->RemoveTasklet( this ) )
+		{
+			Decref();
+		}
+	}
+
+	m_paused = true;
+
+	m_scheduleManager->AddTimer( this, wakeTime );
+
+	return true;
+}
+
 bool Tasklet::SwitchImplementation()
 {
 	TelemetryZone telemetryZone(TMCM_CPP, "Tasklet::SwitchImplementation()", __FILE__, __LINE__, tracy::Color::LightGreen);
@@ -427,6 +530,15 @@ bool Tasklet::SwitchTo( )
 			SetAlive( false );
 
 			OnCallableExited();
+
+			m_scheduleManager->GetStats().m_completions++;
+
+			m_scheduleManager->Trace( TraceEvent::COMPLETE, m_id );
+
+			if( SCHEDULER_PROBE_ENABLED( tasklet_complete ) )
+			{
+				SCHEDULER_PROBE( tasklet_complete, m_id, GetContextUtf8() );
+			}
 		}
 
 		// Removed tasklet is paused
@@ -580,6 +692,15 @@ bool Tasklet::Kill( bool pending /*=false*/ )
 		return true;
     }
 
+	m_scheduleManager->GetStats().m_kills++;
+
+	m_scheduleManager->Trace( TraceEvent::KILL, m_id );
+
+	if( SCHEDULER_PROBE_ENABLED( tasklet_kill ) )
+	{
+		SCHEDULER_PROBE( tasklet_kill, m_id, GetContextUtf8() );
+	}
+
     //Store so condition can be reinstated on failure
     bool blockedStore = m_blocked;
 	Channel* blockChannelStore = m_channelBlockedOn;
@@ -608,7 +729,8 @@ bool Tasklet::Kill( bool pending /*=false*/ )
 
             m_killPending = true;
 
-            if( blockedStore )
+            // Tasklets blocked in select are not on a single channel, they unregister when they run
+            if( blockedStore && blockChannelStore )
 			{
 				blockChannelStore->UnblockTaskletFromChannel( this );
 
@@ -691,10 +813,30 @@ void Tasklet::Block( Channel* channel )
 	m_blocked = true;
 
     m_channelBlockedOn = channel;
+
+	m_blockTime = MonotonicTimeNanoseconds();
+
+	m_scheduleManager->GetStats().m_blocks++;
+
+	m_scheduleManager->Trace( TraceEvent::CHANNEL_BLOCK, m_id, channel ? channel->GetId() : 0 );
 }
 
 void Tasklet::Unblock()
 {
+	if( m_blocked )
+	{
+		if( m_channelBlockedOn )
+		{
+			m_channelBlockedOn->AddBlockedTime( MonotonicTimeNanoseconds() - m_blockTime );
+		}
+		else if( GetSelectWaiter() )
+		{
+			Channel::AddSelectBlockedTime( GetSelectWaiter(), MonotonicTimeNanoseconds() - m_blockTime );
+		}
+
+		m_scheduleManager->Trace( TraceEvent::CHANNEL_UNBLOCK, m_id, m_channelBlockedOn ? m_channelBlockedOn->GetId() : 0 );
+	}
+
 	m_blocked = false;
 
 	m_channelBlockedOn = nullptr;
@@ -708,6 +850,9 @@ void Tasklet::SetAlive( bool value )
 	}
 	else
 	{
+		// Dead tasklets will never be woken, so the timer wheel need not keep them alive
+		m_scheduleManager->CancelTimer( this );
+
 		m_scheduleManager->UnregisterTaskletFromThread( this );
 	}
 
@@ -1036,6 +1181,11 @@ void Tasklet::SetScheduleManager( ScheduleManager* scheduleManager )
 		// It is not valid to have a Tasklet that is alive with no ScheduleManager
 		if( !m_alive )
 		{
+			if( m_scheduleManager && !m_isMain )
+			{
+				m_scheduleManager->ForgetDeadTasklet( this );
+			}
+
 			m_threadId = -1;
 			m_scheduleManager = scheduleManager;
 		}
@@ -1044,6 +1194,11 @@ void Tasklet::SetScheduleManager( ScheduleManager* scheduleManager )
 	}
 	else
 	{
+		if( !m_alive && !m_isMain && m_scheduleManager && m_scheduleManager != scheduleManager )
+		{
+			m_scheduleManager->ForgetDeadTasklet( this );
+		}
+
 		m_threadId = scheduleManager->ThreadId();
 
 		m_scheduleManager = scheduleManager;
@@ -1059,11 +1214,58 @@ ScheduleManager* Tasklet::GetScheduleManager()
 	return m_scheduleManager;
 }
 
+const void* Tasklet::GetCensusKey( TaskletCensusGroup group ) const
+{
+	switch( group )
+	{
+	case TaskletCensusGroup::CALLSITE:
+		// Tasklets bound to callables without code objects are told apart by name
+		return m_callsiteCode ? static_cast<const void*>( m_callsiteCode ) : static_cast<const void*>( m_methodName );
+	case TaskletCensusGroup::CONTEXT:
+		return m_context;
+	case TaskletCensusGroup::CHANNEL:
+		return m_blocked ? m_channelBlockedOn : nullptr;
+	}
+
+	return nullptr;
+}
+
 bool Tasklet::ShouldRestoreTransferException() const
 {
 	return m_restoreException;
 }
 
+int Tasklet::GetReceiveBatchCapacity() const
+{
+	return m_extendedState ? m_extendedState->m_receiveBatchCapacity : 0;
+}
+
+void Tasklet::SetReceiveBatchCapacity( int capacity )
+{
+	if( m_extendedState || capacity != 0 )
+	{
+		ExtendedState().m_receiveBatchCapacity = capacity;
+	}
+}
+
+bool Tasklet::IsSendingBatch() const
+{
+	return GetSendBatchOffset() >= 0;
+}
+
+Py_ssize_t Tasklet::GetSendBatchOffset() const
+{
+	return m_extendedState ? m_extendedState->m_sendBatchOffset : -1;
+}
+
+void Tasklet::SetSendBatchOffset( Py_ssize_t offset )
+{
+	if( m_extendedState || offset != -1 )
+	{
+		ExtendedState().m_sendBatchOffset = offset;
+	}
+}
+
 bool Tasklet::Setup( PyObject* args, PyObject* kwargs )
 {
 
@@ -1117,85 +1319,103 @@ bool Tasklet::Setup( PyObject* args, PyObject* kwargs )
 
 }
 
+// Returns a new reference to the interned string form of value
+static PyObject* InternedStr( PyObject* value )
+{
+	PyObject* str = PyObject_Str( value );
+
+	if( str )
+	{
+		PyUnicode_InternInPlace( &str );
+	}
+
+	return str;
+}
+
+// Looks up an optional attribute, a missing or failing attribute is treated as absent
+static PyObject* OptionalAttr( PyObject* obj, const char* name )
+{
+	PyObject* attr = PyObject_GetAttrString( obj, name );
+
+	if( !attr )
+	{
+		PyErr_Clear();
+	}
+
+	return attr;
+}
+
 bool Tasklet::SetCallsiteData( PyObject* callable )
 {
-	m_methodName = { "unknown_method" };
-	m_moduleName = { "unknown_module" };
-	m_fileName =   { "unknown_file" };
-	m_lineNumber = { 0 };
+	Py_CLEAR( m_methodName );
+	Py_CLEAR( m_moduleName );
+	Py_CLEAR( m_callsiteCode );
 
-	if( PyObject_HasAttrString( callable, "__name__" ) )
+	PyObject* function = callable;
+
+	if( PyMethod_Check( function ) )
 	{
-		PyObject* dunderName = PyObject_GetAttrString( callable, "__name__" );
+		function = PyMethod_GET_FUNCTION( function );
+	}
 
-        // In most places, __name__ is a string.
-        // But in some places in the python code, we are setting it to something else
-		PyObject* nameString = PyObject_Str( dunderName );
+	// Plain functions carry everything needed, no attribute lookups or string copies required.
+	// Name and module are shared with the function, file name and line number stay on the code object until read.
+	if( PyFunction_Check( function ) )
+	{
+		PyFunctionObject* functionObject = reinterpret_cast<PyFunctionObject*>( function );
 
-        Py_DECREF( dunderName );
+		m_methodName = Py_NewRef( functionObject->func_name );
+
+		PyObject* module = functionObject->func_module;
 
-		if( !StdStringFromPyObject( nameString, m_methodName ) )
+		if( module )
 		{
-			Py_DECREF( nameString );
-			return false;
+            // In most places, __module__ is a string.
+            // But in some places in the python code, we are setting it to something else
+			m_moduleName = PyUnicode_CheckExact( module ) ? Py_NewRef( module ) : InternedStr( module );
+
+			if( !m_moduleName )
+			{
+				return false;
+			}
 		}
 
-        Py_DECREF( nameString );
+		m_callsiteCode = Py_NewRef( functionObject->func_code );
+
+		return true;
 	}
 
-	
-	if( PyObject_HasAttrString( callable, "__module__" ) )
+	PyObject* dunderName = OptionalAttr( callable, "__name__" );
+
+	if( dunderName )
 	{
-		PyObject* dunderModule = PyObject_GetAttrString( callable, "__module__" );
-		PyObject* moduleString = PyObject_Str( dunderModule );
+        // In most places, __name__ is a string.
+        // But in some places in the python code, we are setting it to something else
+		m_methodName = InternedStr( dunderName );
 
-		Py_DECREF( dunderModule );
+        Py_DECREF( dunderName );
 
-        // In most places, __module__ is a string.
-        // But in some places in the python code, we are setting it to something else
-		if( !StdStringFromPyObject( moduleString, m_moduleName ) )
+		if( !m_methodName )
 		{
-			Py_DECREF( moduleString );
 			return false;
 		}
-        
-		Py_DECREF( moduleString );
 	}
-   
-    if (!PyObject_HasAttrString(callable, "__code__"))
-    {
-        return true;
-    }
 
-    PyObject* dunderCode = PyObject_GetAttrString( callable, "__code__" );
+	PyObject* dunderModule = OptionalAttr( callable, "__module__" );
 
-    if( PyObject_HasAttrString( dunderCode, "co_filename" ) )
+	if( dunderModule )
 	{
-		PyObject* coFileName = PyObject_GetAttrString( dunderCode, "co_filename" );
-		bool res = StdStringFromPyObject(coFileName , m_fileName );
-		Py_DECREF( coFileName );
-        
-        if (!res)
-        {
-			Py_DECREF( dunderCode );
-			return false;
-        }
-	}
+		m_moduleName = InternedStr( dunderModule );
 
-	if( PyObject_HasAttrString( dunderCode, "co_firstlineno" ) )
-	{
-		PyObject* coLineNumber = PyObject_GetAttrString( dunderCode, "co_firstlineno" );
-		m_lineNumber = PyLong_AsLong( coLineNumber );
-		Py_DECREF( coLineNumber );
+		Py_DECREF( dunderModule );
 
-        if (PyErr_Occurred())
-        {
-			Py_DECREF( dunderCode );
+		if( !m_moduleName )
+		{
 			return false;
-        }
+		}
 	}
 
-    Py_DECREF( dunderCode );
+	m_callsiteCode = OptionalAttr( callable, "__code__" );
 
     return true;
 }
@@ -1313,6 +1533,17 @@ bool Tasklet::Bind(PyObject* callable, PyObject* args, PyObject* kwargs)
 
     m_timesSwitchedTo = 0;
 
+    m_wallTime = 0;
+
+    if( m_extendedState )
+    {
+		m_extendedState->m_cpuTime = 0;
+    }
+
+    m_switchInCount = 0;
+
+    m_longestSlice = 0;
+
     return true;
 
 }
@@ -1390,65 +1621,97 @@ bool Tasklet::BelongsToCurrentThread()
     return ret;
 }
 
-std::string Tasklet::GetMethodName()
+PyObject* Tasklet::GetMethodName()
 {
-	return m_methodName;
+	return m_methodName ? Py_NewRef( m_methodName ) : PyUnicode_InternFromString( "unknown_method" );
 }
 
-void Tasklet::SetMethodName(std::string& methodName)
+PyObject* Tasklet::GetModuleName()
 {
-	m_methodName = methodName;
+	return m_moduleName ? Py_NewRef( m_moduleName ) : PyUnicode_InternFromString( "unknown_module" );
 }
 
-std::string Tasklet::GetModuleName()
+PyObject* Tasklet::GetContext()
 {
-	return m_moduleName;
+	return m_context ? Py_NewRef( m_context ) : PyUnicode_FromString( "" );
 }
 
-void Tasklet::SetModuleName(std::string& moduleName)
+const char* Tasklet::GetContextUtf8()
 {
-	m_moduleName = moduleName;
-}
+	if( !m_context )
+	{
+		return "";
+	}
 
-std::string Tasklet::GetContext()
-{
-    return m_context;
-}
+	// The UTF-8 buffer is cached on the string object so stays valid for as long as the context does
+	const char* context = PyUnicode_AsUTF8( m_context );
 
-std::string Tasklet::GetFilename()
-{
-	return m_fileName;
+	if( !context )
+	{
+		PyErr_Clear();
+
+		return "";
+	}
+
+	return context;
 }
 
-void Tasklet::SetFilename( std::string& fileName )
+PyObject* Tasklet::GetFilename()
 {
-	m_fileName = fileName;
+	PyObject* fileName = m_callsiteCode ? OptionalAttr( m_callsiteCode, "co_filename" ) : nullptr;
+
+	if( !fileName )
+	{
+		return PyUnicode_InternFromString( "unknown_file" );
+	}
+
+	if( !PyUnicode_Check( fileName ) )
+	{
+		Py_DECREF( fileName );
+
+		PyErr_SetString( PyExc_TypeError, "value must be a string" );
+
+		return nullptr;
+	}
+
+	return fileName;
 }
 
 long Tasklet::GetLineNumber()
 {
-	return m_lineNumber;
-}
+	PyObject* lineNumber = m_callsiteCode ? OptionalAttr( m_callsiteCode, "co_firstlineno" ) : nullptr;
 
-void Tasklet::SetLineNumber( long lineNumber )
-{
-	m_lineNumber = lineNumber;
+	if( !lineNumber )
+	{
+		return 0;
+	}
+
+	long ret = PyLong_AsLong( lineNumber );
+
+	Py_DECREF( lineNumber );
+
+	return ret;
 }
 
-void Tasklet::SetContext(std::string& context)
+void Tasklet::SetContext( PyObject* context )
 {
-	m_context = context;
-}
+	Py_XINCREF( context );
 
+	Py_XSETREF( m_context, context );
+}
 
-std::string Tasklet::GetParentCallsite()
+PyObject* Tasklet::GetParentCallsite()
 {
-	return m_parentCallsite;
+	PyObject* parentCallsite = m_extendedState ? m_extendedState->m_parentCallsite : nullptr;
+
+	return parentCallsite ? Py_NewRef( parentCallsite ) : PyUnicode_FromString( "" );
 }
 
-void Tasklet::SetParentCallsite(std::string& parentCallsite)
+void Tasklet::SetParentCallsite( PyObject* parentCallsite )
 {
-	m_parentCallsite = parentCallsite;
+	Py_XINCREF( parentCallsite );
+
+	Py_XSETREF( ExtendedState().m_parentCallsite, parentCallsite );
 }
 
 long long Tasklet::GetStartTime()
@@ -1473,12 +1736,12 @@ void Tasklet::SetEndTime( long long endTime )
 
 double Tasklet::GetRunTime()
 {
-	return m_runTime;
+	return m_extendedState ? m_extendedState->m_runTime : 0.0;
 }
 
 void Tasklet::SetRunTime( double runTime )
 {
-	m_runTime = runTime;
+	ExtendedState().m_runTime = runTime;
 }
 
 bool Tasklet::GetHighlighted()
@@ -1511,14 +1774,16 @@ bool Tasklet::SetDontRaise( bool dontRaise )
 
 PyObject* Tasklet::GetContextManagerCallable() const
 {
-	return m_ContextManagerCallable;
+	return m_extendedState ? m_extendedState->m_contextManagerCallable : nullptr;
 }
 
 void Tasklet::SetContextManagerCallable( PyObject* contextManagerCallable )
 {
-	Py_XDECREF( m_ContextManagerCallable );
+	TaskletExtendedState& extendedState = ExtendedState();
+
+	Py_XDECREF( extendedState.m_contextManagerCallable );
 
-	m_ContextManagerCallable = contextManagerCallable;
+	extendedState.m_contextManagerCallable = contextManagerCallable;
 }
 
 
@@ -1529,12 +1794,136 @@ long Tasklet::GetTimesSwitchedTo()
 
 PyObject* Tasklet::GetExceptionHandler() const
 {
-	return m_exceptionHandler;
+	return m_extendedState ? m_extendedState->m_exceptionHandler : nullptr;
 }
 
 void Tasklet::SetExceptionHandler(PyObject* exceptionHander)
 {
-	Py_XDECREF( m_exceptionHandler );
+	TaskletExtendedState& extendedState = ExtendedState();
+
+	Py_XDECREF( extendedState.m_exceptionHandler );
+
+    extendedState.m_exceptionHandler = exceptionHander;
+}
+
+int Tasklet::GetPriority() const
+{
+	return m_priority;
+}
+
+void Tasklet::SetPriority( int priority )
+{
+	m_priority = priority;
+}
+
+int Tasklet::GetQueueLevel() const
+{
+	return m_queueLevel;
+}
+
+void Tasklet::SetQueueLevel( int level )
+{
+	m_queueLevel = level;
+}
+
+long long Tasklet::GetDeadline() const
+{
+	return m_extendedState ? m_extendedState->m_deadline : 0;
+}
+
+void Tasklet::SetDeadline( long long deadline )
+{
+	if( m_extendedState || deadline != 0 )
+	{
+		ExtendedState().m_deadline = deadline;
+	}
+}
+
+long long Tasklet::GetWakeTime() const
+{
+	return m_wakeTime;
+}
+
+void Tasklet::SetWakeTime( long long wakeTime )
+{
+	m_wakeTime = wakeTime;
+}
+
+long long Tasklet::GetInsertTime() const
+{
+	return m_insertTime;
+}
+
+long long Tasklet::GetBlockTime() const
+{
+	return m_blocked ? m_blockTime : 0;
+}
 
-    m_exceptionHandler = exceptionHander;
+void Tasklet::SetInsertTime( long long insertTime )
+{
+	m_insertTime = insertTime;
+}
+
+SelectWaiter* Tasklet::GetSelectWaiter() const
+{
+	return m_extendedState ? m_extendedState->m_selectWaiter : nullptr;
+}
+
+void Tasklet::SetSelectWaiter( SelectWaiter* waiter )
+{
+	if( m_extendedState || waiter )
+	{
+		ExtendedState().m_selectWaiter = waiter;
+	}
+}
+
+unsigned long long Tasklet::GetId() const
+{
+	return m_id;
+}
+
+size_t Tasklet::GetAllocatedSize() const
+{
+	return sizeof( Tasklet ) + ( m_extendedState ? sizeof( TaskletExtendedState ) : 0 );
+}
+
+void Tasklet::OnSwitchedIn()
+{
+	m_switchInCount++;
+}
+
+void Tasklet::AddSlice( long long wallTime, long long cpuTime )
+{
+	m_wallTime += wallTime;
+
+	// Cpu time is only non zero while tracking is enabled
+	if( cpuTime != 0 )
+	{
+		ExtendedState().m_cpuTime += cpuTime;
+	}
+
+	if( wallTime > m_longestSlice )
+	{
+		m_longestSlice = wallTime;
+	}
+}
+
+long long Tasklet::GetWallTime() const
+{
+	return m_wallTime;
+}
+
+long long Tasklet::GetCpuTime() const
+{
+	return m_extendedState ? m_extendedState->m_cpuTime : 0;
+}
+
+long Tasklet::GetSwitchInCount() const
+{
+	return m_switchInCount;
+}
+
+long long Tasklet::GetLongestSlice() const
+{
+	return m_longestSlice;
 }
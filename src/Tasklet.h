@@ -19,6 +19,7 @@
 #ifndef Tasklet_H
 #define Tasklet_H
 
+#include <memory>
 #include <string>
 
 #include "stdafx.h"
@@ -27,7 +28,31 @@
 
 class Channel;
 class ScheduleManager;
+struct SelectWaiter;
 enum class ChannelDirection;
+enum class TaskletCensusGroup;
+
+// Fields most tasklets never touch, allocated on first use to keep Tasklet small
+struct TaskletExtendedState
+{
+	PyObject* m_exceptionHandler = nullptr;
+
+	PyObject* m_contextManagerCallable = nullptr;
+
+	PyObject* m_parentCallsite = nullptr; // nullptr if unset
+
+	double m_runTime = 0.0;
+
+	long long m_deadline = 0; // Monotonic clock time in nanoseconds the tasklet should be run by, 0 if none
+
+	long long m_cpuTime = 0; // Total thread cpu nanoseconds spent as the current tasklet, only while tracking is enabled
+
+	Py_ssize_t m_sendBatchOffset = -1; // Index of the next item to hand over while blocked in send_many, -1 if not batching
+
+	int m_receiveBatchCapacity = 0; // Maximum number of items accepted in one transfer while blocked in receive_many, 0 if not batching
+
+	SelectWaiter* m_selectWaiter = nullptr; // Registration of a tasklet blocked in select, owned by the select call
+};
 
 // Specify the technique used when rescheduling
 // BACK: Insert Tasklet to the end of the current queue
@@ -119,6 +144,16 @@ public:
 
     bool ShouldRestoreTransferException() const;
 
+    int GetReceiveBatchCapacity() const;
+
+    void SetReceiveBatchCapacity( int capacity );
+
+    bool IsSendingBatch() const;
+
+    Py_ssize_t GetSendBatchOffset() const;
+
+    void SetSendBatchOffset( Py_ssize_t offset );
+
     bool ThrowException( PyObject* exception, PyObject* value, PyObject* tb, bool pending );
 
     bool IsPaused();
@@ -148,6 +183,9 @@ public:
     void SetScheduleManager( ScheduleManager* scheduleManager );
 
     ScheduleManager* GetScheduleManager( );
+
+    // Identity of the group this tasklet is counted under by ScheduleManager::TaskletCensus
+    const void* GetCensusKey( TaskletCensusGroup group ) const;
    
     bool Setup( PyObject* args, PyObject* kwargs );
 
@@ -157,29 +195,25 @@ public:
 
     void Clear();
 
-    void SetMethodName( std::string& methodName);
-
-    std::string GetMethodName();
+    // Callsite getters return new references, the strings are only built when read
+    PyObject* GetMethodName();
 
-    void SetModuleName(std::string& moduleName);
+	PyObject* GetModuleName();
 
-	std::string GetModuleName();
+    void SetContext( PyObject* context );
 
-    void SetContext( std::string& context );
+    PyObject* GetContext();
 
-    std::string GetContext();
+    // Borrowed UTF-8 view of the context, valid while the context is unchanged
+    const char* GetContextUtf8();
 
-    std::string GetFilename();
-
-    void SetFilename( std::string& fileName );
+    PyObject* GetFilename();
 
     long GetLineNumber();
 
-    void SetLineNumber( long lineNumber );
-
-    std::string GetParentCallsite();
+    void SetParentCallsite( PyObject* parentCallsite );
 
-    void SetParentCallsite( std::string& parentCallsite );
+    PyObject* GetParentCallsite();
 
     long long GetStartTime();
 	
@@ -221,6 +255,53 @@ public:
 
     void SetExceptionHandler( PyObject* exceptionHandler );
 
+    int GetPriority() const;
+
+    void SetPriority( int priority );
+
+    int GetQueueLevel() const;
+
+    void SetQueueLevel( int level );
+
+    long long GetDeadline() const;
+
+    void SetDeadline( long long deadline );
+
+    bool InsertAt( long long wakeTime );
+
+    void OnSwitchedIn();
+
+    void AddSlice( long long wallTime, long long cpuTime );
+
+    long long GetWallTime() const;
+
+    long long GetCpuTime() const;
+
+    long GetSwitchInCount() const;
+
+    long long GetLongestSlice() const;
+
+    long long GetWakeTime() const;
+
+    void SetWakeTime( long long wakeTime );
+
+    long long GetInsertTime() const;
+
+    // Monotonic time the tasklet blocked, 0 if it is not blocked
+    long long GetBlockTime() const;
+
+    void SetInsertTime( long long insertTime );
+
+    SelectWaiter* GetSelectWaiter() const;
+
+    // Unique for the lifetime of the process, used to identify the tasklet in traces
+    unsigned long long GetId() const;
+
+    // Bytes allocated for this object and its extended state
+    size_t GetAllocatedSize() const;
+
+    void SetSelectWaiter( SelectWaiter* waiter );
+
 private:
 
     void SetExceptionState( PyObject* exception, PyObject* arguments = Py_None );
@@ -243,6 +324,8 @@ private:
 
     bool BelongsToCurrentThread();
 
+    TaskletExtendedState& ExtendedState();
+
 private:
 
 	PyGreenlet* m_greenlet;
@@ -253,16 +336,6 @@ private:
 
     PyObject* m_kwArguments;
 
-    bool m_isMain;
-
-    bool m_transferInProgress;;
-
-    bool m_scheduled;
-
-	bool m_alive;
-
-    bool m_blocktrap;
-
     Tasklet* m_previous;
 
     Tasklet* m_next;
@@ -271,63 +344,93 @@ private:
 
 	Tasklet* m_previousBlocked;
 
-    unsigned long m_threadId;
-
     PyObject* m_transferArguments;
 
     PyObject* m_transferException;
 
-	bool m_restoreException;
-
     Channel* m_channelBlockedOn;
 
-	bool m_blocked;
+    Tasklet* m_taskletParent; // Weak ref
 
-	ChannelDirection m_blockedDirection;
+    //Exception
+    PyObject* m_exceptionState;
+	PyObject* m_exceptionArguments;
 
-    bool m_paused;
+    PyObject* m_taskletExitException; //Weak ref
 
-    bool m_firstRun;
+    ScheduleManager* m_scheduleManager;
+
+    PyObject* m_methodName; // Interned str, nullptr if the callable has no name
+    PyObject* m_moduleName; // Interned str, nullptr if the callable has no module
+    PyObject* m_callsiteCode; // Code object of the bound callable, file name and line number are read from it on demand
+
+    PyObject* m_context; // nullptr if unset, kept inline as most tasklets are given one, which would otherwise allocate the extended state
+
+    std::unique_ptr<TaskletExtendedState> m_extendedState; // Allocated on first use of a rarely used field
+
+    unsigned long long m_id;
+
+    unsigned long m_threadId;
 
     long m_timesSwitchedTo;
 
+    long long m_startTime;
+    long long m_endTime;
+
+    long long m_wallTime; // Total nanoseconds spent as the current tasklet
+
+    long m_switchInCount;
+
+    long long m_longestSlice;
+
+    long long m_wakeTime; // Monotonic clock time in nanoseconds of the pending timer, 0 if none. Stale timer wheel entries are matched against this
+
+    long long m_insertTime; // Monotonic clock time in nanoseconds the tasklet was inserted into the runnables queue, 0 once switched in
+
+    long long m_blockTime; // Monotonic clock time in nanoseconds the tasklet last blocked
+
+    int m_priority;
+
+    int m_queueLevel; // Priority level segment of the runnable queue this tasklet is held in, -1 if none
+
+	ChannelDirection m_blockedDirection;
+
     RescheduleType m_reschedule;
 
-    bool m_remove;
+    // State flags, packed as there can be hundreds of thousands of tasklets alive
+    bool m_isMain : 1;
 
-    bool m_taggedForRemoval;  // This flag set will ensure that the tasklet doesn't get marked as not alive
+    bool m_transferInProgress : 1;
 
-    Tasklet* m_taskletParent; // Weak ref
+    bool m_scheduled : 1;
 
-    //Exception
-    PyObject* m_exceptionState;
-	PyObject* m_exceptionArguments;
+	bool m_alive : 1;
 
-    PyObject* m_taskletExitException; //Weak ref
+    bool m_blocktrap : 1;
 
-    PyObject* m_exceptionHandler;
+	bool m_restoreException : 1;
 
-    ScheduleManager* m_scheduleManager;
+	bool m_blocked : 1;
 
-    PyObject* m_ContextManagerCallable;
+    bool m_paused : 1;
 
-    bool m_killPending;
+    bool m_firstRun : 1;
+
+    bool m_remove : 1;
+
+    bool m_taggedForRemoval : 1;  // This flag set will ensure that the tasklet doesn't get marked as not alive
+
+    bool m_killPending : 1;
+
+    bool m_highlighted : 1;
+
+    bool m_dontRaise : 1;
 
-    std::string m_parentCallsite;
-    std::string m_methodName;
-    std::string m_moduleName;
-    std::string m_context;
-    std::string m_fileName;
-    long m_lineNumber;
-    long long m_startTime;
-    long long m_endTime;
-    double m_runTime;
-    bool m_highlighted;
     inline static long s_totalAllTimeTaskletCount = 0;
 
     inline static long s_totalActiveTasklets = 0;
 
-    bool m_dontRaise;
+    inline static unsigned long long s_nextId = 1;
 };
 
 #endif // Tasklet_H
\ No newline at end of file
@@ -0,0 +1,418 @@
+#include "TaskletProfiler.h"
+
+#include "ScheduleManager.h"
+#include "Tasklet.h"
+#include "Utils.h"
+
+bool TaskletProfiler::Start()
+{
+	if( s_active )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "The tasklet profiler is already running." );
+
+		return false;
+	}
+
+	ScheduleManager* scheduleManager = ScheduleManager::GetThreadScheduleManager();
+
+	if( !scheduleManager )
+	{
+		return false;
+	}
+
+	s_scheduleManager = scheduleManager;
+
+	s_currentState = &s_states[scheduleManager->GetCurrentTasklet()->GetId()];
+
+	s_active = true;
+
+	PyEval_SetProfile( &TaskletProfiler::ProfileFunction, nullptr );
+
+	return true;
+}
+
+bool TaskletProfiler::Stop()
+{
+	if( !s_active )
+	{
+		return true;
+	}
+
+	if( ScheduleManager::GetThreadScheduleManager() != s_scheduleManager )
+	{
+		if( !PyErr_Occurred() )
+		{
+			PyErr_SetString( PyExc_RuntimeError, "The tasklet profiler must be stopped from the thread that started it." );
+		}
+
+		return false;
+	}
+
+	// Clearing a profile function set since, such as by cProfile or sys.setprofile, would silently drop it
+	Py_tracefunc installed = PyThreadState_Get()->c_profilefunc;
+
+	if( installed && installed != &TaskletProfiler::ProfileFunction )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "The tasklet profiler cannot be stopped while a profile function set after it, such as by cProfile, is still installed." );
+
+		return false;
+	}
+
+	PyEval_SetProfile( nullptr, nullptr );
+
+	long long now = MonotonicTimeNanoseconds();
+
+	// Calls still in progress are charged up to now, suspended tasklets up to when they were switched out
+	for( std::pair<const unsigned long long, TaskletProfileState>& entry : s_states )
+	{
+		TaskletProfileState& state = entry.second;
+
+		long long localTime = ( &state == s_currentState ? now : state.m_suspendStart ) - state.m_suspendedTime;
+
+		while( !state.m_stack.empty() )
+		{
+			LeaveFrame( state, localTime );
+		}
+	}
+
+	s_states.clear();
+
+	s_currentState = nullptr;
+
+	s_scheduleManager = nullptr;
+
+	s_active = false;
+
+	return true;
+}
+
+bool TaskletProfiler::IsActive()
+{
+	return s_active;
+}
+
+PyObject* TaskletProfiler::GetStats()
+{
+	PyObject* stats = PyDict_New();
+
+	if( !stats )
+	{
+		return nullptr;
+	}
+
+	auto buildTimes = []( const ProfileCallStats& call, PyObject* callers ) {
+		return Py_BuildValue(
+			callers ? "(LLddN)" : "(LLdd)",
+			call.m_primitiveCalls,
+			call.m_calls,
+			call.m_totalTime / 1e9,
+			call.m_cumulativeTime / 1e9,
+			callers );
+	};
+
+	for( std::pair<const void* const, ProfileFunctionStats>& function : s_functions )
+	{
+		if( function.second.m_total.m_calls == 0 )
+		{
+			continue;
+		}
+
+		PyObject* callers = PyDict_New();
+
+		if( !callers )
+		{
+			Py_DECREF( stats );
+
+			return nullptr;
+		}
+
+		for( std::pair<const void* const, ProfileCallStats>& caller : function.second.m_callers )
+		{
+			PyObject* callerTimes = buildTimes( caller.second, nullptr );
+
+			if( !callerTimes || PyDict_SetItem( callers, s_functions[caller.first].m_label, callerTimes ) < 0 )
+			{
+				Py_XDECREF( callerTimes );
+
+				Py_DECREF( callers );
+
+				Py_DECREF( stats );
+
+				return nullptr;
+			}
+
+			Py_DECREF( callerTimes );
+		}
+
+		PyObject* times = buildTimes( function.second.m_total, callers );
+
+		if( !times || PyDict_SetItem( stats, function.second.m_label, times ) < 0 )
+		{
+			Py_XDECREF( times );
+
+			Py_DECREF( stats );
+
+			return nullptr;
+		}
+
+		Py_DECREF( times );
+	}
+
+	return stats;
+}
+
+void TaskletProfiler::Reset()
+{
+	// Functions with calls in progress keep their labels, their timings start again
+	for( std::pair<const void* const, ProfileFunctionStats>& function : s_functions )
+	{
+		function.second.m_total = ProfileCallStats{};
+
+		function.second.m_callers.clear();
+	}
+
+	if( s_active )
+	{
+		return;
+	}
+
+	for( std::pair<const void* const, ProfileFunctionStats>& function : s_functions )
+	{
+		Py_XDECREF( function.second.m_label );
+
+		Py_XDECREF( function.second.m_code );
+	}
+
+	s_functions.clear();
+}
+
+void TaskletProfiler::OnSwitch( ScheduleManager* scheduleManager, Tasklet* previous, Tasklet* next, long long time )
+{
+	if( scheduleManager != s_scheduleManager )
+	{
+		return;
+	}
+
+	if( previous )
+	{
+		if( previous->IsAlive() || previous->IsMain() )
+		{
+			s_currentState->m_suspendStart = time;
+		}
+		else
+		{
+			s_states.erase( previous->GetId() );
+		}
+	}
+
+	auto inserted = s_states.try_emplace( next->GetId() );
+
+	s_currentState = &inserted.first->second;
+
+	if( !inserted.second )
+	{
+		s_currentState->m_suspendedTime += time - s_currentState->m_suspendStart;
+	}
+	else
+	{
+		// A new tasklet's clock starts at the switch
+		s_currentState->m_suspendedTime = 0;
+	}
+}
+
+void TaskletProfiler::OnScheduleManagerDestroyed( ScheduleManager* scheduleManager )
+{
+	if( scheduleManager == s_scheduleManager )
+	{
+		// The profiled thread is exiting, its profile function goes with its thread state
+		s_states.clear();
+
+		s_currentState = nullptr;
+
+		s_scheduleManager = nullptr;
+
+		s_active = false;
+	}
+}
+
+int TaskletProfiler::ProfileFunction( PyObject* obj, PyFrameObject* frame, int what, PyObject* arg )
+{
+	if( !s_currentState )
+	{
+		return 0;
+	}
+
+	long long time = MonotonicTimeNanoseconds();
+
+	switch( what )
+	{
+	case PyTrace_CALL:
+	{
+		PyCodeObject* code = PyFrame_GetCode( frame );
+
+		if( s_functions.find( code ) != s_functions.end() || RegisterPythonFunction( code ) )
+		{
+			Enter( code, time );
+		}
+
+		Py_DECREF( code );
+
+		break;
+	}
+	case PyTrace_RETURN:
+	{
+		PyCodeObject* code = PyFrame_GetCode( frame );
+
+		Leave( code, time );
+
+		Py_DECREF( code );
+
+		break;
+	}
+	case PyTrace_C_CALL:
+		if( PyCFunction_Check( arg ) )
+		{
+			const void* key = reinterpret_cast<PyCFunctionObject*>( arg )->m_ml;
+
+			if( s_functions.find( key ) != s_functions.end() || RegisterBuiltinFunction( arg ) )
+			{
+				Enter( key, time );
+			}
+		}
+		break;
+	case PyTrace_C_RETURN:
+	case PyTrace_C_EXCEPTION:
+		if( PyCFunction_Check( arg ) )
+		{
+			Leave( reinterpret_cast<PyCFunctionObject*>( arg )->m_ml, time );
+		}
+		break;
+	}
+
+	return 0;
+}
+
+void TaskletProfiler::Enter( const void* function, long long time )
+{
+	TaskletProfileState& state = *s_currentState;
+
+	const void* caller = state.m_stack.empty() ? nullptr : state.m_stack.back().m_function;
+
+	state.m_recursion[function]++;
+
+	state.m_callerRecursion[function][caller]++;
+
+	state.m_stack.push_back( ProfileFrame{ function, caller, time - state.m_suspendedTime, 0 } );
+}
+
+void TaskletProfiler::Leave( const void* function, long long time )
+{
+	TaskletProfileState& state = *s_currentState;
+
+	// Calls that started before the profiler, or before this tasklet was first seen, are not tracked
+	if( state.m_stack.empty() || state.m_stack.back().m_function != function )
+	{
+		return;
+	}
+
+	LeaveFrame( state, time - state.m_suspendedTime );
+}
+
+void TaskletProfiler::LeaveFrame( TaskletProfileState& state, long long time )
+{
+	ProfileFrame frame = state.m_stack.back();
+
+	state.m_stack.pop_back();
+
+	long long elapsed = time - frame.m_start;
+
+	if( !state.m_stack.empty() )
+	{
+		state.m_stack.back().m_childTime += elapsed;
+	}
+
+	bool outermost = --state.m_recursion[frame.m_function] == 0;
+
+	bool outermostForCaller = --state.m_callerRecursion[frame.m_function][frame.m_caller] == 0;
+
+	ProfileFunctionStats& function = s_functions[frame.m_function];
+
+	auto record = [&]( ProfileCallStats& call, bool primitive ) {
+		call.m_calls++;
+
+		call.m_totalTime += elapsed - frame.m_childTime;
+
+		if( primitive )
+		{
+			call.m_primitiveCalls++;
+
+			call.m_cumulativeTime += elapsed;
+		}
+	};
+
+	record( function.m_total, outermost );
+
+	// pstats leaves calls from outside any profiled function out of the callers
+	if( frame.m_caller )
+	{
+		record( function.m_callers[frame.m_caller], outermostForCaller );
+	}
+}
+
+bool TaskletProfiler::RegisterPythonFunction( PyCodeObject* code )
+{
+	PyObject* label = Py_BuildValue( "(OiO)", code->co_filename, code->co_firstlineno, code->co_name );
+
+	if( !label )
+	{
+		PyErr_Clear();
+
+		return false;
+	}
+
+	ProfileFunctionStats& function = s_functions[code];
+
+	function.m_label = label;
+
+	function.m_code = Py_NewRef( reinterpret_cast<PyObject*>( code ) );
+
+	return true;
+}
+
+bool TaskletProfiler::RegisterBuiltinFunction( PyObject* function )
+{
+	PyCFunctionObject* builtin = reinterpret_cast<PyCFunctionObject*>( function );
+
+	PyObject* name;
+
+	// Named the same way as cProfile names builtins
+	if( builtin->m_self && !PyModule_Check( builtin->m_self ) )
+	{
+		name = PyUnicode_FromFormat( "<method '%s' of '%s' objects>", builtin->m_ml->ml_name, Py_TYPE( builtin->m_self )->tp_name );
+	}
+	else if( builtin->m_module && PyUnicode_Check( builtin->m_module ) )
+	{
+		name = PyUnicode_FromFormat( "<built-in method %U.%s>", builtin->m_module, builtin->m_ml->ml_name );
+	}
+	else
+	{
+		name = PyUnicode_FromFormat( "<built-in method %s>", builtin->m_ml->ml_name );
+	}
+
+	PyObject* label = name ? Py_BuildValue( "(siN)", "~", 0, name ) : nullptr;
+
+	if( !label )
+	{
+		PyErr_Clear();
+
+		return false;
+	}
+
+	ProfileFunctionStats& stats = s_functions[builtin->m_ml];
+
+	stats.m_label = label;
+
+	stats.m_code = nullptr;
+
+	return true;
+}
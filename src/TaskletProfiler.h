@@ -0,0 +1,116 @@
+#pragma once
+#ifndef TaskletProfiler_H
+#define TaskletProfiler_H
+
+#include "stdafx.h"
+
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+class ScheduleManager;
+class Tasklet;
+
+// Timings of calls to one function, from one caller or in total
+struct ProfileCallStats
+{
+	long long m_primitiveCalls = 0; // calls that were not recursive
+
+	long long m_calls = 0;
+
+	long long m_totalTime = 0; // nanoseconds spent in the function itself
+
+	long long m_cumulativeTime = 0; // nanoseconds including callees, counted for non recursive calls only
+};
+
+struct ProfileFunctionStats
+{
+	PyObject* m_label; // (file name, line number, function name) as used by pstats
+
+	PyObject* m_code; // Keeps the code object alive so its address is not reused, nullptr for builtins
+
+	ProfileCallStats m_total;
+
+	std::unordered_map<const void*, ProfileCallStats> m_callers; // keyed by the caller's function key
+};
+
+// A call in progress on one tasklet
+struct ProfileFrame
+{
+	const void* m_function;
+
+	const void* m_caller;
+
+	long long m_start; // tasklet local time
+
+	long long m_childTime;
+};
+
+// Call stack and clock of one tasklet, the clock only advances while the tasklet is current
+struct TaskletProfileState
+{
+	std::vector<ProfileFrame> m_stack;
+
+	std::unordered_map<const void*, int> m_recursion;
+
+	std::unordered_map<const void*, std::unordered_map<const void*, int>> m_callerRecursion;
+
+	long long m_suspendedTime = 0;
+
+	long long m_suspendStart = 0;
+};
+
+// Deterministic profiler for the tasklets of one thread.
+// Calls are tracked on a separate stack per tasklet and each tasklet's clock is paused while it is switched
+// out, so time spent in other tasklets or blocked on a channel is not charged to the frames that switched.
+// Results from every tasklet are merged into one table in the format used by pstats.
+// All methods must be called with the GIL held.
+class TaskletProfiler
+{
+public:
+	// Profiles the calling thread, returns false with a Python exception set on failure
+	static bool Start();
+
+	// Must be called from the thread that started the profiler, returns false with a Python exception set on failure
+	static bool Stop();
+
+	static bool IsActive();
+
+	// Returns a new dict in the format of pstats.Stats.stats
+	static PyObject* GetStats();
+
+	static void Reset();
+
+	// Called on every switch while the profiler is active
+	static void OnSwitch( ScheduleManager* scheduleManager, Tasklet* previous, Tasklet* next, long long time );
+
+	static void OnScheduleManagerDestroyed( ScheduleManager* scheduleManager );
+
+private:
+
+	static int ProfileFunction( PyObject* obj, PyFrameObject* frame, int what, PyObject* arg );
+
+	static void Enter( const void* function, long long time );
+
+	static void Leave( const void* function, long long time );
+
+	static void LeaveFrame( TaskletProfileState& state, long long time );
+
+	// Records the label of a function the first time it is called, returns false if it could not be built
+	static bool RegisterPythonFunction( PyCodeObject* code );
+
+	static bool RegisterBuiltinFunction( PyObject* function );
+
+	inline static bool s_active = false;
+
+	inline static ScheduleManager* s_scheduleManager = nullptr;
+
+	inline static TaskletProfileState* s_currentState = nullptr;
+
+	// Keyed by tasklet id so a tasklet reusing a freed address does not inherit a stack
+	inline static std::unordered_map<unsigned long long, TaskletProfileState> s_states;
+
+	inline static std::unordered_map<const void*, ProfileFunctionStats> s_functions;
+};
+
+#endif // TaskletProfiler_H
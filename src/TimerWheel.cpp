@@ -0,0 +1,231 @@
+#include "TimerWheel.h"
+
+#include <chrono>
+
+TimerWheel::TimerWheel() :
+	m_currentTick( TickFromTime( std::chrono::duration_cast<std::chrono::nanoseconds>( std::chrono::steady_clock::now().time_since_epoch() ).count() ) ),
+	m_size( 0 )
+{
+	for( int level = 0; level < s_numberOfLevels; level++ )
+	{
+		m_levelCount[level] = 0;
+	}
+}
+
+void TimerWheel::Add( Tasklet* tasklet, long long wakeTime )
+{
+	AddEntry( TimerEntry{ tasklet, wakeTime } );
+}
+
+bool TimerWheel::Remove( Tasklet* tasklet, long long wakeTime )
+{
+	long long dueTick = wakeTime / s_tickLength + ( wakeTime % s_tickLength != 0 ? 1 : 0 );
+
+	// A timer only ever sits in the slot its due tick selects on its current level, so at most one slot per level is searched
+	for( int level = 0; level < s_numberOfLevels; level++ )
+	{
+		if( RemoveEntry( m_slots[level][( dueTick >> ( s_slotBits * level ) ) & s_slotMask], tasklet, wakeTime ) )
+		{
+			m_levelCount[level]--;
+
+			m_size--;
+
+			return true;
+		}
+	}
+
+	if( RemoveEntry( m_due, tasklet, wakeTime ) || RemoveEntry( m_overflow, tasklet, wakeTime ) )
+	{
+		m_size--;
+
+		return true;
+	}
+
+	return false;
+}
+
+bool TimerWheel::RemoveEntry( std::vector<TimerEntry>& entries, Tasklet* tasklet, long long wakeTime )
+{
+	for( auto iter = entries.begin(); iter != entries.end(); iter++ )
+	{
+		if( iter->m_tasklet == tasklet && iter->m_wakeTime == wakeTime )
+		{
+			// Erased rather than swapped out so timers due on the same tick still expire in the order they were added
+			entries.erase( iter );
+
+			return true;
+		}
+	}
+
+	return false;
+}
+
+void TimerWheel::AddEntry( const TimerEntry& entry )
+{
+	m_size++;
+
+	// Round up so a timer never expires before its wake time, without overflowing for wake times near LLONG_MAX
+	long long dueTick = entry.m_wakeTime / s_tickLength + ( entry.m_wakeTime % s_tickLength != 0 ? 1 : 0 );
+
+	long long delta = dueTick - m_currentTick;
+
+	if( delta <= 0 )
+	{
+		m_due.push_back( entry );
+
+		return;
+	}
+
+	for( int level = 0; level < s_numberOfLevels; level++ )
+	{
+		if( delta < ( 1LL << ( s_slotBits * ( level + 1 ) ) ) )
+		{
+			m_slots[level][( dueTick >> ( s_slotBits * level ) ) & s_slotMask].push_back( entry );
+
+			m_levelCount[level]++;
+
+			return;
+		}
+	}
+
+	m_overflow.push_back( entry );
+}
+
+void TimerWheel::Cascade( int level )
+{
+	std::vector<TimerEntry>& slot = m_slots[level][( m_currentTick >> ( s_slotBits * level ) ) & s_slotMask];
+
+	m_cascadeScratch.swap( slot );
+
+	m_levelCount[level] -= static_cast<int>( m_cascadeScratch.size() );
+
+	if( level == s_numberOfLevels - 1 )
+	{
+		// Overflow timers may now be within range of the wheel
+		m_cascadeScratch.insert( m_cascadeScratch.end(), m_overflow.begin(), m_overflow.end() );
+
+		m_overflow.clear();
+	}
+
+	m_size -= static_cast<int>( m_cascadeScratch.size() );
+
+	for( const TimerEntry& entry : m_cascadeScratch )
+	{
+		AddEntry( entry );
+	}
+
+	m_cascadeScratch.clear();
+}
+
+void TimerWheel::Advance( long long time, std::vector<TimerEntry>& expired )
+{
+	long long targetTick = TickFromTime( time );
+
+	while( true )
+	{
+		m_size -= static_cast<int>( m_due.size() );
+
+		expired.insert( expired.end(), m_due.begin(), m_due.end() );
+
+		m_due.clear();
+
+		if( m_currentTick >= targetTick )
+		{
+			break;
+		}
+
+		if( m_size == 0 )
+		{
+			m_currentTick = targetTick;
+
+			break;
+		}
+
+		if( m_levelCount[0] > 0 )
+		{
+			m_currentTick++;
+		}
+		else
+		{
+			// Nothing can expire before the lowest populated level next cascades
+			int level = 1;
+
+			while( level < s_numberOfLevels - 1 && m_levelCount[level] == 0 )
+			{
+				level++;
+			}
+
+			long long nextCascadeTick = ( ( m_currentTick >> ( s_slotBits * level ) ) + 1 ) << ( s_slotBits * level );
+
+			if( nextCascadeTick > targetTick )
+			{
+				m_currentTick = targetTick;
+
+				break;
+			}
+
+			m_currentTick = nextCascadeTick;
+		}
+
+		// Higher levels cascade first so their timers can drop through the lower levels
+		for( int level = s_numberOfLevels - 1; level > 0; level-- )
+		{
+			if( ( m_currentTick & ( ( 1LL << ( s_slotBits * level ) ) - 1 ) ) == 0 )
+			{
+				Cascade( level );
+			}
+		}
+
+		std::vector<TimerEntry>& slot = m_slots[0][m_currentTick & s_slotMask];
+
+		m_levelCount[0] -= static_cast<int>( slot.size() );
+
+		m_size -= static_cast<int>( slot.size() );
+
+		// Timers cascaded straight to due on this tick are earlier than the slot's
+		m_size -= static_cast<int>( m_due.size() );
+
+		expired.insert( expired.end(), m_due.begin(), m_due.end() );
+
+		m_due.clear();
+
+		expired.insert( expired.end(), slot.begin(), slot.end() );
+
+		slot.clear();
+	}
+}
+
+void TimerWheel::Clear( std::vector<TimerEntry>& entries )
+{
+	for( int level = 0; level < s_numberOfLevels; level++ )
+	{
+		for( std::vector<TimerEntry>& slot : m_slots[level] )
+		{
+			entries.insert( entries.end(), slot.begin(), slot.end() );
+
+			slot.clear();
+		}
+
+		m_levelCount[level] = 0;
+	}
+
+	entries.insert( entries.end(), m_overflow.begin(), m_overflow.end() );
+
+	m_overflow.clear();
+
+	entries.insert( entries.end(), m_due.begin(), m_due.end() );
+
+	m_due.clear();
+
+	m_size = 0;
+}
+
+int TimerWheel::Size() const
+{
+	return m_size;
+}
+
+long long TimerWheel::TickFromTime( long long time )
+{
+	return time / s_tickLength;
+}
@@ -0,0 +1,73 @@
+#pragma once
+#ifndef TimerWheel_H
+#define TimerWheel_H
+
+#include <vector>
+
+class Tasklet;
+
+struct TimerEntry
+{
+	Tasklet* m_tasklet;
+
+	long long m_wakeTime; // steady clock nanoseconds
+};
+
+// Four levels of 256 slots with a 1ms tick cover ~49 days, anything later is held
+// in an overflow list and re-examined as the wheel turns.
+// Adding a timer is O(1), turning the wheel costs O(1) per expired or cascaded timer
+// and idle stretches of the wheel are skipped rather than ticked through.
+class TimerWheel
+{
+public:
+	TimerWheel();
+
+	void Add( Tasklet* tasklet, long long wakeTime );
+
+	// Removes a timer that has not yet expired, returns false if it is not in the wheel
+	bool Remove( Tasklet* tasklet, long long wakeTime );
+
+	// Appends all timers due at or before time to expired, in wake order per tick
+	void Advance( long long time, std::vector<TimerEntry>& expired );
+
+	// Removes every timer, appending them to entries
+	void Clear( std::vector<TimerEntry>& entries );
+
+	int Size() const;
+
+    inline static const long long s_tickLength = 1000000;
+
+private:
+
+	void AddEntry( const TimerEntry& entry );
+
+	static bool RemoveEntry( std::vector<TimerEntry>& entries, Tasklet* tasklet, long long wakeTime );
+
+	void Cascade( int level );
+
+	static long long TickFromTime( long long time );
+
+    inline static const int s_numberOfLevels = 4;
+
+    inline static const int s_slotBits = 8;
+
+    inline static const int s_slotsPerLevel = 1 << s_slotBits;
+
+    inline static const long long s_slotMask = s_slotsPerLevel - 1;
+
+	long long m_currentTick;
+
+	std::vector<TimerEntry> m_slots[s_numberOfLevels][s_slotsPerLevel];
+
+	int m_levelCount[s_numberOfLevels];
+
+	std::vector<TimerEntry> m_overflow;
+
+	std::vector<TimerEntry> m_due;
+
+	std::vector<TimerEntry> m_cascadeScratch;
+
+	int m_size;
+};
+
+#endif // TimerWheel_H
@@ -0,0 +1,83 @@
+#include "TraceBuffer.h"
+
+TraceBuffer::TraceBuffer() :
+	m_mask( 0 ),
+	m_written( 0 ),
+	m_read( 0 ),
+	m_dropped( 0 ),
+	m_enabled( false )
+{
+}
+
+void TraceBuffer::Enable( size_t capacity )
+{
+	size_t size = 1;
+
+	while( size < capacity )
+	{
+		size <<= 1;
+	}
+
+	m_records.assign( size, TraceRecord{} );
+
+	m_mask = size - 1;
+
+	m_written = 0;
+
+	m_read = 0;
+
+	m_dropped = 0;
+
+	m_enabled = true;
+}
+
+void TraceBuffer::Disable()
+{
+	m_enabled = false;
+
+	std::vector<TraceRecord>().swap( m_records );
+
+	m_mask = 0;
+
+	m_written = 0;
+
+	m_read = 0;
+}
+
+unsigned long long TraceBuffer::Drain( std::vector<TraceRecord>& records )
+{
+	size_t held = Size();
+
+	// Anything older than one lap of the ring has been overwritten
+	unsigned long long dropped = ( m_written - m_read ) - held;
+
+	m_dropped += dropped;
+
+	records.reserve( records.size() + held );
+
+	for( unsigned long long i = m_written - held; i < m_written; i++ )
+	{
+		records.push_back( m_records[i & m_mask] );
+	}
+
+	m_read = m_written;
+
+	return dropped;
+}
+
+size_t TraceBuffer::Size() const
+{
+	unsigned long long unread = m_written - m_read;
+
+	return unread < m_records.size() ? static_cast<size_t>( unread ) : m_records.size();
+}
+
+size_t TraceBuffer::Capacity() const
+{
+	return m_records.size();
+}
+
+unsigned long long TraceBuffer::Dropped() const
+{
+	return m_dropped + ( ( m_written - m_read ) - Size() );
+}
@@ -0,0 +1,99 @@
+#pragma once
+#ifndef TraceBuffer_H
+#define TraceBuffer_H
+
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+enum class TraceEvent : uint32_t
+{
+	SWITCH = 1, // tasklet switched out, target switched in
+	INSERT, // tasklet inserted into the runnables queue, target unused
+	KILL, // tasklet killed, target unused
+	COMPLETE, // tasklet callable returned or raised, target unused
+	CHANNEL_SEND, // tasklet started a send on target channel
+	CHANNEL_RECEIVE, // tasklet started a receive on target channel
+	CHANNEL_BLOCK, // tasklet blocked on target channel, 0 if blocked in select
+	CHANNEL_UNBLOCK // tasklet unblocked from target channel, 0 if blocked in select
+};
+
+// Set on channel send and receive records when the operation is expected to block
+// Set on insert records when the tasklet is inserted to run next
+static const uint32_t TRACE_FLAG_WILL_BLOCK = 1;
+static const uint32_t TRACE_FLAG_RUN_NEXT = 1;
+
+// Fixed size record, layout is exported through the buffer protocol so must stay in sync with s_recordFormat
+struct TraceRecord
+{
+	long long m_timestamp; // steady clock nanoseconds, matches time.monotonic_ns()
+
+	uint32_t m_event;
+
+	uint32_t m_flags;
+
+	unsigned long long m_taskletId;
+
+	unsigned long long m_targetId; // tasklet or channel id depending on event
+};
+
+// Preallocated ring of trace records, once full the oldest records are overwritten and counted as dropped.
+// Recording is a bounds free store into the ring so it can be left enabled in production.
+class TraceBuffer
+{
+public:
+	TraceBuffer();
+
+	// Allocates capacity records rounded up to a power of two, discarding any held records
+	void Enable( size_t capacity );
+
+	void Disable();
+
+	bool IsEnabled() const
+	{
+		return m_enabled;
+	}
+
+	void Record( long long timestamp, TraceEvent event, unsigned long long taskletId, unsigned long long targetId, uint32_t flags )
+	{
+		TraceRecord& record = m_records[m_written & m_mask];
+
+		record.m_timestamp = timestamp;
+		record.m_event = static_cast<uint32_t>( event );
+		record.m_flags = flags;
+		record.m_taskletId = taskletId;
+		record.m_targetId = targetId;
+
+		m_written++;
+	}
+
+	// Appends held records to records oldest first and empties the ring
+	// Returns the number of records overwritten since the previous drain
+	unsigned long long Drain( std::vector<TraceRecord>& records );
+
+	// Records currently held
+	size_t Size() const;
+
+	size_t Capacity() const;
+
+	// Records overwritten before they were drained, in total since enabled
+	unsigned long long Dropped() const;
+
+	// struct module format of TraceRecord
+	inline static const char* s_recordFormat = "qIIQQ";
+
+private:
+	std::vector<TraceRecord> m_records;
+
+	unsigned long long m_mask;
+
+	unsigned long long m_written;
+
+	unsigned long long m_read;
+
+	unsigned long long m_dropped;
+
+	bool m_enabled;
+};
+
+#endif // TraceBuffer_H
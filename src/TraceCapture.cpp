@@ -0,0 +1,581 @@
+#include "TraceCapture.h"
+
+#include <algorithm>
+#include <condition_variable>
+#include <cstdio>
+#include <mutex>
+#include <thread>
+#include <unordered_map>
+
+#include "ScheduleManager.h"
+#include "Tasklet.h"
+#include "TraceBuffer.h"
+#include "Utils.h"
+
+// Records drained from one ScheduleManager
+struct TraceChunk
+{
+	unsigned long m_threadId;
+
+	std::vector<TraceRecord> m_records;
+
+	unsigned long long m_dropped;
+};
+
+// Everything gathered by one flush, chunks are merged by timestamp on the writer thread
+struct TraceBatch
+{
+	std::vector<TraceChunk> m_chunks;
+
+	std::vector<std::pair<unsigned long long, std::string>> m_names;
+};
+
+// The tasklet currently running on a thread, its slice is written once it is switched out
+struct TraceTrack
+{
+	unsigned long long m_taskletId;
+
+	long long m_sliceStart;
+
+	bool m_open;
+};
+
+// Formats batches as Chrome Trace Event JSON on its own thread, never touches Python
+class TraceFileWriter
+{
+public:
+	TraceFileWriter( FILE* file, long long startTime ) :
+		m_file( file ),
+		m_startTime( startTime ),
+		m_finishing( false ),
+		m_firstEvent( true ),
+		m_nextFlowId( 1 ),
+		m_lastTimestamp( startTime )
+	{
+		m_buffer.append( "[\n" );
+
+		WriteEventStart( "M", 0, 0, false );
+		m_buffer.append( ",\"name\":\"process_name\",\"args\":{\"name\":\"scheduler\"}}" );
+
+		m_thread = std::thread( &TraceFileWriter::Run, this );
+	}
+
+	void Submit( TraceBatch&& batch )
+	{
+		{
+			std::lock_guard<std::mutex> lock( m_mutex );
+
+			m_queue.push_back( std::move( batch ) );
+		}
+
+		m_condition.notify_one();
+	}
+
+	// Writes out all submitted batches and closes the file, slices still running end at endTime
+	void Finish( long long endTime )
+	{
+		{
+			std::lock_guard<std::mutex> lock( m_mutex );
+
+			m_finishing = true;
+		}
+
+		m_condition.notify_one();
+
+		m_thread.join();
+
+		for( std::pair<const unsigned long, TraceTrack>& track : m_tracks )
+		{
+			CloseSlice( track.first, track.second, std::max( endTime, m_lastTimestamp ) );
+		}
+
+		m_buffer.append( "\n]\n" );
+
+		WriteBuffer();
+
+		fclose( m_file );
+	}
+
+private:
+
+	void Run()
+	{
+		std::vector<TraceBatch> batches;
+
+		while( true )
+		{
+			{
+				std::unique_lock<std::mutex> lock( m_mutex );
+
+				m_condition.wait( lock, [this] { return !m_queue.empty() || m_finishing; } );
+
+				if( m_queue.empty() )
+				{
+					break;
+				}
+
+				batches.swap( m_queue );
+			}
+
+			for( TraceBatch& batch : batches )
+			{
+				Process( batch );
+			}
+
+			batches.clear();
+
+			WriteBuffer();
+		}
+	}
+
+	void Process( TraceBatch& batch )
+	{
+		for( std::pair<unsigned long long, std::string>& name : batch.m_names )
+		{
+			m_names[name.first] = std::move( name.second );
+		}
+
+		std::vector<std::pair<const TraceRecord*, unsigned long>> records;
+
+		for( const TraceChunk& chunk : batch.m_chunks )
+		{
+			if( chunk.m_dropped > 0 )
+			{
+				WriteEventStart( "i", chunk.m_threadId, chunk.m_records.empty() ? m_lastTimestamp : chunk.m_records.front().m_timestamp );
+				m_buffer.append( ",\"s\":\"t\",\"name\":\"trace records dropped\",\"args\":{\"count\":" );
+				m_buffer.append( std::to_string( chunk.m_dropped ) );
+				m_buffer.append( "}}" );
+			}
+
+			for( const TraceRecord& record : chunk.m_records )
+			{
+				records.emplace_back( &record, chunk.m_threadId );
+			}
+		}
+
+		// Each chunk is already in order, merging them orders channel wakes across threads
+		std::stable_sort( records.begin(), records.end(), []( const std::pair<const TraceRecord*, unsigned long>& a, const std::pair<const TraceRecord*, unsigned long>& b ) {
+			return a.first->m_timestamp < b.first->m_timestamp;
+		} );
+
+		for( const std::pair<const TraceRecord*, unsigned long>& record : records )
+		{
+			ProcessRecord( *record.first, record.second );
+		}
+	}
+
+	void ProcessRecord( const TraceRecord& record, unsigned long threadId )
+	{
+		m_lastTimestamp = std::max( m_lastTimestamp, record.m_timestamp );
+
+		switch( static_cast<TraceEvent>( record.m_event ) )
+		{
+		case TraceEvent::SWITCH:
+		{
+			TraceTrack& track = GetTrack( threadId );
+
+			CloseSlice( threadId, track, record.m_timestamp );
+
+			track.m_taskletId = record.m_targetId;
+			track.m_sliceStart = record.m_timestamp;
+			// Switching to 0 marks the end of the thread
+			track.m_open = record.m_targetId != 0;
+
+			// A flow end binds to the next slice to start on its thread, which is the woken tasklet's
+			auto flow = m_pendingFlows.find( record.m_targetId );
+
+			if( flow != m_pendingFlows.end() )
+			{
+				WriteFlow( "f", flow->second, threadId, record.m_timestamp );
+
+				m_pendingFlows.erase( flow );
+			}
+
+			break;
+		}
+
+		case TraceEvent::CHANNEL_SEND:
+		case TraceEvent::CHANNEL_RECEIVE:
+			// Only an operation that completes straight away can wake a waiting tasklet
+			if( !( record.m_flags & TRACE_FLAG_WILL_BLOCK ) )
+			{
+				m_lastChannelOperation[record.m_targetId] = std::make_pair( record.m_timestamp, threadId );
+			}
+			break;
+
+		case TraceEvent::CHANNEL_UNBLOCK:
+		{
+			auto operation = m_lastChannelOperation.find( record.m_targetId );
+
+			if( record.m_targetId != 0 && operation != m_lastChannelOperation.end() )
+			{
+				unsigned long long flowId = m_nextFlowId++;
+
+				// A flow start binds to the slice enclosing it, which is the waking tasklet's
+				WriteFlow( "s", flowId, operation->second.second, operation->second.first );
+
+				m_pendingFlows[record.m_taskletId] = flowId;
+			}
+			break;
+		}
+
+		default:
+			break;
+		}
+	}
+
+	TraceTrack& GetTrack( unsigned long threadId )
+	{
+		auto track = m_tracks.find( threadId );
+
+		if( track != m_tracks.end() )
+		{
+			return track->second;
+		}
+
+		WriteEventStart( "M", threadId, 0, false );
+		m_buffer.append( ",\"name\":\"thread_name\",\"args\":{\"name\":\"Schedule Manager " );
+		m_buffer.append( std::to_string( threadId ) );
+		m_buffer.append( "\"}}" );
+
+		return m_tracks.emplace( threadId, TraceTrack{ 0, 0, false } ).first->second;
+	}
+
+	void CloseSlice( unsigned long threadId, TraceTrack& track, long long endTime )
+	{
+		if( !track.m_open )
+		{
+			return;
+		}
+
+		track.m_open = false;
+
+		WriteEventStart( "X", threadId, track.m_sliceStart );
+		m_buffer.append( ",\"dur\":" );
+		AppendMicroseconds( endTime - track.m_sliceStart );
+		m_buffer.append( ",\"cat\":\"tasklet\",\"name\":\"" );
+
+		auto name = m_names.find( track.m_taskletId );
+
+		if( name != m_names.end() )
+		{
+			AppendEscaped( name->second );
+		}
+		else
+		{
+			m_buffer.append( "tasklet " );
+			m_buffer.append( std::to_string( track.m_taskletId ) );
+		}
+
+		m_buffer.append( "\",\"args\":{\"tasklet_id\":" );
+		m_buffer.append( std::to_string( track.m_taskletId ) );
+		m_buffer.append( "}}" );
+	}
+
+	void WriteFlow( const char* phase, unsigned long long flowId, unsigned long threadId, long long timestamp )
+	{
+		WriteEventStart( phase, threadId, timestamp );
+		m_buffer.append( ",\"cat\":\"channel\",\"name\":\"wake\",\"id\":" );
+		m_buffer.append( std::to_string( flowId ) );
+		m_buffer.append( "}" );
+	}
+
+	// Writes the opening of an event up to and including its timestamp, the caller closes the object
+	void WriteEventStart( const char* phase, unsigned long threadId, long long timestamp, bool hasTimestamp = true )
+	{
+		m_buffer.append( m_firstEvent ? "" : ",\n" );
+
+		m_firstEvent = false;
+
+		m_buffer.append( "{\"ph\":\"" );
+		m_buffer.append( phase );
+		m_buffer.append( "\",\"pid\":1,\"tid\":" );
+		m_buffer.append( std::to_string( threadId ) );
+
+		if( hasTimestamp )
+		{
+			m_buffer.append( ",\"ts\":" );
+			AppendMicroseconds( timestamp - m_startTime );
+		}
+	}
+
+	void AppendMicroseconds( long long nanoseconds )
+	{
+		char text[32];
+
+		snprintf( text, sizeof( text ), "%.3f", nanoseconds / 1000.0 );
+
+		m_buffer.append( text );
+	}
+
+	void AppendEscaped( const std::string& text )
+	{
+		for( char character : text )
+		{
+			if( character == '"' || character == '\\' )
+			{
+				m_buffer.push_back( '\\' );
+				m_buffer.push_back( character );
+			}
+			else if( static_cast<unsigned char>( character ) < 0x20 )
+			{
+				char escaped[8];
+
+				snprintf( escaped, sizeof( escaped ), "\\u%04x", character );
+
+				m_buffer.append( escaped );
+			}
+			else
+			{
+				m_buffer.push_back( character );
+			}
+		}
+	}
+
+	void WriteBuffer()
+	{
+		fwrite( m_buffer.data(), 1, m_buffer.size(), m_file );
+
+		m_buffer.clear();
+	}
+
+	FILE* m_file;
+
+	long long m_startTime;
+
+	std::thread m_thread;
+
+	std::mutex m_mutex;
+
+	std::condition_variable m_condition;
+
+	std::vector<TraceBatch> m_queue;
+
+	bool m_finishing;
+
+	// Only used by the writer thread from here on
+
+	std::string m_buffer;
+
+	bool m_firstEvent;
+
+	std::unordered_map<unsigned long long, std::string> m_names;
+
+	std::unordered_map<unsigned long, TraceTrack> m_tracks;
+
+	// Timestamp and thread of the last non blocking operation on each channel
+	std::unordered_map<unsigned long long, std::pair<long long, unsigned long>> m_lastChannelOperation;
+
+	// Flow ids waiting for the woken tasklet to be switched in
+	std::unordered_map<unsigned long long, unsigned long long> m_pendingFlows;
+
+	unsigned long long m_nextFlowId;
+
+	long long m_lastTimestamp;
+};
+
+bool TraceCapture::Start( PyObject* path, size_t capacity )
+{
+	if( s_active )
+	{
+		PyErr_SetString( PyExc_RuntimeError, "A trace capture is already running." );
+
+		return false;
+	}
+
+	PyObject* encodedPath = nullptr;
+
+	if( !PyUnicode_FSConverter( path, &encodedPath ) )
+	{
+		return false;
+	}
+
+	FILE* file = fopen( PyBytes_AS_STRING( encodedPath ), "wb" );
+
+	Py_DECREF( encodedPath );
+
+	if( !file )
+	{
+		PyErr_SetFromErrnoWithFilenameObject( PyExc_OSError, path );
+
+		return false;
+	}
+
+	long long now = MonotonicTimeNanoseconds();
+
+	s_writer = new TraceFileWriter( file, now );
+
+	s_capacity = capacity;
+
+	s_lastFlushTime = now;
+
+	s_active = true;
+
+	for( ScheduleManager* scheduleManager : ScheduleManager::GetScheduleManagers() )
+	{
+		OnScheduleManagerCreated( scheduleManager );
+
+		NameTasklet( scheduleManager->GetCurrentTasklet() );
+	}
+
+	return true;
+}
+
+void TraceCapture::Stop()
+{
+	if( !s_active )
+	{
+		return;
+	}
+
+	Flush();
+
+	s_active = false;
+
+	for( ScheduleManager* scheduleManager : s_enabledScheduleManagers )
+	{
+		scheduleManager->GetTraceBuffer().Disable();
+	}
+
+	s_enabledScheduleManagers.clear();
+
+	s_namedTasklets.clear();
+
+	TraceFileWriter* writer = s_writer;
+
+	s_writer = nullptr;
+
+	long long endTime = MonotonicTimeNanoseconds();
+
+	// The writer never needs the GIL, let other threads run while the file is completed
+	Py_BEGIN_ALLOW_THREADS
+
+	writer->Finish( endTime );
+
+	delete writer;
+
+	Py_END_ALLOW_THREADS
+}
+
+void TraceCapture::OnSwitch( ScheduleManager* scheduleManager, Tasklet* tasklet, long long time )
+{
+	NameTasklet( tasklet );
+
+	TraceBuffer& traceBuffer = scheduleManager->GetTraceBuffer();
+
+	if( time - s_lastFlushTime >= s_flushInterval || traceBuffer.Size() * 2 >= traceBuffer.Capacity() )
+	{
+		Flush();
+	}
+}
+
+void TraceCapture::OnScheduleManagerCreated( ScheduleManager* scheduleManager )
+{
+	if( !s_active )
+	{
+		return;
+	}
+
+	TraceBuffer& traceBuffer = scheduleManager->GetTraceBuffer();
+
+	if( traceBuffer.IsEnabled() )
+	{
+		// Records from before the capture started are not part of it
+		std::vector<TraceRecord> discarded;
+
+		traceBuffer.Drain( discarded );
+	}
+	else
+	{
+		traceBuffer.Enable( s_capacity );
+
+		s_enabledScheduleManagers.insert( scheduleManager );
+	}
+}
+
+void TraceCapture::OnScheduleManagerDestroyed( ScheduleManager* scheduleManager )
+{
+	if( !s_active )
+	{
+		return;
+	}
+
+	Tasklet* currentTasklet = scheduleManager->GetCurrentTasklet();
+
+	// Ends the thread's last slice, then keeps the records of the thread as it shuts down
+	scheduleManager->Trace( TraceEvent::SWITCH, currentTasklet ? currentTasklet->GetId() : 0 );
+
+	Flush();
+
+	s_enabledScheduleManagers.erase( scheduleManager );
+}
+
+void TraceCapture::Flush()
+{
+	TraceBatch batch;
+
+	batch.m_names.swap( s_pendingNames );
+
+	for( ScheduleManager* scheduleManager : ScheduleManager::GetScheduleManagers() )
+	{
+		TraceBuffer& traceBuffer = scheduleManager->GetTraceBuffer();
+
+		if( !traceBuffer.IsEnabled() )
+		{
+			continue;
+		}
+
+		TraceChunk chunk{ scheduleManager->ThreadId() };
+
+		chunk.m_dropped = traceBuffer.Drain( chunk.m_records );
+
+		if( !chunk.m_records.empty() || chunk.m_dropped > 0 )
+		{
+			batch.m_chunks.push_back( std::move( chunk ) );
+		}
+	}
+
+	s_lastFlushTime = MonotonicTimeNanoseconds();
+
+	s_writer->Submit( std::move( batch ) );
+}
+
+void TraceCapture::NameTasklet( Tasklet* tasklet )
+{
+	if( !tasklet || !s_namedTasklets.insert( tasklet->GetId() ).second )
+	{
+		return;
+	}
+
+	std::string name;
+
+	if( tasklet->IsMain() )
+	{
+		name = "main";
+	}
+	else
+	{
+		// Switches can happen while an exception is being propagated, it must survive the name lookup
+		PyObject* raisedException = PyErr_GetRaisedException();
+
+		name = tasklet->GetContextUtf8();
+
+		if( name.empty() )
+		{
+			PyObject* methodName = tasklet->GetMethodName();
+
+			if( !methodName || !StdStringFromPyObject( methodName, name ) )
+			{
+				name = "unknown_method";
+			}
+
+			Py_XDECREF( methodName );
+		}
+
+		PyErr_Clear();
+
+		PyErr_SetRaisedException( raisedException );
+	}
+
+	s_pendingNames.emplace_back( tasklet->GetId(), std::move( name ) );
+}
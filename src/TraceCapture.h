@@ -0,0 +1,68 @@
+#pragma once
+#ifndef TraceCapture_H
+#define TraceCapture_H
+
+#include "stdafx.h"
+
+#include <cstddef>
+#include <string>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+class ScheduleManager;
+class Tasklet;
+class TraceFileWriter;
+
+// Streams the trace buffers of every ScheduleManager to a Chrome Trace Event JSON file.
+// Records are gathered under the GIL and handed to a background thread which formats and writes them,
+// so the cost on the scheduling threads is the ring buffer record plus a periodic copy out of the rings.
+// All methods must be called with the GIL held.
+class TraceCapture
+{
+public:
+	// Returns false with a Python exception set on failure
+	static bool Start( PyObject* path, size_t capacity );
+
+	// Writes out everything recorded so far and waits for the file to be closed
+	static void Stop();
+
+	static bool IsActive()
+	{
+		return s_active;
+	}
+
+	// Called on every switch while a capture is active
+	static void OnSwitch( ScheduleManager* scheduleManager, Tasklet* tasklet, long long time );
+
+	static void OnScheduleManagerCreated( ScheduleManager* scheduleManager );
+
+	static void OnScheduleManagerDestroyed( ScheduleManager* scheduleManager );
+
+private:
+
+	// Hands the records held by every ScheduleManager to the writer
+	static void Flush();
+
+	static void NameTasklet( Tasklet* tasklet );
+
+	inline static bool s_active = false;
+
+	inline static TraceFileWriter* s_writer = nullptr;
+
+	inline static size_t s_capacity = 0;
+
+	inline static long long s_lastFlushTime = 0;
+
+	// Tasklets whose name has been sent to the writer this capture
+	inline static std::unordered_set<unsigned long long> s_namedTasklets;
+
+	inline static std::vector<std::pair<unsigned long long, std::string>> s_pendingNames;
+
+	// ScheduleManagers whose trace buffer was enabled by the capture rather than by the user
+	inline static std::unordered_set<ScheduleManager*> s_enabledScheduleManagers;
+
+	inline static const long long s_flushInterval = 50000000; // 50ms
+};
+
+#endif // TraceCapture_H
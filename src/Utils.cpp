@@ -1,5 +1,14 @@
 #include "Utils.h"
 
+#include <chrono>
+#include <limits>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <time.h>
+#endif
+
 bool StdStringFromPyObject( PyObject* obj, std::string& str )
 {
 
@@ -32,3 +41,55 @@ bool StdStringFromPyObject( PyObject* obj, std::string& str )
 
 	return true;
 }
+
+long long MonotonicTimeNanoseconds()
+{
+	return std::chrono::duration_cast<std::chrono::nanoseconds>( std::chrono::steady_clock::now().time_since_epoch() ).count();
+}
+
+long long NanosecondsAfter( long long time, double seconds )
+{
+	long long remaining = std::numeric_limits<long long>::max() - time;
+
+	double nanoseconds = seconds * 1e9;
+
+	// The first test keeps the conversion in range, the second catches rounding of remaining to a double
+	if( nanoseconds < static_cast<double>( remaining ) && static_cast<long long>( nanoseconds ) < remaining )
+	{
+		return time + static_cast<long long>( nanoseconds );
+	}
+
+	return std::numeric_limits<long long>::max();
+}
+
+long long ThreadCpuTimeNanoseconds()
+{
+#ifdef _WIN32
+	FILETIME creationTime, exitTime, kernelTime, userTime;
+
+	if( !GetThreadTimes( GetCurrentThread(), &creationTime, &exitTime, &kernelTime, &userTime ) )
+	{
+		return 0;
+	}
+
+	ULARGE_INTEGER kernel;
+	kernel.LowPart = kernelTime.dwLowDateTime;
+	kernel.HighPart = kernelTime.dwHighDateTime;
+
+	ULARGE_INTEGER user;
+	user.LowPart = userTime.dwLowDateTime;
+	user.HighPart = userTime.dwHighDateTime;
+
+	// FILETIME is in 100 nanosecond intervals
+	return static_cast<long long>( kernel.QuadPart + user.QuadPart ) * 100;
+#else
+	timespec time;
+
+	if( clock_gettime( CLOCK_THREAD_CPUTIME_ID, &time ) != 0 )
+	{
+		return 0;
+	}
+
+	return static_cast<long long>( time.tv_sec ) * 1000000000LL + time.tv_nsec;
+#endif
+}
@@ -25,4 +25,14 @@
 
 bool StdStringFromPyObject( PyObject* obj, std::string& str );
 
+// Steady clock time in nanoseconds, matches time.monotonic_ns()
+long long MonotonicTimeNanoseconds();
+
+// Time the given number of seconds after time in nanoseconds, LLONG_MAX if that cannot be represented, including
+// for infinity. Seconds must not be negative or NaN
+long long NanosecondsAfter( long long time, double seconds );
+
+// CPU time consumed by the calling thread in nanoseconds
+long long ThreadCpuTimeNanoseconds();
+
 #endif //UTILS_H
\ No newline at end of file
@@ -495,4 +495,33 @@ TEST_F( SchedulerCapi, PyScheduler_GetTaskletsSwitchedLastRunWithTimeout )
 	// Check tasklets completed since last timeout
 	// This shows a switchting to and from the main tasklet
 	EXPECT_EQ( m_api->PyScheduler_GetTaskletsSwitchedLastRunWithTimeout(), 6 );
-}
\ No newline at end of file
+}
+TEST_F( SchedulerCapi, PyScheduler_RunWithTimeoutEarliestDeadlineFirst )
+{
+	// Create three tasklets, queued in reverse deadline order
+	EXPECT_EQ( PyRun_SimpleString( "import time\n"
+								   "completed = []\n"
+								   "now = time.monotonic_ns()\n"
+								   "t1 = scheduler.tasklet(lambda:completed.append(1))\n"
+								   "t1.deadline_ns = now + 3000000000\n"
+								   "t1()\n"
+								   "t2 = scheduler.tasklet(lambda:completed.append(2))\n"
+								   "t2.deadline_ns = now + 2000000000\n"
+								   "t2()\n"
+								   "t3 = scheduler.tasklet(lambda:completed.append(3))\n"
+								   "t3.deadline_ns = 1\n"
+								   "t3()\n" ),
+			   0 );
+
+	EXPECT_EQ( m_api->PyScheduler_GetRunCount(), 4 );
+
+	// Run scheduler until finished using a huge timeout time
+	EXPECT_EQ( m_api->PyScheduler_RunWithTimeoutEarliestDeadlineFirst( 10000000000 ), Py_None );
+
+	EXPECT_EQ( m_api->PyScheduler_GetRunCount(), 1 );
+
+	EXPECT_EQ( PyRun_SimpleString( "assert completed == [3, 2, 1]\n" ), 0 );
+
+	// Only t3 had a deadline which had already passed
+	EXPECT_EQ( m_api->PyScheduler_GetTaskletsMissedDeadlineLastRunWithTimeout(), 1 );
+}
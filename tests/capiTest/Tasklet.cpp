@@ -310,4 +310,31 @@ TEST_F( TaskletCapi, PyTasklet_Kill )
 
     // Clean
 	Py_XDECREF( tasklet );
-}
\ No newline at end of file
+}
+TEST_F( TaskletCapi, PyTasklet_GetTimeAccounting )
+{
+	EXPECT_EQ( PyRun_SimpleString( "import time\n"
+								   "def busy():\n"
+								   "    end = time.perf_counter() + 0.002\n"
+								   "    while time.perf_counter() < end:\n"
+								   "        pass\n"
+								   "t = scheduler.tasklet(busy)()\n" ),
+			   0 );
+
+	PyTaskletObject* tasklet = reinterpret_cast<PyTaskletObject*>( PyObject_GetAttrString( m_mainModule, "t" ) );
+
+	EXPECT_EQ( m_api->PyTasklet_GetSwitchInCount( tasklet ), 0 );
+
+	EXPECT_EQ( m_api->PyScheduler_RunNTasklets( 1 ), Py_None );
+
+	EXPECT_EQ( m_api->PyTasklet_GetSwitchInCount( tasklet ), 1 );
+
+	EXPECT_GE( m_api->PyTasklet_GetWallTime( tasklet ), 2000000 );
+
+	EXPECT_EQ( m_api->PyTasklet_GetLongestSlice( tasklet ), m_api->PyTasklet_GetWallTime( tasklet ) );
+
+	// Thread cpu time tracking is off by default
+	EXPECT_EQ( m_api->PyTasklet_GetCpuTime( tasklet ), 0 );
+
+	Py_DECREF( tasklet );
+}
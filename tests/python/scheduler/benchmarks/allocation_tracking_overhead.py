@@ -0,0 +1,45 @@
+"""
+Measures the cost of allocation tracking on a frame of tasklets that allocate
+short lived objects, by timing the same frames with and without tracking.
+
+Usage: python allocation_tracking_overhead.py [tasklets] [frames]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def work():
+    for _ in range(10):
+        [object() for _ in range(100)]
+
+
+def frame_time(tasklets, frames):
+    start = time.perf_counter_ns()
+    for _ in range(frames):
+        for i in range(tasklets):
+            t = scheduler.tasklet(work)()
+            t.context = "subsystem_{}".format(i % 4)
+        scheduler.run()
+    return (time.perf_counter_ns() - start) / frames
+
+
+def main():
+    tasklets = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    frame_time(tasklets, frames // 10)
+
+    baseline = frame_time(tasklets, frames)
+    print("{:<20} {:>10.3f}ms per frame".format("no tracking", baseline / 1e6))
+
+    scheduler.start_allocation_tracking()
+    tracked = frame_time(tasklets, frames)
+    scheduler.stop_allocation_tracking()
+    print("{:<20} {:>10.3f}ms per frame ({:+.1f}%)".format("tracking", tracked / 1e6, (tracked - baseline) / baseline * 100))
+
+
+if __name__ == "__main__":
+    main()
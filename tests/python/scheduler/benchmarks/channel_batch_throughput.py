@@ -0,0 +1,53 @@
+"""
+Measures channel throughput in items per second when moving items between a
+producer and a consumer tasklet with send_many/receive_many, compared to a
+loop of single send/receive calls.
+
+Usage: python channel_batch_throughput.py [items] [batch_size]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def run(items, producer, consumer):
+    channel = scheduler.channel()
+    scheduler.tasklet(consumer)(channel, items)
+    scheduler.tasklet(producer)(channel, items)
+
+    start = time.perf_counter_ns()
+    scheduler.run()
+    return items / ((time.perf_counter_ns() - start) / 1e9)
+
+
+def single_producer(channel, items):
+    for i in range(items):
+        channel.send(i)
+
+
+def single_consumer(channel, items):
+    for _ in range(items):
+        channel.receive()
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    def batch_producer(channel, items):
+        for start in range(0, items, batch_size):
+            channel.send_many(range(start, min(start + batch_size, items)))
+
+    def batch_consumer(channel, items):
+        received = 0
+        while received < items:
+            received += len(channel.receive_many(batch_size))
+
+    print("{:<24} {:>14.0f} items/sec".format("send/receive", run(items, single_producer, single_consumer)))
+    print("{:<24} {:>14.0f} items/sec".format("send_many/receive_many", run(items, batch_producer, batch_consumer)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures the cost of the sampling profiler on a frame of tasklets doing pure
+Python work, by timing the same frames with and without the profiler running.
+
+Usage: python sampling_profiler_overhead.py [tasklets] [frames] [interval_ns]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def work():
+    total = 0
+    for i in range(2000):
+        total += i * i
+    return total
+
+
+def frame_time(tasklets, frames):
+    start = time.perf_counter_ns()
+    for _ in range(frames):
+        for i in range(tasklets):
+            t = scheduler.tasklet(work)()
+            t.context = "subsystem_{}".format(i % 4)
+        scheduler.run()
+    return (time.perf_counter_ns() - start) / frames
+
+
+def main():
+    tasklets = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    interval = int(sys.argv[3]) if len(sys.argv) > 3 else 10000000
+
+    frame_time(tasklets, frames // 10)
+
+    baseline = frame_time(tasklets, frames)
+    print("{:<20} {:>10.3f}ms per frame".format("no profiler", baseline / 1e6))
+
+    scheduler.start_sampling_profiler(interval)
+    profiled = frame_time(tasklets, frames)
+    scheduler.stop_sampling_profiler()
+    print("{:<20} {:>10.3f}ms per frame ({:+.2f}%, {} samples)".format(
+        "sampling", profiled / 1e6, (profiled - baseline) / baseline * 100, scheduler.get_sample_count()))
+
+
+if __name__ == "__main__":
+    main()
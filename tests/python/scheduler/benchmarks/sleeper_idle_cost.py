@@ -0,0 +1,40 @@
+"""
+Measures the per frame cost of scheduler.run() with a large number of tasklets
+sleeping far in the future, compared to no sleepers at all.
+
+Usage: python sleeper_idle_cost.py [sleepers] [frames]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def frame_cost(frames):
+    start = time.perf_counter_ns()
+    for _ in range(frames):
+        scheduler.run()
+    return (time.perf_counter_ns() - start) / frames
+
+
+def main():
+    sleepers = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print("{:<20} {:>10.0f}ns per run".format("no sleepers", frame_cost(frames)))
+
+    def sleeper():
+        scheduler.sleep(3600)
+
+    start = time.perf_counter_ns()
+    for _ in range(sleepers):
+        scheduler.tasklet(sleeper)()
+    scheduler.run()
+    print("{:<20} {:>10.3f}ms to put {} tasklets to sleep".format("setup", (time.perf_counter_ns() - start) / 1e6, sleepers))
+
+    print("{:<20} {:>10.0f}ns per run".format("{} sleepers".format(sleepers), frame_cost(frames)))
+
+
+if __name__ == "__main__":
+    main()
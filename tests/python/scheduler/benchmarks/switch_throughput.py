@@ -0,0 +1,98 @@
+"""
+Measures tasklet switch and channel transfer throughput with and without the
+schedule and channel callbacks installed, and with the native tracer enabled.
+
+Usage: python switch_throughput.py [tasklets] [switches]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def schedule_callback(previous, next):
+    pass
+
+
+def channel_callback(channel, tasklet, sending, will_block):
+    pass
+
+
+def switch_rate(tasklets, switches):
+    def worker():
+        for _ in range(switches):
+            scheduler.schedule()
+
+    for _ in range(tasklets):
+        scheduler.tasklet(worker)()
+
+    start = time.perf_counter_ns()
+    scheduler.run()
+    elapsed = time.perf_counter_ns() - start
+
+    return tasklets * switches / (elapsed / 1e9)
+
+
+def channel_rate(transfers):
+    channel = scheduler.channel()
+
+    def sender():
+        for i in range(transfers):
+            channel.send(i)
+
+    def receiver():
+        for _ in range(transfers):
+            channel.receive()
+
+    scheduler.tasklet(sender)()
+    scheduler.tasklet(receiver)()
+
+    start = time.perf_counter_ns()
+    scheduler.run()
+    elapsed = time.perf_counter_ns() - start
+
+    return transfers / (elapsed / 1e9)
+
+
+def report(name, rate, unit):
+    print("{:<32} {:>14,.0f} {} per second".format(name, rate, unit))
+
+
+def main():
+    tasklets = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    switches = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    report("switch without callback", switch_rate(tasklets, switches), "switches")
+
+    scheduler.set_schedule_callback(schedule_callback)
+    try:
+        report("switch with schedule callback", switch_rate(tasklets, switches), "switches")
+    finally:
+        scheduler.set_schedule_callback(None)
+
+    # Large enough that the ring wraps, so the steady state cost is measured
+    schedule_manager = scheduler.get_schedule_manager()
+    schedule_manager.enable_trace()
+    try:
+        report("switch with trace", switch_rate(tasklets, switches), "switches")
+    finally:
+        schedule_manager.disable_trace()
+
+    report("channel without callback", channel_rate(tasklets * switches), "transfers")
+
+    scheduler.set_channel_callback(channel_callback)
+    try:
+        report("channel with channel callback", channel_rate(tasklets * switches), "transfers")
+    finally:
+        scheduler.set_channel_callback(None)
+
+    schedule_manager.enable_trace()
+    try:
+        report("channel with trace", channel_rate(tasklets * switches), "transfers")
+    finally:
+        schedule_manager.disable_trace()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the cost of scheduler.tasklet_census() against building the same
+callsite census by reading each tasklet's attributes from Python.
+
+Usage: python tasklet_census_cost.py [tasklets] [repeats]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def python_census(tasklets):
+    census = {}
+    for t in tasklets:
+        key = (t.file_name, t.line_number, t.method_name)
+        counts = census.setdefault(key, {"runnable": 0, "blocked": 0, "paused": 0, "dead": 0})
+        if not t.alive:
+            counts["dead"] += 1
+        elif t.blocked:
+            counts["blocked"] += 1
+        elif t.paused:
+            counts["paused"] += 1
+        else:
+            counts["runnable"] += 1
+    return census
+
+
+def time_ms(function, repeats):
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter_ns() - start) / repeats / 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    channel = scheduler.channel()
+
+    def blocker():
+        channel.receive()
+
+    def worker():
+        pass
+
+    tasklets = [scheduler.tasklet(blocker if i % 2 else worker)() for i in range(count)]
+    scheduler.run()
+    tasklets.extend(scheduler.tasklet(worker)() for _ in range(count // 10))
+
+    print("{:<20} {:>10.3f}ms per census of {} tasklets".format("tasklet_census", time_ms(scheduler.tasklet_census, repeats), len(tasklets)))
+    print("{:<20} {:>10.3f}ms per census of {} tasklets".format("python walk", time_ms(lambda: python_census(tasklets), repeats), len(tasklets)))
+
+    channel.close()
+    for t in tasklets:
+        t.kill()
+
+
+if __name__ == "__main__":
+    main()
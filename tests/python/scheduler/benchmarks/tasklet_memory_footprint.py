@@ -0,0 +1,43 @@
+"""
+Reports the memory used per live tasklet for a large number of tasklets bound
+to a function and waiting in the runnables queue.
+
+sys.getsizeof covers the tasklet object and its implementation. tracemalloc
+additionally covers the greenlet and bound arguments created for each tasklet.
+
+Usage: python tasklet_memory_footprint.py [tasklets]
+"""
+
+import sys
+import tracemalloc
+
+import scheduler
+
+
+def job(value):
+    pass
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    tasklets = [scheduler.tasklet(job)(i) for i in range(count)]
+
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    sizeof = sum(sys.getsizeof(t) for t in tasklets)
+
+    print("{:<20} {:>10}".format("tasklets", count))
+    print("{:<20} {:>10.1f} bytes per tasklet".format("sys.getsizeof", sizeof / count))
+    print("{:<20} {:>10.1f} bytes per tasklet".format("tracemalloc", traced / count))
+
+    # Run the tasklets to empty the queue before exiting
+    scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
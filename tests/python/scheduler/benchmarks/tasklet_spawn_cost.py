@@ -0,0 +1,49 @@
+"""
+Measures the cost of creating, running and releasing short lived tasklets with
+and without the tasklet pool.
+
+Tasklets are spawned in bursts before each run, mimicking a frame that fans out
+a batch of small jobs.
+
+Usage: python tasklet_spawn_cost.py [tasklets] [burst] [pool_size]
+"""
+
+import sys
+import time
+
+import scheduler
+
+
+def job():
+    pass
+
+
+def spawn_cost(tasklets, burst):
+    start = time.perf_counter_ns()
+    for _ in range(tasklets // burst):
+        for _ in range(burst):
+            scheduler.tasklet(job)()
+        scheduler.run()
+    return (time.perf_counter_ns() - start) / tasklets
+
+
+def main():
+    tasklets = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    burst = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    pool_size = int(sys.argv[3]) if len(sys.argv) > 3 else burst
+
+    print("{:<20} {:>10.0f}ns per tasklet".format("without pool", spawn_cost(tasklets, burst)))
+
+    scheduler.set_tasklet_pool_max_size(pool_size)
+    scheduler.reset_tasklet_pool_stats()
+    try:
+        cost = spawn_cost(tasklets, burst)
+        stats = scheduler.get_tasklet_pool_stats()
+    finally:
+        scheduler.set_tasklet_pool_max_size(0)
+
+    print("{:<20} {:>10.0f}ns per tasklet (hits={} misses={})".format("with pool", cost, stats["hits"], stats["misses"]))
+
+
+if __name__ == "__main__":
+    main()
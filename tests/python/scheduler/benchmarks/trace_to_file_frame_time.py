@@ -0,0 +1,77 @@
+"""
+Measures frame time of a workload of tasklets exchanging messages over
+channels, with and without a trace_to_file capture running.
+
+Thread cpu time excludes the background writer, on a machine with a spare
+core it is what the capture costs the frame.
+
+Usage: python trace_to_file_frame_time.py [tasklets] [frames] [path]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import scheduler
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def frame_times(tasklets, frames):
+    channel = scheduler.channel()
+
+    def sender():
+        channel.send(None)
+
+    def receiver():
+        channel.receive()
+
+    times = []
+    cpu_times = []
+    for _ in range(frames):
+        for _ in range(tasklets):
+            scheduler.tasklet(receiver)()
+            scheduler.tasklet(sender)()
+        start = time.perf_counter_ns()
+        cpu_start = time.thread_time_ns()
+        scheduler.run()
+        cpu_times.append(time.thread_time_ns() - cpu_start)
+        times.append(time.perf_counter_ns() - start)
+
+    return times, cpu_times
+
+
+def report(name, times):
+    wall, cpu = times
+    print("{:<20} wall p50={:>10.3f}ms p99={:>10.3f}ms  thread cpu p50={:>10.3f}ms p99={:>10.3f}ms".format(
+        name,
+        percentile(wall, 0.50) / 1e6,
+        percentile(wall, 0.99) / 1e6,
+        percentile(cpu, 0.50) / 1e6,
+        percentile(cpu, 0.99) / 1e6
+    ))
+
+
+def main():
+    tasklets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(tempfile.gettempdir(), "scheduler_trace.json")
+
+    report("without capture", frame_times(tasklets, frames))
+
+    scheduler.trace_to_file(path)
+    try:
+        report("with capture", frame_times(tasklets, frames))
+    finally:
+        start = time.perf_counter_ns()
+        scheduler.stop_trace_to_file()
+        print("{:<20} {:>10.3f}ms to complete {} ({} bytes)".format(
+            "stop", (time.perf_counter_ns() - start) / 1e6, path, os.path.getsize(path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+import gc
 import sys
+import time
+import weakref
 from test_utils import SchedulerTestCaseBase
 import scheduler
 
@@ -1053,6 +1056,44 @@ class TestChannels(SchedulerTestCaseBase):
         self.assertEqual(callback2, scheduler.set_channel_callback(None))
         self.assertEqual(scheduler.get_channel_callback(),None)
 
+    def test_set_channel_callback_reference_count(self):
+
+        def callback(channel, tasklet, is_sending, will_block):
+            pass
+
+        before = sys.getrefcount(callback)
+
+        scheduler.set_channel_callback(callback)
+        self.assertEqual(sys.getrefcount(callback), before + 1)
+
+        previous = scheduler.set_channel_callback(None)
+        self.assertIs(previous, callback)
+        del previous
+
+        self.assertEqual(sys.getrefcount(callback), before)
+
+    def test_channel_callback_result_released(self):
+        result = object()
+        callbackOutput = []
+
+        def channel_callback(channel, tasklet, is_sending, will_block):
+            callbackOutput.append((channel, tasklet, is_sending, will_block))
+            return result
+
+        before = sys.getrefcount(result)
+        c = scheduler.channel()
+
+        scheduler.set_channel_callback(channel_callback)
+        try:
+            t = scheduler.tasklet(c.send)(1)
+            scheduler.run()
+            c.receive()
+        finally:
+            scheduler.set_channel_callback(None)
+
+        self.assertEqual(callbackOutput[0], (c, t, True, True))
+        self.assertEqual(sys.getrefcount(result), before)
+
     def test_channel_callback_with_blocking_send(self):
         callbackOutput = []
 
@@ -1377,3 +1418,846 @@ class TestChannels(SchedulerTestCaseBase):
         # There should now only be one reference remaining (2 for sys.getrefcount)
         self.assertEqual(sys.getrefcount(tasklet[0]),2)
         tasklet[0] = None
+
+
+class TestChannelBatching(SchedulerTestCaseBase):
+    def test_send_many_hands_items_to_waiting_receivers(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive())
+
+        for _ in range(3):
+            scheduler.tasklet(receiver)()
+        scheduler.run()
+        self.assertEqual(channel.balance, -3)
+
+        channel.send_many(["a", "b", "c"])
+
+        self.assertEqual(received, ["a", "b", "c"])
+        self.assertEqual(channel.balance, 0)
+
+    def test_send_many_blocks_until_remaining_items_are_received(self):
+        channel = scheduler.channel()
+
+        def sender():
+            channel.send_many(range(5))
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual(channel.balance, 1)
+
+        self.assertEqual(channel.receive(), 0)
+        self.assertEqual(channel.receive(), 1)
+        self.assertTrue(sender_tasklet.blocked)
+
+        self.assertEqual([channel.receive(), channel.receive(), channel.receive()], [2, 3, 4])
+        self.assertFalse(sender_tasklet.blocked)
+        self.assertEqual(channel.balance, 0)
+
+        scheduler.run()
+        self.assertFalse(sender_tasklet.alive)
+
+    def test_send_many_delivers_remainder_after_waiting_receivers(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive())
+
+        def sender():
+            channel.send_many([1, 2, 3])
+
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+
+        self.assertEqual(received, [1])
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual(channel.receive_many(10), [2, 3])
+        self.assertFalse(sender_tasklet.blocked)
+
+    def test_send_many_with_empty_iterable_does_not_block(self):
+        channel = scheduler.channel()
+        channel.send_many([])
+        self.assertEqual(channel.balance, 0)
+
+    def test_send_many_on_closed_channel(self):
+        channel = scheduler.channel()
+        channel.close()
+        with self.assertRaises(ValueError):
+            channel.send_many([1])
+
+    def test_receive_many_drains_blocked_senders(self):
+        channel = scheduler.channel()
+
+        def sender(value):
+            channel.send(value)
+
+        senders = [scheduler.tasklet(sender)(i) for i in range(5)]
+        scheduler.run()
+        self.assertEqual(channel.balance, 5)
+
+        self.assertEqual(channel.receive_many(3), [0, 1, 2])
+        self.assertEqual(channel.balance, 2)
+        self.assertEqual(channel.receive_many(10), [3, 4])
+        self.assertEqual(channel.balance, 0)
+
+        scheduler.run()
+        self.assertTrue(all(not t.alive for t in senders))
+
+    def test_receive_many_blocks_until_send_many(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive_many(2))
+
+        scheduler.tasklet(receiver)()
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+        self.assertEqual(channel.balance, -2)
+
+        channel.send_many(range(4))
+
+        self.assertEqual(received, [[0, 1], [2, 3]])
+        self.assertEqual(channel.balance, 0)
+
+    def test_receive_many_blocked_receiver_gets_list_from_send(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive_many(4))
+
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+
+        channel.send([1, 2])
+
+        self.assertEqual(received, [[[1, 2]]])
+
+    def test_receive_many_raises_exception_from_sender(self):
+        channel = scheduler.channel()
+
+        def sender():
+            channel.send_exception(ValueError, "boom")
+
+        scheduler.tasklet(sender)()
+        scheduler.run()
+
+        with self.assertRaises(ValueError):
+            channel.receive_many(5)
+
+    def test_receive_many_stops_at_sender_with_exception(self):
+        channel = scheduler.channel()
+
+        def sender():
+            channel.send(1)
+
+        def exception_sender():
+            channel.send_exception(ValueError, "boom")
+
+        scheduler.tasklet(sender)()
+        scheduler.tasklet(exception_sender)()
+        scheduler.run()
+
+        self.assertEqual(channel.receive_many(5), [1])
+        with self.assertRaises(ValueError):
+            channel.receive()
+
+    def test_receive_many_invalid_max_items(self):
+        channel = scheduler.channel()
+        with self.assertRaises(ValueError):
+            channel.receive_many(0)
+
+    def test_kill_blocked_send_many_releases_items(self):
+        channel = scheduler.channel()
+
+        class Data(object):
+            pass
+
+        value = Data()
+        original_refcount = sys.getrefcount(value)
+
+        def sender():
+            channel.send_many([value, value])
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+        self.assertEqual(channel.receive(), value)
+
+        sender_tasklet.kill()
+
+        self.assertEqual(channel.balance, 0)
+        self.assertEqual(sys.getrefcount(value), original_refcount)
+
+    def test_send_many_preference_sender_does_not_switch(self):
+        channel = scheduler.channel()
+        channel.preference = 1
+        received = []
+
+        def receiver():
+            received.append(channel.receive())
+
+        scheduler.tasklet(receiver)()
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+
+        channel.send_many([1, 2])
+        self.assertEqual(received, [])
+        scheduler.run()
+        self.assertEqual(received, [1, 2])
+
+
+class TestChannelCapacity(SchedulerTestCaseBase):
+    def test_default_capacity(self):
+        self.assertEqual(scheduler.channel().capacity, 0)
+        self.assertLess(scheduler.QueueChannel().capacity, 0)
+        self.assertEqual(scheduler.QueueChannel(capacity=3).capacity, 3)
+
+    def test_invalid_keyword(self):
+        with self.assertRaises(TypeError):
+            scheduler.channel(size=3)
+
+    def test_send_buffers_until_capacity(self):
+        channel = scheduler.channel(capacity=2)
+
+        def sender():
+            for i in range(3):
+                channel.send(i)
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual(channel.balance, 3)
+        self.assertEqual(channel.queue, sender_tasklet)
+
+    def test_receive_unblocks_sender_on_full_buffer(self):
+        channel = scheduler.channel(capacity=2)
+
+        def sender():
+            for i in range(4):
+                channel.send(i)
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+        self.assertTrue(sender_tasklet.blocked)
+
+        self.assertEqual(channel.receive(), 0)
+
+        # The blocked item has moved into the buffer and the sender can continue
+        self.assertFalse(sender_tasklet.blocked)
+        self.assertEqual(channel.balance, 2)
+
+        scheduler.run()
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual([channel.receive() for _ in range(3)], [1, 2, 3])
+
+        scheduler.run()
+        self.assertFalse(sender_tasklet.alive)
+        self.assertEqual(channel.balance, 0)
+
+    def test_send_many_blocks_with_what_does_not_fit(self):
+        channel = scheduler.channel(capacity=3)
+
+        def sender():
+            channel.send_many(range(8))
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual(channel.balance, 4)
+        self.assertEqual(channel.receive_many(2), [0, 1])
+        self.assertTrue(sender_tasklet.blocked)
+        self.assertEqual([channel.receive() for _ in range(4)], [2, 3, 4, 5])
+        self.assertEqual(channel.receive_many(10), [6, 7])
+        self.assertFalse(sender_tasklet.blocked)
+
+    def test_raising_capacity_unblocks_senders(self):
+        channel = scheduler.channel(capacity=1)
+
+        def sender(value):
+            channel.send(value)
+
+        senders = [scheduler.tasklet(sender)(i) for i in range(3)]
+        scheduler.run()
+        self.assertEqual([t.blocked for t in senders], [False, True, True])
+
+        channel.capacity = 3
+        self.assertEqual([t.blocked for t in senders], [False, False, False])
+        self.assertEqual(channel.receive_many(3), [0, 1, 2])
+
+    def test_peak_buffered(self):
+        channel = scheduler.QueueChannel()
+        self.assertEqual(channel.peak_buffered, 0)
+
+        for i in range(5):
+            channel.send(i)
+        for _ in range(3):
+            channel.receive()
+
+        self.assertEqual(channel.peak_buffered, 5)
+        channel.reset_peak_buffered()
+        self.assertEqual(channel.peak_buffered, 2)
+
+    def test_blocked_exception_moves_into_buffer(self):
+        channel = scheduler.channel(capacity=1)
+
+        def sender():
+            channel.send(1)
+            channel.send_exception(ValueError, 2)
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+        self.assertTrue(sender_tasklet.blocked)
+
+        self.assertEqual(channel.receive(), 1)
+        self.assertFalse(sender_tasklet.blocked)
+        with self.assertRaises(ValueError):
+            channel.receive()
+
+    def test_kill_sender_blocked_on_full_buffer(self):
+        channel = scheduler.channel(capacity=1)
+
+        def sender():
+            channel.send(1)
+            channel.send(2)
+
+        sender_tasklet = scheduler.tasklet(sender)()
+        scheduler.run()
+
+        sender_tasklet.kill()
+
+        self.assertEqual(channel.balance, 1)
+        self.assertEqual(channel.receive(), 1)
+        self.assertEqual(channel.balance, 0)
+
+
+class TestSelect(SchedulerTestCaseBase):
+    def test_select_completes_ready_receive(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+
+        scheduler.tasklet(second.send)("value")
+        scheduler.run()
+
+        self.assertEqual(scheduler.select([(first, 'recv'), (second, 'recv')]), (1, "value"))
+        self.assertEqual(second.balance, 0)
+
+    def test_select_completes_ready_send(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive())
+
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+
+        self.assertEqual(scheduler.select([(channel, 'send', 1)]), (0, None))
+        scheduler.run()
+        self.assertEqual(received, [1])
+
+    def test_select_prefers_first_ready_case(self):
+        first = scheduler.QueueChannel()
+        second = scheduler.QueueChannel()
+        first.send(1)
+        second.send(2)
+
+        self.assertEqual(scheduler.select([(second, 'recv'), (first, 'recv')]), (0, 2))
+
+    def test_blocked_select_woken_by_send(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(first, 'recv'), (second, 'recv')]))
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        scheduler.run()
+        self.assertTrue(selector_tasklet.blocked)
+
+        # A select does not count towards channel balance
+        self.assertEqual(first.balance, 0)
+        self.assertEqual(second.balance, 0)
+
+        second.send("value")
+        scheduler.run()
+        self.assertEqual(results, [(1, "value")])
+        self.assertFalse(selector_tasklet.alive)
+
+        # The select has been removed from every channel it was waiting on
+        self.assertFalse(first.try_send("unused"))
+
+    def test_blocked_select_woken_by_receive(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(first, 'send', 1), (second, 'send', 2)]))
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+
+        self.assertEqual(first.receive(), 1)
+        scheduler.run()
+        self.assertEqual(results, [(0, None)])
+        self.assertEqual(second.try_receive(), (False, None))
+
+    def test_selects_on_opposite_ends_pair_up(self):
+        channel = scheduler.channel()
+        other = scheduler.channel()
+        results = []
+
+        def receiving_selector():
+            results.append(scheduler.select([(other, 'recv'), (channel, 'recv')]))
+
+        def sending_selector():
+            results.append(scheduler.select([(channel, 'send', "value")]))
+
+        scheduler.tasklet(receiving_selector)()
+        scheduler.tasklet(sending_selector)()
+        scheduler.run()
+
+        self.assertEqual(sorted(results, key=repr), sorted([(1, "value"), (0, None)], key=repr))
+
+    def test_select_receives_from_send_many(self):
+        channel = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(channel, 'recv')]))
+
+        scheduler.tasklet(selector)()
+        scheduler.tasklet(selector)()
+        scheduler.run()
+
+        channel.send_many([1, 2])
+        scheduler.run()
+        self.assertEqual(results, [(0, 1), (0, 2)])
+
+    def test_receive_many_takes_from_select(self):
+        channel = scheduler.channel()
+
+        def selector(value):
+            scheduler.select([(channel, 'send', value)])
+
+        scheduler.tasklet(selector)(1)
+        scheduler.tasklet(selector)(2)
+        scheduler.run()
+
+        self.assertEqual(channel.receive_many(5), [1, 2])
+
+    def test_select_send_into_buffer_made_free(self):
+        channel = scheduler.channel(capacity=1)
+        channel.send(1)
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(channel, 'send', 2)]))
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        scheduler.run()
+        self.assertTrue(selector_tasklet.blocked)
+
+        self.assertEqual(channel.receive(), 1)
+        self.assertEqual(channel.balance, 1)
+        scheduler.run()
+        self.assertEqual(results, [(0, None)])
+        self.assertEqual(channel.receive(), 2)
+
+    def test_select_receives_exception(self):
+        channel = scheduler.channel()
+        errors = []
+
+        def selector():
+            try:
+                scheduler.select([(channel, 'recv')])
+            except ValueError as e:
+                errors.append(e.args)
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+        channel.send_exception(ValueError, 1)
+        scheduler.run()
+        self.assertEqual(errors, [(1,)])
+
+    def test_select_poll(self):
+        channel = scheduler.channel()
+        self.assertEqual(scheduler.select([(channel, 'recv'), (channel, 'send', 1)], timeout=0), (-1, None))
+
+    def test_select_timeout(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(first, 'recv'), (second, 'send', 1)], timeout=0.01))
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        start = time.monotonic()
+        self.run_until(lambda: results)
+
+        self.assertEqual(results, [(-1, None)])
+        self.assertGreaterEqual(time.monotonic() - start, 0.01)
+        self.assertFalse(selector_tasklet.alive)
+        self.assertFalse(first.try_send(1))
+        self.assertEqual(second.try_receive(), (False, None))
+
+    def test_select_completed_before_timeout(self):
+        channel = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(channel, 'recv')], timeout=60))
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+        channel.send(1)
+        scheduler.run()
+        self.assertEqual(results, [(0, 1)])
+
+    def test_select_timeout_on_main_tasklet(self):
+        channel = scheduler.channel()
+        with self.assertRaises(RuntimeError):
+            scheduler.select([(channel, 'recv')], timeout=1)
+
+    def test_select_deadlock_on_main_tasklet(self):
+        channel = scheduler.channel()
+        with self.assertRaises(RuntimeError):
+            scheduler.select([(channel, 'recv')])
+        self.assertFalse(channel.try_send(1))
+
+    def test_kill_blocked_select(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+
+        def selector():
+            scheduler.select([(first, 'recv'), (second, 'send', 1)])
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        scheduler.run()
+        selector_tasklet.kill()
+
+        self.assertFalse(selector_tasklet.alive)
+        self.assertFalse(first.try_send(1))
+        self.assertEqual(second.try_receive(), (False, None))
+
+    def test_pending_kill_blocked_select(self):
+        channel = scheduler.channel()
+
+        def selector():
+            scheduler.select([(channel, 'recv')])
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        scheduler.run()
+        selector_tasklet.kill(pending=True)
+
+        # The select can no longer be completed
+        self.assertFalse(channel.try_send(1))
+        scheduler.run()
+        self.assertFalse(selector_tasklet.alive)
+
+    def test_clear_kills_blocked_select(self):
+        channel = scheduler.channel()
+
+        def selector():
+            scheduler.select([(channel, 'recv')])
+
+        selector_tasklet = scheduler.tasklet(selector)()
+        scheduler.run()
+        channel.clear()
+        self.assertFalse(selector_tasklet.alive)
+
+    def test_select_on_closed_channel(self):
+        channel = scheduler.channel()
+        channel.close()
+        with self.assertRaises(ValueError):
+            scheduler.select([(channel, 'recv')])
+
+    def test_select_invalid_cases(self):
+        channel = scheduler.channel()
+        self.assertRaises(ValueError, scheduler.select, [])
+        self.assertRaises(TypeError, scheduler.select, [channel])
+        self.assertRaises(TypeError, scheduler.select, [(1, 'recv')])
+        self.assertRaises(ValueError, scheduler.select, [(channel, 'receive')])
+        self.assertRaises(ValueError, scheduler.select, [(channel, 'send')])
+        self.assertRaises(ValueError, scheduler.select, [(channel, 'recv', 1)])
+        self.assertRaises(ValueError, scheduler.select, [(channel, 'recv')], timeout=-1)
+        self.assertRaises(ValueError, scheduler.select, [(channel, 'recv')], timeout=float('nan'))
+        self.assertRaises(TypeError, scheduler.select, 1)
+
+    def test_select_infinite_timeout(self):
+        channel = scheduler.channel()
+        results = []
+
+        def selector(timeout):
+            results.append(scheduler.select([(channel, 'recv')], timeout=timeout))
+
+        for timeout in (float('inf'), 9.2e9, 1e300):
+            scheduler.tasklet(selector)(timeout)
+            scheduler.run()
+            time.sleep(0.002)
+            scheduler.run()
+            self.assertEqual(results, [])
+            channel.send(1)
+            scheduler.run()
+            self.assertEqual(results, [(0, 1)])
+            results.clear()
+
+    def test_select_cases_changed_while_blocked(self):
+        class Data(object):
+            pass
+
+        receiving = scheduler.channel()
+        value = Data()
+        value_reference = weakref.ref(value)
+        cases = [(receiving, 'recv'), (scheduler.channel(), 'send', value)]
+        results = []
+
+        def selector():
+            results.append(scheduler.select(cases))
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+
+        # The select holds its own references, so the sending channel and value outlive the caller's list
+        del value
+        cases.clear()
+        gc.collect()
+        self.assertIsNotNone(value_reference())
+
+        receiving.send(1)
+        scheduler.run()
+        self.assertEqual(results, [(0, 1)])
+
+        gc.collect()
+        self.assertIsNone(value_reference())
+
+    def test_select_value_refcount(self):
+        channel = scheduler.channel()
+
+        class Data(object):
+            pass
+
+        value = Data()
+        original_refcount = sys.getrefcount(value)
+
+        def selector():
+            scheduler.select([(channel, 'send', value)])
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+        self.assertIs(channel.receive(), value)
+        scheduler.run()
+
+        self.assertEqual(sys.getrefcount(value), original_refcount)
+
+
+class TestTryOperations(SchedulerTestCaseBase):
+    def test_try_send_without_receiver(self):
+        channel = scheduler.channel()
+        self.assertFalse(channel.try_send(1))
+        self.assertEqual(channel.balance, 0)
+
+    def test_try_send_with_receiver(self):
+        channel = scheduler.channel()
+        received = []
+
+        def receiver():
+            received.append(channel.receive())
+
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+
+        self.assertTrue(channel.try_send(1))
+        scheduler.run()
+        self.assertEqual(received, [1])
+
+    def test_try_send_buffered(self):
+        channel = scheduler.channel(capacity=1)
+        self.assertTrue(channel.try_send(1))
+        self.assertFalse(channel.try_send(2))
+        self.assertEqual(channel.balance, 1)
+
+    def test_try_receive_without_sender(self):
+        channel = scheduler.channel()
+        self.assertEqual(channel.try_receive(), (False, None))
+        self.assertEqual(channel.balance, 0)
+
+    def test_try_receive_with_sender(self):
+        channel = scheduler.channel()
+        scheduler.tasklet(channel.send)(None)
+        scheduler.run()
+
+        self.assertEqual(channel.try_receive(), (True, None))
+        self.assertEqual(channel.balance, 0)
+
+    def test_try_receive_buffered(self):
+        channel = scheduler.QueueChannel()
+        channel.send(1)
+        self.assertEqual(channel.try_receive(), (True, 1))
+        self.assertEqual(channel.try_receive(), (False, None))
+
+
+class TestChannelStats(SchedulerTestCaseBase):
+    def test_counts_sends_and_receives(self):
+        channel = scheduler.channel()
+        self.assertEqual(channel.get_stats(), {
+            "sends": 0,
+            "receives": 0,
+            "blocked_operations": 0,
+            "blocked_time_ns": 0,
+            "max_blocked_time_ns": 0,
+            "max_abs_balance": 0,
+        })
+
+        def sender():
+            for i in range(3):
+                channel.send(i)
+
+        scheduler.tasklet(sender)()
+        for _ in range(3):
+            channel.receive()
+
+        stats = channel.get_stats()
+        self.assertEqual(stats["sends"], 3)
+        self.assertEqual(stats["receives"], 3)
+        self.assertGreaterEqual(stats["blocked_operations"], 3)
+        self.assertEqual(stats["max_abs_balance"], 1)
+
+    def test_batches_counted_per_item(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        for _ in range(3):
+            scheduler.tasklet(receiver)()
+        scheduler.run()
+
+        channel.send_many([1, 2, 3])
+        scheduler.run()
+
+        stats = channel.get_stats()
+        self.assertEqual(stats["sends"], 3)
+        self.assertEqual(stats["receives"], 3)
+
+        # Drained from a blocked sender
+        scheduler.tasklet(channel.send_many)([4, 5])
+        scheduler.run()
+        self.assertEqual(channel.receive_many(10), [4, 5])
+
+        # Blocked until a sender arrives
+        results = []
+        scheduler.tasklet(lambda: results.append(channel.receive_many(10)))()
+        scheduler.run()
+        channel.send_many([6, 7, 8])
+        scheduler.run()
+        self.assertEqual(results, [[6, 7, 8]])
+
+        stats = channel.get_stats()
+        self.assertEqual(stats["sends"], 8)
+        self.assertEqual(stats["receives"], 8)
+        self.assertEqual(scheduler.top_channels(1, "operations"), [(channel, 16)])
+
+    def test_blocked_select_charged_to_each_channel(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+        results = []
+
+        def selector():
+            results.append(scheduler.select([(first, 'recv'), (second, 'recv'), (first, 'send', 1)]))
+
+        scheduler.tasklet(selector)()
+        scheduler.run()
+        time.sleep(0.01)
+        second.send(2)
+        scheduler.run()
+        self.assertEqual(results, [(1, 2)])
+
+        first_stats = first.get_stats()
+        second_stats = second.get_stats()
+        self.assertEqual(first_stats["blocked_operations"], 1)
+        self.assertEqual(second_stats["blocked_operations"], 1)
+        self.assertGreater(first_stats["blocked_time_ns"], 0)
+        self.assertGreater(second_stats["blocked_time_ns"], 0)
+        self.assertEqual((first_stats["sends"], first_stats["receives"]), (0, 0))
+        self.assertEqual((second_stats["sends"], second_stats["receives"]), (1, 1))
+
+    def test_blocked_time(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        scheduler.tasklet(receiver)()
+        scheduler.run()
+        time.sleep(0.01)
+        channel.send(None)
+
+        stats = channel.get_stats()
+        self.assertEqual(stats["blocked_operations"], 1)
+        self.assertGreaterEqual(stats["blocked_time_ns"], 10000000)
+        self.assertEqual(stats["max_blocked_time_ns"], stats["blocked_time_ns"])
+
+    def test_reset_stats(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        tasklets = [scheduler.tasklet(receiver)() for _ in range(2)]
+        scheduler.run()
+        self.assertEqual(channel.get_stats()["max_abs_balance"], 2)
+
+        channel.reset_stats()
+        stats = channel.get_stats()
+        self.assertEqual(stats["blocked_operations"], 0)
+        self.assertEqual(stats["max_abs_balance"], 2)
+
+        channel.send(None)
+        channel.send(None)
+        self.assertEqual(channel.get_stats()["sends"], 2)
+        channel.reset_stats()
+        self.assertEqual(channel.get_stats()["max_abs_balance"], 0)
+        self.assertTrue(all(t.alive is False for t in tasklets))
+
+    def test_top_channels(self):
+        quiet = scheduler.channel()
+        busy = scheduler.channel()
+        busier = scheduler.channel()
+
+        def receive_forever(channel):
+            while True:
+                channel.receive()
+
+        receivers = [scheduler.tasklet(receive_forever)(c) for c in (busy, busier)]
+        scheduler.run()
+        busy.send(None)
+        for _ in range(3):
+            busier.send(None)
+
+        top = scheduler.top_channels(5, "sends")
+        self.assertEqual(top, [(busier, 3), (busy, 1)])
+        self.assertEqual(scheduler.top_channels(1, key="sends"), [(busier, 3)])
+        self.assertEqual(scheduler.top_channels(0, "sends"), [])
+        self.assertNotIn(quiet, [c for c, _ in scheduler.top_channels(5)])
+
+        for receiver in receivers:
+            receiver.kill()
+
+    def test_top_channels_errors(self):
+        with self.assertRaises(ValueError):
+            scheduler.top_channels(1, "unknown")
+        with self.assertRaises(ValueError):
+            scheduler.top_channels(-1)
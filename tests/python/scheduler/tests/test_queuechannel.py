@@ -32,7 +32,7 @@ class TestQueueChannels(SchedulerTestCaseBase):
             tasklet.run()
             self.assertEqual(self.getruncount(), 1)
 
-        self.assertEqual(channel.balance, len(channel.data_queue),
+        self.assertEqual(channel.balance, len(channel),
                          "The channel balance should equal the length of the channel's data queue")
 
     def test_queue_data(self):
@@ -47,7 +47,7 @@ class TestQueueChannels(SchedulerTestCaseBase):
         self.assertEqual(self.getruncount(), 1)
 
         # The tasklet should have inserted data into the queue
-        exception, data = channel.data_queue.popleft()
+        data = channel.receive()
         self.assertEqual(data, (1, 2, 3), "Channel queue received incorrect data")
 
         data_to_send = range(3)
@@ -214,3 +214,90 @@ class TestQueueChannels(SchedulerTestCaseBase):
 
         self.assertEqual(channel.balance, 0)
         self.assertEqual(receivedValues, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_queue_order(self):
+        channel = scheduler.QueueChannel()
+        for i in range(100):
+            channel.send(i)
+
+        self.assertEqual(len(channel), 100)
+        self.assertEqual([channel.receive() for _ in range(100)], list(range(100)))
+        self.assertEqual(len(channel), 0)
+
+    def test_queued_exception_is_raised_in_order(self):
+        channel = scheduler.QueueChannel()
+        channel.send(1)
+        channel.send_exception(ValueError, 2)
+        channel.send(3)
+
+        self.assertEqual(channel.receive(), 1)
+        with self.assertRaises(ValueError) as context:
+            channel.receive()
+        self.assertEqual(context.exception.args, (2,))
+        self.assertEqual(channel.receive(), 3)
+
+    def test_closing_drains_queue_before_closed(self):
+        channel = scheduler.QueueChannel()
+        channel.send(1)
+        channel.send(2)
+        channel.close()
+
+        self.assertTrue(channel.closing)
+        self.assertFalse(channel.closed)
+        self.assertRaises(ValueError, channel.send, 3)
+
+        self.assertEqual(list(channel), [1, 2])
+        self.assertTrue(channel.closed)
+
+    def test_queued_items_released_with_channel(self):
+        class Data(object):
+            pass
+
+        value = Data()
+        original_refcount = sys.getrefcount(value)
+
+        channel = scheduler.QueueChannel()
+        channel.send(value)
+        channel.send_exception(ValueError, value)
+        self.assertGreater(sys.getrefcount(value), original_refcount)
+
+        del channel
+        self.assertEqual(sys.getrefcount(value), original_refcount)
+
+    def test_send_from_other_thread(self):
+        import threading
+
+        channel = scheduler.QueueChannel()
+
+        def thread_func():
+            for i in range(1000):
+                channel.send(i)
+
+        threads = [threading.Thread(target=thread_func) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(channel), 4000)
+        self.assertEqual(sorted(channel.receive() for _ in range(4000)), sorted(list(range(1000)) * 4))
+
+    def test_send_many_and_receive_many(self):
+        channel = scheduler.QueueChannel()
+        channel.send_many(range(10))
+        channel.send_sequence(range(10, 12))
+
+        self.assertEqual(channel.balance, 12)
+        self.assertEqual(channel.receive_many(5), [0, 1, 2, 3, 4])
+        self.assertEqual(channel.receive_many(100), list(range(5, 12)))
+        self.assertEqual(channel.balance, 0)
+
+    def test_subclass(self):
+        class DerivedQueueChannel(scheduler.QueueChannel):
+            pass
+
+        channel = DerivedQueueChannel()
+        self.assertIsInstance(channel, scheduler.channel)
+        channel.send(1)
+        self.assertEqual(len(channel), 1)
+        self.assertEqual(channel.receive(), 1)
@@ -1,5 +1,17 @@
 import unittest
 import contextlib
+import gc
+import json
+import os
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import weakref
 import test_utils
 import scheduler
 
@@ -380,6 +392,46 @@ class TestSchedule(test_utils.SchedulerTestCaseBase):
         self.assertEqual(callback2, scheduler.set_schedule_callback(None))
         self.assertEqual(scheduler.get_schedule_callback(),None)
 
+    def test_set_schedule_callback_reference_count(self):
+
+        def callback(previousTasklet, nextTasklet):
+            pass
+
+        before = sys.getrefcount(callback)
+
+        scheduler.set_schedule_callback(callback)
+        self.assertEqual(sys.getrefcount(callback), before + 1)
+
+        previous = scheduler.set_schedule_callback(None)
+        self.assertIs(previous, callback)
+        del previous
+
+        self.assertEqual(sys.getrefcount(callback), before)
+
+    def test_schedule_callback_bound_method_result_released(self):
+        result = object()
+
+        class Recorder(object):
+            def __init__(self):
+                self.calls = []
+
+            def callback(self, previousTasklet, nextTasklet):
+                self.calls.append((previousTasklet, nextTasklet))
+                return result
+
+        recorder = Recorder()
+        before = sys.getrefcount(result)
+
+        scheduler.set_schedule_callback(recorder.callback)
+        try:
+            t = scheduler.tasklet(lambda: None)()
+            scheduler.run()
+        finally:
+            scheduler.set_schedule_callback(None)
+
+        self.assertEqual(recorder.calls[0], (scheduler.getmain(), t))
+        self.assertEqual(sys.getrefcount(result), before)
+
 
     def test_schedule_callback_basic(self):
         callbackOutput = []
@@ -695,3 +747,1510 @@ class TestSwitchTrap(test_utils.SchedulerTestCaseBase):
         with self.assertRaises(RuntimeError):
             scheduler.run()
 
+
+
+@contextlib.contextmanager
+def priority_aging_threshold(threshold):
+    original_threshold = scheduler.get_priority_aging_threshold()
+    scheduler.set_priority_aging_threshold(threshold)
+    try:
+        yield
+    finally:
+        scheduler.set_priority_aging_threshold(original_threshold)
+
+
+class TestPriorityBase(object):
+
+    def create_tasklet(self, completed, name, priority):
+        def tasklet_callable():
+            completed.append(name)
+
+        t = scheduler.tasklet(tasklet_callable)
+        t.priority = priority
+        return t()
+
+    def test_default_priority(self):
+        t = scheduler.tasklet(lambda: None)
+        self.assertEqual(t.priority, 0)
+
+    def test_invalid_priority(self):
+        t = scheduler.tasklet(lambda: None)
+        with self.assertRaises(ValueError):
+            t.priority = -1
+        with self.assertRaises(ValueError):
+            t.priority = 4
+        with self.assertRaises(TypeError):
+            t.priority = "high"
+        self.assertEqual(t.priority, 0)
+
+    def test_higher_priority_runs_first(self):
+        completed = []
+
+        self.create_tasklet(completed, "low1", 0)
+        self.create_tasklet(completed, "high1", 3)
+        self.create_tasklet(completed, "low2", 0)
+        self.create_tasklet(completed, "mid1", 1)
+        self.create_tasklet(completed, "high2", 3)
+        self.create_tasklet(completed, "mid2", 1)
+
+        self.assertEqual(self.getruncount(), 7)
+
+        self.run_scheduler()
+
+        self.assertEqual(self.getruncount(), 1)
+        self.assertEqual(completed, ["high1", "high2", "mid1", "mid2", "low1", "low2"])
+
+    def test_priority_inserted_while_running(self):
+        completed = []
+
+        def spawn_high_priority():
+            completed.append("spawner")
+            self.create_tasklet(completed, "high", 2)
+
+        self.create_tasklet(completed, "low1", 0)
+        scheduler.tasklet(spawn_high_priority)()
+        self.create_tasklet(completed, "low2", 0)
+        self.create_tasklet(completed, "low3", 0)
+
+        self.run_scheduler()
+
+        self.assertEqual(self.getruncount(), 1)
+        self.assertEqual(completed, ["low1", "spawner", "high", "low2", "low3"])
+
+    def test_rescheduled_tasklet_keeps_priority(self):
+        completed = []
+
+        def high_priority_scheduling():
+            completed.append("high_start")
+            scheduler.schedule()
+            completed.append("high_end")
+
+        t = scheduler.tasklet(high_priority_scheduling)
+        t.priority = 1
+        self.create_tasklet(completed, "low1", 0)
+        t()
+        self.create_tasklet(completed, "low2", 0)
+
+        self.run_scheduler()
+
+        self.assertEqual(self.getruncount(), 1)
+        self.assertEqual(completed, ["high_start", "high_end", "low1", "low2"])
+
+    def test_removed_tasklets_keep_run_count(self):
+        completed = []
+
+        low = self.create_tasklet(completed, "low", 0)
+        high = self.create_tasklet(completed, "high", 2)
+        mid = self.create_tasklet(completed, "mid", 1)
+
+        self.assertEqual(self.getruncount(), 4)
+
+        high.remove()
+        self.assertEqual(self.getruncount(), 3)
+
+        low.remove()
+        self.assertEqual(self.getruncount(), 2)
+
+        low.insert()
+        high.insert()
+        self.assertEqual(self.getruncount(), 4)
+
+        self.run_scheduler()
+
+        self.assertEqual(completed, ["high", "mid", "low"])
+
+    def test_aging_prevents_starvation(self):
+        completed = []
+
+        with priority_aging_threshold(2):
+            self.create_tasklet(completed, "low", 0)
+            self.create_tasklet(completed, "high1", 1)
+            self.create_tasklet(completed, "high2", 1)
+            # The low priority level has now been overtaken twice and is promoted
+            self.create_tasklet(completed, "high3", 1)
+
+            self.run_scheduler()
+
+        self.assertEqual(self.getruncount(), 1)
+        self.assertEqual(completed, ["high1", "high2", "low", "high3"])
+
+    def test_aging_disabled(self):
+        completed = []
+
+        with priority_aging_threshold(0):
+            self.create_tasklet(completed, "low", 0)
+            for i in range(100):
+                self.create_tasklet(completed, i, 1)
+
+            self.run_scheduler()
+
+        self.assertEqual(completed, list(range(100)) + ["low"])
+
+    def test_invalid_aging_threshold(self):
+        with self.assertRaises(ValueError):
+            scheduler.set_priority_aging_threshold(-1)
+
+
+class TestPriorityWithoutLimitWithNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                                 TestPriorityBase,
+                                                 test_utils.TestWithoutLimit):
+    pass
+
+class TestPriorityWithLimitWithNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                              TestPriorityBase,
+                                              test_utils.TestWithLimit):
+    pass
+
+class TestPriorityWithoutLimitWithoutNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                                    TestPriorityBase,
+                                                    test_utils.TestNoNestedTasklets,
+                                                    test_utils.TestWithoutLimit):
+    pass
+
+
+class TestDeadlineBase(object):
+
+    # Large enough that the whole queue is always processed
+    TIMEOUT = 10 * 1000 * 1000 * 1000
+
+    def create_tasklet(self, completed, name, deadline, priority=0):
+        def tasklet_callable():
+            completed.append(name)
+
+        t = scheduler.tasklet(tasklet_callable)
+        t.deadline_ns = deadline
+        t.priority = priority
+        return t()
+
+    def test_default_deadline(self):
+        t = scheduler.tasklet(lambda: None)
+        self.assertEqual(t.deadline_ns, 0)
+
+    def test_invalid_deadline(self):
+        t = scheduler.tasklet(lambda: None)
+        with self.assertRaises(ValueError):
+            t.deadline_ns = -1
+        with self.assertRaises(TypeError):
+            t.deadline_ns = 1.5
+        self.assertEqual(t.deadline_ns, 0)
+
+    def test_run_for_time_ignores_deadlines_by_default(self):
+        completed = []
+        now = time.monotonic_ns()
+
+        self.create_tasklet(completed, "late", now + 3000000000)
+        self.create_tasklet(completed, "early", now + 1000000000)
+
+        scheduler.run_for_time(self.TIMEOUT)
+
+        self.assertEqual(completed, ["late", "early"])
+
+    def test_earliest_deadline_first(self):
+        completed = []
+        now = time.monotonic_ns()
+
+        self.create_tasklet(completed, "none1", 0)
+        self.create_tasklet(completed, "late", now + 3000000000)
+        self.create_tasklet(completed, "early", now + 1000000000)
+        self.create_tasklet(completed, "none2", 0)
+        self.create_tasklet(completed, "middle", now + 2000000000)
+
+        scheduler.run_for_time(self.TIMEOUT, earliest_deadline_first=True)
+
+        self.assertEqual(self.getruncount(), 1)
+        self.assertEqual(completed, ["early", "middle", "late", "none1", "none2"])
+
+    def test_earliest_deadline_first_within_priority(self):
+        completed = []
+        now = time.monotonic_ns()
+
+        self.create_tasklet(completed, "low_early", now + 1000000000, 0)
+        self.create_tasklet(completed, "high_late", now + 3000000000, 1)
+        self.create_tasklet(completed, "high_early", now + 2000000000, 1)
+
+        scheduler.run_for_time(self.TIMEOUT, earliest_deadline_first=True)
+
+        self.assertEqual(completed, ["high_early", "high_late", "low_early"])
+
+        # Priority levels must still be intact after the reorder
+        self.create_tasklet(completed, "low", 0, 0)
+        self.create_tasklet(completed, "high", 0, 1)
+
+        scheduler.run()
+
+        self.assertEqual(completed[3:], ["high", "low"])
+
+    def test_missed_deadlines(self):
+        completed = []
+        now = time.monotonic_ns()
+
+        # A deadline of 1 has always passed
+        self.create_tasklet(completed, "missed1", 1)
+        self.create_tasklet(completed, "met", now + 60000000000)
+        self.create_tasklet(completed, "missed2", 1)
+        self.create_tasklet(completed, "none", 0)
+
+        scheduler.run_for_time(self.TIMEOUT, earliest_deadline_first=True)
+
+        self.assertEqual(len(completed), 4)
+        self.assertEqual(scheduler.get_tasklets_missed_deadline_last_run_with_timeout(), 2)
+
+        scheduler.run_for_time(self.TIMEOUT)
+
+        self.assertEqual(scheduler.get_tasklets_missed_deadline_last_run_with_timeout(), 0)
+
+
+class TestDeadlineWithNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                     TestDeadlineBase):
+    pass
+
+class TestDeadlineWithoutNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                        TestDeadlineBase,
+                                        test_utils.TestNoNestedTasklets):
+    pass
+
+
+class TestSleepBase(object):
+
+    def test_sleep(self):
+        completed = []
+
+        def sleeper():
+            start = time.monotonic_ns()
+            scheduler.sleep(0.01)
+            completed.append(time.monotonic_ns() - start)
+
+        scheduler.tasklet(sleeper)()
+
+        self.run_scheduler()
+
+        # Sleeping tasklets are not in the runnables queue
+        self.assertEqual(completed, [])
+        self.assertEqual(self.getruncount(), 1)
+
+        self.run_until(lambda: completed)
+
+        self.assertGreaterEqual(completed[0], 10000000)
+
+    def test_sleep_zero(self):
+        completed = []
+
+        def sleeper():
+            scheduler.sleep(0)
+            completed.append(True)
+
+        scheduler.tasklet(sleeper)()
+
+        self.run_until(lambda: completed)
+
+    def test_sleepers_wake_in_order(self):
+        completed = []
+
+        def sleeper(seconds):
+            scheduler.sleep(seconds)
+            completed.append(seconds)
+
+        lengths = [0.03, 0.01, 0.04, 0.02, 0.0]
+        for seconds in lengths:
+            scheduler.tasklet(sleeper)(seconds)
+
+        self.run_until(lambda: len(completed) == len(lengths))
+
+        self.assertEqual(completed, sorted(lengths))
+
+    def test_sleep_unrepresentable(self):
+        completed = []
+
+        def sleeper(seconds):
+            scheduler.sleep(seconds)
+            completed.append(seconds)
+
+        tasklets = [scheduler.tasklet(sleeper)(seconds) for seconds in (float('inf'), 1e12, 1e300)]
+        self.run_scheduler()
+
+        time.sleep(0.002)
+        self.run_scheduler()
+
+        # Too long to represent so never woken
+        self.assertEqual(completed, [])
+
+        for t in tasklets:
+            t.kill()
+
+    def test_sleep_invalid(self):
+        self.assertRaises(ValueError, scheduler.sleep, -1)
+        self.assertRaises(ValueError, scheduler.sleep, float('nan'))
+        self.assertRaises(TypeError, scheduler.sleep, "1")
+
+    def test_sleep_on_main(self):
+        self.assertRaises(RuntimeError, scheduler.sleep, 0)
+
+    def test_kill_sleeping_tasklet(self):
+        completed = []
+
+        def sleeper():
+            try:
+                scheduler.sleep(0)
+                completed.append("woken")
+            except scheduler.TaskletExit:
+                completed.append("killed")
+                raise
+
+        t = scheduler.tasklet(sleeper)()
+        self.run_scheduler()
+
+        t.kill()
+
+        self.assertEqual(completed, ["killed"])
+
+        # The timer expiring later must not resurrect the tasklet
+        time.sleep(0.002)
+        self.run_scheduler()
+
+        self.assertEqual(completed, ["killed"])
+        self.assertFalse(t.alive)
+
+    def test_killed_sleeper_released(self):
+        def sleeper():
+            scheduler.sleep(60)
+
+        t = scheduler.tasklet(sleeper)()
+        self.run_scheduler()
+
+        t.kill()
+        reference = weakref.ref(t)
+        del t
+        gc.collect()
+
+        # Not held by the timer wheel until its wake time
+        self.assertIsNone(reference())
+
+    def test_insert_cancels_sleep(self):
+        completed = []
+
+        def sleeper():
+            scheduler.sleep(60)
+            completed.append(True)
+
+        t = scheduler.tasklet(sleeper)()
+        self.run_scheduler()
+
+        t.insert()
+        self.run_scheduler()
+
+        self.assertEqual(completed, [True])
+
+
+class TestSleepWithoutLimitWithNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                              TestSleepBase,
+                                              test_utils.TestWithoutLimit):
+    pass
+
+class TestSleepWithLimitWithNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                           TestSleepBase,
+                                           test_utils.TestWithLimit):
+    pass
+
+class TestSleepWithoutLimitWithoutNestedTasklets(test_utils.SchedulerTestCaseBase,
+                                                 TestSleepBase,
+                                                 test_utils.TestNoNestedTasklets,
+                                                 test_utils.TestWithoutLimit):
+    pass
+
+
+class TestTrace(test_utils.SchedulerTestCaseBase):
+
+    def setUp(self):
+        super().setUp()
+        self.schedule_manager = scheduler.get_schedule_manager()
+
+    def tearDown(self):
+        self.schedule_manager.disable_trace()
+        self.schedule_manager = None
+        super().tearDown()
+
+    def drain(self):
+        records = self.schedule_manager.drain_trace()
+        return [record[1:] for record in struct.iter_unpack(scheduler.TRACE_RECORD_FORMAT, memoryview(records))]
+
+    def test_trace_disabled_by_default(self):
+        self.assertFalse(self.schedule_manager.trace_enabled)
+        self.assertEqual(self.schedule_manager.trace_capacity, 0)
+
+        scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertEqual(len(self.schedule_manager.drain_trace()), 0)
+
+    def test_trace_capacity_rounded_to_power_of_two(self):
+        self.schedule_manager.enable_trace(1000)
+        self.assertTrue(self.schedule_manager.trace_enabled)
+        self.assertEqual(self.schedule_manager.trace_capacity, 1024)
+
+        self.schedule_manager.disable_trace()
+        self.assertFalse(self.schedule_manager.trace_enabled)
+        self.assertEqual(self.schedule_manager.trace_capacity, 0)
+
+    def test_trace_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            self.schedule_manager.enable_trace(0)
+
+    def test_trace_insert_switch_complete(self):
+        self.schedule_manager.enable_trace()
+        main_id = scheduler.getcurrent().id
+
+        t = scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertEqual(self.drain(), [
+            (scheduler.TRACE_INSERT, 0, t.id, 0),
+            (scheduler.TRACE_SWITCH, 0, main_id, t.id),
+            (scheduler.TRACE_COMPLETE, 0, t.id, 0),
+            (scheduler.TRACE_SWITCH, 0, t.id, main_id),
+        ])
+
+    def test_trace_timestamps_monotonic(self):
+        self.schedule_manager.enable_trace()
+
+        for _ in range(10):
+            scheduler.tasklet(scheduler.schedule)()
+        scheduler.run()
+
+        records = self.schedule_manager.drain_trace()
+        timestamps = [record[0] for record in struct.iter_unpack(scheduler.TRACE_RECORD_FORMAT, memoryview(records))]
+
+        self.assertGreater(len(timestamps), 0)
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_trace_channel_operations(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        def sender():
+            channel.send(None)
+
+        receiving_tasklet = scheduler.tasklet(receiver)()
+        sending_tasklet = scheduler.tasklet(sender)()
+
+        self.schedule_manager.enable_trace()
+        scheduler.run()
+
+        records = self.drain()
+
+        self.assertIn((scheduler.TRACE_CHANNEL_RECEIVE, scheduler.TRACE_FLAG_WILL_BLOCK, receiving_tasklet.id, channel.id), records)
+        self.assertIn((scheduler.TRACE_CHANNEL_BLOCK, 0, receiving_tasklet.id, channel.id), records)
+        self.assertIn((scheduler.TRACE_CHANNEL_SEND, 0, sending_tasklet.id, channel.id), records)
+        self.assertIn((scheduler.TRACE_CHANNEL_UNBLOCK, 0, receiving_tasklet.id, channel.id), records)
+
+        block = records.index((scheduler.TRACE_CHANNEL_BLOCK, 0, receiving_tasklet.id, channel.id))
+        unblock = records.index((scheduler.TRACE_CHANNEL_UNBLOCK, 0, receiving_tasklet.id, channel.id))
+        self.assertLess(block, unblock)
+
+    def test_trace_kill(self):
+        channel = scheduler.channel()
+        t = scheduler.tasklet(channel.receive)()
+        scheduler.run()
+
+        self.schedule_manager.enable_trace()
+        t.kill()
+
+        self.assertIn((scheduler.TRACE_KILL, 0, t.id, 0), self.drain())
+
+    def test_trace_overflow_counts_dropped(self):
+        self.schedule_manager.enable_trace(4)
+
+        for _ in range(4):
+            scheduler.tasklet(lambda: None)()
+
+        records = self.schedule_manager.drain_trace()
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records.dropped, 0)
+
+        tasklets = [scheduler.tasklet(lambda: None)() for _ in range(6)]
+
+        records = self.schedule_manager.drain_trace()
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records.dropped, 2)
+
+        # The oldest records are the ones overwritten
+        self.assertEqual([record[3] for record in struct.iter_unpack(scheduler.TRACE_RECORD_FORMAT, memoryview(records))],
+                         [t.id for t in tasklets[2:]])
+
+        scheduler.run()
+
+    def test_trace_drain_empties_buffer(self):
+        self.schedule_manager.enable_trace()
+
+        scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertGreater(len(self.schedule_manager.drain_trace()), 0)
+        self.assertEqual(len(self.schedule_manager.drain_trace()), 0)
+
+    def test_trace_records_read_only(self):
+        self.schedule_manager.enable_trace()
+        scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        view = memoryview(self.schedule_manager.drain_trace())
+        self.assertTrue(view.readonly)
+        self.assertEqual(view.format, scheduler.TRACE_RECORD_FORMAT)
+        self.assertEqual(view.itemsize, struct.calcsize(scheduler.TRACE_RECORD_FORMAT))
+
+    def test_ids_unique(self):
+        tasklets = [scheduler.tasklet(lambda: None) for _ in range(10)]
+        channels = [scheduler.channel() for _ in range(10)]
+
+        self.assertEqual(len(set(t.id for t in tasklets)), 10)
+        self.assertEqual(len(set(c.id for c in channels)), 10)
+
+
+class TestTraceToFile(test_utils.SchedulerTestCaseBase):
+
+    def setUp(self):
+        super().setUp()
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+
+    def tearDown(self):
+        scheduler.stop_trace_to_file()
+        os.remove(self.path)
+        super().tearDown()
+
+    def capture(self, function):
+        scheduler.trace_to_file(self.path)
+        try:
+            function()
+        finally:
+            scheduler.stop_trace_to_file()
+
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_trace_to_file_running(self):
+        self.assertFalse(scheduler.is_tracing_to_file())
+
+        scheduler.trace_to_file(self.path)
+        try:
+            self.assertTrue(scheduler.is_tracing_to_file())
+
+            with self.assertRaises(RuntimeError):
+                scheduler.trace_to_file(self.path)
+        finally:
+            scheduler.stop_trace_to_file()
+
+        self.assertFalse(scheduler.is_tracing_to_file())
+
+        # Stopping again does nothing
+        scheduler.stop_trace_to_file()
+
+    def test_trace_to_file_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            scheduler.trace_to_file(self.path, 0)
+
+        with self.assertRaises(OSError):
+            scheduler.trace_to_file(os.path.join(self.path, "not_a_directory", "trace.json"))
+
+        self.assertFalse(scheduler.is_tracing_to_file())
+
+    def test_trace_to_file_slices_named(self):
+        def worker():
+            scheduler.schedule()
+
+        def run():
+            t = scheduler.tasklet(worker)()
+            t.context = "named context"
+            scheduler.tasklet(worker)()
+            scheduler.run()
+
+        events = self.capture(run)
+
+        slices = [event for event in events if event["ph"] == "X"]
+        names = set(event["name"] for event in slices)
+
+        self.assertIn("named context", names)
+        self.assertIn("worker", names)
+        self.assertIn("main", names)
+
+        for event in slices:
+            self.assertGreaterEqual(event["dur"], 0)
+
+        # Slices on a track never overlap
+        ordered = sorted(slices, key=lambda event: event["ts"])
+        for previous, following in zip(ordered, ordered[1:]):
+            self.assertLessEqual(previous["ts"] + previous["dur"], following["ts"] + 0.001)
+
+    def test_trace_to_file_leaves_user_trace_enabled(self):
+        schedule_manager = scheduler.get_schedule_manager()
+
+        self.capture(lambda: None)
+
+        self.assertFalse(schedule_manager.trace_enabled)
+
+        schedule_manager.enable_trace()
+        try:
+            self.capture(lambda: None)
+            self.assertTrue(schedule_manager.trace_enabled)
+        finally:
+            schedule_manager.disable_trace()
+
+    def test_trace_to_file_channel_flows(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        def sender():
+            channel.send(None)
+
+        def run():
+            scheduler.tasklet(receiver)()
+            scheduler.tasklet(sender)()
+            scheduler.run()
+
+        events = self.capture(run)
+
+        starts = [event for event in events if event["ph"] == "s"]
+        ends = [event for event in events if event["ph"] == "f"]
+
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(len(ends), 1)
+        self.assertEqual(starts[0]["id"], ends[0]["id"])
+
+        slices = [event for event in events if event["ph"] == "X"]
+
+        def slice_at(event):
+            return [s for s in slices if s["tid"] == event["tid"] and s["ts"] <= event["ts"] <= s["ts"] + s["dur"]]
+
+        # The flow starts in the sender and ends where the receiver is switched back in
+        self.assertIn("sender", [s["name"] for s in slice_at(starts[0])])
+        self.assertIn("receiver", [s["name"] for s in slices if s["tid"] == ends[0]["tid"] and s["ts"] == ends[0]["ts"]])
+
+    def test_trace_to_file_track_per_thread(self):
+        def run():
+            def thread_function():
+                scheduler.tasklet(lambda: None)()
+                scheduler.run()
+
+            thread = threading.Thread(target=thread_function)
+            thread.start()
+            thread.join()
+
+            scheduler.tasklet(lambda: None)()
+            scheduler.run()
+
+        events = self.capture(run)
+
+        thread_names = [event for event in events if event["ph"] == "M" and event["name"] == "thread_name"]
+
+        self.assertEqual(len(thread_names), 2)
+        self.assertEqual(set(event["tid"] for event in thread_names),
+                         set(event["tid"] for event in events if event["ph"] == "X"))
+
+
+class TestScheduleManagerStats(test_utils.SchedulerTestCaseBase):
+
+    def setUp(self):
+        super().setUp()
+        self.schedule_manager = scheduler.get_schedule_manager()
+        self.schedule_manager.reset_stats()
+
+    def tearDown(self):
+        self.schedule_manager = None
+        super().tearDown()
+
+    def test_stats_reset(self):
+        stats = self.schedule_manager.get_stats()
+
+        self.assertEqual(stats["thread_id"], threading.get_ident())
+        for key in ("switches", "completions", "inserts", "blocks", "kills", "run_calls", "queue_length", "queue_high_water_mark"):
+            self.assertEqual(stats[key], 0, key)
+        self.assertEqual(stats["run_time"], 0.0)
+
+    def test_stats_count_activity(self):
+        channel = scheduler.channel()
+
+        scheduler.tasklet(channel.receive)()
+        scheduler.tasklet(channel.send)(None)
+        scheduler.tasklet(lambda: None)()
+
+        self.assertEqual(self.schedule_manager.get_stats()["queue_length"], 3)
+
+        scheduler.run()
+
+        stats = self.schedule_manager.get_stats()
+        self.assertEqual(stats["completions"], 3)
+        self.assertEqual(stats["blocks"], 1)
+        # The woken receiver is inserted again
+        self.assertGreaterEqual(stats["inserts"], 4)
+        self.assertEqual(stats["queue_high_water_mark"], 3)
+        self.assertEqual(stats["queue_length"], 0)
+        self.assertEqual(stats["run_calls"], 1)
+        self.assertGreater(stats["run_time"], 0.0)
+        self.assertGreaterEqual(stats["switches"], 8)
+
+    def test_stats_count_kills(self):
+        channel = scheduler.channel()
+        t = scheduler.tasklet(channel.receive)()
+        scheduler.run()
+
+        t.kill()
+
+        self.assertEqual(self.schedule_manager.get_stats()["kills"], 1)
+
+    def test_stats_nested_runs_not_counted(self):
+        def worker():
+            scheduler.schedule()
+
+        for _ in range(5):
+            scheduler.tasklet(worker)()
+
+        scheduler.run()
+        scheduler.run()
+
+        self.assertEqual(self.schedule_manager.get_stats()["run_calls"], 2)
+
+    def test_get_all_schedule_manager_stats(self):
+        started = threading.Event()
+        finish = threading.Event()
+
+        def thread_function():
+            scheduler.tasklet(lambda: None)()
+            scheduler.run()
+            started.set()
+            finish.wait()
+
+        thread = threading.Thread(target=thread_function)
+        thread.start()
+        try:
+            started.wait()
+
+            all_stats = {stats["thread_id"]: stats for stats in scheduler.get_all_schedule_manager_stats()}
+
+            self.assertIn(threading.get_ident(), all_stats)
+            self.assertIn(thread.ident, all_stats)
+            self.assertEqual(all_stats[thread.ident]["completions"], 1)
+            self.assertEqual(all_stats[thread.ident]["run_calls"], 1)
+        finally:
+            finish.set()
+            thread.join()
+
+    def test_last_run_with_timeout_per_thread(self):
+        def late():
+            pass
+
+        t = scheduler.tasklet(late)
+        # A deadline of 1 has always passed
+        t.deadline_ns = 1
+        t()
+        scheduler.run_for_time(1000000000)
+        self.assertEqual(scheduler.get_tasklets_missed_deadline_last_run_with_timeout(), 1)
+
+        def thread_function():
+            scheduler.run_for_time(1000000)
+
+        thread = threading.Thread(target=thread_function)
+        thread.start()
+        thread.join()
+
+        # Another thread's run does not reset this thread's count
+        self.assertEqual(scheduler.get_tasklets_missed_deadline_last_run_with_timeout(), 1)
+
+
+class TestQueueWaitStats(test_utils.SchedulerTestCaseBase):
+
+    def setUp(self):
+        super().setUp()
+        self.schedule_manager = scheduler.get_schedule_manager()
+        self.schedule_manager.reset_queue_wait_stats()
+
+    def tearDown(self):
+        self.schedule_manager = None
+        super().tearDown()
+
+    def test_queue_wait_stats_empty(self):
+        self.assertEqual(self.schedule_manager.get_queue_wait_stats(), {
+            "count": 0,
+            "min_ns": 0,
+            "max_ns": 0,
+            "mean_ns": 0.0,
+            "p50_ns": 0,
+            "p99_ns": 0,
+            "p999_ns": 0,
+        })
+        self.assertEqual(self.schedule_manager.queue_wait_percentile(50), 0)
+
+    def test_queue_wait_recorded_per_switch_from_queue(self):
+        for _ in range(10):
+            scheduler.tasklet(lambda: None)()
+
+        scheduler.run()
+
+        self.assertEqual(self.schedule_manager.get_queue_wait_stats()["count"], 10)
+
+        def yielding():
+            scheduler.schedule()
+
+        for _ in range(10):
+            scheduler.tasklet(yielding)()
+
+        scheduler.run()
+
+        # Each tasklet waits once after being created and once after yielding
+        self.assertEqual(self.schedule_manager.get_queue_wait_stats()["count"], 30)
+
+    def test_queue_wait_measures_time_behind_slow_tasklet(self):
+        def slow():
+            time.sleep(0.02)
+
+        scheduler.tasklet(slow)()
+        scheduler.tasklet(lambda: None)()
+
+        scheduler.run()
+
+        stats = self.schedule_manager.get_queue_wait_stats()
+
+        self.assertEqual(stats["count"], 2)
+        self.assertGreaterEqual(stats["max_ns"], 20000000)
+        self.assertLess(stats["min_ns"], 20000000)
+        self.assertLessEqual(stats["min_ns"], stats["p50_ns"])
+        self.assertLessEqual(stats["p50_ns"], stats["p99_ns"])
+        self.assertLessEqual(stats["p99_ns"], stats["p999_ns"])
+        self.assertLessEqual(stats["p999_ns"], stats["max_ns"])
+        self.assertEqual(self.schedule_manager.queue_wait_percentile(100), stats["max_ns"])
+
+        # The lower bucket holds the min, bucket bounds are within ~3% of the value
+        self.assertLessEqual(self.schedule_manager.queue_wait_percentile(0), stats["min_ns"] * 1.04)
+
+    def test_queue_wait_reset(self):
+        scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertEqual(self.schedule_manager.get_queue_wait_stats()["count"], 1)
+
+        self.schedule_manager.reset_queue_wait_stats()
+
+        self.assertEqual(self.schedule_manager.get_queue_wait_stats()["count"], 0)
+
+    def test_queue_wait_percentile_invalid(self):
+        with self.assertRaises(ValueError):
+            self.schedule_manager.queue_wait_percentile(100.1)
+
+        with self.assertRaises(ValueError):
+            self.schedule_manager.queue_wait_percentile(-1)
+
+
+class TestTaskletCensus(test_utils.SchedulerTestCaseBase):
+
+    def test_census_by_callsite(self):
+        channel = scheduler.channel()
+
+        def blocker():
+            channel.receive()
+
+        def sleeper():
+            scheduler.sleep(100)
+
+        def worker():
+            pass
+
+        blocked = [scheduler.tasklet(blocker)() for _ in range(3)]
+        sleeping = [scheduler.tasklet(sleeper)() for _ in range(2)]
+        finished = [scheduler.tasklet(worker)() for _ in range(2)]
+        scheduler.run()
+        runnable = [scheduler.tasklet(worker)() for _ in range(4)]
+
+        census = scheduler.tasklet_census()
+
+        self.assertEqual(census[(__file__, blocker.__code__.co_firstlineno, "blocker")],
+                         {"runnable": 0, "blocked": 3, "paused": 0, "dead": 0})
+        self.assertEqual(census[(__file__, sleeper.__code__.co_firstlineno, "sleeper")],
+                         {"runnable": 0, "blocked": 0, "paused": 2, "dead": 0})
+        self.assertEqual(census[(__file__, worker.__code__.co_firstlineno, "worker")],
+                         {"runnable": 4, "blocked": 0, "paused": 0, "dead": 2})
+
+        del finished
+        self.assertEqual(scheduler.tasklet_census()[(__file__, worker.__code__.co_firstlineno, "worker")]["dead"], 0)
+
+        for t in blocked + sleeping + runnable:
+            t.kill()
+
+    def test_census_by_context(self):
+        def worker():
+            pass
+
+        tasklets = [scheduler.tasklet(worker)() for _ in range(3)]
+        # Equal contexts held in different string objects are one group
+        tasklets[0].context = "".join(["census", "_context"])
+        tasklets[1].context = "".join(["census_", "context"])
+
+        census = scheduler.tasklet_census(group_by="context")
+
+        self.assertEqual(census["census_context"], {"runnable": 2, "blocked": 0, "paused": 0, "dead": 0})
+        self.assertGreaterEqual(census[""]["runnable"], 1)
+
+        scheduler.run()
+
+    def test_census_by_channel(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+
+        def receiver(channel):
+            channel.receive()
+
+        tasklets = [scheduler.tasklet(receiver)(first) for _ in range(2)]
+        tasklets.append(scheduler.tasklet(receiver)(second))
+        scheduler.run()
+
+        census = scheduler.tasklet_census("channel")
+
+        self.assertEqual(census[first]["blocked"], 2)
+        self.assertEqual(census[second]["blocked"], 1)
+        self.assertNotIn(None, [k for k, v in census.items() if v["blocked"]])
+
+        for t in tasklets:
+            t.kill()
+
+    def test_census_invalid_group(self):
+        with self.assertRaises(ValueError):
+            scheduler.tasklet_census("thread")
+
+
+class TestSnapshot(test_utils.SchedulerTestCaseBase):
+
+    def test_snapshot_columns(self):
+        channel = scheduler.channel()
+
+        def blocker():
+            channel.receive()
+
+        def worker():
+            pass
+
+        blocked = [scheduler.tasklet(blocker)() for _ in range(2)]
+        finished = scheduler.tasklet(worker)()
+        scheduler.run()
+        runnable = scheduler.tasklet(worker)()
+
+        snapshot = scheduler.snapshot()
+        rows = {tasklet_id: i for i, tasklet_id in enumerate(snapshot["id"])}
+
+        columns = [k for k in snapshot if k != "callsites"]
+        for column in columns:
+            self.assertIsInstance(snapshot[column], memoryview)
+            self.assertEqual(len(snapshot[column]), len(rows))
+        self.assertEqual(snapshot["id"].format, "Q")
+        self.assertEqual(snapshot["flags"].format, "B")
+        self.assertEqual(snapshot["run_time"].format, "d")
+
+        def row(tasklet, column):
+            return snapshot[column][rows[tasklet.id]]
+
+        for t in blocked:
+            self.assertEqual(row(t, "flags"), scheduler.SNAPSHOT_FLAG_ALIVE | scheduler.SNAPSHOT_FLAG_BLOCKED)
+            self.assertEqual(row(t, "times_switched_to"), 1)
+            self.assertEqual(snapshot["callsites"][row(t, "callsite")], "blocker ({}:{})".format(__file__, blocker.__code__.co_firstlineno))
+
+        self.assertEqual(row(finished, "flags"), 0)
+        self.assertEqual(row(finished, "wall_time_ns"), finished.wall_time_ns)
+        self.assertEqual(row(finished, "end_time"), finished.endTime)
+        self.assertEqual(row(runnable, "flags"), scheduler.SNAPSHOT_FLAG_ALIVE | scheduler.SNAPSHOT_FLAG_SCHEDULED)
+        self.assertEqual(row(runnable, "thread_id"), runnable.thread_id)
+        self.assertEqual(row(runnable, "callsite"), row(finished, "callsite"))
+
+        for t in blocked:
+            t.kill()
+        scheduler.run()
+
+    def test_snapshot_is_read_only(self):
+        scheduler.tasklet(lambda: None)()
+
+        snapshot = scheduler.snapshot()
+
+        self.assertTrue(snapshot["id"].readonly)
+
+        scheduler.run()
+
+
+class TestFindLongBlocked(test_utils.SchedulerTestCaseBase):
+
+    def test_blocked_since(self):
+        channel = scheduler.channel()
+
+        def receiver():
+            channel.receive()
+
+        t = scheduler.tasklet(receiver)()
+        self.assertEqual(t.blocked_since_ns, 0)
+
+        before = time.monotonic_ns()
+        scheduler.run()
+        self.assertGreaterEqual(t.blocked_since_ns, before)
+        self.assertLessEqual(t.blocked_since_ns, time.monotonic_ns())
+
+        channel.send(None)
+        self.assertEqual(t.blocked_since_ns, 0)
+
+    def test_find_long_blocked_by_channel(self):
+        old = scheduler.channel()
+        new = scheduler.channel()
+
+        def receiver(channel):
+            channel.receive()
+
+        tasklets = [scheduler.tasklet(receiver)(old) for _ in range(3)]
+        scheduler.run()
+        time.sleep(0.02)
+        tasklets += [scheduler.tasklet(receiver)(new) for _ in range(2)]
+        scheduler.run()
+
+        long_blocked = scheduler.find_long_blocked(10000000)
+
+        self.assertEqual(list(long_blocked), [old])
+        self.assertEqual(long_blocked[old]["count"], 3)
+        self.assertGreaterEqual(long_blocked[old]["longest_ns"], 20000000)
+        self.assertIs(long_blocked[old]["oldest"], tasklets[0])
+
+        everything = scheduler.find_long_blocked(0)
+        self.assertEqual(everything[new]["count"], 2)
+
+        for t in tasklets:
+            t.kill()
+
+        self.assertEqual(scheduler.find_long_blocked(0), {})
+
+    def test_find_long_blocked_by_callsite(self):
+        first = scheduler.channel()
+        second = scheduler.channel()
+
+        def receiver(channel):
+            channel.receive()
+
+        tasklets = [scheduler.tasklet(receiver)(first), scheduler.tasklet(receiver)(second)]
+        scheduler.run()
+
+        long_blocked = scheduler.find_long_blocked(0, group_by="callsite")
+
+        self.assertEqual(long_blocked[(__file__, receiver.__code__.co_firstlineno, "receiver")]["count"], 2)
+
+        for t in tasklets:
+            t.kill()
+
+    def test_find_long_blocked_invalid(self):
+        with self.assertRaises(ValueError):
+            scheduler.find_long_blocked(-1)
+
+        with self.assertRaises(ValueError):
+            scheduler.find_long_blocked(0, "context")
+
+
+class TestStallWatchdog(test_utils.TestStopsProfiler, test_utils.SchedulerTestCaseBase):
+
+    stop_profiler = staticmethod(lambda: scheduler.stop_stall_watchdog())
+    reset_profiler = staticmethod(lambda: scheduler.clear_stall_log())
+
+    def test_records_stalled_tasklet(self):
+        scheduler.start_stall_watchdog(20000000)
+        self.assertTrue(scheduler.is_stall_watchdog_running())
+
+        def stalling():
+            test_utils.spin(0.15)
+
+        t = scheduler.tasklet(stalling)()
+        t.context = "stalling_context"
+        scheduler.run()
+
+        log = scheduler.get_stall_log()
+
+        self.assertEqual(len(log), 1)
+        record = log[0]
+        self.assertEqual(record["tasklet_id"], t.id)
+        self.assertEqual(record["thread_id"], t.thread_id)
+        self.assertEqual(record["method_name"], "stalling")
+        self.assertEqual(record["file_name"], __file__)
+        self.assertEqual(record["line_number"], stalling.__code__.co_firstlineno)
+        self.assertEqual(record["context"], "stalling_context")
+        self.assertGreaterEqual(record["held_ns"], 20000000)
+        self.assertTrue(any("in stalling" in line for line in record["stack"]))
+
+    def test_switching_tasklets_are_not_recorded(self):
+        scheduler.start_stall_watchdog(50000000)
+
+        def worker():
+            for _ in range(20):
+                test_utils.spin(0.005)
+                scheduler.schedule()
+
+        scheduler.tasklet(worker)()
+        scheduler.tasklet(worker)()
+        scheduler.run()
+
+        # The main tasklet holding the thread between runs is not a stall
+        test_utils.spin(0.1)
+
+        self.assertEqual(scheduler.get_stall_log(), [])
+
+    def test_log_capacity_and_stop(self):
+        scheduler.start_stall_watchdog(10000000, log_capacity=2)
+
+        tasklets = [scheduler.tasklet(test_utils.spin)(0.05) for _ in range(3)]
+        scheduler.run()
+
+        scheduler.stop_stall_watchdog()
+        self.assertFalse(scheduler.is_stall_watchdog_running())
+
+        log = scheduler.get_stall_log()
+        self.assertEqual([r["tasklet_id"] for r in log], [t.id for t in tasklets[1:]])
+
+        scheduler.clear_stall_log()
+        self.assertEqual(scheduler.get_stall_log(), [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            scheduler.start_stall_watchdog(0)
+
+        with self.assertRaises(ValueError):
+            scheduler.start_stall_watchdog(1000000, log_capacity=0)
+
+        scheduler.start_stall_watchdog(1000000)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.start_stall_watchdog(1000000)
+
+
+class TestSamplingProfiler(test_utils.TestStopsProfiler, test_utils.SchedulerTestCaseBase):
+
+    stop_profiler = staticmethod(lambda: scheduler.stop_sampling_profiler())
+    reset_profiler = staticmethod(lambda: scheduler.reset_sampling_profiler())
+
+    def test_samples_grouped_by_context(self):
+        def physics_step():
+            for _ in range(10):
+                test_utils.spin(0.01)
+                scheduler.schedule()
+
+        def ai_step():
+            for _ in range(10):
+                test_utils.spin(0.01)
+                scheduler.schedule()
+
+        physics = scheduler.tasklet(physics_step)()
+        physics.context = "physics"
+        scheduler.tasklet(ai_step)()
+
+        scheduler.start_sampling_profiler(1000000)
+        self.assertTrue(scheduler.is_sampling_profiler_running())
+        scheduler.run()
+        scheduler.stop_sampling_profiler()
+        self.assertFalse(scheduler.is_sampling_profiler_running())
+
+        lines = scheduler.get_collapsed_stacks().splitlines()
+        counts = {}
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            counts[stack] = counts.get(stack, 0) + int(count)
+
+        self.assertEqual(sum(counts.values()), scheduler.get_sample_count())
+
+        physics_stacks = [s for s in counts if s.startswith("physics;")]
+        ai_stacks = [s for s in counts if s.startswith("ai_step;")]
+        self.assertTrue(physics_stacks)
+        self.assertTrue(ai_stacks)
+        self.assertTrue(all("physics_step (" in s for s in physics_stacks))
+        self.assertTrue(all(";{} ({}:{})".format(ai_step.__qualname__, __file__, ai_step.__code__.co_firstlineno) in s for s in ai_stacks))
+
+    def test_reset(self):
+        scheduler.start_sampling_profiler(1000000)
+        test_utils.spin(0.02)
+        scheduler.stop_sampling_profiler()
+
+        self.assertGreater(scheduler.get_sample_count(), 0)
+        self.assertTrue(scheduler.get_collapsed_stacks().startswith("main;"))
+
+        scheduler.reset_sampling_profiler()
+
+        self.assertEqual(scheduler.get_sample_count(), 0)
+        self.assertEqual(scheduler.get_collapsed_stacks(), "")
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            scheduler.start_sampling_profiler(0)
+
+        scheduler.start_sampling_profiler()
+
+        with self.assertRaises(RuntimeError):
+            scheduler.start_sampling_profiler()
+
+
+class TestTaskletProfiler(test_utils.TestStopsProfiler, test_utils.SchedulerTestCaseBase):
+
+    stop_profiler = staticmethod(lambda: scheduler.stop_tasklet_profiler())
+    reset_profiler = staticmethod(lambda: scheduler.reset_tasklet_profiler())
+
+    @staticmethod
+    def find(stats, function):
+        key = (function.__code__.co_filename, function.__code__.co_firstlineno, function.__code__.co_name)
+        return stats[key]
+
+    def test_stop_refused_under_later_profile_function(self):
+        scheduler.start_tasklet_profiler()
+        sys.setprofile(lambda frame, event, arg: None)
+        try:
+            # The later profile function would otherwise be removed
+            self.assertRaises(RuntimeError, scheduler.stop_tasklet_profiler)
+            self.assertTrue(scheduler.is_tasklet_profiler_running())
+            self.assertIsNotNone(sys.getprofile())
+        finally:
+            sys.setprofile(None)
+
+        scheduler.stop_tasklet_profiler()
+        self.assertFalse(scheduler.is_tasklet_profiler_running())
+
+    def test_blocked_time_is_not_charged(self):
+        channel = scheduler.channel()
+
+        def consumer():
+            for _ in range(3):
+                channel.receive()
+
+        def producer():
+            for _ in range(3):
+                test_utils.spin(0.01)
+                channel.send(None)
+
+        scheduler.tasklet(consumer)()
+        scheduler.tasklet(producer)()
+
+        scheduler.start_tasklet_profiler()
+        self.assertTrue(scheduler.is_tasklet_profiler_running())
+        scheduler.run()
+        scheduler.stop_tasklet_profiler()
+        self.assertFalse(scheduler.is_tasklet_profiler_running())
+
+        stats = scheduler.get_tasklet_profile()
+
+        cc, nc, tt, ct, callers = self.find(stats, consumer)
+        self.assertEqual((cc, nc), (1, 1))
+        # The consumer spends 30ms blocked while the producer spins
+        self.assertLess(ct, 0.005)
+
+        cc, nc, tt, ct, callers = self.find(stats, producer)
+        self.assertGreaterEqual(ct, 0.03)
+
+        cc, nc, tt, ct, callers = self.find(stats, test_utils.spin)
+        self.assertEqual(nc, 3)
+        producer_key = (producer.__code__.co_filename, producer.__code__.co_firstlineno, producer.__code__.co_name)
+        self.assertEqual(list(callers), [producer_key])
+        self.assertEqual(callers[producer_key][1], 3)
+
+    def test_recursive_calls(self):
+        def recurse(depth):
+            if depth:
+                recurse(depth - 1)
+                scheduler.schedule()
+
+        scheduler.tasklet(recurse)(3)
+        scheduler.tasklet(recurse)(2)
+
+        scheduler.start_tasklet_profiler()
+        scheduler.run()
+        scheduler.stop_tasklet_profiler()
+
+        cc, nc, tt, ct, callers = self.find(scheduler.get_tasklet_profile(), recurse)
+
+        # Each tasklet's outermost call is primitive, interleaving tasklets does not make them recursive
+        self.assertEqual((cc, nc), (2, 7))
+
+    def test_pstats(self):
+        def work():
+            return sum(range(100))
+
+        scheduler.tasklet(work)()
+
+        scheduler.start_tasklet_profiler()
+        scheduler.run()
+        scheduler.stop_tasklet_profiler()
+
+        stats = scheduler.get_tasklet_profile_stats()
+
+        self.assertIn((work.__code__.co_filename, work.__code__.co_firstlineno, "work"), stats.stats)
+        self.assertIn(("~", 0, "<built-in method builtins.sum>"), stats.stats)
+        self.assertGreater(stats.total_calls, 0)
+
+        scheduler.reset_tasklet_profiler()
+
+        self.assertEqual(scheduler.get_tasklet_profile(), {})
+
+    def test_invalid_use(self):
+        scheduler.start_tasklet_profiler()
+
+        with self.assertRaises(RuntimeError):
+            scheduler.start_tasklet_profiler()
+
+        errors = []
+
+        def stop_from_thread():
+            try:
+                scheduler.stop_tasklet_profiler()
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=stop_from_thread)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(scheduler.is_tasklet_profiler_running())
+
+
+class TestAllocationTracking(test_utils.TestStopsProfiler, test_utils.SchedulerTestCaseBase):
+
+    stop_profiler = staticmethod(lambda: scheduler.stop_allocation_tracking())
+    reset_profiler = staticmethod(lambda: scheduler.reset_allocation_tracking())
+
+    def test_stop_refused_under_later_allocator_hook(self):
+        import tracemalloc
+
+        scheduler.start_allocation_tracking()
+        tracemalloc.start()
+        try:
+            # tracemalloc would otherwise be removed, then put the tracker back when it stops
+            self.assertRaises(RuntimeError, scheduler.stop_allocation_tracking)
+            self.assertTrue(scheduler.is_tracking_allocations())
+        finally:
+            tracemalloc.stop()
+
+        scheduler.stop_allocation_tracking()
+        self.assertFalse(scheduler.is_tracking_allocations())
+
+    def test_charges_allocations_to_tasklet_context(self):
+        kept = []
+
+        def leaking():
+            for _ in range(3):
+                kept.append([object() for _ in range(1000)])
+                scheduler.schedule()
+
+        def releasing():
+            for _ in range(3):
+                temporary = [object() for _ in range(1000)]
+                scheduler.schedule()
+            del temporary
+
+        scheduler.tasklet(leaking)().context = "leaking"
+        scheduler.tasklet(releasing)().context = "releasing"
+
+        scheduler.start_allocation_tracking()
+        self.assertTrue(scheduler.is_tracking_allocations())
+        scheduler.run()
+        scheduler.stop_allocation_tracking()
+        self.assertFalse(scheduler.is_tracking_allocations())
+
+        stats = scheduler.get_allocation_stats()
+
+        # 3000 objects are kept alive by the leaking tasklet
+        self.assertGreaterEqual(stats["leaking"]["live_bytes"], 3000 * sys.getsizeof(object()))
+        self.assertGreaterEqual(stats["leaking"]["allocations"], 3000)
+        # Memory kept in free lists, such as for the tasklet's frames, is still counted as live
+        self.assertLess(stats["releasing"]["live_bytes"], 1000)
+        self.assertGreater(stats["releasing"]["freed_bytes"], 1000 * sys.getsizeof(object()))
+
+        top = scheduler.top_allocation_contexts(1)
+        self.assertEqual(top, [("leaking", stats["leaking"]["live_bytes"])])
+
+        callsites = scheduler.get_allocation_stats(group_by="callsite")
+        self.assertEqual(callsites[(__file__, leaking.__code__.co_firstlineno, "leaking")], stats["leaking"])
+
+    def test_reset(self):
+        def allocate():
+            return [object() for _ in range(100)]
+
+        scheduler.tasklet(allocate)()
+
+        scheduler.start_allocation_tracking()
+        scheduler.run()
+
+        self.assertNotEqual(scheduler.get_allocation_stats(), {})
+
+        scheduler.reset_allocation_tracking()
+
+        # Allocations made by the main tasklet, including by the query itself, are under None
+        stats = scheduler.get_allocation_stats()
+        self.assertTrue(all(v["allocations"] == 0 for k, v in stats.items() if k is not None))
+
+        scheduler.stop_allocation_tracking()
+        scheduler.reset_allocation_tracking()
+
+        self.assertEqual(scheduler.get_allocation_stats(), {})
+
+    def test_invalid_use(self):
+        with self.assertRaises(ValueError):
+            scheduler.get_allocation_stats("channel")
+
+        with self.assertRaises(ValueError):
+            scheduler.top_allocation_contexts(-1)
+
+        scheduler.start_allocation_tracking()
+
+        with self.assertRaises(RuntimeError):
+            scheduler.start_allocation_tracking()
+
+
+class TestUsdtProbes(test_utils.SchedulerTestCaseBase):
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bpftrace", "scheduler_probes.bt")
+
+    def setUp(self):
+        super().setUp()
+        if not scheduler.HAS_USDT_PROBES:
+            self.skipTest("Scheduler built without USDT probes")
+        if not sys.platform.startswith("linux") or shutil.which("bpftrace") is None or os.geteuid() != 0:
+            self.skipTest("Requires bpftrace running as root")
+
+    def test_bpftrace_script_attributes_probes_to_contexts(self):
+        tracer = subprocess.Popen(
+            ["bpftrace", "-p", str(os.getpid()), self.script],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        )
+
+        try:
+            # bpftrace announces itself before the probes are live
+            line = tracer.stdout.readline()
+            self.assertIn("Attaching", line)
+            time.sleep(0.5)
+
+            c = scheduler.channel()
+
+            def sender():
+                c.send(1)
+
+            def receiver():
+                c.receive()
+
+            def sleeper():
+                scheduler.schedule()
+                scheduler.schedule()
+
+            for function, context in ((sender, "probe sender"), (receiver, "probe receiver"), (sleeper, "probe sleeper")):
+                t = scheduler.tasklet(function)()
+                t.context = context
+
+            blocked = scheduler.channel()
+            killed = scheduler.tasklet(blocked.receive)()
+            killed.context = "probe killed"
+
+            scheduler.run()
+            killed.kill()
+        finally:
+            tracer.send_signal(signal.SIGINT)
+            output, _ = tracer.communicate(timeout=30)
+
+        self.assertIn("@blocking_sends[probe sender]: 1", output)
+        self.assertIn("@completions[probe receiver]: 1", output)
+        self.assertIn("@switches[probe sleeper]: 3", output)
+        self.assertIn("@kills[probe killed]: 1", output)
+        self.assertIn("@run_ns", output)
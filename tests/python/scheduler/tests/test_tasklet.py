@@ -1,6 +1,7 @@
 import unittest
 import sys
 import traceback
+import time
 import test_utils
 import scheduler
     
@@ -1239,6 +1240,121 @@ class TestTaskletMetricsCollection(test_utils.SchedulerTestCaseBase):
         t = scheduler.tasklet(testMethod)()
         self.assertTrue(t.file_name.endswith("test_tasklet.py"))
 
+    def test_module_name(self):
+        def testMethod():
+            return 0
+
+        t = scheduler.tasklet(testMethod)()
+        self.assertEqual(__name__, t.module_name)
+
+    def test_callsite_of_wrapped_function(self):
+        import functools
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
+            return wrapper
+
+        @decorator
+        def first():
+            return 0
+
+        @decorator
+        def second():
+            return 0
+
+        # Both wrappers share a code object but keep their own names
+        first_tasklet = scheduler.tasklet(first)
+        second_tasklet = scheduler.tasklet(second)
+
+        self.assertEqual("first", first_tasklet.method_name)
+        self.assertEqual("second", second_tasklet.method_name)
+        self.assertEqual(first_tasklet.line_number, second_tasklet.line_number)
+
+    def test_callsite_of_bound_method(self):
+        class Worker(object):
+            def work(self):
+                return 0
+
+        t = scheduler.tasklet(Worker().work)
+
+        self.assertEqual("work", t.method_name)
+        self.assertEqual(__name__, t.module_name)
+        self.assertEqual(Worker.work.__code__.co_firstlineno, t.line_number)
+
+    def test_callsite_of_callable_without_code(self):
+        t = scheduler.tasklet(len)
+
+        self.assertEqual("len", t.method_name)
+        self.assertEqual("builtins", t.module_name)
+        self.assertEqual("unknown_file", t.file_name)
+        self.assertEqual(0, t.line_number)
+
+    def test_callsite_updated_on_rebind(self):
+        def first():
+            return 0
+
+        def second():
+            return 0
+
+        t = scheduler.tasklet(first)
+        t.bind(second)
+
+        self.assertEqual("second", t.method_name)
+        self.assertEqual(second.__code__.co_firstlineno, t.line_number)
+
+    def test_context(self):
+        t = scheduler.tasklet(lambda: None)
+
+        self.assertEqual("", t.context)
+        self.assertEqual("", t.parent_callsite)
+
+        t.context = "context"
+        t.parent_callsite = "parent"
+
+        self.assertEqual("context", t.context)
+        self.assertEqual("parent", t.parent_callsite)
+
+        with self.assertRaises(TypeError):
+            t.context = 1
+
+    def test_sizeof(self):
+        t = scheduler.tasklet(lambda: None)
+
+        basic_size = sys.getsizeof(t)
+        self.assertGreater(basic_size, object.__sizeof__(t))
+
+        # Rarely used fields live in a side allocation that is only made when needed
+        t.exception_handler = lambda message: None
+
+        self.assertGreater(sys.getsizeof(t), basic_size)
+
+    def test_rarely_used_fields_default_without_allocation(self):
+        t = scheduler.tasklet(lambda: None)
+
+        self.assertEqual(sys.getsizeof(t), sys.getsizeof(scheduler.tasklet(lambda: None)))
+        self.assertEqual(t.cpu_time_ns, 0)
+        self.assertEqual(t.runTime, 0.0)
+        self.assertIsNone(t.exception_handler)
+
+    def test_exception_handler_reference_count(self):
+        def handler(message):
+            pass
+
+        t = scheduler.tasklet(lambda: None)
+        t.exception_handler = handler
+        before = sys.getrefcount(handler)
+
+        for _ in range(10):
+            self.assertIs(t.exception_handler, handler)
+
+        self.assertEqual(sys.getrefcount(handler), before)
+
+        del t
+
+        self.assertEqual(sys.getrefcount(handler), before - 1)
+
 
     def test_start_end_time(self):
         def testMethod():
@@ -1254,6 +1370,177 @@ class TestTaskletMetricsCollection(test_utils.SchedulerTestCaseBase):
         self.assertTrue(t.startTime > 0)
         self.assertTrue(t.endTime > t.startTime)
 
+    def test_time_accounting(self):
+        def testMethod():
+            test_utils.spin(0.002)
+            scheduler.schedule()
+            test_utils.spin(0.005)
+
+        t = scheduler.tasklet(testMethod)()
+
+        self.assertEqual(t.wall_time_ns, 0)
+        self.assertEqual(t.switch_in_count, 0)
+        self.assertEqual(t.longest_slice_ns, 0)
+
+        scheduler.run()
+
+        self.assertEqual(t.switch_in_count, 2)
+        self.assertGreaterEqual(t.wall_time_ns, 7000000)
+        self.assertGreaterEqual(t.longest_slice_ns, 5000000)
+        self.assertLess(t.longest_slice_ns, t.wall_time_ns)
+
+    def test_time_accounting_excludes_other_tasklets(self):
+        def busy():
+            test_utils.spin(0.005)
+
+        def idle():
+            pass
+
+        busy_tasklet = scheduler.tasklet(busy)()
+        idle_tasklet = scheduler.tasklet(idle)()
+
+        scheduler.run()
+
+        self.assertGreaterEqual(busy_tasklet.wall_time_ns, 5000000)
+        self.assertLess(idle_tasklet.wall_time_ns, busy_tasklet.wall_time_ns)
+
+    def test_cpu_time_tracking(self):
+        self.assertFalse(scheduler.get_track_thread_cpu_time())
+
+        def testMethod():
+            test_utils.spin(0.005)
+
+        untracked = scheduler.tasklet(testMethod)()
+        scheduler.run()
+
+        self.assertEqual(untracked.cpu_time_ns, 0)
+
+        scheduler.set_track_thread_cpu_time(True)
+        try:
+            self.assertTrue(scheduler.get_track_thread_cpu_time())
+
+            tracked = scheduler.tasklet(testMethod)()
+            scheduler.run()
+        finally:
+            scheduler.set_track_thread_cpu_time(False)
+
+        self.assertGreater(tracked.cpu_time_ns, 0)
+
+    def test_time_accounting_reset_on_bind(self):
+        t = scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertGreater(t.switch_in_count, 0)
+
+        t.bind(lambda: None)
+
+        self.assertEqual(t.switch_in_count, 0)
+        self.assertEqual(t.wall_time_ns, 0)
+
+class TestTaskletPool(test_utils.SchedulerTestCaseBase):
+
+    def test_pool_disabled_by_default(self):
+        self.assertEqual(scheduler.get_tasklet_pool_max_size(), 0)
+
+        scheduler.reset_tasklet_pool_stats()
+        scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        stats = scheduler.get_tasklet_pool_stats()
+        self.assertEqual(stats["size"], 0)
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["misses"], 0)
+
+    def test_negative_max_size_raises(self):
+        with self.assertRaises(ValueError):
+            scheduler.set_tasklet_pool_max_size(-1)
+
+    def test_finished_tasklet_is_reused(self):
+        scheduler.set_tasklet_pool_max_size(4)
+        try:
+            scheduler.reset_tasklet_pool_stats()
+
+            scheduler.tasklet(lambda: None)()
+            scheduler.run()
+
+            stats = scheduler.get_tasklet_pool_stats()
+            self.assertEqual(stats["size"], 1)
+            self.assertEqual(stats["misses"], 1)
+
+            results = []
+            t = scheduler.tasklet(results.append)
+
+            stats = scheduler.get_tasklet_pool_stats()
+            self.assertEqual(stats["size"], 0)
+            self.assertEqual(stats["hits"], 1)
+        finally:
+            scheduler.set_tasklet_pool_max_size(0)
+
+        # A reused tasklet starts from a clean state
+        self.assertFalse(t.alive)
+        self.assertFalse(t.scheduled)
+        self.assertFalse(t.highlighted)
+        self.assertEqual(t.switch_in_count, 0)
+
+        t(1)
+        scheduler.run()
+
+        self.assertEqual(results, [1])
+        self.assertFalse(t.alive)
+
+    def test_reused_tasklet_supports_weakrefs(self):
+        import weakref
+
+        scheduler.set_tasklet_pool_max_size(4)
+        try:
+            t = scheduler.tasklet(lambda: None)()
+            ref = weakref.ref(t)
+            scheduler.run()
+            del t
+
+            self.assertIsNone(ref())
+
+            t = scheduler.tasklet(lambda: None)()
+            ref = weakref.ref(t)
+            self.assertIs(ref(), t)
+            scheduler.run()
+        finally:
+            scheduler.set_tasklet_pool_max_size(0)
+
+    def test_pool_respects_max_size(self):
+        scheduler.set_tasklet_pool_max_size(2)
+        try:
+            tasklets = [scheduler.tasklet(lambda: None)() for _ in range(5)]
+            scheduler.run()
+            del tasklets
+
+            self.assertEqual(scheduler.get_tasklet_pool_stats()["size"], 2)
+
+            scheduler.set_tasklet_pool_max_size(1)
+
+            self.assertEqual(scheduler.get_tasklet_pool_stats()["size"], 1)
+        finally:
+            scheduler.set_tasklet_pool_max_size(0)
+
+        self.assertEqual(scheduler.get_tasklet_pool_stats()["size"], 0)
+
+    def test_subclasses_are_not_pooled(self):
+        class SubTasklet(scheduler.tasklet):
+            pass
+
+        scheduler.set_tasklet_pool_max_size(4)
+        try:
+            scheduler.reset_tasklet_pool_stats()
+
+            SubTasklet(lambda: None)()
+            scheduler.run()
+
+            stats = scheduler.get_tasklet_pool_stats()
+            self.assertEqual(stats["size"], 0)
+            self.assertEqual(stats["misses"], 0)
+        finally:
+            scheduler.set_tasklet_pool_max_size(0)
+
 class TestTaskletDontRaise(test_utils.SchedulerTestCaseBase):
 
     def test_tasklet_dont_raise(self):
@@ -1507,4 +1794,112 @@ class TestTaskletDontRaise(test_utils.SchedulerTestCaseBase):
 
         # There should now only be one reference remaining (2 for sys.getrefcount)
         self.assertEqual(sys.getrefcount(tasklet[0]),2)
-        tasklet[0] = None
\ No newline at end of file
+        tasklet[0] = None
+
+class TestInsertAt(test_utils.SchedulerTestCaseBase):
+
+    def test_insert_at(self):
+        completed = []
+
+        t = scheduler.tasklet(lambda: completed.append(True))()
+        self.assertTrue(t.scheduled)
+
+        wake_time = time.monotonic_ns() + 10000000
+        self.assertIs(t.insert_at(wake_time), t)
+
+        # Removed from the runnables queue until the timer expires
+        self.assertFalse(t.scheduled)
+        self.assertEqual(self.getruncount(), 1)
+
+        self.run_until(lambda: completed)
+
+        self.assertGreaterEqual(time.monotonic_ns(), wake_time)
+
+    def test_insert_at_past_time(self):
+        completed = []
+
+        t = scheduler.tasklet(lambda: completed.append(True))()
+        t.insert_at(0)
+
+        scheduler.run()
+
+        self.assertEqual(completed, [True])
+
+    def test_insert_at_current(self):
+        completed = []
+
+        def foo():
+            scheduler.getcurrent().insert_at(time.monotonic_ns() + 1000000)
+            completed.append(True)
+
+        scheduler.tasklet(foo)()
+        scheduler.run()
+
+        self.assertEqual(completed, [])
+
+        self.run_until(lambda: completed)
+
+    def test_insert_at_killed_released(self):
+        import gc
+        import weakref
+
+        t = scheduler.tasklet(lambda: None)()
+        t.insert_at(time.monotonic_ns() + 60000000000)
+        t.kill()
+
+        reference = weakref.ref(t)
+        del t
+        gc.collect()
+
+        self.assertIsNone(reference())
+
+    def test_insert_at_dead(self):
+        t = scheduler.tasklet(lambda: None)()
+        scheduler.run()
+
+        self.assertRaises(RuntimeError, t.insert_at, 0)
+
+    def test_insert_at_blocked(self):
+        c = scheduler.channel()
+
+        t = scheduler.tasklet(c.receive)()
+        scheduler.run()
+
+        self.assertRaises(RuntimeError, t.insert_at, 0)
+
+        c.send(None)
+
+    def test_insert_at_from_another_thread(self):
+        import threading
+
+        t = scheduler.tasklet(lambda: None)()
+        errors = []
+
+        def ThreadFunc():
+            try:
+                t.insert_at(0)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=ThreadFunc)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(errors), 1)
+
+        # Left in this thread's queue
+        self.assertTrue(t.scheduled)
+        self.assertEqual(self.getruncount(), 2)
+
+        scheduler.run()
+
+    def test_many_sleepers(self):
+        completed = []
+        now = time.monotonic_ns()
+
+        for i in range(10000):
+            scheduler.tasklet(completed.append)(i).insert_at(now + (i % 50) * 100000)
+
+        self.run_until(lambda: len(completed) == 10000)
+
+        self.assertEqual(sorted(completed), list(range(10000)))
@@ -2,6 +2,7 @@ import unittest
 import sys
 import gc
 import os
+import time
 
 flavor = os.environ.get("BUILDFLAVOR", "release")
 
@@ -67,6 +68,21 @@ class SchedulerTestCaseBase(unittest.TestCase):
 
         return runCount
 
+    # Runs the scheduler until condition holds, timers are only processed when the scheduler runs
+    def run_until(self, condition, timeout=5.0):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.001)
+            scheduler.run()
+        self.assertTrue(condition())
+
+
+# Busy waits without switching, so the calling tasklet keeps the thread the whole time
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
 
 # Scheduling options
 class TestWithLimit(object):
@@ -88,4 +104,20 @@ class TestNoNestedTasklets(object):
         super().tearDown()
         scheduler.set_use_nested_tasklets(True)
 
+# Stops a profiler or watchdog and clears its results around each test, listed before SchedulerTestCaseBase
+# The callables are set as staticmethods by each test case, wrapped in lambdas where they name scheduler functions
+# as test discovery imports the tests with a stand in scheduler module
+class TestStopsProfiler(object):
+    stop_profiler = None
+    reset_profiler = None
+
+    def setUp(self):
+        super().setUp()
+        self.reset_profiler()
+
+    def tearDown(self):
+        self.stop_profiler()
+        self.reset_profiler()
+        super().tearDown()
+
 # End of options